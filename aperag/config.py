@@ -111,6 +111,58 @@ class Config(BaseSettings):
 
     # Embedding
     embedding_max_chunks_in_batch: int = Field(10, alias="EMBEDDING_MAX_CHUNKS_IN_BATCH")
+    # Token budget per embedding request, 0 batches by chunk count only
+    embedding_max_tokens_in_batch: int = Field(32768, alias="EMBEDDING_MAX_TOKENS_IN_BATCH")
+    # Max concurrent async embedding requests per provider, shared by the whole process
+    embedding_max_concurrency: int = Field(8, alias="EMBEDDING_MAX_CONCURRENCY")
+    # Coalesce concurrent aembed_query calls arriving within this window (ms) into one batch, 0 disables it
+    embedding_query_coalesce_window_ms: float = Field(0, alias="EMBEDDING_QUERY_COALESCE_WINDOW_MS")
+    # Flush a coalesced batch early at this size, 0 means embedding_max_chunks_in_batch
+    embedding_query_coalesce_max_batch: int = Field(0, alias="EMBEDDING_QUERY_COALESCE_MAX_BATCH")
+    embedding_cache_enabled: bool = Field(True, alias="EMBEDDING_CACHE_ENABLED")
+    # Shared tier behind the in-process LRU: "memory" (LRU only) or "redis"
+    embedding_cache_backend: str = Field("memory", alias="EMBEDDING_CACHE_BACKEND")
+    embedding_cache_max_entries: int = Field(20000, alias="EMBEDDING_CACHE_MAX_ENTRIES")
+    embedding_cache_ttl: int = Field(7 * 86400, alias="EMBEDDING_CACHE_TTL")
+
+    # Vector index write pipeline: chunks per embed/upsert batch and max concurrent upserts
+    vector_upsert_batch_size: int = Field(256, alias="VECTOR_UPSERT_BATCH_SIZE")
+    vector_upsert_max_inflight: int = Field(2, alias="VECTOR_UPSERT_MAX_INFLIGHT")
+
+    # LightRAG pgvector ANN indexes: a partial HNSW index is built for a workspace once one of its
+    # vector tables holds this many rows, 0 disables automatic index creation
+    graph_index_hnsw_min_rows: int = Field(20000, alias="GRAPH_INDEX_HNSW_MIN_ROWS")
+    graph_index_hnsw_m: int = Field(16, alias="GRAPH_INDEX_HNSW_M")
+    graph_index_hnsw_ef_construction: int = Field(64, alias="GRAPH_INDEX_HNSW_EF_CONSTRUCTION")
+    # Default hnsw.ef_search of LightRAG similarity queries, 0 keeps the server default (never below top_k)
+    graph_index_hnsw_ef_search: int = Field(0, alias="GRAPH_INDEX_HNSW_EF_SEARCH")
+    # Per-process cache of LightRAG graph reads (nodes, degrees, adjacency), invalidated across
+    # processes by a per-workspace version counter in Redis
+    graph_query_cache_enabled: bool = Field(False, alias="GRAPH_QUERY_CACHE_ENABLED")
+    graph_query_cache_max_entries: int = Field(50000, alias="GRAPH_QUERY_CACHE_MAX_ENTRIES")
+    # Cache of raw LLM entity extraction outputs, keyed on (model, prompts, language, entity types, chunk hash).
+    # "memory" keeps an in-process LRU only, "redis" adds a shared persistent tier
+    extraction_cache_enabled: bool = Field(True, alias="EXTRACTION_CACHE_ENABLED")
+    extraction_cache_backend: str = Field("redis", alias="EXTRACTION_CACHE_BACKEND")
+    extraction_cache_max_entries: int = Field(5000, alias="EXTRACTION_CACHE_MAX_ENTRIES")
+    extraction_cache_ttl: int = Field(30 * 86400, alias="EXTRACTION_CACHE_TTL")
+    # Parse artifact of each document in the object store, keyed on (file sha256, parsers, parser config,
+    # parser version)
+    parse_cache_enabled: bool = Field(True, alias="PARSE_CACHE_ENABLED")
+    # PDF pages rendered for the vision index: resolution, image format (png, jpeg or webp) and
+    # lossy quality; the vision index loads and embeds PDF_PAGE_WINDOW page images at a time
+    pdf_page_render_dpi: int = Field(72, alias="PDF_PAGE_RENDER_DPI")
+    pdf_page_image_format: str = Field("png", alias="PDF_PAGE_IMAGE_FORMAT")
+    pdf_page_image_quality: int = Field(85, alias="PDF_PAGE_IMAGE_QUALITY")
+    pdf_page_window: int = Field(8, alias="PDF_PAGE_WINDOW")
+    # Process pool sharding the parsing of large documents (PDF page ranges, markdown sections),
+    # 0 workers parses in-process. Workers are limited to PARSE_POOL_MEMORY_LIMIT_MB of address
+    # space each and replaced after PARSE_POOL_MAX_TASKS_PER_WORKER shards
+    parse_pool_workers: int = Field(0, alias="PARSE_POOL_WORKERS")
+    parse_pool_memory_limit_mb: int = Field(2048, alias="PARSE_POOL_MEMORY_LIMIT_MB")
+    parse_pool_max_tasks_per_worker: int = Field(100, alias="PARSE_POOL_MAX_TASKS_PER_WORKER")
+    parse_pool_pdf_pages_per_shard: int = Field(16, alias="PARSE_POOL_PDF_PAGES_PER_SHARD")
+    parse_pool_markdown_chars_per_shard: int = Field(200000, alias="PARSE_POOL_MARKDOWN_CHARS_PER_SHARD")
 
     # Memory backend
     memory_redis_url: Optional[str] = Field(None, alias="MEMORY_REDIS_URL")
@@ -120,6 +172,8 @@ class Config(BaseSettings):
     vector_db_context: str = Field(
         '{"url":"http://localhost", "port":6333, "distance":"Cosine"}', alias="VECTOR_DB_CONTEXT"
     )
+    # Send concurrent searches on one collection arriving within this window (ms) as one batch, 0 disables it
+    vector_search_batch_window_ms: float = Field(0, alias="VECTOR_SEARCH_BATCH_WINDOW_MS")
 
     # Object store
     object_store_type: str = Field("local", alias="OBJECT_STORE_TYPE")
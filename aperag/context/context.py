@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from abc import ABC
 from typing import Any, List, Optional
 
@@ -26,7 +27,17 @@ class ContextManager(ABC):
         self.vectordb_type = vectordb_type
         self.adaptor = VectorStoreConnectorAdaptor(vectordb_type, vectordb_ctx)
 
-    def query(self, query, score_threshold=0.5, topk=3, vector=None, index_types=None, chat_id=None):
+    def query(
+        self,
+        query,
+        score_threshold=0.5,
+        topk=3,
+        vector=None,
+        index_types=None,
+        chat_id=None,
+        with_vectors=False,
+        payload_fields=None,
+    ):
         """
         Query vectors with optional filtering by index types and chat_id
 
@@ -38,6 +49,9 @@ class ContextManager(ABC):
             index_types: List of index types to include (e.g., ["vector", "vision", "summary"])
                         If None, no filtering is applied
             chat_id: Chat ID to filter chat documents (optional)
+            with_vectors: Return the stored vectors as DocumentWithScore.embedding, only needed
+                        by consumers that compare results, e.g. MMR diversification
+            payload_fields: Extra payload fields to return in the metadata (optional)
 
         Returns:
             List of DocumentWithScore objects
@@ -45,22 +59,59 @@ class ContextManager(ABC):
         if vector is None:
             vector = self.embedding_model.embed_query(query)
 
+        query_embedding, search_kwargs = self._build_search(
+            query, score_threshold, topk, vector, index_types, chat_id, with_vectors, payload_fields
+        )
+        results = self.adaptor.connector.search(query_embedding, **search_kwargs)
+        return results.results
+
+    async def aquery(
+        self,
+        query,
+        score_threshold=0.5,
+        topk=3,
+        vector=None,
+        index_types=None,
+        chat_id=None,
+        with_vectors=False,
+        payload_fields=None,
+    ):
+        """
+        Async variant of query(): the query is embedded natively on the event loop and the
+        search runs on the connector's async client when it has one.
+
+        Takes the same arguments and returns the same results as query().
+        """
+        if vector is None:
+            vector = await self.embedding_model.aembed_query(query)
+
+        query_embedding, search_kwargs = self._build_search(
+            query, score_threshold, topk, vector, index_types, chat_id, with_vectors, payload_fields
+        )
+        connector = self.adaptor.connector
+        if hasattr(connector, "asearch"):
+            results = await connector.asearch(query_embedding, **search_kwargs)
+        else:
+            results = await asyncio.to_thread(connector.search, query_embedding, **search_kwargs)
+        return results.results
+
+    def _build_search(self, query, score_threshold, topk, vector, index_types, chat_id, with_vectors, payload_fields):
         # Create filter based on index_types and chat_id if provided
         filter_condition = self._create_combined_filter(index_types, chat_id)
 
         query_embedding = QueryWithEmbedding(query=query, top_k=topk, embedding=vector)
-        results = self.adaptor.connector.search(
-            query_embedding,
+        search_kwargs = dict(
             collection_name=self.collection_name,
             query_vector=query_embedding.embedding,
-            with_vectors=True,
+            with_vectors=with_vectors,
+            payload_fields=payload_fields,
             limit=query_embedding.top_k,
             consistency="majority",
             search_params={"hnsw_ef": 128, "exact": False},
             score_threshold=score_threshold,
             filter=filter_condition,
         )
-        return results.results
+        return query_embedding, search_kwargs
 
     def _create_index_types_filter(self, index_types: List[str]) -> Optional[Any]:
         """
@@ -863,6 +863,15 @@ class LightRAGGraphNode(Base):
         Index("idx_lightrag_nodes_entity_type_createtime", "workspace", "entity_type", "createtime"),
         # Composite index for common query patterns
         Index("idx_lightrag_nodes_workspace_type_id", "workspace", "entity_type", "entity_id"),
+        # Index for top-K by degree queries
+        Index("idx_lightrag_nodes_workspace_degree", "workspace", "degree"),
+        # Trigram index for substring label matches (requires pg_trgm)
+        Index(
+            "idx_lightrag_nodes_entity_id_trgm",
+            "entity_id",
+            postgresql_using="gin",
+            postgresql_ops={"entity_id": "gin_trgm_ops"},
+        ),
     )
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -872,6 +881,8 @@ class LightRAGGraphNode(Base):
     description = Column(Text, nullable=True)
     source_id = Column(Text, nullable=True)
     file_path = Column(Text, nullable=True)
+    # Number of edges with this node as source or target, maintained by the edge writes
+    degree = Column(Integer, default=0, server_default="0", nullable=False)
     workspace = Column(String(255), nullable=False)
     createtime = Column(DateTime(timezone=True), default=utc_now, nullable=False)
     updatetime = Column(DateTime(timezone=True), default=utc_now, nullable=False)
@@ -249,7 +249,8 @@ class NebulaSyncConnectionManager:
                 "description string, "
                 "source_id string, "
                 "file_path string, "
-                "created_at int64"
+                "created_at int64, "
+                "degree int64 DEFAULT 0"
                 ")"
             )
             if not tag_result.is_succeeded():
@@ -276,6 +277,14 @@ class NebulaSyncConnectionManager:
             if not index_result.is_succeeded():
                 logger.warning(f"Failed to create index: {_safe_error_msg(index_result)}")
 
+            # Top-K by degree index, spaces created before the degree property get it from
+            # NebulaSyncStorage.initialize, after a backfill of the degrees
+            degree_index_result = space_session.execute(
+                "CREATE TAG INDEX IF NOT EXISTS base_degree_index ON base(degree)"
+            )
+            if not degree_index_result.is_succeeded():
+                logger.warning(f"Failed to create degree index: {_safe_error_msg(degree_index_result)}")
+
         # Always ensure schema readiness (formerly controlled by ensure_schema_ready parameter)
         logger.info("Ensuring schema is fully ready...")
         # Initial wait to let basic schema creation complete
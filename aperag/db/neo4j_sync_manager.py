@@ -93,6 +93,22 @@ class Neo4jSyncConnectionManager:
         finally:
             session.close()
 
+    @staticmethod
+    def _ensure_degree_index(session: Session) -> None:
+        """Create the index on the node degree, backfilling the degrees of graphs written before it existed."""
+        record = session.run("SHOW INDEXES YIELD name WHERE name = 'base_degree' RETURN count(*) AS found").single()
+        if record and record["found"]:
+            return
+        session.run("MATCH (n:base) SET n.degree = count { (n)--() }").consume()
+        session.run("CREATE INDEX base_degree IF NOT EXISTS FOR (n:base) ON (n.degree)").consume()
+
+    @staticmethod
+    def _ensure_label_fulltext_index(session: Session) -> None:
+        """Create the full-text index on entity_id used by the label search."""
+        session.run(
+            "CREATE FULLTEXT INDEX base_entity_id_fulltext IF NOT EXISTS FOR (n:base) ON EACH [n.entity_id]"
+        ).consume()
+
     @classmethod
     def prepare_database(cls, workspace: str) -> str:
         """Prepare database and return database name."""
@@ -111,6 +127,8 @@ class Neo4jSyncConnectionManager:
                 try:
                     result = session.run("CREATE INDEX IF NOT EXISTS FOR (n:base) ON (n.entity_id)")
                     result.consume()
+                    cls._ensure_degree_index(session)
+                    cls._ensure_label_fulltext_index(session)
                     logger.debug(f"Ensured index exists in database: {DATABASE}")
                 except Exception as e:
                     logger.warning(f"Could not create index: {e}")
@@ -131,6 +149,8 @@ class Neo4jSyncConnectionManager:
                         try:
                             result = session.run("CREATE INDEX IF NOT EXISTS FOR (n:base) ON (n.entity_id)")
                             result.consume()
+                            cls._ensure_degree_index(session)
+                            cls._ensure_label_fulltext_index(session)
                         except Exception as e:
                             logger.warning(f"Could not create index: {e}")
 
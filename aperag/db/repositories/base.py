@@ -25,6 +25,8 @@ class SyncRepositoryProtocol(Protocol):
 
     def _execute_query(self, query_func): ...
 
+    def _stream_query(self, query_func): ...
+
     def _execute_transaction(self, operation): ...
 
 
@@ -54,6 +56,15 @@ class SyncBaseRepository(SyncRepositoryProtocol):
             with sync_session() as session:
                 return query_func(session)
 
+    def _stream_query(self, query_func):
+        """Like _execute_query for a query_func that is a generator, keeping the session open while it is consumed"""
+        if self._session:
+            yield from query_func(self._session)
+        else:
+            sync_session = sessionmaker(sync_engine, class_=Session, expire_on_commit=False)
+            with sync_session() as session:
+                yield from query_func(session)
+
     def _execute_transaction(self, operation):
         if self._session:
             # Use provided session, caller manages transaction
@@ -13,15 +13,107 @@
 # limitations under the License.
 
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import and_, delete, func, or_, select, text
+from sqlalchemy import and_, delete, func, literal_column, or_, select, text
 from sqlalchemy.dialects.postgresql import insert
 
 from aperag.db.models import LightRAGGraphEdge, LightRAGGraphNode
 
 logger = logging.getLogger(__name__)
 
+# True for the rows an INSERT ... ON CONFLICT DO UPDATE inserted, False for the ones it updated
+_INSERTED = literal_column("(xmax = 0)")
+
+
+def _apply_degree_deltas(session, workspace: str, edges: Iterable[Tuple[str, str]], sign: int) -> None:
+    """Add sign to the stored degree of both endpoints of every inserted (1) or deleted (-1) edge"""
+    deltas = Counter()
+    for source, target in edges:
+        deltas[source] += sign
+        deltas[target] += sign
+    if not deltas:
+        return
+    # Lock the node rows in a stable order to avoid deadlocks between concurrent writers
+    node_ids = sorted(deltas)
+    session.execute(
+        text("""
+            UPDATE lightrag_graph_nodes AS n
+            SET degree = GREATEST(n.degree + d.delta, 0)
+            FROM unnest(CAST(:node_ids AS varchar[]), CAST(:deltas AS integer[])) AS d(entity_id, delta)
+            WHERE n.workspace = :workspace AND n.entity_id = d.entity_id
+        """),
+        {"workspace": workspace, "node_ids": node_ids, "deltas": [deltas[node_id] for node_id in node_ids]},
+    )
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _bfs_node_ids(
+    fetch_seeds: Callable[[int], List[str]],
+    fetch_neighbors: Callable[[List[str], List[str], int], List[str]],
+    max_depth: int,
+    max_nodes: int,
+) -> Tuple[List[str], bool]:
+    """
+    Breadth-first search by frontier, one query per level.
+
+    fetch_seeds(limit) returns the start nodes and fetch_neighbors(frontier, visited, limit) the
+    unvisited neighbors of a frontier, both highest degree first, so that the truncation to
+    max_nodes keeps the best connected nodes. Returns the node IDs in visit order and whether
+    the subgraph was truncated.
+    """
+    visited = fetch_seeds(max_nodes + 1)
+    truncated = len(visited) > max_nodes
+    visited = visited[:max_nodes]
+    frontier = visited
+    for _ in range(max_depth):
+        if truncated or not frontier:
+            break
+        remaining = max_nodes - len(visited)
+        # Fetch one more than needed to tell whether the level was truncated
+        frontier = fetch_neighbors(frontier, visited, remaining + 1)
+        if len(frontier) > remaining:
+            truncated = True
+            frontier = frontier[:remaining]
+        visited = visited + frontier
+    return visited, truncated
+
+
+def _edge_to_dict(edge: LightRAGGraphEdge) -> Dict[str, Any]:
+    edge_dict = {
+        "weight": float(edge.weight) if edge.weight is not None else 0.0,
+        "keywords": edge.keywords,
+        "description": edge.description,
+        "source_id": edge.source_id,
+        "file_path": edge.file_path,
+    }
+    # Keep required fields even if None, remove optional fields if None
+    return {k: v for k, v in edge_dict.items() if k != "file_path" or v is not None}
+
+
+def _recount_degrees(session, workspace: str, node_ids: List[str]) -> None:
+    """Recount the stored degree of nodes from their edges, for nodes inserted after some of their edges"""
+    if not node_ids:
+        return
+    session.execute(
+        text("""
+            UPDATE lightrag_graph_nodes AS n
+            SET degree = (
+                SELECT COUNT(*) FROM lightrag_graph_edges e
+                WHERE e.workspace = n.workspace AND e.source_entity_id = n.entity_id
+            ) + (
+                SELECT COUNT(*) FROM lightrag_graph_edges e
+                WHERE e.workspace = n.workspace AND e.target_entity_id = n.entity_id
+            )
+            WHERE n.workspace = :workspace AND n.entity_id = ANY(:node_ids)
+        """),
+        {"workspace": workspace, "node_ids": node_ids},
+    )
+
 
 class GraphRepositoryMixin:
     """Graph Repository Mixin for LightRAG Graph operations using SQLAlchemy"""
@@ -60,9 +152,10 @@ class GraphRepositoryMixin:
                     file_path=stmt.excluded.file_path,
                     updatetime=func.now(),
                 ),
-            )
+            ).returning(_INSERTED)
 
-            session.execute(stmt)
+            if session.execute(stmt).scalar():
+                _recount_degrees(session, workspace, [node_id])
             session.flush()
             logger.debug(f"Upserted graph node: {node_id} in workspace {workspace}")
 
@@ -104,9 +197,10 @@ class GraphRepositoryMixin:
                     file_path=stmt.excluded.file_path,
                     updatetime=func.now(),
                 ),
-            )
+            ).returning(_INSERTED)
 
-            session.execute(stmt)
+            if session.execute(stmt).scalar():
+                _apply_degree_deltas(session, workspace, [(source_node_id, target_node_id)], 1)
             session.flush()
             logger.debug(f"Upserted graph edge: {source_node_id} -> {target_node_id} in workspace {workspace}")
 
@@ -213,18 +307,11 @@ class GraphRepositoryMixin:
         """Get the degree of a graph node"""
 
         def _get_degree(session):
-            # Count edges where node is either source or target
-            outgoing_stmt = select(func.count(LightRAGGraphEdge.id)).where(
-                and_(LightRAGGraphEdge.workspace == workspace, LightRAGGraphEdge.source_entity_id == node_id)
-            )
-            incoming_stmt = select(func.count(LightRAGGraphEdge.id)).where(
-                and_(LightRAGGraphEdge.workspace == workspace, LightRAGGraphEdge.target_entity_id == node_id)
+            # Degree is maintained by the edge writes
+            stmt = select(LightRAGGraphNode.degree).where(
+                and_(LightRAGGraphNode.workspace == workspace, LightRAGGraphNode.entity_id == node_id)
             )
-
-            outgoing_count = session.execute(outgoing_stmt).scalar()
-            incoming_count = session.execute(incoming_stmt).scalar()
-
-            return outgoing_count + incoming_count
+            return session.execute(stmt).scalar() or 0
 
         return self._execute_query(_get_degree)
 
@@ -261,13 +348,21 @@ class GraphRepositoryMixin:
 
         def _delete_node(session):
             # First delete all edges related to this node
-            edge_delete_stmt = delete(LightRAGGraphEdge).where(
-                and_(
-                    LightRAGGraphEdge.workspace == workspace,
-                    or_(LightRAGGraphEdge.source_entity_id == node_id, LightRAGGraphEdge.target_entity_id == node_id),
+            edge_delete_stmt = (
+                delete(LightRAGGraphEdge)
+                .where(
+                    and_(
+                        LightRAGGraphEdge.workspace == workspace,
+                        or_(
+                            LightRAGGraphEdge.source_entity_id == node_id,
+                            LightRAGGraphEdge.target_entity_id == node_id,
+                        ),
+                    )
                 )
+                .returning(LightRAGGraphEdge.source_entity_id, LightRAGGraphEdge.target_entity_id)
             )
-            session.execute(edge_delete_stmt)
+            deleted_edges = session.execute(edge_delete_stmt).all()
+            _apply_degree_deltas(session, workspace, deleted_edges, -1)
 
             # Then delete the node itself
             node_delete_stmt = delete(LightRAGGraphNode).where(
@@ -285,15 +380,21 @@ class GraphRepositoryMixin:
             return
 
         def _delete_edges(session):
+            deleted_edges = []
             for source, target in edges:
-                delete_stmt = delete(LightRAGGraphEdge).where(
-                    and_(
-                        LightRAGGraphEdge.workspace == workspace,
-                        LightRAGGraphEdge.source_entity_id == source,
-                        LightRAGGraphEdge.target_entity_id == target,
+                delete_stmt = (
+                    delete(LightRAGGraphEdge)
+                    .where(
+                        and_(
+                            LightRAGGraphEdge.workspace == workspace,
+                            LightRAGGraphEdge.source_entity_id == source,
+                            LightRAGGraphEdge.target_entity_id == target,
+                        )
                     )
+                    .returning(LightRAGGraphEdge.source_entity_id, LightRAGGraphEdge.target_entity_id)
                 )
-                session.execute(delete_stmt)
+                deleted_edges.extend(session.execute(delete_stmt).all())
+            _apply_degree_deltas(session, workspace, deleted_edges, -1)
             session.flush()
             logger.debug(f"Deleted {len(edges)} graph edges in workspace {workspace}")
 
@@ -314,6 +415,41 @@ class GraphRepositoryMixin:
 
         return self._execute_query(_get_labels)
 
+    def search_graph_labels(
+        self, workspace: str, query: str, limit: int, offset: int = 0, match: str = "fuzzy"
+    ) -> List[str]:
+        """
+        Search entity labels using the trigram index, case-insensitively.
+
+        match "prefix" finds the labels starting with query. "fuzzy" finds the labels containing it
+        or similar to it (pg_trgm similarity), ranked by exact match, prefix match, then similarity.
+        """
+
+        def _search_labels(session):
+            entity_id = LightRAGGraphNode.entity_id
+            prefix_match = entity_id.ilike(f"{_escape_like(query)}%", escape="\\")
+            if match == "prefix":
+                condition = prefix_match
+                order_by = [func.lower(entity_id) != query.lower(), entity_id]
+            else:
+                condition = or_(entity_id.ilike(f"%{_escape_like(query)}%", escape="\\"), entity_id.op("%")(query))
+                order_by = [
+                    func.lower(entity_id) != query.lower(),
+                    ~prefix_match,
+                    func.similarity(entity_id, query).desc(),
+                    entity_id,
+                ]
+            stmt = (
+                select(entity_id)
+                .where(and_(LightRAGGraphNode.workspace == workspace, condition))
+                .order_by(*order_by)
+                .offset(offset)
+                .limit(limit)
+            )
+            return [row[0] for row in session.execute(stmt)]
+
+        return self._execute_query(_search_labels)
+
     def drop_graph_workspace(self, workspace: str) -> Dict[str, str]:
         """Drop all graph data for a workspace"""
 
@@ -381,43 +517,117 @@ class GraphRepositoryMixin:
             return {}
 
         def _get_degrees_batch(session):
-            # Use UNNEST and CTE for efficient batch degree calculation
-            # This query calculates all node degrees in a single pass
-            query = text("""
-                WITH node_list AS (
-                    SELECT unnest(:node_ids) AS entity_id
-                ),
-                outgoing_counts AS (
-                    SELECT e.source_entity_id AS entity_id, COUNT(*) AS out_degree
-                    FROM lightrag_graph_edges e
-                    WHERE e.workspace = :workspace 
-                      AND e.source_entity_id = ANY(:node_ids)
-                    GROUP BY e.source_entity_id
-                ),
-                incoming_counts AS (
-                    SELECT e.target_entity_id AS entity_id, COUNT(*) AS in_degree
-                    FROM lightrag_graph_edges e
-                    WHERE e.workspace = :workspace 
-                      AND e.target_entity_id = ANY(:node_ids)
-                    GROUP BY e.target_entity_id
-                )
-                SELECT 
-                    nl.entity_id,
-                    COALESCE(oc.out_degree, 0) + COALESCE(ic.in_degree, 0) AS total_degree
-                FROM node_list nl
-                LEFT JOIN outgoing_counts oc ON nl.entity_id = oc.entity_id
-                LEFT JOIN incoming_counts ic ON nl.entity_id = ic.entity_id
-            """)
+            # Degree is maintained by the edge writes, nodes not found have degree 0
+            stmt = select(LightRAGGraphNode.entity_id, LightRAGGraphNode.degree).where(
+                and_(LightRAGGraphNode.workspace == workspace, LightRAGGraphNode.entity_id.in_(node_ids))
+            )
+            degrees = {node_id: 0 for node_id in node_ids}
+            for entity_id, degree in session.execute(stmt):
+                degrees[entity_id] = degree
+            return degrees
 
-            result = session.execute(query, {"workspace": workspace, "node_ids": node_ids})
-            degrees = {}
+        return self._execute_query(_get_degrees_batch)
 
-            for row in result:
-                degrees[row[0]] = row[1]
+    def get_graph_top_degree_nodes(self, workspace: str, limit: int) -> List[Tuple[str, int]]:
+        """Get the (entity_id, degree) of the connected nodes with the highest degrees, using the degree index"""
 
-            return degrees
+        def _get_top_degree_nodes(session):
+            stmt = (
+                select(LightRAGGraphNode.entity_id, LightRAGGraphNode.degree)
+                .where(and_(LightRAGGraphNode.workspace == workspace, LightRAGGraphNode.degree > 0))
+                .order_by(LightRAGGraphNode.degree.desc(), LightRAGGraphNode.entity_id)
+                .limit(limit)
+            )
+            return [(row[0], row[1]) for row in session.execute(stmt)]
+
+        return self._execute_query(_get_top_degree_nodes)
+
+    def get_graph_subgraph_node_ids(
+        self, workspace: str, node_label: str, max_depth: int, max_nodes: int
+    ) -> Tuple[List[str], bool]:
+        """
+        Get the nodes of the subgraph within max_depth hops of the nodes matching node_label.
+
+        node_label "*" selects the highest-degree nodes of the workspace, any other label the nodes whose
+        entity_id contains it, case-insensitively (trigram index), exact match first. Every level of the
+        search is one query on the edge indexes and is truncated by degree once max_nodes is reached.
+        Returns the node IDs and whether the subgraph was truncated.
+        """
+
+        def _get_subgraph_node_ids(session):
+            def fetch_top(limit):
+                stmt = (
+                    select(LightRAGGraphNode.entity_id)
+                    .where(LightRAGGraphNode.workspace == workspace)
+                    .order_by(LightRAGGraphNode.degree.desc(), LightRAGGraphNode.entity_id)
+                    .limit(limit)
+                )
+                return [row[0] for row in session.execute(stmt)]
+
+            def fetch_seeds(limit):
+                stmt = (
+                    select(LightRAGGraphNode.entity_id)
+                    .where(
+                        and_(
+                            LightRAGGraphNode.workspace == workspace,
+                            LightRAGGraphNode.entity_id.ilike(f"%{_escape_like(node_label)}%", escape="\\"),
+                        )
+                    )
+                    .order_by(
+                        (LightRAGGraphNode.entity_id == node_label).desc(),
+                        LightRAGGraphNode.degree.desc(),
+                        LightRAGGraphNode.entity_id,
+                    )
+                    .limit(limit)
+                )
+                return [row[0] for row in session.execute(stmt)]
+
+            def fetch_neighbors(frontier, visited, limit):
+                query = text("""
+                    WITH neighbors AS (
+                        SELECT e.target_entity_id AS entity_id
+                        FROM lightrag_graph_edges e
+                        WHERE e.workspace = :workspace AND e.source_entity_id = ANY(:frontier)
+                        UNION
+                        SELECT e.source_entity_id AS entity_id
+                        FROM lightrag_graph_edges e
+                        WHERE e.workspace = :workspace AND e.target_entity_id = ANY(:frontier)
+                    )
+                    SELECT n.entity_id
+                    FROM neighbors nb
+                    JOIN lightrag_graph_nodes n ON n.workspace = :workspace AND n.entity_id = nb.entity_id
+                    WHERE NOT (n.entity_id = ANY(:visited))
+                    ORDER BY n.degree DESC, n.entity_id
+                    LIMIT :limit
+                """)
+                params = {"workspace": workspace, "frontier": frontier, "visited": visited, "limit": limit}
+                return [row[0] for row in session.execute(query, params)]
+
+            if node_label == "*":
+                return _bfs_node_ids(fetch_top, fetch_neighbors, 0, max_nodes)
+            return _bfs_node_ids(fetch_seeds, fetch_neighbors, max_depth, max_nodes)
+
+        return self._execute_query(_get_subgraph_node_ids)
+
+    def get_graph_edges_among(self, workspace: str, node_ids: List[str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Get the edges with both endpoints in node_ids"""
+        if not node_ids:
+            return {}
 
-        return self._execute_query(_get_degrees_batch)
+        def _get_edges_among(session):
+            stmt = select(LightRAGGraphEdge).where(
+                and_(
+                    LightRAGGraphEdge.workspace == workspace,
+                    LightRAGGraphEdge.source_entity_id.in_(node_ids),
+                    LightRAGGraphEdge.target_entity_id.in_(node_ids),
+                )
+            )
+            return {
+                (edge.source_entity_id, edge.target_entity_id): _edge_to_dict(edge)
+                for edge in session.execute(stmt).scalars()
+            }
+
+        return self._execute_query(_get_edges_among)
 
     def get_graph_edges_batch(
         self, workspace: str, edge_pairs: List[Tuple[str, str]]
@@ -521,16 +731,21 @@ class GraphRepositoryMixin:
 
         def _delete_nodes_batch(session):
             # First delete all edges related to these nodes in batch
-            edge_delete_stmt = delete(LightRAGGraphEdge).where(
-                and_(
-                    LightRAGGraphEdge.workspace == workspace,
-                    or_(
-                        LightRAGGraphEdge.source_entity_id.in_(node_ids),
-                        LightRAGGraphEdge.target_entity_id.in_(node_ids),
-                    ),
+            edge_delete_stmt = (
+                delete(LightRAGGraphEdge)
+                .where(
+                    and_(
+                        LightRAGGraphEdge.workspace == workspace,
+                        or_(
+                            LightRAGGraphEdge.source_entity_id.in_(node_ids),
+                            LightRAGGraphEdge.target_entity_id.in_(node_ids),
+                        ),
+                    )
                 )
+                .returning(LightRAGGraphEdge.source_entity_id, LightRAGGraphEdge.target_entity_id)
             )
-            session.execute(edge_delete_stmt)
+            deleted_edges = session.execute(edge_delete_stmt).all()
+            _apply_degree_deltas(session, workspace, deleted_edges, -1)
 
             # Then delete all nodes in batch
             node_delete_stmt = delete(LightRAGGraphNode).where(
@@ -556,10 +771,13 @@ class GraphRepositoryMixin:
                 )
 
             # Use OR with all conditions for batch delete
-            delete_stmt = delete(LightRAGGraphEdge).where(
-                and_(LightRAGGraphEdge.workspace == workspace, or_(*conditions))
+            delete_stmt = (
+                delete(LightRAGGraphEdge)
+                .where(and_(LightRAGGraphEdge.workspace == workspace, or_(*conditions)))
+                .returning(LightRAGGraphEdge.source_entity_id, LightRAGGraphEdge.target_entity_id)
             )
-            session.execute(delete_stmt)
+            deleted_edges = session.execute(delete_stmt).all()
+            _apply_degree_deltas(session, workspace, deleted_edges, -1)
             session.flush()
             logger.debug(f"Batch deleted {len(edges)} graph edges in workspace {workspace}")
 
@@ -601,9 +819,10 @@ class GraphRepositoryMixin:
                     file_path=stmt.excluded.file_path,
                     updatetime=func.now(),
                 ),
-            )
+            ).returning(LightRAGGraphNode.entity_id, _INSERTED)
 
-            session.execute(stmt)
+            inserted = [row[0] for row in session.execute(stmt) if row[1]]
+            _recount_degrees(session, workspace, inserted)
             session.flush()
             logger.debug(f"Batch upserted {len(nodes_data)} graph nodes in workspace {workspace}")
 
@@ -645,9 +864,10 @@ class GraphRepositoryMixin:
                     file_path=stmt.excluded.file_path,
                     updatetime=func.now(),
                 ),
-            )
+            ).returning(LightRAGGraphEdge.source_entity_id, LightRAGGraphEdge.target_entity_id, _INSERTED)
 
-            session.execute(stmt)
+            inserted = [(row[0], row[1]) for row in session.execute(stmt) if row[2]]
+            _apply_degree_deltas(session, workspace, inserted, 1)
             session.flush()
             logger.debug(f"Batch upserted {len(edges_data)} graph edges in workspace {workspace}")
 
@@ -12,8 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from sqlalchemy import select
+import hashlib
 
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam, select, text
+
+from aperag.config import sync_engine
 from aperag.db.models import (
     LightRAGDocChunksModel,
     LightRAGVDBEntityModel,
@@ -22,6 +26,131 @@ from aperag.db.models import (
 from aperag.db.repositories.base import SyncRepositoryProtocol
 from aperag.utils.utils import utc_now
 
+# pgvector HNSW indexes support up to 2000 dimensions for vector and 4000 for halfvec
+HNSW_MAX_VECTOR_DIM = 2000
+HNSW_MAX_HALFVEC_DIM = 4000
+# Server default of hnsw.ef_search, an HNSW scan returns at most this many rows
+HNSW_DEFAULT_EF_SEARCH = 40
+HNSW_MAX_EF_SEARCH = 1000
+
+LIGHTRAG_VECTOR_TABLES = ("lightrag_doc_chunks", "lightrag_vdb_entity", "lightrag_vdb_relation")
+
+# Entities/relations referencing at least one chunk of the given documents
+_RELEVANT_CHUNKS_FILTER = """
+    AND chunk_ids && ARRAY(
+        SELECT id FROM lightrag_doc_chunks WHERE workspace = :workspace AND full_doc_id = ANY(:doc_ids)
+    )
+"""
+
+
+def pgvector_search_type(dim: int) -> str:
+    """
+    SQL type content_vector is cast to for similarity search.
+
+    The content_vector columns have no fixed dimension, so ANN indexes are built on this
+    cast expression and queries must use exactly the same expression to be able to use them.
+    """
+    return f"halfvec({dim})" if dim > HNSW_MAX_VECTOR_DIM else f"vector({dim})"
+
+
+def lightrag_vector_index_name(table: str, workspace: str) -> str:
+    """Name of the partial HNSW index of a workspace, the same naming as migration 7b2e4c91d5a8."""
+    return f"idx_{table}_hnsw_{hashlib.md5(workspace.encode()).hexdigest()[:12]}"
+
+
+_TABLE_MODELS = {
+    "lightrag_doc_chunks": LightRAGDocChunksModel,
+    "lightrag_vdb_entity": LightRAGVDBEntityModel,
+    "lightrag_vdb_relation": LightRAGVDBRelationModel,
+}
+
+
+def lightrag_table_columns(table: str) -> list:
+    """Column names of a LightRAG vector table"""
+    model = _TABLE_MODELS.get(table)
+    if model is None:
+        raise ValueError(f"Unknown LightRAG vector table: {table}")
+    return list(model.__table__.columns.keys())
+
+
+def _select_columns(table: str, columns: list = None):
+    """Validate a projection of a LightRAG vector table, returns the table columns and the ones to select"""
+    available = lightrag_table_columns(table)
+    columns = list(dict.fromkeys(["id", *(columns or available)]))
+    unknown = [column for column in columns if column not in available]
+    if unknown:
+        raise ValueError(f"Unknown columns for {table}: {unknown}")
+    table_columns = _TABLE_MODELS[table].__table__.columns
+    return table_columns, [table_columns[column] for column in columns]
+
+
+def _check_vector_table(table: str) -> None:
+    if table not in LIGHTRAG_VECTOR_TABLES:
+        raise ValueError(f"Unknown LightRAG vector table: {table}")
+
+
+def _execute_autocommit(sql: str) -> None:
+    """Run DDL outside of a transaction, as required by CREATE/DROP/REINDEX ... CONCURRENTLY."""
+    with sync_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(sql))
+
+
+def _query_similarity(
+    session,
+    table: str,
+    columns: str,
+    output_columns: str,
+    extra_filter: str,
+    workspace: str,
+    embedding: list,
+    top_k: int,
+    doc_ids: list,
+    threshold: float,
+    ef_search: int = 0,
+):
+    """
+    Run a top-k cosine similarity query against a LightRAG vector table.
+
+    The embedding is a bound parameter, so the SQL text only depends on the table and the
+    vector dimension. The distance is computed once per row and the inner query orders by the
+    distance operator with a LIMIT, which lets the planner use an HNSW/IVFFlat index. Filtering
+    the top-k by threshold afterwards returns the same rows as filtering first, since the
+    threshold is monotonic in the distance.
+
+    An HNSW scan returns at most hnsw.ef_search rows, so ef_search is raised to top_k when
+    needed and set with transaction scope right before the query.
+
+    The returned "distance" column is the cosine similarity, for compatibility with callers.
+    """
+    if ef_search or top_k > HNSW_DEFAULT_EF_SEARCH:
+        ef_search = min(max(ef_search or 0, top_k), HNSW_MAX_EF_SEARCH)
+        session.execute(text("SELECT set_config('hnsw.ef_search', :value, true)"), {"value": str(ef_search)})
+
+    vector_type = pgvector_search_type(len(embedding))
+    sql = text(
+        f"""
+        SELECT {output_columns}, 1 - cosine_distance AS distance
+        FROM (
+            SELECT {columns},
+                   content_vector::{vector_type} <=> CAST(:embedding AS {vector_type}) AS cosine_distance
+            FROM {table}
+            WHERE workspace = :workspace
+            {extra_filter}
+            ORDER BY cosine_distance
+            LIMIT :top_k
+        ) AS candidates
+        WHERE cosine_distance < 1 - :threshold
+        ORDER BY cosine_distance
+        """
+    ).bindparams(bindparam("embedding", type_=Vector(len(embedding))))
+
+    params = {"workspace": workspace, "embedding": embedding, "threshold": threshold, "top_k": top_k}
+    if doc_ids:
+        params["doc_ids"] = doc_ids
+    result = session.execute(sql, params)
+    # Properly convert SQLAlchemy Row objects to dictionaries
+    return [dict(row._mapping) for row in result]
+
 
 class LightragRepositoryMixin(SyncRepositoryProtocol):
     # LightRAG Doc Chunks Operations
@@ -61,6 +190,18 @@ class LightragRepositoryMixin(SyncRepositoryProtocol):
 
         return self._execute_query(_query)
 
+    def query_lightrag_doc_chunk_ids_by_doc_id(self, workspace: str, doc_id: str):
+        """Query the IDs of the LightRAG document chunks of a document"""
+
+        def _query(session):
+            stmt = select(LightRAGDocChunksModel.id).where(
+                LightRAGDocChunksModel.workspace == workspace, LightRAGDocChunksModel.full_doc_id == doc_id
+            )
+            result = session.execute(stmt)
+            return list(result.scalars().all())
+
+        return self._execute_query(_query)
+
     def filter_lightrag_doc_chunks_keys(self, workspace: str, keys: list):
         """Filter existing keys for LightRAG document chunks"""
 
@@ -305,175 +446,87 @@ class LightragRepositoryMixin(SyncRepositoryProtocol):
 
     # Add vector similarity search methods
     def query_lightrag_doc_chunks_similarity(
-        self, workspace: str, embedding: list, top_k: int, doc_ids: list = None, threshold: float = 0.2
+        self,
+        workspace: str,
+        embedding: list,
+        top_k: int,
+        doc_ids: list = None,
+        threshold: float = 0.2,
+        ef_search: int = 0,
     ):
         """Query similar document chunks using vector similarity"""
 
         def _query(session):
-            from sqlalchemy import text
-
-            # Convert embedding to PostgreSQL array format
-            embedding_string = ",".join(map(str, embedding))
-
-            if doc_ids:
-                # Query with document ID filter
-                sql = text(
-                    """
-                    WITH relevant_chunks AS (
-                        SELECT id as chunk_id
-                        FROM lightrag_doc_chunks
-                        WHERE workspace = :workspace AND full_doc_id = ANY(:doc_ids)
-                    )
-                    SELECT id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at,
-                           1 - (content_vector <=> '[:embedding]'::vector) as distance
-                    FROM lightrag_doc_chunks
-                    WHERE workspace = :workspace
-                    AND id IN (SELECT chunk_id FROM relevant_chunks)
-                    AND 1 - (content_vector <=> '[:embedding]'::vector) > :threshold
-                    ORDER BY distance DESC
-                    LIMIT :top_k
-                """.replace(":embedding", embedding_string)
-                )
-
-                result = session.execute(
-                    sql, {"workspace": workspace, "doc_ids": doc_ids, "threshold": threshold, "top_k": top_k}
-                )
-            else:
-                # Query without document ID filter
-                sql = text(
-                    """
-                    SELECT id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at,
-                           1 - (content_vector <=> '[:embedding]'::vector) as distance
-                    FROM lightrag_doc_chunks
-                    WHERE workspace = :workspace
-                    AND 1 - (content_vector <=> '[:embedding]'::vector) > :threshold
-                    ORDER BY distance DESC
-                    LIMIT :top_k
-                """.replace(":embedding", embedding_string)
-                )
-
-                result = session.execute(sql, {"workspace": workspace, "threshold": threshold, "top_k": top_k})
-
-            # Properly convert SQLAlchemy Row objects to dictionaries
-            return [dict(row._mapping) for row in result]
+            doc_filter = "AND full_doc_id = ANY(:doc_ids)" if doc_ids else ""
+            return _query_similarity(
+                session,
+                table="lightrag_doc_chunks",
+                columns="id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at",
+                output_columns="id, content, file_path, created_at",
+                extra_filter=doc_filter,
+                workspace=workspace,
+                embedding=embedding,
+                top_k=top_k,
+                doc_ids=doc_ids,
+                threshold=threshold,
+                ef_search=ef_search,
+            )
 
         return self._execute_query(_query)
 
     def query_lightrag_vdb_entity_similarity(
-        self, workspace: str, embedding: list, top_k: int, doc_ids: list = None, threshold: float = 0.2
+        self,
+        workspace: str,
+        embedding: list,
+        top_k: int,
+        doc_ids: list = None,
+        threshold: float = 0.2,
+        ef_search: int = 0,
     ):
         """Query similar entities using vector similarity"""
 
         def _query(session):
-            from sqlalchemy import text
-
-            # Convert embedding to PostgreSQL array format
-            embedding_string = ",".join(map(str, embedding))
-
-            if doc_ids:
-                # Query with document ID filter
-                sql = text(
-                    """
-                    WITH relevant_chunks AS (
-                        SELECT id as chunk_id
-                        FROM lightrag_doc_chunks
-                        WHERE workspace = :workspace AND full_doc_id = ANY(:doc_ids)
-                    )
-                    SELECT entity_name, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at,
-                           1 - (content_vector <=> '[:embedding]'::vector) as distance
-                    FROM lightrag_vdb_entity e
-                    WHERE e.workspace = :workspace
-                    AND EXISTS (
-                        SELECT 1 FROM relevant_chunks rc 
-                        WHERE rc.chunk_id = ANY(e.chunk_ids)
-                    )
-                    AND 1 - (content_vector <=> '[:embedding]'::vector) > :threshold
-                    ORDER BY distance DESC
-                    LIMIT :top_k
-                """.replace(":embedding", embedding_string)
-                )
-
-                result = session.execute(
-                    sql, {"workspace": workspace, "doc_ids": doc_ids, "threshold": threshold, "top_k": top_k}
-                )
-            else:
-                # Query without document ID filter
-                sql = text(
-                    """
-                    SELECT entity_name, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at,
-                           1 - (content_vector <=> '[:embedding]'::vector) as distance
-                    FROM lightrag_vdb_entity
-                    WHERE workspace = :workspace
-                    AND 1 - (content_vector <=> '[:embedding]'::vector) > :threshold
-                    ORDER BY distance DESC
-                    LIMIT :top_k
-                """.replace(":embedding", embedding_string)
-                )
-
-                result = session.execute(sql, {"workspace": workspace, "threshold": threshold, "top_k": top_k})
-
-            # Properly convert SQLAlchemy Row objects to dictionaries
-            return [dict(row._mapping) for row in result]
+            return _query_similarity(
+                session,
+                table="lightrag_vdb_entity",
+                columns="entity_name, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at",
+                output_columns="entity_name, created_at",
+                extra_filter=_RELEVANT_CHUNKS_FILTER if doc_ids else "",
+                workspace=workspace,
+                embedding=embedding,
+                top_k=top_k,
+                doc_ids=doc_ids,
+                threshold=threshold,
+                ef_search=ef_search,
+            )
 
         return self._execute_query(_query)
 
     def query_lightrag_vdb_relation_similarity(
-        self, workspace: str, embedding: list, top_k: int, doc_ids: list = None, threshold: float = 0.2
+        self,
+        workspace: str,
+        embedding: list,
+        top_k: int,
+        doc_ids: list = None,
+        threshold: float = 0.2,
+        ef_search: int = 0,
     ):
         """Query similar relations using vector similarity"""
 
         def _query(session):
-            from sqlalchemy import text
-
-            # Convert embedding to PostgreSQL array format
-            embedding_string = ",".join(map(str, embedding))
-
-            if doc_ids:
-                # Query with document ID filter
-                sql = text(
-                    """
-                    WITH relevant_chunks AS (
-                        SELECT id as chunk_id
-                        FROM lightrag_doc_chunks
-                        WHERE workspace = :workspace AND full_doc_id = ANY(:doc_ids)
-                    )
-                    SELECT source_id as src_id, target_id as tgt_id, 
-                           EXTRACT(EPOCH FROM create_time)::BIGINT as created_at,
-                           1 - (content_vector <=> '[:embedding]'::vector) as distance
-                    FROM lightrag_vdb_relation r
-                    WHERE r.workspace = :workspace
-                    AND EXISTS (
-                        SELECT 1 FROM relevant_chunks rc 
-                        WHERE rc.chunk_id = ANY(r.chunk_ids)
-                    )
-                    AND 1 - (content_vector <=> '[:embedding]'::vector) > :threshold
-                    ORDER BY distance DESC
-                    LIMIT :top_k
-                """.replace(":embedding", embedding_string)
-                )
-
-                result = session.execute(
-                    sql, {"workspace": workspace, "doc_ids": doc_ids, "threshold": threshold, "top_k": top_k}
-                )
-            else:
-                # Query without document ID filter
-                sql = text(
-                    """
-                    SELECT source_id as src_id, target_id as tgt_id,
-                           EXTRACT(EPOCH FROM create_time)::BIGINT as created_at,
-                           1 - (content_vector <=> '[:embedding]'::vector) as distance
-                    FROM lightrag_vdb_relation
-                    WHERE workspace = :workspace
-                    AND 1 - (content_vector <=> '[:embedding]'::vector) > :threshold
-                    ORDER BY distance DESC
-                    LIMIT :top_k
-                """.replace(":embedding", embedding_string)
-                )
-
-                result = session.execute(sql, {"workspace": workspace, "threshold": threshold, "top_k": top_k})
-
-            # Properly convert SQLAlchemy Row objects to dictionaries
-            return [dict(row._mapping) for row in result]
+            return _query_similarity(
+                session,
+                table="lightrag_vdb_relation",
+                columns="source_id as src_id, target_id as tgt_id, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at",
+                output_columns="src_id, tgt_id, created_at",
+                extra_filter=_RELEVANT_CHUNKS_FILTER if doc_ids else "",
+                workspace=workspace,
+                embedding=embedding,
+                top_k=top_k,
+                doc_ids=doc_ids,
+                threshold=threshold,
+                ef_search=ef_search,
+            )
 
         return self._execute_query(_query)
 
@@ -577,3 +630,128 @@ class LightragRepositoryMixin(SyncRepositoryProtocol):
             return {relation.id: relation for relation in result.scalars().all()}
 
         return self._execute_query(_query)
+
+    def iter_lightrag_rows(self, table: str, workspace: str, columns: list = None, batch_size: int = 1000):
+        """
+        Stream the rows of a workspace through a server-side cursor, in batches of dicts.
+
+        Only the given columns are fetched (all of them when None), so callers can skip
+        content_vector. At most batch_size rows are held in memory at a time.
+        """
+        table_columns, selected = _select_columns(table, columns)
+
+        def _query(session):
+            stmt = (
+                select(*selected)
+                .where(table_columns["workspace"] == workspace)
+                .execution_options(stream_results=True, max_row_buffer=batch_size)
+            )
+            result = session.execute(stmt)
+            for partition in result.partitions(batch_size):
+                yield [dict(row._mapping) for row in partition]
+
+        return self._stream_query(_query)
+
+    def query_lightrag_rows_by_ids(self, table: str, workspace: str, ids: list, columns: list = None) -> list:
+        """Rows of a workspace by IDs as dicts, fetching only the given columns (all of them when None)"""
+        table_columns, selected = _select_columns(table, columns)
+
+        def _query(session):
+            if not ids:
+                return []
+            stmt = select(*selected).where(table_columns["workspace"] == workspace, table_columns["id"].in_(ids))
+            return [dict(row._mapping) for row in session.execute(stmt)]
+
+        return self._execute_query(_query)
+
+    # ANN index management
+    def count_lightrag_vectors(self, table: str, workspace: str, limit: int = None) -> int:
+        """Count rows with a vector in a workspace, scanning at most `limit` rows when given"""
+        _check_vector_table(table)
+
+        def _query(session):
+            sql = f"SELECT 1 FROM {table} WHERE workspace = :workspace AND content_vector IS NOT NULL"
+            params = {"workspace": workspace}
+            if limit:
+                sql += " LIMIT :limit"
+                params["limit"] = limit
+            return session.execute(text(f"SELECT count(*) FROM ({sql}) AS rows"), params).scalar()
+
+        return self._execute_query(_query)
+
+    def query_lightrag_vector_dimension(self, table: str, workspace: str):
+        """Dimension of the vectors stored for a workspace, None if it has no vectors"""
+        _check_vector_table(table)
+
+        def _query(session):
+            sql = text(
+                f"SELECT vector_dims(content_vector) FROM {table} "
+                "WHERE workspace = :workspace AND content_vector IS NOT NULL LIMIT 1"
+            )
+            return session.execute(sql, {"workspace": workspace}).scalar()
+
+        return self._execute_query(_query)
+
+    def query_lightrag_vector_indexes(self, workspace: str = None):
+        """List the per-workspace HNSW indexes of the LightRAG vector tables, optionally for one workspace"""
+
+        def _query(session):
+            sql = text(
+                """
+                SELECT c.relname AS name, t.relname AS "table", i.indisvalid AS valid,
+                       pg_get_indexdef(c.oid) AS definition, pg_relation_size(c.oid) AS size_bytes
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_class t ON t.oid = i.indrelid
+                WHERE t.relname = ANY(:tables)
+                ORDER BY t.relname, c.relname
+                """
+            )
+            rows = [dict(row._mapping) for row in session.execute(sql, {"tables": list(LIGHTRAG_VECTOR_TABLES)})]
+            rows = [row for row in rows if row["name"].startswith(f"idx_{row['table']}_hnsw_")]
+            if workspace is not None:
+                names = {lightrag_vector_index_name(table, workspace) for table in LIGHTRAG_VECTOR_TABLES}
+                rows = [row for row in rows if row["name"] in names]
+            return rows
+
+        return self._execute_query(_query)
+
+    def create_lightrag_vector_index(
+        self, table: str, workspace: str, dim: int, m: int = 16, ef_construction: int = 64
+    ) -> str:
+        """
+        Build the partial HNSW index of a workspace without blocking writes.
+
+        The indexed expression is the same cast as the similarity queries use, see
+        pgvector_search_type(). Returns the index name.
+        """
+        _check_vector_table(table)
+        if dim > HNSW_MAX_HALFVEC_DIM:
+            raise ValueError(f"HNSW indexes support at most {HNSW_MAX_HALFVEC_DIM} dimensions, got {dim}")
+
+        vector_type = pgvector_search_type(dim)
+        ops = "halfvec_cosine_ops" if vector_type.startswith("halfvec") else "vector_cosine_ops"
+        name = lightrag_vector_index_name(table, workspace)
+        # The partial index predicate must be a literal for the planner to match it
+        quoted_workspace = workspace.replace("'", "''")
+        _execute_autocommit(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+            f"USING hnsw ((content_vector::{vector_type}) {ops}) "
+            f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)}) "
+            f"WHERE workspace = '{quoted_workspace}'"
+        )
+        return name
+
+    def drop_lightrag_vector_index(self, table: str, workspace: str) -> str:
+        """Drop the partial HNSW index of a workspace if it exists. Returns the index name."""
+        _check_vector_table(table)
+        name = lightrag_vector_index_name(table, workspace)
+        _execute_autocommit(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        return name
+
+    def reindex_lightrag_vector_index(self, table: str, workspace: str) -> str:
+        """Rebuild the partial HNSW index of a workspace in place without blocking writes."""
+        _check_vector_table(table)
+        name = lightrag_vector_index_name(table, workspace)
+        _execute_autocommit(f"REINDEX INDEX CONCURRENTLY {name}")
+        return name
@@ -33,16 +33,72 @@ class Group:
     tokens: int | None = None
 
 
+def _is_stable_joint(left: str, piece: str) -> bool:
+    """
+    Whether the token boundary at the start of `piece` survives the concatenation `left + piece`.
+
+    Tokenizers that pre-split text with a regex scanning left to right (tiktoken encodings among
+    them) never merge across a line break followed by a non-whitespace character, so the tokens of
+    `left + piece` are the tokens of `left` followed by the tokens of `piece`. Other tokenizers,
+    e.g. SentencePiece or BPE without such a pre-split, may merge across it.
+    """
+    return left.endswith(("\n", "\r")) and piece[:1] != "" and not piece[0].isspace()
+
+
+@dataclass
+class TokenTally:
+    """
+    Token count of a text built by appending pieces, without re-tokenizing the whole text.
+
+    The text is split at the last stable joint: `base` counts the tokens before it and `tail` holds
+    the text after it. Appending a piece behind a stable joint only tokenizes the tail with the
+    separator, the piece then becomes the new tail. Behind an unstable joint the piece is added to
+    the tail, which is tokenized again on the next count.
+
+    The count is exact for tokenizers that pre-split text with a regex, like tiktoken's BPE
+    encodings, see _is_stable_joint. With other tokenizers it is an approximation of the count of
+    the whole text and may differ by a few tokens per joint.
+    """
+
+    tokenizer: Callable[[str], List[int]]
+    base: int = 0
+    tail: str = ""
+    tail_tokens: int | None = None
+
+    def append(self, separator: str, piece: str, piece_tokens: int | None = None) -> int:
+        if not _is_stable_joint(self.tail + separator, piece):
+            self.tail += separator + piece
+            self.tail_tokens = None
+            return self.count()
+        # Nothing merges across the joint, the tokens before it are those of the tail and separator alone
+        self.base += len(self.tokenizer(self.tail + separator)) if separator else self.count() - self.base
+        self.tail = piece
+        self.tail_tokens = piece_tokens
+        return self.count()
+
+    def count(self) -> int:
+        if self.tail_tokens is None:
+            self.tail_tokens = len(self.tokenizer(self.tail))
+        return self.base + self.tail_tokens
+
+
 class Rechunker:
+    PART_SEPARATOR = "\n\n"
+
     def __init__(self, chunk_size: int, chunk_overlap: int, tokenizer: Callable[[str], List[int]]):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.tokenizer = tokenizer
+        # Parts built by merges, by id: (part, its tally, pieces appended since the last count)
+        self._pending_pieces: dict[int, tuple[Part, TokenTally, list[tuple[str, int | None]]]] = {}
 
     def __call__(self, parts: list[Part]) -> list[Part]:
         groups = self._to_groups(parts)
         groups = self._merge_consecutive_title_groups(groups)
-        return self._rechunk(groups)
+        try:
+            return self._rechunk(groups)
+        finally:
+            self._pending_pieces.clear()
 
     def _is_pure_title_group(self, group: Group) -> bool:
         """A group is considered a pure title if it has a title and only one item."""
@@ -177,7 +233,7 @@ class Rechunker:
                 tokens = self._count_tokens(part)
                 if tokens > self.chunk_size:
                     # If the single part is too large, split it into smaller chunks
-                    splitter = SimpleSemanticSplitter(self.tokenizer)
+                    splitter = self._make_splitter()
                     chunks = splitter.split(part.content, self.chunk_size, self.chunk_overlap)
                     metadata = part.metadata.copy()
                     metadata.pop("tokens", None)
@@ -216,6 +272,9 @@ class Rechunker:
 
         return result
 
+    def _make_splitter(self) -> "SimpleSemanticSplitter":
+        return SimpleSemanticSplitter(self.tokenizer)
+
     def _append_group_to_part(self, group: Group, dest: Part | None, titles: list[str]) -> Part:
         for part in group.items:
             dest = self._append_part_to_part(part, dest, titles)
@@ -227,11 +286,17 @@ class Rechunker:
             if titles:
                 metadata["titles"] = titles.copy()
             # Normalize to a Part
-            return Part(content=part.content, metadata=metadata)
-        dest.content += "\n\n" + part.content
+            dest = Part(content=part.content, metadata=metadata)
+            tally = TokenTally(self.tokenizer, tail=part.content, tail_tokens=part.metadata.get("tokens"))
+            self._pending_pieces[id(dest)] = (dest, tally, [])
+            return dest
+        dest.content += self.PART_SEPARATOR + part.content
         self._merge_md_source_map(dest, part)
         self._merge_pdf_source_map(dest, part)
         dest.metadata.pop("tokens", None)
+        pending = self._pending_pieces.get(id(dest))
+        if pending is not None and pending[0] is dest:
+            pending[2].append((part.content, part.metadata.get("tokens")))
         return dest
 
     def _merge_md_source_map(self, dest: Part, src: Part):
@@ -278,7 +343,16 @@ class Rechunker:
             tokens = elem.metadata.get("tokens", None)
             if tokens is not None:
                 return tokens
-            tokens = len(self.tokenizer(elem.content))
+            pending = self._pending_pieces.get(id(elem))
+            if pending is None or pending[0] is not elem:
+                tokens = len(self.tokenizer(elem.content))
+            else:
+                # A part built by merges: only the pieces appended since the last count are tokenized
+                _, tally, pieces = pending
+                tokens = tally.count()
+                for piece, piece_tokens in pieces:
+                    tokens = tally.append(self.PART_SEPARATOR, piece, piece_tokens)
+                pieces.clear()
             elem.metadata["tokens"] = tokens
             return tokens
 
@@ -304,12 +378,23 @@ class SimpleSemanticSplitter:
 
     def __init__(self, tokenizer: Callable[[str], List[int]]):
         self.tokenizer = tokenizer
+        # Token counts of the pieces of the text being split, each level checks them again
+        self._token_counts: dict[str, int] = {}
 
     def split(self, s: str, chunk_size: int, chunk_overlap: int) -> list[str]:
-        return self._recursive_split(s, chunk_size, chunk_overlap, 0)
+        try:
+            return self._recursive_split(s, chunk_size, chunk_overlap, 0)
+        finally:
+            self._token_counts.clear()
+
+    def _count_tokens(self, s: str) -> int:
+        tokens = self._token_counts.get(s)
+        if tokens is None:
+            tokens = self._token_counts[s] = len(self.tokenizer(s))
+        return tokens
 
     def _fit(self, s: str, chunk_size: int) -> bool:
-        return len(self.tokenizer(s)) <= chunk_size
+        return self._count_tokens(s) <= chunk_size
 
     def _recursive_split(self, s: str, chunk_size: int, chunk_overlap: int, level: int) -> list[str]:
         if len(s) == 0:
@@ -373,15 +458,19 @@ class SimpleSemanticSplitter:
     def _merge_small_chunks(self, chunks: list[str], chunk_size: int) -> list[str]:
         merged_chunks = []
         current_chunk = ""
+        tally = None
         for chunk in chunks:
             if len(current_chunk) == 0:
                 current_chunk = chunk
+                tally = TokenTally(self.tokenizer, tail=chunk, tail_tokens=self._token_counts.get(chunk))
                 continue
-            if self._fit(current_chunk + chunk, chunk_size):
+            # Counts `current_chunk + chunk` by only re-tokenizing since the last line break
+            if tally.append("", chunk, self._token_counts.get(chunk)) <= chunk_size:
                 current_chunk += chunk
             else:
                 merged_chunks.append(current_chunk)
                 current_chunk = chunk
+                tally = TokenTally(self.tokenizer, tail=chunk, tail_tokens=self._token_counts.get(chunk))
         if len(current_chunk) > 0:
             merged_chunks.append(current_chunk)
         return merged_chunks
@@ -38,6 +38,12 @@ ALL_PARSERS = [
 
 PARSER_MAP = {cls.name: cls for cls in ALL_PARSERS}
 
+# Version of the parse output. Bump it whenever a change to the parsers, or to
+# DocumentParser.parse_document, changes the parts produced for the same file, so that cached parse
+# artifacts produced by the previous version are not reused.
+# 2: PDF pages are no longer rendered into the parse output
+PARSER_VERSION = "2"
+
 
 def get_default_config() -> list["ParserConfig"]:
     return [
@@ -126,6 +132,11 @@ class DocParser(BaseParser):
         supported = self._get_parser_supported_extensions(parser_name)
         return extension in supported
 
+    def accepting_parsers(self, extension: str) -> list[ParserConfig]:
+        """Configs of the enabled parsers that would be tried for the extension, in order."""
+        configs = {cfg.name: cfg for cfg in self.config}
+        return [configs[name] for name in self.parsing_order if self._parser_accept(name, extension)]
+
     def supported_extensions(self) -> list[str]:
         if self.supported is not None:
             return self.supported
@@ -20,6 +20,7 @@ from markitdown import MarkItDown
 
 from aperag.docparser.base import BaseParser, FallbackError, Part
 from aperag.docparser.parse_md import parse_md
+from aperag.docparser.parse_pool import get_default_parse_pool
 from aperag.docparser.utils import convert_office_doc, get_soffice_cmd
 
 SUPPORTED_EXTENSIONS = [
@@ -63,6 +64,16 @@ class MarkItDownParser(BaseParser):
         return self._parse_file(path, metadata, **kwargs)
 
     def _parse_file(self, path: Path, metadata: dict[str, Any] = {}, **kwargs) -> list[Part]:
-        mid = MarkItDown()
-        result = mid.convert_local(path, keep_data_uris=True)
-        return parse_md(result.markdown, metadata)
+        parse_pool = get_default_parse_pool()
+        if parse_pool is None:
+            mid = MarkItDown()
+            result = mid.convert_local(path, keep_data_uris=True)
+            return parse_md(result.markdown, metadata)
+
+        # Large documents are converted by shards on the parse pool
+        markdown = None
+        if path.suffix.lower() == ".pdf":
+            markdown = parse_pool.pdf_to_markdown(path)
+        if markdown is None:
+            markdown = MarkItDown().convert_local(path, keep_data_uris=True).markdown
+        return parse_pool.parse_md(markdown, metadata)
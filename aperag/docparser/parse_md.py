@@ -34,13 +34,17 @@ DATA_URI_PATTERN: Pattern = re.compile(r"!\[.*?\]\(\s*(data:.+?;base64,.+?)(?:\s
 def parse_md(input_md: str, metadata: dict[str, Any]) -> list[Part]:
     input_md, asset_bin_parts = extract_data_uri(input_md, metadata)
     md_part = MarkdownPart(markdown=input_md, metadata=metadata)
+    parts = convert_md(input_md, metadata)
 
+    return [md_part] + asset_bin_parts + parts
+
+
+def convert_md(input_md: str, metadata: dict[str, Any]) -> list[Part]:
+    """Convert the blocks of a markdown document, whose data URIs are already extracted, to parts."""
     md = MarkdownIt("gfm-like", options_update={"inline_definitions": True})
     tokens = md.parse(input_md)
     converter = PartConverter()
-    parts = converter.convert_all(tokens, metadata)
-
-    return [md_part] + asset_bin_parts + parts
+    return converter.convert_all(tokens, metadata)
 
 
 def extract_data_uri(text: str, metadata: dict[str, Any]) -> tuple[str, list[Part]]:
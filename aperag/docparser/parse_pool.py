@@ -0,0 +1,299 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process pool for the CPU-heavy steps of parsing large documents.
+
+Two steps are sharded across the worker processes and merged back in order:
+
+- the text extraction of PDFs (pdfminer, as used by MarkItDown), by page ranges. pdfminer lays
+  out each page on its own, so the concatenated texts of the ranges are those of the whole file.
+  This replicates the PDF converter of the MarkItDown versions in MARKITDOWN_PDF_VERSIONS, PDFs
+  are converted in-process by MarkItDown itself with any other version.
+- the conversion of markdown to parts (markdown-it tokenization and PartConverter), by sections.
+  Shards are cut at top-level ATX headings preceded by a blank line, outside of fenced code and
+  raw HTML blocks, where no block can continue across the cut. The md_source_map line ranges of
+  the parts of a shard are shifted by the first line of the shard. Documents with link reference
+  definitions, which markdown-it resolves across the whole document, are not sharded.
+
+The merged output is the same as the in-process parse. Workers are spawned rather than forked
+from the (threaded) Celery worker, each is limited to an address space ceiling and replaced after
+a number of shards. If a shard fails, e.g. a worker hits its ceiling, the document is parsed
+in-process instead.
+"""
+
+import importlib.metadata
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from aperag.docparser.base import MarkdownPart, Part
+from aperag.docparser.parse_md import convert_md, extract_data_uri
+
+logger = logging.getLogger(__name__)
+
+# MarkItDown versions whose PDF conversion is pdfminer's extract_text followed by normalize_markdown
+MARKITDOWN_PDF_VERSIONS = ("0.1.1",)
+
+_NEWLINES = re.compile(r"\r\n?")
+_ATX_HEADING = re.compile(r"#{1,6}(?:[ \t]|$)")
+_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})(.*)$")
+_LINK_REFERENCE_DEFINITION = re.compile(r"^ {0,3}\[[^\]]+\]:", re.MULTILINE)
+# CommonMark HTML blocks of types 1 to 5 end at a marker rather than at a blank line
+_HTML_BLOCK_STARTS = [
+    (
+        re.compile(r" {0,3}<(?:script|pre|style|textarea)(?:\s|>|$)", re.IGNORECASE),
+        re.compile(r"</(?:script|pre|style|textarea)>", re.IGNORECASE),
+    ),
+    (re.compile(r" {0,3}<!--"), re.compile(r"-->")),
+    (re.compile(r" {0,3}<\?"), re.compile(r"\?>")),
+    (re.compile(r" {0,3}<![A-Za-z]"), re.compile(r">")),
+    (re.compile(r" {0,3}<!\[CDATA\["), re.compile(r"\]\]>")),
+]
+
+
+def split_markdown(markdown: str, chars_per_shard: int) -> List[Tuple[int, str]]:
+    """
+    Cut markdown into shards of about chars_per_shard characters at safe section boundaries.
+
+    Returns:
+        (first line, text) of every shard, the texts joined are the markdown with normalized newlines
+    """
+    markdown = _NEWLINES.sub("\n", markdown)
+    if len(markdown) <= chars_per_shard or _LINK_REFERENCE_DEFINITION.search(markdown):
+        return [(0, markdown)]
+
+    lines = markdown.split("\n")
+    shards = []
+    shard_start, shard_chars = 0, 0
+    fence: Optional[Tuple[str, int]] = None
+    html_end: Optional[re.Pattern] = None
+    previous_blank = True
+    for i, line in enumerate(lines):
+        if fence is not None:
+            match = _FENCE.match(line)
+            if (
+                match
+                and match.group(1)[0] == fence[0]
+                and len(match.group(1)) >= fence[1]
+                and not match.group(2).strip()
+            ):
+                fence = None
+        elif html_end is not None:
+            if html_end.search(line):
+                html_end = None
+        else:
+            if previous_blank and i > shard_start and shard_chars >= chars_per_shard and _ATX_HEADING.match(line):
+                shards.append((shard_start, "\n".join(lines[shard_start:i]) + "\n"))
+                shard_start, shard_chars = i, 0
+            match = _FENCE.match(line)
+            if match and not (match.group(1)[0] == "`" and "`" in match.group(2)):
+                fence = (match.group(1)[0], len(match.group(1)))
+            else:
+                for start, end in _HTML_BLOCK_STARTS:
+                    if start.match(line):
+                        if not end.search(line, start.match(line).end()):
+                            html_end = end
+                        break
+        previous_blank = not line.strip()
+        shard_chars += len(line) + 1
+    shards.append((shard_start, "\n".join(lines[shard_start:])))
+    return shards
+
+
+def shift_source_maps(parts: List[Part], line_offset: int) -> List[Part]:
+    if line_offset:
+        for part in parts:
+            source_map = part.metadata.get("md_source_map")
+            if source_map is not None:
+                part.metadata["md_source_map"] = [line + line_offset for line in source_map]
+    return parts
+
+
+def normalize_markdown(text: str) -> str:
+    """The normalization MarkItDown applies to the output of its converters."""
+    text = "\n".join([line.rstrip() for line in re.split(r"\r?\n", text)])
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def markitdown_pdf_is_replicated() -> bool:
+    """Whether the installed MarkItDown converts PDFs the way pdf_to_markdown does."""
+    try:
+        version = importlib.metadata.version("markitdown")
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    if version not in MARKITDOWN_PDF_VERSIONS:
+        logger.info(f"PDFs are not sharded on the parse pool with markitdown {version}")
+        return False
+    return True
+
+
+def _init_worker(memory_limit_bytes: int) -> None:
+    if memory_limit_bytes <= 0:
+        return
+    try:
+        import resource
+
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = memory_limit_bytes if hard == resource.RLIM_INFINITY else min(memory_limit_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Failed to set the memory limit of a parse worker: {e}")
+
+
+def _convert_md_shard(shard: Tuple[str, dict[str, Any]]) -> List[Part]:
+    text, metadata = shard
+    return convert_md(text, metadata)
+
+
+def _extract_pdf_text(shard: Tuple[str, int, int]) -> str:
+    from pdfminer.high_level import extract_text
+
+    path, start, end = shard
+    return extract_text(path, page_numbers=range(start, end))
+
+
+def pdf_page_count(path: str | Path) -> Optional[int]:
+    import pypdfium2 as pdfium
+
+    try:
+        pdf_doc = pdfium.PdfDocument(str(path))
+    except Exception as e:
+        logger.warning(f"Failed to read the page count of {path}: {e}")
+        return None
+    try:
+        return len(pdf_doc)
+    finally:
+        pdf_doc.close()
+
+
+class ParsePool:
+    """Shards the parsing of large documents across worker processes."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        memory_limit_mb: int = 2048,
+        max_tasks_per_worker: int = 100,
+        pdf_pages_per_shard: int = 16,
+        markdown_chars_per_shard: int = 200000,
+    ):
+        self.max_workers = max_workers
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.pdf_pages_per_shard = max(1, pdf_pages_per_shard)
+        self.markdown_chars_per_shard = max(1, markdown_chars_per_shard)
+        self.fallbacks = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_mb * 1024 * 1024,),
+                    max_tasks_per_child=self.max_tasks_per_worker or None,
+                )
+            return self._executor
+
+    def _map(self, fn: Callable, shards: Sequence[Any]) -> Optional[List[Any]]:
+        """Results of fn over the shards in order, None if a shard failed."""
+        try:
+            return list(self._get_executor().map(fn, shards))
+        except Exception as e:
+            logger.warning(f"Parse pool failed on {len(shards)} shards, parsing in-process instead: {e!r}")
+            self.fallbacks += 1
+            if isinstance(e, BrokenProcessPool):
+                self.shutdown()
+            return None
+
+    def parse_md(self, input_md: str, metadata: dict[str, Any]) -> List[Part]:
+        """Same parts as aperag.docparser.parse_md.parse_md, large documents converted by sections."""
+        input_md, asset_bin_parts = extract_data_uri(input_md, metadata)
+        md_part = MarkdownPart(markdown=input_md, metadata=metadata)
+
+        shards = split_markdown(input_md, self.markdown_chars_per_shard)
+        results = None
+        if len(shards) > 1:
+            results = self._map(_convert_md_shard, [(text, metadata) for _, text in shards])
+        if results is None:
+            parts = convert_md(input_md, metadata)
+        else:
+            parts = [
+                part
+                for (start, _), shard_parts in zip(shards, results)
+                for part in shift_source_maps(shard_parts, start)
+            ]
+
+        return [md_part] + asset_bin_parts + parts
+
+    def pdf_to_markdown(self, path: str | Path) -> Optional[str]:
+        """
+        Markdown of a PDF as converted by MarkItDown, extracted by page ranges.
+
+        Returns:
+            None when the PDF is too small to be sharded, a shard failed, or the installed MarkItDown
+            is not one of MARKITDOWN_PDF_VERSIONS
+        """
+        if not markitdown_pdf_is_replicated():
+            return None
+        page_count = pdf_page_count(path)
+        if page_count is None or page_count < 2 * self.pdf_pages_per_shard:
+            return None
+        shards = [
+            (str(path), start, min(start + self.pdf_pages_per_shard, page_count))
+            for start in range(0, page_count, self.pdf_pages_per_shard)
+        ]
+        texts = self._map(_extract_pdf_text, shards)
+        if texts is None:
+            return None
+        return normalize_markdown("".join(texts))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_default_parse_pool: Optional[ParsePool] = None
+_default_parse_pool_lock = threading.Lock()
+
+
+def get_default_parse_pool() -> Optional[ParsePool]:
+    """Process-wide parse pool, None when PARSE_POOL_WORKERS is 0."""
+    global _default_parse_pool
+    from aperag.config import settings
+
+    if settings.parse_pool_workers <= 0:
+        return None
+    if _default_parse_pool is None:
+        with _default_parse_pool_lock:
+            if _default_parse_pool is None:
+                _default_parse_pool = ParsePool(
+                    max_workers=settings.parse_pool_workers,
+                    memory_limit_mb=settings.parse_pool_memory_limit_mb,
+                    max_tasks_per_worker=settings.parse_pool_max_tasks_per_worker,
+                    pdf_pages_per_shard=settings.parse_pool_pdf_pages_per_shard,
+                    markdown_chars_per_shard=settings.parse_pool_markdown_chars_per_shard,
+                )
+    return _default_parse_pool
@@ -87,10 +87,10 @@ class VectorSearchService:
             vectordb_ctx["collection"] = collection_name
             context_manager = ContextManager(collection_name, embedding_model, settings.vector_db_type, vectordb_ctx)
 
-            vector = embedding_model.embed_query(query)
+            vector = await embedding_model.aembed_query(query)
 
             # Query vector database for vector and vision indexes only (excluding summary)
-            results = context_manager.query(
+            results = await context_manager.aquery(
                 query,
                 score_threshold=similarity_threshold,
                 topk=top_k,
@@ -135,7 +135,7 @@ class VisionSearchService:
             vectordb_ctx["collection"] = collection_name
             context_manager = ContextManager(collection_name, embedding_model, settings.vector_db_type, vectordb_ctx)
 
-            vector = embedding_model.embed_query(query)
+            vector = await embedding_model.aembed_query(query)
 
             # Vision indexing might produce two types of vectors for the same image: multimodal embedding and text embedding,
             # which could lead to the same document chunk being retrieved twice. To ensure the number of unique results
@@ -143,7 +143,7 @@ class VisionSearchService:
             top_k = top_k * 2
 
             # Query vector database for vision vectors only
-            results = context_manager.query(
+            results = await context_manager.aquery(
                 query, score_threshold=similarity_threshold, topk=top_k, vector=vector, index_types=["vision"]
             )
 
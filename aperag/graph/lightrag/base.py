@@ -58,6 +58,8 @@ class TextChunkSchema(TypedDict):
 
 T = TypeVar("T")
 
+LabelMatch = Literal["prefix", "fuzzy"]
+
 
 @dataclass
 class QueryParam:
@@ -113,6 +115,11 @@ class QueryParam:
     ids: list[str] | None = None
     """List of ids to filter the results."""
 
+    ef_search: int | None = None
+    """Candidate list size of approximate (HNSW) vector search, traded against latency.
+    None uses the storage default. Never lower than top_k.
+    """
+
     model_func: Callable[..., object] | None = None
     """Optional override for the LLM model function to use for this specific query.
     If provided, this will be used instead of the global model function.
@@ -180,8 +187,13 @@ class BaseVectorStorage(StorageNameSpace, ABC):
     meta_fields: set[str] = field(default_factory=set)
 
     @abstractmethod
-    async def query(self, query: str, top_k: int, ids: list[str] | None = None) -> list[dict[str, Any]]:
-        """Query the vector storage and retrieve top_k results."""
+    async def query(
+        self, query: str, top_k: int, ids: list[str] | None = None, ef_search: int | None = None
+    ) -> list[dict[str, Any]]:
+        """Query the vector storage and retrieve top_k results.
+
+        ef_search tunes the recall of approximate indexes, storages without one ignore it.
+        """
 
     @abstractmethod
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
@@ -226,11 +238,12 @@ class BaseVectorStorage(StorageNameSpace, ABC):
         pass
 
     @abstractmethod
-    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+    async def get_by_ids(self, ids: list[str], fields: list[str] | None = None) -> list[dict[str, Any]]:
         """Get multiple vector data by their IDs
 
         Args:
             ids: List of unique identifiers
+            fields: Only return these fields (and "id"), all fields when None
 
         Returns:
             List of vector data objects that were found
@@ -260,8 +273,13 @@ class BaseKVStorage(StorageNameSpace, ABC):
         """Get value by id"""
 
     @abstractmethod
-    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Get values by ids"""
+    async def get_by_ids(self, ids: list[str], fields: list[str] | None = None) -> list[dict[str, Any]]:
+        """Get values by ids, missing ids are skipped
+
+        Args:
+            ids: The ids to get
+            fields: Only return these fields (and "id"), all fields when None
+        """
 
     @abstractmethod
     async def filter_keys(self, keys: set[str]) -> set[str]:
@@ -404,6 +422,20 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             result[node_id] = degree
         return result
 
+    async def get_top_degree_nodes(self, limit: int) -> list[tuple[str, int]]:
+        """Get the (node ID, degree) of the connected nodes with the highest degrees, highest first
+
+        Default implementation scans every label and computes the degrees in pages of 100.
+        Override this method in storage backends that maintain an indexed degree.
+        """
+        labels = await self.get_all_labels()
+        degrees = []
+        for i in range(0, len(labels), 100):
+            batch_degrees = await self.node_degrees_batch(labels[i : i + 100])
+            degrees.extend((label, degree) for label, degree in batch_degrees.items() if degree > 0)
+        degrees.sort(key=lambda item: item[1], reverse=True)
+        return degrees[:limit]
+
     async def edge_degrees_batch(self, edge_pairs: list[tuple[str, str]]) -> dict[tuple[str, str], int]:
         """Edge degrees as a batch using UNWIND also uses node_degrees_batch
 
@@ -475,6 +507,32 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             edge_data: A dictionary of edge properties
         """
 
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """Insert or update nodes as a batch
+
+        Default implementation upserts nodes one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+
+        Args:
+            nodes: A dictionary of node ID to node properties
+        """
+        for node_id, node_data in nodes.items():
+            await self.upsert_node(node_id, node_data)
+
+    async def upsert_edges_batch(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """Insert or update edges as a batch
+
+        Default implementation upserts edges one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+
+        Args:
+            edges: A dictionary of (source node ID, target node ID) to edge properties
+        """
+        for (source_node_id, target_node_id), edge_data in edges.items():
+            await self.upsert_edge(source_node_id, target_node_id, edge_data)
+
     @abstractmethod
     async def delete_node(self, node_id: str) -> None:
         """Delete a node from the graph.
@@ -522,6 +580,36 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             A list of all node labels in the graph, sorted alphabetically
         """
 
+    async def search_labels(
+        self, query: str, limit: int = 50, offset: int = 0, match: LabelMatch = "fuzzy"
+    ) -> list[str]:
+        """Search node labels, best matches first
+
+        match "prefix" finds the labels starting with query, "fuzzy" the labels containing it,
+        plus near misses on the backends that index them (Neo4j matches the start of the words
+        of the labels instead of anywhere). Matching is case-insensitive on all backends.
+
+        Default implementation filters get_all_labels() in memory.
+        Override this method in storage backends with a label index.
+
+        Args:
+            query: Text to search for
+            limit: Maximum number of labels to return
+            offset: Number of matching labels to skip, for pagination
+            match: "prefix" or "fuzzy"
+
+        Returns:
+            Matching labels ordered by exact match, then prefix match, then alphabetically
+        """
+        needle = query.lower()
+        matches = []
+        for label in await self.get_all_labels():
+            lowered = label.lower()
+            if lowered.startswith(needle) if match == "prefix" else needle in lowered:
+                matches.append((lowered != needle, not lowered.startswith(needle), label))
+        matches.sort()
+        return [label for _, _, label in matches[offset : offset + limit]]
+
     @abstractmethod
     async def get_knowledge_graph(self, node_label: str, max_depth: int = 3, max_nodes: int = 1000) -> KnowledgeGraph:
         """
@@ -0,0 +1,199 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Content-addressed cache of LLM entity extraction outputs.
+
+extract_entities stores the raw LLM outputs of a chunk (the initial extraction followed by
+the gleaning rounds) keyed on (model, prompt template hash, language, entity types,
+gleaning rounds, sha256(chunk content)). Re-indexing an unchanged chunk, or the same
+content in another document, replays the stored outputs through the parser and never
+calls the LLM.
+
+An in-process LRU is always the first tier; EXTRACTION_CACHE_BACKEND=redis adds a shared,
+persistent tier visible to every Celery worker. Async callers use aget/aset, which run the
+blocking Redis calls in a thread instead of on the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_REDIS_KEY_PREFIX = "aperag:extraction_cache:"
+
+
+def hash_prompt_templates(*templates: str) -> str:
+    """Hash the prompt templates of an extraction, so that a prompt change invalidates the cache."""
+    digest = hashlib.sha256()
+    for template in templates:
+        digest.update(template.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def make_extraction_cache_key(
+    model: str,
+    prompt_hash: str,
+    language: str,
+    entity_types: Sequence[str],
+    max_gleaning: int,
+    content: str,
+) -> str:
+    """Build the content-addressed cache key of the extraction of one chunk."""
+    params = json.dumps([model, prompt_hash, language, list(entity_types), max_gleaning], ensure_ascii=False)
+    params_digest = hashlib.sha256(params.encode("utf-8")).hexdigest()
+    content_digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{params_digest}:{content_digest}"
+
+
+class ExtractionCacheStats:
+    """Hit/miss counters of one extraction run, reported in the graph index task result."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class ExtractionCache:
+    """Raw extraction outputs by key, in an in-process LRU backed by an optional Redis tier."""
+
+    def __init__(self, max_entries: int = 5000, redis_ttl: Optional[int] = None, redis_client=None):
+        self.max_entries = max_entries
+        # None disables the redis tier, 0 stores entries without expiry
+        self.redis_ttl = redis_ttl
+        self._redis_client = redis_client
+        self._data: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            from aperag.db.redis_manager import RedisConnectionManager
+
+            self._redis_client = RedisConnectionManager.get_sync_client()
+        return self._redis_client
+
+    def get(self, key: str) -> Optional[List[str]]:
+        outputs = self._get_local(key)
+        if outputs is not None or self.redis_ttl is None:
+            return outputs
+        return self._get_redis(key)
+
+    async def aget(self, key: str) -> Optional[List[str]]:
+        outputs = self._get_local(key)
+        if outputs is not None or self.redis_ttl is None:
+            return outputs
+        return await asyncio.to_thread(self._get_redis, key)
+
+    def set(self, key: str, outputs: List[str]) -> None:
+        self._remember(key, outputs)
+        if self.redis_ttl is not None:
+            self._set_redis(key, outputs)
+
+    async def aset(self, key: str, outputs: List[str]) -> None:
+        self._remember(key, outputs)
+        if self.redis_ttl is not None:
+            await asyncio.to_thread(self._set_redis, key, outputs)
+
+    def _get_local(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            outputs = self._data.get(key)
+            if outputs is not None:
+                self._data.move_to_end(key)
+            return outputs
+
+    def _get_redis(self, key: str) -> Optional[List[str]]:
+        try:
+            value = self.redis_client.get(_REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            # The shared tier is best effort, a Redis outage must not break indexing
+            logger.warning(f"Extraction cache redis lookup failed: {e}")
+            return None
+        if value is None:
+            return None
+        outputs = json.loads(value)
+        self._remember(key, outputs)
+        return outputs
+
+    def _set_redis(self, key: str, outputs: List[str]) -> None:
+        try:
+            self.redis_client.set(_REDIS_KEY_PREFIX + key, json.dumps(outputs), ex=self.redis_ttl or None)
+        except Exception as e:
+            logger.warning(f"Extraction cache redis write failed: {e}")
+
+    def _remember(self, key: str, outputs: List[str]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = outputs
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_default_cache: Optional[ExtractionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Get the process-wide extraction cache configured from settings.
+
+    Returns None when EXTRACTION_CACHE_ENABLED is false.
+    """
+    global _default_cache
+    from aperag.config import settings
+
+    if not settings.extraction_cache_enabled:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                if settings.extraction_cache_backend == "redis":
+                    redis_ttl = settings.extraction_cache_ttl
+                elif settings.extraction_cache_backend == "memory":
+                    redis_ttl = None
+                else:
+                    raise ValueError(
+                        f"Unsupported EXTRACTION_CACHE_BACKEND: {settings.extraction_cache_backend}. "
+                        "Supported backends are: memory, redis."
+                    )
+                _default_cache = ExtractionCache(settings.extraction_cache_max_entries, redis_ttl=redis_ttl)
+    return _default_cache
@@ -0,0 +1,220 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Query-time cache of LightRAG graph reads.
+
+CachedGraphStorage wraps a graph storage and caches the batch reads of kg_query: node records
+(get_nodes_batch), node and edge degrees (node_degrees_batch, edge_degrees_batch) and adjacency
+lists (get_nodes_edges_batch). Entries live in a size-bounded, process-wide LRU and are tagged
+with the version of their workspace. Every graph write through the wrapper bumps that version,
+in Redis so that the caches of all API and Celery processes are invalidated. The version reads
+and bumps of the async wrapper are run in a worker thread, off the event loop.
+
+When the version cannot be read from Redis, reads bypass the cache rather than risk stale data.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_REDIS_VERSION_PREFIX = "aperag:graph_cache:version:"
+
+# Cached "not found" results of get_nodes_batch
+_MISSING = object()
+
+
+class GraphReadCache:
+    """Process-wide LRU of graph reads keyed by (workspace, kind, key), each tagged with a workspace version."""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, workspace: str, version: int, kind: str, keys: Sequence[Hashable]) -> Dict[Hashable, Any]:
+        """Return the entries of the given version, missing or stale keys are omitted."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                cache_key = (workspace, kind, key)
+                entry = self._data.get(cache_key)
+                if entry is None:
+                    continue
+                if entry[0] != version:
+                    del self._data[cache_key]
+                    continue
+                self._data.move_to_end(cache_key)
+                found[key] = entry[1]
+        return found
+
+    def set_many(self, workspace: str, version: int, kind: str, items: Dict[Hashable, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for key, value in items.items():
+                cache_key = (workspace, kind, key)
+                self._data[cache_key] = (version, value)
+                self._data.move_to_end(cache_key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class WorkspaceVersions:
+    """Per-workspace graph version counters shared through Redis."""
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from aperag.db.redis_manager import RedisConnectionManager
+
+            self._client = RedisConnectionManager.get_sync_client()
+        return self._client
+
+    def get(self, workspace: str) -> Optional[int]:
+        """Current version of a workspace, None when Redis is unavailable."""
+        try:
+            value = self.client.get(_REDIS_VERSION_PREFIX + workspace)
+        except Exception as e:
+            logger.warning(f"Graph cache version lookup failed: {e}")
+            return None
+        return int(value) if value is not None else 0
+
+    def bump(self, workspace: str) -> None:
+        try:
+            self.client.incr(_REDIS_VERSION_PREFIX + workspace)
+        except Exception as e:
+            logger.warning(f"Graph cache version bump failed for workspace {workspace}: {e}")
+
+    async def aget(self, workspace: str) -> Optional[int]:
+        return await asyncio.to_thread(self.get, workspace)
+
+    async def abump(self, workspace: str) -> None:
+        await asyncio.to_thread(self.bump, workspace)
+
+
+class CachedGraphStorage:
+    """
+    Graph storage wrapper caching the batch reads of kg_query.
+
+    Other reads and all writes are delegated to the wrapped storage, writes bump the workspace version.
+    """
+
+    def __init__(self, storage, cache: GraphReadCache, versions: WorkspaceVersions):
+        self._storage = storage
+        self._cache = cache
+        self._versions = versions
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+    async def _cached(
+        self, kind: str, keys: Sequence[Hashable], fetch: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+    ) -> Dict[Hashable, Any]:
+        workspace = self._storage.workspace
+        # Read the version before the storage, so that a concurrent write makes the fetched entries stale
+        version = await self._versions.aget(workspace)
+        if version is None:
+            return await fetch(list(keys))
+
+        found = self._cache.get_many(workspace, version, kind, keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            fetched = await fetch(missing)
+            items = {key: fetched.get(key, _MISSING) for key in missing}
+            self._cache.set_many(workspace, version, kind, items)
+            found.update(items)
+        return {key: value for key, value in found.items() if value is not _MISSING}
+
+    async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
+        return await self._cached("node", node_ids, self._storage.get_nodes_batch)
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        return await self._cached("degree", node_ids, self._storage.node_degrees_batch)
+
+    async def edge_degrees_batch(self, edge_pairs: list[tuple[str, str]]) -> dict[tuple[str, str], int]:
+        return await self._cached("edge_degree", [tuple(pair) for pair in edge_pairs], self._storage.edge_degrees_batch)
+
+    async def get_nodes_edges_batch(self, node_ids: list[str]) -> dict[str, list[tuple[str, str]]]:
+        return await self._cached("edges", node_ids, self._storage.get_nodes_edges_batch)
+
+    async def _write(self, method: str, *args, **kwargs):
+        try:
+            return await getattr(self._storage, method)(*args, **kwargs)
+        finally:
+            await self._versions.abump(self._storage.workspace)
+
+    async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
+        await self._write("upsert_node", node_id, node_data)
+
+    async def upsert_edge(self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]) -> None:
+        await self._write("upsert_edge", source_node_id, target_node_id, edge_data)
+
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        await self._write("upsert_nodes_batch", nodes)
+
+    async def upsert_edges_batch(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        await self._write("upsert_edges_batch", edges)
+
+    async def delete_node(self, node_id: str) -> None:
+        await self._write("delete_node", node_id)
+
+    async def remove_nodes(self, nodes: list[str]):
+        return await self._write("remove_nodes", nodes)
+
+    async def remove_edges(self, edges: list[tuple[str, str]]):
+        return await self._write("remove_edges", edges)
+
+    async def drop(self) -> dict[str, str]:
+        return await self._write("drop")
+
+
+_default_cache: Optional[GraphReadCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_graph_read_cache() -> GraphReadCache:
+    global _default_cache
+    from aperag.config import settings
+
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = GraphReadCache(settings.graph_query_cache_max_entries)
+    return _default_cache
+
+
+def wrap_graph_storage(storage):
+    """Wrap a graph storage with the process-wide read cache, unless GRAPH_QUERY_CACHE_ENABLED is false."""
+    from aperag.config import settings
+
+    if not settings.graph_query_cache_enabled:
+        return storage
+    return CachedGraphStorage(storage, get_default_graph_read_cache(), WorkspaceVersions())
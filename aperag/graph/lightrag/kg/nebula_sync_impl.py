@@ -33,6 +33,9 @@ Modifications by ApeRAG Team:
 
 import asyncio
 import logging
+import threading
+import time
+from collections import Counter
 from dataclasses import dataclass
 from typing import final
 
@@ -40,13 +43,29 @@ from nebula3.common import ttypes
 
 from aperag.db.nebula_sync_manager import NebulaSyncConnectionManager
 
-from ..base import BaseGraphStorage
+from ..base import BaseGraphStorage, LabelMatch
 from ..types import KnowledgeGraph
 from ..utils import logger
 
 # Set nebula logger level to ERROR to suppress warning logs
 logging.getLogger("nebula3").setLevel(logging.WARNING)
 
+# Max number of UPSERT statements sent in one request by the batch writes
+UPSERT_BATCH_SIZE = 256
+
+# Vertex property holding the number of edges of the vertex, maintained by the edge writes.
+# Spaces created before it existed get it, and a backfill, on their first initialization.
+DEGREE_PROPERTY = "degree"
+DEGREE_INDEX = "base_degree_index"
+# Spaces whose degree property and index are known to be in place, per process
+_degree_ready_spaces: set[str] = set()
+_degree_ready_lock = threading.Lock()
+
+
+def _without_degree(properties: dict) -> dict:
+    """Vertex properties to write, the degree read back with a node is never written over the maintained one."""
+    return {k: v for k, v in properties.items() if k != DEGREE_PROPERTY}
+
 
 def _prepare_nebula_params(params: dict) -> dict:
     """Convert Python values to Nebula ttypes.Value objects."""
@@ -91,6 +110,32 @@ def _quote_vid(vid: str) -> str:
     return f'"{escaped}"'
 
 
+def _build_batched_upserts(items: list[tuple[str, str, dict]]) -> list[tuple[str, dict]]:
+    """
+    Build requests of up to UPSERT_BATCH_SIZE parameterized UPSERT statements.
+
+    Items are (statement head, property prefix, properties), e.g. ('UPSERT VERTEX "a"', "base.", {...}).
+    Like the single-item writes, an UPSERT only sets the given properties and keeps the others.
+    """
+    statements = []
+    for head, prefix, properties in items:
+        if properties:
+            statements.append((head, prefix, properties))
+
+    requests = []
+    for start in range(0, len(statements), UPSERT_BATCH_SIZE):
+        queries = []
+        params = {}
+        for i, (head, prefix, properties) in enumerate(statements[start : start + UPSERT_BATCH_SIZE]):
+            set_items = []
+            for name, value in properties.items():
+                params[f"p{i}_{name}"] = value
+                set_items.append(f"{prefix}{name} = $p{i}_{name}")
+            queries.append(f"{head} SET {', '.join(set_items)}")
+        requests.append(("; ".join(queries), params))
+    return requests
+
+
 def _convert_nebula_value(value) -> any:
     """Convert a single Nebula Value to Python type."""
     if value.is_null():
@@ -178,6 +223,7 @@ class NebulaSyncStorage(BaseGraphStorage):
             embedding_func=None,
         )
         self._space_name = None
+        self._stored_degree = False
 
     def _convert_nebula_value_map(self, value_map: dict) -> dict[str, any]:
         """统一的类型转换函数"""
@@ -197,6 +243,7 @@ class NebulaSyncStorage(BaseGraphStorage):
         self._space_name = await asyncio.to_thread(
             NebulaSyncConnectionManager.prepare_space, self.workspace, max_wait=30, fail_on_timeout=True
         )
+        self._stored_degree = await asyncio.to_thread(self._sync_ensure_stored_degree)
 
         logger.debug(f"NebulaSyncStorage initialized for workspace '{self.workspace}', space '{self._space_name}'")
 
@@ -205,6 +252,178 @@ class NebulaSyncStorage(BaseGraphStorage):
         # Nothing to clean up - connection managed at worker level
         logger.debug(f"NebulaSyncStorage finalized for workspace '{self.workspace}'")
 
+    def _sync_ensure_stored_degree(self) -> bool:
+        """
+        Whether the vertices of the space store their degree, adding it to spaces created before.
+
+        Such spaces get the tag property, a backfill of the degree of every vertex, and then the
+        index, which also marks the backfill as done. If this fails, degrees are computed on read
+        and the backfill is retried by the next initialization.
+        """
+        with _degree_ready_lock:
+            if self._space_name in _degree_ready_spaces:
+                return True
+
+        try:
+            with NebulaSyncConnectionManager.get_session(space=self._space_name) as session:
+                result = session.execute("SHOW TAG INDEXES")
+                if not result.is_succeeded():
+                    raise RuntimeError(f"Failed to show tag indexes: {_safe_error_msg(result)}")
+                if not any(row.values()[0].as_string() == DEGREE_INDEX for row in result):
+                    self._sync_backfill_degrees(session)
+        except Exception as e:
+            logger.warning(f"Degrees of space {self._space_name} are computed on read: {e}")
+            return False
+
+        with _degree_ready_lock:
+            _degree_ready_spaces.add(self._space_name)
+        return True
+
+    def _sync_has_degree_property(self, session) -> bool:
+        """Whether the base tag of the space has the maintained degree property."""
+        result = session.execute("DESCRIBE TAG base")
+        if not result.is_succeeded():
+            raise RuntimeError(f"Failed to describe tag base: {_safe_error_msg(result)}")
+        return any(row.values()[0].as_string() == DEGREE_PROPERTY for row in result)
+
+    def _sync_backfill_degrees(self, session, max_wait: float = 30) -> None:
+        """Add the degree property to the base tag, store the degree of every vertex and index it."""
+        if not self._sync_has_degree_property(session):
+            result = session.execute(f"ALTER TAG base ADD ({DEGREE_PROPERTY} int64 DEFAULT 0)")
+            if not result.is_succeeded():
+                raise RuntimeError(f"Failed to add the degree property: {_safe_error_msg(result)}")
+            # Schema changes are applied asynchronously
+            deadline = time.time() + max_wait
+            while not self._sync_has_degree_property(session):
+                if time.time() > deadline:
+                    raise RuntimeError("the degree property was not added in time")
+                time.sleep(0.5)
+
+        result = session.execute("LOOKUP ON base YIELD id(vertex) AS vid")
+        if not result.is_succeeded():
+            raise RuntimeError(f"Failed to list vertices: {_safe_error_msg(result)}")
+        node_ids = [row.values()[0].as_string() for row in result]
+        logger.info(f"Backfilling the degrees of {len(node_ids)} vertices of space {self._space_name}")
+        self._sync_update_degrees(session, self._sync_count_degrees(session, node_ids))
+
+        for query in (
+            f"CREATE TAG INDEX IF NOT EXISTS {DEGREE_INDEX} ON base({DEGREE_PROPERTY})",
+            f"REBUILD TAG INDEX {DEGREE_INDEX}",
+        ):
+            result = session.execute(query)
+            if not result.is_succeeded():
+                raise RuntimeError(f"Failed to index degrees: {_safe_error_msg(result)}")
+
+    def _sync_count_degrees(self, session, node_ids: list[str]) -> dict[str, int]:
+        """Count the edges of nodes, processing up to 100 nodes per query."""
+        degrees = {}
+        batch_size = 100
+
+        for i in range(0, len(node_ids), batch_size):
+            batch_ids = node_ids[i : i + batch_size]
+
+            # Use MATCH syntax for more reliable batch degree calculation
+            query = """
+            UNWIND $node_ids AS node_id 
+            MATCH (v)-[r]-(other) 
+            WHERE id(v) == node_id 
+            RETURN node_id, COUNT(r) AS degree
+            """
+            params = {"node_ids": batch_ids}
+            nebula_params = _prepare_nebula_params(params)
+            result = session.execute_parameter(query, nebula_params)
+
+            if result.is_succeeded():
+                for row in result:
+                    node_id = row.values()[0].as_string()
+                    degree = row.values()[1].as_int()
+                    degrees[node_id] = degree
+
+            # Set degree 0 for nodes not found in the result
+            for node_id in batch_ids:
+                if node_id not in degrees:
+                    degrees[node_id] = 0
+
+        return degrees
+
+    def _sync_existing_vertices(self, session, node_ids) -> set[str]:
+        existing = set()
+        node_ids = list(dict.fromkeys(node_ids))
+        for i in range(0, len(node_ids), 100):
+            query = "MATCH (v:base) WHERE id(v) IN $node_ids RETURN id(v) AS vid"
+            result = session.execute_parameter(query, _prepare_nebula_params({"node_ids": node_ids[i : i + 100]}))
+            if not result.is_succeeded():
+                raise RuntimeError(f"Failed to look up vertices: {_safe_error_msg(result)}")
+            existing.update(row.values()[0].as_string() for row in result)
+        return existing
+
+    def _sync_existing_edges(self, session, pairs: list[tuple[str, str]]) -> set[tuple[str, str]]:
+        existing = set()
+        for i in range(0, len(pairs), 100):
+            # FETCH cannot take VIDs as parameters
+            keys = ", ".join(f"{_quote_vid(source)} -> {_quote_vid(target)}" for source, target in pairs[i : i + 100])
+            result = session.execute(f"FETCH PROP ON DIRECTED {keys} YIELD src(edge) AS src, dst(edge) AS dst")
+            if not result.is_succeeded():
+                raise RuntimeError(f"Failed to look up edges: {_safe_error_msg(result)}")
+            existing.update((row.values()[0].as_string(), row.values()[1].as_string()) for row in result)
+        return existing
+
+    def _sync_update_degrees(self, session, degrees: dict[str, int], increment: bool = False) -> None:
+        """Set, or add to with increment, the stored degree of the existing vertices among degrees."""
+        degrees = {vid: degree for vid, degree in degrees.items() if degree or not increment}
+        existing = self._sync_existing_vertices(session, degrees) if degrees else set()
+        value = f"{DEGREE_PROPERTY} + " if increment else ""
+        # UPDATE VERTEX cannot take VIDs as parameters, up to UPSERT_BATCH_SIZE statements per request
+        statements = [
+            f"UPDATE VERTEX ON base {_quote_vid(vid)} SET {DEGREE_PROPERTY} = {value}{int(degree)}"
+            for vid, degree in degrees.items()
+            if vid in existing
+        ]
+        for i in range(0, len(statements), UPSERT_BATCH_SIZE):
+            result = session.execute("; ".join(statements[i : i + UPSERT_BATCH_SIZE]))
+            if not result.is_succeeded():
+                raise RuntimeError(f"Failed to update degrees: {_safe_error_msg(result)}")
+
+    def _sync_add_edge_degrees(self, session, pairs, sign: int) -> None:
+        """Add sign to the degrees of both endpoints of every edge in pairs."""
+        deltas = Counter()
+        for source, target in pairs:
+            deltas[source] += sign
+            deltas[target] += sign
+        self._sync_update_degrees(session, deltas, increment=True)
+
+    def _sync_count_new_vertices(self, session, new_vertices) -> None:
+        """A vertex inserted after its edges starts with degree 0, count them."""
+        if new_vertices:
+            degrees = self._sync_count_degrees(session, list(new_vertices))
+            self._sync_update_degrees(session, {vid: degree for vid, degree in degrees.items() if degree})
+
+    def _sync_neighbor_edges(self, session, node_ids: list[str]) -> dict[str, Counter]:
+        """Number of edges between every node of node_ids and each of its neighbors."""
+        neighbors = {}
+        for i in range(0, len(node_ids), 100):
+            query = (
+                "MATCH (v)-[r]-(other) WHERE id(v) IN $node_ids "
+                "RETURN id(v) AS vid, id(other) AS other, count(r) AS edges"
+            )
+            result = session.execute_parameter(query, _prepare_nebula_params({"node_ids": node_ids[i : i + 100]}))
+            if not result.is_succeeded():
+                raise RuntimeError(f"Failed to look up neighbors: {_safe_error_msg(result)}")
+            for row in result:
+                vid, other = row.values()[0].as_string(), row.values()[1].as_string()
+                neighbors.setdefault(vid, Counter())[other] += row.values()[2].as_int()
+        return neighbors
+
+    def _sync_remove_neighbor_degrees(self, session, neighbors: dict[str, Counter], deleted) -> None:
+        """Subtract the edges to the deleted nodes from the degrees of their neighbors."""
+        deleted = set(deleted)
+        deltas = Counter()
+        for vid in deleted:
+            for other, edges in neighbors.get(vid, {}).items():
+                if other not in deleted:
+                    deltas[other] -= edges
+        self._sync_update_degrees(session, deltas, increment=True)
+
     async def has_node(self, node_id: str) -> bool:
         """Check if a node exists using MATCH syntax (Nebula supports both nGQL and Cypher-like syntax)."""
 
@@ -305,6 +524,9 @@ class NebulaSyncStorage(BaseGraphStorage):
     async def node_degree(self, node_id: str) -> int:
         """Get the degree of a node."""
 
+        if self._stored_degree:
+            return (await self.node_degrees_batch([node_id]))[node_id]
+
         def _sync_node_degree():
             with NebulaSyncConnectionManager.get_session(space=self._space_name) as session:
                 # Use MATCH syntax for more reliable degree calculation
@@ -325,47 +547,49 @@ class NebulaSyncStorage(BaseGraphStorage):
 
     async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
         """
-        Optimized batch degree calculation using batch queries.
-        Processes up to 100 nodes per batch.
+        Batch degree retrieval, reading the maintained degree property or counting the edges
+        on spaces without it. Processes up to 100 nodes per batch.
         """
 
         def _sync_node_degrees_batch():
             with NebulaSyncConnectionManager.get_session(space=self._space_name) as session:
                 if not node_ids:
                     return {}
-
-                degrees = {}
-                batch_size = 100
-
-                for i in range(0, len(node_ids), batch_size):
-                    batch_ids = node_ids[i : i + batch_size]
-
-                    # Use MATCH syntax for more reliable batch degree calculation
-                    query = """
-                    UNWIND $node_ids AS node_id 
-                    MATCH (v)-[r]-(other) 
-                    WHERE id(v) == node_id 
-                    RETURN node_id, COUNT(r) AS degree
-                    """
-                    params = {"node_ids": batch_ids}
-                    nebula_params = _prepare_nebula_params(params)
-                    result = session.execute_parameter(query, nebula_params)
-
+                if not self._stored_degree:
+                    return self._sync_count_degrees(session, node_ids)
+
+                degrees = {node_id: 0 for node_id in node_ids}
+                for i in range(0, len(node_ids), 100):
+                    query = f"MATCH (v:base) WHERE id(v) IN $node_ids RETURN id(v) AS vid, v.base.{DEGREE_PROPERTY}"
+                    params = _prepare_nebula_params({"node_ids": node_ids[i : i + 100]})
+                    result = session.execute_parameter(query, params)
                     if result.is_succeeded():
                         for row in result:
-                            node_id = row.values()[0].as_string()
-                            degree = row.values()[1].as_int()
-                            degrees[node_id] = degree
-
-                    # Set degree 0 for nodes not found in the result
-                    for node_id in batch_ids:
-                        if node_id not in degrees:
-                            degrees[node_id] = 0
-
+                            degree = _convert_nebula_value(row.values()[1])
+                            degrees[row.values()[0].as_string()] = degree or 0
                 return degrees
 
         return await asyncio.to_thread(_sync_node_degrees_batch)
 
+    async def get_top_degree_nodes(self, limit: int) -> list[tuple[str, int]]:
+        """Get the connected nodes with the highest degrees using the degree tag index."""
+        if not self._stored_degree:
+            return await super().get_top_degree_nodes(limit)
+
+        def _sync_get_top_degree_nodes():
+            with NebulaSyncConnectionManager.get_session(space=self._space_name) as session:
+                query = (
+                    f"LOOKUP ON base WHERE base.{DEGREE_PROPERTY} > 0 "
+                    f"YIELD id(vertex) AS vid, properties(vertex).{DEGREE_PROPERTY} AS degree "
+                    f"| ORDER BY $-.degree DESC | LIMIT {int(limit)}"
+                )
+                result = session.execute(query)
+                if not result.is_succeeded():
+                    raise RuntimeError(f"Failed to get top degree nodes: {_safe_error_msg(result)}")
+                return [(row.values()[0].as_string(), row.values()[1].as_int()) for row in result]
+
+        return await asyncio.to_thread(_sync_get_top_degree_nodes)
+
     async def edge_degree(self, src_id: str, tgt_id: str) -> int:
         """Get the total degree of two nodes."""
         src_degree = await self.node_degree(src_id)
@@ -590,7 +814,7 @@ class NebulaSyncStorage(BaseGraphStorage):
                 prop_names = []
                 param_dict = {"node_id": node_id}
 
-                for key, value in node_data.items():
+                for key, value in _without_degree(node_data).items():
                     if value is not None:
                         prop_names.append(key)
                         param_dict[f"prop_{key}"] = value
@@ -604,6 +828,9 @@ class NebulaSyncStorage(BaseGraphStorage):
                 # VID cannot be parameterized in UPSERT statements
                 # Use safe VID quoting to handle special characters properly
                 node_id_quoted = _quote_vid(node_id)
+                new_vertices = set()
+                if self._stored_degree:
+                    new_vertices = {node_id} - self._sync_existing_vertices(session, [node_id])
 
                 # Build SET clause with parameterized values
                 set_items = []
@@ -622,6 +849,8 @@ class NebulaSyncStorage(BaseGraphStorage):
                     logger.error(f"Failed to upsert node {node_id}: {_safe_error_msg(result)}")
                     raise RuntimeError(f"Failed to upsert node: {_safe_error_msg(result)}")
 
+                self._sync_count_new_vertices(session, new_vertices)
+
                 logger.debug(f"Upserted node with id '{node_id}'")
 
         return await asyncio.to_thread(_sync_upsert_node)
@@ -652,6 +881,12 @@ class NebulaSyncStorage(BaseGraphStorage):
 
                 set_clause = ", ".join(set_clauses)
 
+                # Only a new edge changes the degrees of its endpoints
+                pair = (source_node_id, target_node_id)
+                new_edges = []
+                if self._stored_degree and pair not in self._sync_existing_edges(session, [pair]):
+                    new_edges = [pair]
+
                 # Use correct UPSERT EDGE syntax: UPSERT EDGE "src" -> "dst" OF edge_type SET ...
                 query = f"UPSERT EDGE {source_quoted} -> {target_quoted} OF DIRECTED SET {set_clause}"
 
@@ -669,10 +904,78 @@ class NebulaSyncStorage(BaseGraphStorage):
                     )
                     raise RuntimeError(f"Failed to upsert edge: {_safe_error_msg(result)}")
 
+                self._sync_add_edge_degrees(session, new_edges, 1)
+
                 logger.debug(f"Successfully upserted edge: '{source_node_id}' -> '{target_node_id}'")
 
         return await asyncio.to_thread(_sync_upsert_edge)
 
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Upsert multiple nodes, sending their UPSERT VERTEX statements UPSERT_BATCH_SIZE per request.
+
+        As with upsert_node, only the non-None properties are set and the others are kept.
+        """
+        if not nodes:
+            return
+
+        def _sync_upsert_nodes_batch():
+            items = []
+            for node_id, node_data in nodes.items():
+                if "entity_id" not in node_data:
+                    raise ValueError("Nebula: node properties must contain an 'entity_id' field")
+                items.append(
+                    (
+                        f"UPSERT VERTEX {_quote_vid(node_id)}",
+                        "base.",
+                        {k: v for k, v in _without_degree(node_data).items() if v is not None},
+                    )
+                )
+
+            with NebulaSyncConnectionManager.get_session(space=self._space_name) as session:
+                new_vertices = set()
+                if self._stored_degree:
+                    new_vertices = set(nodes) - self._sync_existing_vertices(session, list(nodes))
+                for query, params in _build_batched_upserts(items):
+                    result = session.execute_parameter(query, _prepare_nebula_params(params))
+                    if not result.is_succeeded():
+                        logger.error(f"Failed to upsert nodes: {_safe_error_msg(result)}")
+                        raise RuntimeError(f"Failed to upsert nodes: {_safe_error_msg(result)}")
+                self._sync_count_new_vertices(session, new_vertices)
+                logger.debug(f"Upserted {len(nodes)} nodes")
+
+        return await asyncio.to_thread(_sync_upsert_nodes_batch)
+
+    async def upsert_edges_batch(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """Upsert multiple edges, sending their UPSERT EDGE statements UPSERT_BATCH_SIZE per request."""
+        if not edges:
+            return
+
+        def _sync_upsert_edges_batch():
+            items = [
+                (
+                    f"UPSERT EDGE {_quote_vid(source)} -> {_quote_vid(target)} OF DIRECTED",
+                    "",
+                    {k: v for k, v in edge_data.items() if v is not None},
+                )
+                for (source, target), edge_data in edges.items()
+            ]
+
+            with NebulaSyncConnectionManager.get_session(space=self._space_name) as session:
+                new_edges = []
+                if self._stored_degree:
+                    existing = self._sync_existing_edges(session, list(edges))
+                    new_edges = [pair for pair in edges if pair not in existing]
+                for query, params in _build_batched_upserts(items):
+                    result = session.execute_parameter(query, _prepare_nebula_params(params))
+                    if not result.is_succeeded():
+                        logger.error(f"Failed to upsert edges: {_safe_error_msg(result)}")
+                        raise RuntimeError(f"Failed to upsert edges: {_safe_error_msg(result)}")
+                self._sync_add_edge_degrees(session, new_edges, 1)
+                logger.debug(f"Upserted {len(edges)} edges")
+
+        return await asyncio.to_thread(_sync_upsert_edges_batch)
+
     def _sync_check_node_exists(self, node_id: str, session) -> bool:
         """Synchronous helper to check if a node exists using parameterized query."""
         query = "MATCH (v:base) WHERE id(v) == $node_id RETURN v LIMIT 1"
@@ -712,6 +1015,49 @@ class NebulaSyncStorage(BaseGraphStorage):
 
         return await asyncio.to_thread(_sync_get_all_labels)
 
+    async def search_labels(
+        self, query: str, limit: int = 50, offset: int = 0, match: LabelMatch = "fuzzy"
+    ) -> list[str]:
+        """
+        Prefix search with range scans of the entity_id tag index, case-insensitive.
+
+        The index is case-sensitive, so it is scanned for each case of the first character of the
+        query and the labels in these ranges are matched on their lowercase form. Fuzzy search would
+        need a full-text (Elasticsearch) listener on the space, so it falls back to filtering all labels.
+        """
+        if match != "prefix" or not query:
+            return await super().search_labels(query, limit, offset, match)
+
+        needle = query.lower()
+        first_chars = {char for char in (query[0], query[0].lower(), query[0].upper()) if len(char) == 1}
+
+        def _sync_search_labels():
+            matches = []
+            with NebulaSyncConnectionManager.get_session(space=self._space_name) as session:
+                for first_char in sorted(first_chars):
+                    # The range on the indexed property is pushed down to an index scan
+                    query_text = f"""
+                    MATCH (v:base)
+                    WHERE v.base.entity_id >= $low AND v.base.entity_id < $high
+                        AND toLower(v.base.entity_id) STARTS WITH $needle
+                    RETURN v.base.entity_id AS label,
+                        CASE WHEN toLower(v.base.entity_id) == $needle THEN 0 ELSE 1 END AS rank
+                    ORDER BY rank, label
+                    LIMIT {int(offset) + int(limit)}
+                    """
+                    params = _prepare_nebula_params(
+                        {"low": first_char, "high": first_char + "\U0010ffff", "needle": needle}
+                    )
+                    result = session.execute_parameter(query_text, params)
+                    if not result.is_succeeded():
+                        raise RuntimeError(f"Failed to search labels: {_safe_error_msg(result)}")
+                    matches.extend((row.values()[1].as_int(), row.values()[0].as_string()) for row in result)
+            # Exact matches first, then alphabetically, as the ranges are merged
+            matches.sort()
+            return [label for _, label in matches[offset : offset + limit]]
+
+        return await asyncio.to_thread(_sync_search_labels)
+
     async def delete_node(self, node_id: str) -> None:
         """
         Delete a node using nGQL syntax.
@@ -722,6 +1068,7 @@ class NebulaSyncStorage(BaseGraphStorage):
             with NebulaSyncConnectionManager.get_session(space=self._space_name) as session:
                 # VID cannot be parameterized in DELETE statements
                 # Use safe VID quoting to handle special characters properly
+                neighbors = self._sync_neighbor_edges(session, [node_id]) if self._stored_degree else {}
                 node_id_quoted = _quote_vid(node_id)
                 query = f"DELETE VERTEX {node_id_quoted} WITH EDGE"
                 result = session.execute(query)
@@ -729,6 +1076,7 @@ class NebulaSyncStorage(BaseGraphStorage):
                 if not result.is_succeeded():
                     logger.error(f"Failed to delete node {node_id}: {_safe_error_msg(result)}")
                     raise RuntimeError(f"Failed to delete node: {_safe_error_msg(result)}")
+                self._sync_remove_neighbor_degrees(session, neighbors, [node_id])
 
                 logger.debug(f"Deleted node with id '{node_id}'")
 
@@ -745,6 +1093,9 @@ class NebulaSyncStorage(BaseGraphStorage):
                 if not batch_nodes:
                     return
 
+                neighbors = self._sync_neighbor_edges(session, batch_nodes) if self._stored_degree else {}
+                deleted = []
+
                 # For very small batches, use individual deletes to avoid query plan depth issues
                 for node_id in batch_nodes:
                     node_id_quoted = _quote_vid(node_id)
@@ -755,8 +1106,10 @@ class NebulaSyncStorage(BaseGraphStorage):
                         logger.error(f"Failed to delete node {node_id}: {_safe_error_msg(result)}")
                         # Continue with other nodes instead of raising exception
                     else:
+                        deleted.append(node_id)
                         logger.debug(f"Successfully deleted node {node_id}")
 
+                self._sync_remove_neighbor_degrees(session, neighbors, deleted)
                 logger.debug(f"Processed deletion of {len(batch_nodes)} nodes")
 
         # Process in very small batches of 10 to avoid query plan tree depth limit
@@ -776,6 +1129,10 @@ class NebulaSyncStorage(BaseGraphStorage):
                 if not batch_edges:
                     return
 
+                # Only the edges that existed change the degrees of their endpoints
+                existing = self._sync_existing_edges(session, batch_edges) if self._stored_degree else set()
+                deleted = []
+
                 # For very small batches, use individual deletes to avoid query plan depth issues
                 for source, target in batch_edges:
                     source_quoted = _quote_vid(source)
@@ -787,8 +1144,12 @@ class NebulaSyncStorage(BaseGraphStorage):
                         logger.error(f"Failed to delete edge {source} -> {target}: {_safe_error_msg(result)}")
                         # Continue with other edges instead of raising exception
                     else:
+                        if (source, target) in existing:
+                            existing.discard((source, target))
+                            deleted.append((source, target))
                         logger.debug(f"Successfully deleted edge {source} -> {target}")
 
+                self._sync_add_edge_degrees(session, deleted, -1)
                 logger.debug(f"Processed deletion of {len(batch_edges)} edges")
 
         # Process in very small batches of 10 to avoid query plan tree depth limit
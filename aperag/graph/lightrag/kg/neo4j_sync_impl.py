@@ -33,6 +33,8 @@ Modifications by ApeRAG Team:
 
 import asyncio
 import logging
+import re
+from collections import defaultdict
 from dataclasses import dataclass
 from typing import final
 
@@ -44,7 +46,7 @@ from tenacity import (
     wait_exponential,
 )
 
-from ..base import BaseGraphStorage
+from ..base import BaseGraphStorage, LabelMatch
 from ..types import KnowledgeGraph, KnowledgeGraphEdge, KnowledgeGraphNode
 from ..utils import logger
 
@@ -57,6 +59,54 @@ except ImportError:
 # Set neo4j logger level to ERROR to suppress warning logs
 logging.getLogger("neo4j").setLevel(logging.ERROR)
 
+# Node property holding the number of relationships of the node, maintained by the edge writes.
+# Nodes written before it existed fall back to counting their relationships.
+DEGREE_PROPERTY = "degree"
+
+
+# Full-text index on entity_id, created by Neo4jSyncConnectionManager.prepare_database
+LABEL_FULLTEXT_INDEX = "base_entity_id_fulltext"
+
+_LUCENE_SPECIAL_CHARS = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+# Characters the standard analyzer of the index emits as one token each: CJK ideographs and hiragana
+_SINGLE_CHAR_TOKEN = "\u3040-\u309f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0002fa1f"
+# Tokens of the standard analyzer (Unicode word boundaries): runs of word characters, kept whole
+# across ".", "'" or ":" between letters and across ".", "'", "," or ";" between digits
+_ANALYZER_TOKEN = re.compile(
+    rf"[{_SINGLE_CHAR_TOKEN}]"
+    rf"|(?:(?![{_SINGLE_CHAR_TOKEN}])\w)+"
+    rf"(?:(?:(?<=[^\W\d])[.'’:](?=[^\W\d{_SINGLE_CHAR_TOKEN}])|(?<=\d)[.'’,;](?=\d))"
+    rf"(?:(?![{_SINGLE_CHAR_TOKEN}])\w)+)*"
+)
+
+
+def _label_search_terms(query: str) -> list[str]:
+    """The query split into the tokens the full-text index holds for the same text, lowercased."""
+    return _ANALYZER_TOKEN.findall(query.lower())
+
+
+def _label_fulltext_query(query: str, match: str) -> str:
+    """
+    Lucene query for search_labels: every term as a prefix, or for fuzzy also within an edit distance.
+
+    Wildcard and fuzzy terms are not analyzed by Lucene, so the query is tokenized here the way the
+    index analyzer tokenizes the labels. Single-character tokens (CJK) only match as prefixes, an
+    edit distance on them would match about every short token.
+    """
+    terms = []
+    for term in _label_search_terms(query):
+        escaped = _LUCENE_SPECIAL_CHARS.sub(r"\\\1", term)
+        if match == "prefix" or re.fullmatch(f"[{_SINGLE_CHAR_TOKEN}]", term):
+            terms.append(f"{escaped}*")
+        else:
+            terms.append(f"({escaped}* OR {escaped}~)")
+    return " AND ".join(terms)
+
+
+def _without_degree(properties: dict) -> dict:
+    """Node properties to write, the degree read back with a node is never written over the maintained one."""
+    return {k: v for k, v in properties.items() if k != DEGREE_PROPERTY}
+
 
 @final
 @dataclass
@@ -174,8 +224,7 @@ class Neo4JSyncStorage(BaseGraphStorage):
             with Neo4jSyncConnectionManager.get_session(database=self._DATABASE) as session:
                 query = """
                     MATCH (n:base {entity_id: $entity_id})
-                    OPTIONAL MATCH (n)-[r]-()
-                    RETURN COUNT(r) AS degree
+                    RETURN coalesce(n.degree, count { (n)--() }) AS degree
                 """
                 result = session.run(query, entity_id=node_id)
                 record = result.single()
@@ -196,7 +245,7 @@ class Neo4JSyncStorage(BaseGraphStorage):
                 query = """
                     UNWIND $node_ids AS id
                     MATCH (n:base {entity_id: id})
-                    RETURN n.entity_id AS entity_id, count { (n)--() } AS degree;
+                    RETURN n.entity_id AS entity_id, coalesce(n.degree, count { (n)--() }) AS degree;
                 """
                 result = session.run(query, node_ids=node_ids)
                 degrees = {}
@@ -214,6 +263,23 @@ class Neo4JSyncStorage(BaseGraphStorage):
 
         return await asyncio.to_thread(_sync_node_degrees_batch)
 
+    async def get_top_degree_nodes(self, limit: int) -> list[tuple[str, int]]:
+        """Get the connected nodes with the highest degrees using the index on the degree property."""
+
+        def _sync_get_top_degree_nodes():
+            with Neo4jSyncConnectionManager.get_session(database=self._DATABASE) as session:
+                query = """
+                    MATCH (n:base)
+                    WHERE n.degree > 0
+                    RETURN n.entity_id AS entity_id, n.degree AS degree
+                    ORDER BY n.degree DESC
+                    LIMIT $limit
+                """
+                result = session.run(query, limit=limit)
+                return [(record["entity_id"], record["degree"]) for record in result]
+
+        return await asyncio.to_thread(_sync_get_top_degree_nodes)
+
     async def edge_degree(self, src_id: str, tgt_id: str) -> int:
         """Get the total degree of two nodes."""
         src_degree = await self.node_degree(src_id)
@@ -391,7 +457,7 @@ class Neo4JSyncStorage(BaseGraphStorage):
         """Upsert a node in the database."""
 
         def _sync_upsert_node():
-            properties = node_data
+            properties = _without_degree(node_data)
             entity_type = properties["entity_type"]
             if "entity_id" not in properties:
                 raise ValueError("Neo4j: node properties must contain an 'entity_id' field")
@@ -400,6 +466,7 @@ class Neo4JSyncStorage(BaseGraphStorage):
                 query = (
                     """
                     MERGE (n:base {entity_id: $entity_id})
+                    ON CREATE SET n.degree = 0
                     SET n += $properties
                     SET n:`%s`
                     """
@@ -433,6 +500,7 @@ class Neo4JSyncStorage(BaseGraphStorage):
                 WITH source
                 MATCH (target:base {entity_id: $target_entity_id})
                 MERGE (source)-[r:DIRECTED]-(target)
+                ON CREATE SET source.degree = count { (source)--() }, target.degree = count { (target)--() }
                 SET r += $properties
                 RETURN r, source, target
                 """
@@ -446,6 +514,86 @@ class Neo4JSyncStorage(BaseGraphStorage):
 
         return await asyncio.to_thread(_sync_upsert_edge)
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """Upsert multiple nodes using UNWIND, one query per entity type as labels cannot be parameterized."""
+        if not nodes:
+            return
+
+        def _sync_upsert_nodes_batch():
+            by_type = defaultdict(list)
+            for node_id, properties in nodes.items():
+                if "entity_id" not in properties:
+                    raise ValueError("Neo4j: node properties must contain an 'entity_id' field")
+                by_type[properties["entity_type"]].append(
+                    {"entity_id": node_id, "properties": _without_degree(properties)}
+                )
+
+            with Neo4jSyncConnectionManager.get_session(database=self._DATABASE) as session:
+                for entity_type, rows in by_type.items():
+                    query = (
+                        """
+                        UNWIND $rows AS row
+                        MERGE (n:base {entity_id: row.entity_id})
+                        ON CREATE SET n.degree = 0
+                        SET n += row.properties
+                        SET n:`%s`
+                        """
+                        % entity_type
+                    )
+                    session.run(query, rows=rows)
+                logger.debug(f"Upserted {len(nodes)} nodes")
+
+        return await asyncio.to_thread(_sync_upsert_nodes_batch)
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_edges_batch(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """Upsert multiple edges using UNWIND."""
+        if not edges:
+            return
+
+        def _sync_upsert_edges_batch():
+            rows = [
+                {"source_entity_id": source, "target_entity_id": target, "properties": properties}
+                for (source, target), properties in edges.items()
+            ]
+            with Neo4jSyncConnectionManager.get_session(database=self._DATABASE) as session:
+                query = """
+                UNWIND $rows AS row
+                MATCH (source:base {entity_id: row.source_entity_id})
+                WITH source, row
+                MATCH (target:base {entity_id: row.target_entity_id})
+                MERGE (source)-[r:DIRECTED]-(target)
+                ON CREATE SET source.degree = count { (source)--() }, target.degree = count { (target)--() }
+                SET r += row.properties
+                """
+                session.run(query, rows=rows)
+                logger.debug(f"Upserted {len(edges)} edges")
+
+        return await asyncio.to_thread(_sync_upsert_edges_batch)
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -575,6 +723,42 @@ class Neo4JSyncStorage(BaseGraphStorage):
 
         return await asyncio.to_thread(_sync_get_all_labels)
 
+    async def search_labels(
+        self, query: str, limit: int = 50, offset: int = 0, match: LabelMatch = "fuzzy"
+    ) -> list[str]:
+        """
+        Search node labels with the full-text index on entity_id, exact matches first.
+
+        The index matches the terms of the query against any word of the labels, so prefix matches
+        are then restricted to the labels starting with the query.
+        """
+        lucene_query = _label_fulltext_query(query, match)
+        if not lucene_query:
+            return []
+        prefix_filter = "WHERE toLower(node.entity_id) STARTS WITH $exact" if match == "prefix" else ""
+
+        def _sync_search_labels():
+            with Neo4jSyncConnectionManager.get_session(database=self._DATABASE) as session:
+                cypher = f"""
+                CALL db.index.fulltext.queryNodes($index, $query) YIELD node, score
+                {prefix_filter}
+                RETURN node.entity_id AS label
+                ORDER BY toLower(node.entity_id) = $exact DESC, score DESC, label
+                SKIP $offset
+                LIMIT $limit
+                """
+                result = session.run(
+                    cypher,
+                    index=LABEL_FULLTEXT_INDEX,
+                    query=lucene_query,
+                    exact=query.lower(),
+                    offset=offset,
+                    limit=limit,
+                )
+                return [record["label"] for record in result]
+
+        return await asyncio.to_thread(_sync_search_labels)
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -594,7 +778,13 @@ class Neo4JSyncStorage(BaseGraphStorage):
             with Neo4jSyncConnectionManager.get_session(database=self._DATABASE) as session:
                 query = """
                 MATCH (n:base {entity_id: $entity_id})
+                OPTIONAL MATCH (n)--(m)
+                WHERE m <> n
+                WITH n, collect(DISTINCT m) AS neighbors
                 DETACH DELETE n
+                WITH neighbors
+                UNWIND neighbors AS m
+                SET m.degree = count { (m)--() }
                 """
                 session.run(query, entity_id=node_id)
                 logger.debug(f"Deleted node with label '{node_id}'")
@@ -614,6 +804,8 @@ class Neo4JSyncStorage(BaseGraphStorage):
                 query = """
                 MATCH (source:base {entity_id: $source_entity_id})-[r]-(target:base {entity_id: $target_entity_id})
                 DELETE r
+                WITH DISTINCT source, target
+                SET source.degree = count { (source)--() }, target.degree = count { (target)--() }
                 """
                 session.run(query, source_entity_id=source, target_entity_id=target)
                 logger.debug(f"Deleted edge from '{source}' to '{target}'")
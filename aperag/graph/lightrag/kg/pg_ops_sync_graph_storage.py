@@ -29,7 +29,7 @@ import asyncio
 from dataclasses import dataclass
 from typing import final
 
-from ..base import BaseGraphStorage
+from ..base import BaseGraphStorage, LabelMatch
 from ..types import KnowledgeGraph, KnowledgeGraphEdge, KnowledgeGraphNode
 from ..utils import logger
 
@@ -85,6 +85,34 @@ class PGOpsSyncGraphStorage(BaseGraphStorage):
         await asyncio.to_thread(_sync_upsert_edge)
         logger.debug(f"Upserted edge from '{source_node_id}' to '{target_node_id}'")
 
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """Upsert multiple nodes with one multi-row INSERT ... ON CONFLICT."""
+        if not nodes:
+            return
+
+        def _sync_upsert_nodes_batch():
+            # Import here to avoid circular imports
+            from aperag.db.ops import db_ops
+
+            db_ops.upsert_graph_nodes_batch(self.workspace, nodes)
+
+        await asyncio.to_thread(_sync_upsert_nodes_batch)
+        logger.debug(f"Upserted {len(nodes)} nodes")
+
+    async def upsert_edges_batch(self, edges: dict[tuple[str, str], dict[str, str]]) -> None:
+        """Upsert multiple edges with one multi-row INSERT ... ON CONFLICT."""
+        if not edges:
+            return
+
+        def _sync_upsert_edges_batch():
+            # Import here to avoid circular imports
+            from aperag.db.ops import db_ops
+
+            db_ops.upsert_graph_edges_batch(self.workspace, edges)
+
+        await asyncio.to_thread(_sync_upsert_edges_batch)
+        logger.debug(f"Upserted {len(edges)} edges")
+
     # Query methods
     async def has_node(self, node_id: str) -> bool:
         """Check if a node exists."""
@@ -183,6 +211,17 @@ class PGOpsSyncGraphStorage(BaseGraphStorage):
 
         return await asyncio.to_thread(_sync_node_degrees_batch)
 
+    async def get_top_degree_nodes(self, limit: int) -> list[tuple[str, int]]:
+        """Get the connected nodes with the highest degrees from the indexed degree column."""
+
+        def _sync_get_top_degree_nodes():
+            # Import here to avoid circular imports
+            from aperag.db.ops import db_ops
+
+            return db_ops.get_graph_top_degree_nodes(self.workspace, limit)
+
+        return await asyncio.to_thread(_sync_get_top_degree_nodes)
+
     async def edge_degrees_batch(self, edge_pairs: list[tuple[str, str]]) -> dict[tuple[str, str], int]:
         """Calculate combined degrees for edges using efficient batch processing."""
 
@@ -282,13 +321,27 @@ class PGOpsSyncGraphStorage(BaseGraphStorage):
 
         return await asyncio.to_thread(_sync_get_all_labels)
 
+    async def search_labels(
+        self, query: str, limit: int = 50, offset: int = 0, match: LabelMatch = "fuzzy"
+    ) -> list[str]:
+        """Search entity names using the trigram index on entity_id."""
+
+        def _sync_search_labels():
+            # Import here to avoid circular imports
+            from aperag.db.ops import db_ops
+
+            return db_ops.search_graph_labels(self.workspace, query, limit, offset, match)
+
+        return await asyncio.to_thread(_sync_search_labels)
+
     async def get_knowledge_graph(self, node_label: str, max_depth: int = 3, max_nodes: int = 1000) -> KnowledgeGraph:
         """
         Get a connected subgraph of nodes matching the specified label.
 
-        Note: This is a simplified implementation that uses the existing Repository pattern.
-        For now, it only supports getting nodes by label pattern and their immediate connections.
-        Full graph traversal with max_depth would require additional Repository methods.
+        The nodes within max_depth hops of the nodes whose names contain node_label are found by
+        a breadth-first search in the database, one query per level. Once max_nodes is reached the
+        highest-degree nodes are kept and the result is marked truncated. node_label "*" returns
+        the max_nodes highest-degree nodes. Edges are the ones between the returned nodes.
         """
 
         def _sync_get_knowledge_graph():
@@ -296,90 +349,56 @@ class PGOpsSyncGraphStorage(BaseGraphStorage):
             from aperag.db.ops import db_ops
 
             result = KnowledgeGraph()
-            MAX_GRAPH_NODES = max_nodes
-
-            # Get all labels first
-            all_labels = db_ops.get_all_graph_labels(self.workspace)
-
-            # Filter based on node_label pattern
-            if node_label == "*":
-                # Get all nodes (limited by max_nodes)
-                matching_labels = all_labels[:MAX_GRAPH_NODES]
-            else:
-                # Filter by pattern (similar to LIKE operation)
-                matching_labels = [label for label in all_labels if node_label in label]
-                if len(matching_labels) > MAX_GRAPH_NODES:
-                    matching_labels = matching_labels[:MAX_GRAPH_NODES]
-
-            # Get node details for each matching label using batch operation
-            if matching_labels:
-                nodes_data = db_ops.get_graph_nodes_batch(self.workspace, matching_labels)
-
-                for entity_id, node_data in nodes_data.items():
-                    # Assemble properties from individual fields
-                    properties = {
-                        "entity_id": node_data["entity_id"],
-                        "entity_type": node_data.get("entity_type"),
-                        "description": node_data.get("description"),
-                        "source_id": node_data.get("source_id"),
-                        "file_path": node_data.get("file_path"),
-                    }
-                    # Only include entity_name if it's different from entity_id and not None
-                    if "entity_name" in node_data and node_data["entity_name"] != entity_id:
-                        properties["entity_name"] = node_data["entity_name"]
-
-                    # Remove None values for cleaner output
-                    properties = {k: v for k, v in properties.items() if v is not None}
-
-                    result.nodes.append(
-                        KnowledgeGraphNode(
-                            id=entity_id,
-                            labels=[node_data.get("entity_type", entity_id)],
-                            properties=properties,
-                        )
+            node_ids, result.is_truncated = db_ops.get_graph_subgraph_node_ids(
+                self.workspace, node_label, max_depth, max_nodes
+            )
+            if not node_ids:
+                return result
+
+            # Get node details using batch operation, in search order
+            nodes_data = db_ops.get_graph_nodes_batch(self.workspace, node_ids)
+            for entity_id in node_ids:
+                node_data = nodes_data.get(entity_id)
+                if node_data is None:
+                    continue
+                # Assemble properties from individual fields
+                properties = {
+                    "entity_id": node_data["entity_id"],
+                    "entity_type": node_data.get("entity_type"),
+                    "description": node_data.get("description"),
+                    "source_id": node_data.get("source_id"),
+                    "file_path": node_data.get("file_path"),
+                }
+                # Only include entity_name if it's different from entity_id and not None
+                if "entity_name" in node_data and node_data["entity_name"] != entity_id:
+                    properties["entity_name"] = node_data["entity_name"]
+
+                # Remove None values for cleaner output
+                properties = {k: v for k, v in properties.items() if v is not None}
+
+                result.nodes.append(
+                    KnowledgeGraphNode(
+                        id=entity_id,
+                        labels=[node_data.get("entity_type", entity_id)],
+                        properties=properties,
                     )
-
-                # Get edges between the selected nodes using batch operation
-                node_names = [node.id for node in result.nodes]
-                if node_names:
-                    nodes_edges = db_ops.get_graph_nodes_edges_batch(self.workspace, node_names)
-
-                    # Collect unique edge pairs that connect nodes in our result set
-                    edge_pairs_to_query = set()
-                    for source_node in node_names:
-                        edges = nodes_edges.get(source_node, [])
-                        for source_entity_id, target_entity_id in edges:
-                            # Only include edges between selected nodes
-                            if source_entity_id in node_names and target_entity_id in node_names:
-                                edge_pairs_to_query.add((source_entity_id, target_entity_id))
-
-                    # Get edge details in batch
-                    if edge_pairs_to_query:
-                        edges_data = db_ops.get_graph_edges_batch(self.workspace, list(edge_pairs_to_query))
-
-                        for (source_entity_id, target_entity_id), edge_data in edges_data.items():
-                            edge_id = f"{source_entity_id}-{target_entity_id}"
-
-                            # Assemble edge properties from individual fields
-                            edge_properties = {
-                                "weight": edge_data.get("weight", 0.0),
-                                "keywords": edge_data.get("keywords"),
-                                "description": edge_data.get("description"),
-                                "source_id": edge_data.get("source_id"),
-                                "file_path": edge_data.get("file_path"),
-                            }
-                            # Remove None values for cleaner output
-                            edge_properties = {k: v for k, v in edge_properties.items() if v is not None}
-
-                            result.edges.append(
-                                KnowledgeGraphEdge(
-                                    id=edge_id,
-                                    type="DIRECTED",
-                                    source=source_entity_id,
-                                    target=target_entity_id,
-                                    properties=edge_properties,
-                                )
-                            )
+                )
+
+            # Get the edges between the selected nodes
+            edges_data = db_ops.get_graph_edges_among(self.workspace, node_ids)
+            for (source_entity_id, target_entity_id), edge_data in edges_data.items():
+                # Remove None values for cleaner output
+                edge_properties = {k: v for k, v in edge_data.items() if v is not None}
+
+                result.edges.append(
+                    KnowledgeGraphEdge(
+                        id=f"{source_entity_id}-{target_entity_id}",
+                        type="DIRECTED",
+                        source=source_entity_id,
+                        target=target_entity_id,
+                        properties=edge_properties,
+                    )
+                )
 
             return result
 
@@ -33,7 +33,7 @@ Modifications by ApeRAG Team:
 
 import asyncio
 from dataclasses import dataclass
-from typing import Any, final
+from typing import Any, AsyncIterator, final
 
 from ..base import (
     BaseKVStorage,
@@ -83,6 +83,43 @@ class PGOpsSyncKVStorage(BaseKVStorage):
 
         return await asyncio.to_thread(_sync_get_all)
 
+    async def iter_all(
+        self, fields: list[str] | None = None, batch_size: int = 1000
+    ) -> AsyncIterator[dict[str, dict[str, Any]]]:
+        """Iterate over all data in batches of {id: record}, streaming instead of loading the workspace.
+
+        Args:
+            fields: Record fields to fetch, "id" is always included. None fetches every field
+                but content_vector, which must be asked for explicitly.
+            batch_size: Max number of records per batch
+        """
+        # Import here to avoid circular imports
+        from aperag.graph.lightrag.kg.pg_ops_sync_rows import iter_workspace_records
+        from aperag.graph.lightrag.namespace import NameSpace, is_namespace
+
+        if not is_namespace(self.namespace, NameSpace.KV_STORE_TEXT_CHUNKS):
+            logger.error(f"Unknown namespace for iter_all: {self.namespace}")
+            return
+
+        async for batch in iter_workspace_records("lightrag_doc_chunks", self.workspace, fields, batch_size):
+            yield batch
+
+    async def get_ids_by_doc_id(self, doc_id: str) -> list[str]:
+        """Get the ids of the text chunks of a document"""
+
+        def _sync_get_ids_by_doc_id():
+            # Import here to avoid circular imports
+            from aperag.db.ops import db_ops
+            from aperag.graph.lightrag.namespace import NameSpace, is_namespace
+
+            if is_namespace(self.namespace, NameSpace.KV_STORE_TEXT_CHUNKS):
+                return db_ops.query_lightrag_doc_chunk_ids_by_doc_id(self.workspace, doc_id)
+            else:
+                logger.error(f"Unknown namespace for get_ids_by_doc_id: {self.namespace}")
+                return []
+
+        return await asyncio.to_thread(_sync_get_ids_by_doc_id)
+
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         """Get data by id"""
 
@@ -110,8 +147,17 @@ class PGOpsSyncKVStorage(BaseKVStorage):
 
         return await asyncio.to_thread(_sync_get_by_id)
 
-    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Get data by ids"""
+    async def get_by_ids(self, ids: list[str], fields: list[str] | None = None) -> list[dict[str, Any]]:
+        """Get data by ids, with only the given fields (and "id") when fields is set"""
+        if fields is not None:
+            # Import here to avoid circular imports
+            from aperag.graph.lightrag.kg.pg_ops_sync_rows import get_workspace_records
+            from aperag.graph.lightrag.namespace import NameSpace, is_namespace
+
+            if not is_namespace(self.namespace, NameSpace.KV_STORE_TEXT_CHUNKS):
+                logger.error(f"Unknown namespace for get_by_ids: {self.namespace}")
+                return []
+            return await get_workspace_records("lightrag_doc_chunks", self.workspace, ids, fields)
 
         def _sync_get_by_ids():
             if not ids:
@@ -0,0 +1,115 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming reads of the LightRAG tables shared by the PGOps storages.
+
+get_all() loads a whole workspace, vectors included, into one dict. iter_workspace_records()
+streams it in batches through a server-side cursor and only fetches the requested fields,
+so exports and maintenance jobs run in memory bounded by the batch size. get_workspace_records()
+fetches records by IDs with the same projection.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator
+
+from aperag.db.repositories.lightrag import lightrag_table_columns
+
+# Record fields that are named differently in the tables
+_FIELD_COLUMNS = {
+    "created_at": "create_time",
+    "src_id": "source_id",
+    "tgt_id": "target_id",
+}
+# Columns never returned in records
+_HIDDEN_COLUMNS = ("workspace", "update_time")
+
+
+def fields_to_columns(table: str, fields: list[str] | None) -> list[str]:
+    """
+    Translate record field names to the table columns to fetch.
+
+    None selects every column except content_vector, vectors are only fetched when asked for.
+    """
+    if fields is None:
+        return [
+            column
+            for column in lightrag_table_columns(table)
+            if column not in _HIDDEN_COLUMNS and column != "content_vector"
+        ]
+    return list(dict.fromkeys(_FIELD_COLUMNS.get(field, field) for field in fields))
+
+
+def row_to_record(row: dict[str, Any], relationship: bool = False) -> dict[str, Any]:
+    """Shape a table row like the records returned by get_all()."""
+    record = {}
+    for column, value in row.items():
+        if column == "create_time":
+            record["created_at"] = int(value.timestamp()) if value else None
+        elif column == "content":
+            record["content"] = value or ""
+        elif column == "chunk_ids":
+            record["chunk_ids"] = value or []
+        else:
+            record[column] = value
+    if relationship:
+        if "source_id" in record:
+            record["src_id"] = record["source_id"]
+        if "target_id" in record:
+            record["tgt_id"] = record["target_id"]
+    return record
+
+
+async def iter_workspace_records(
+    table: str,
+    workspace: str,
+    fields: list[str] | None = None,
+    batch_size: int = 1000,
+    relationship: bool = False,
+) -> AsyncIterator[dict[str, dict[str, Any]]]:
+    """
+    Iterate over the records of a workspace in batches of {id: record}.
+
+    Every batch is fetched in a worker thread, so the event loop is never blocked.
+    """
+    # Import here to avoid circular imports
+    from aperag.db.ops import db_ops
+
+    batches = db_ops.iter_lightrag_rows(table, workspace, fields_to_columns(table, fields), batch_size)
+    try:
+        while True:
+            rows = await asyncio.to_thread(next, batches, None)
+            if rows is None:
+                break
+            yield {row["id"]: row_to_record(row, relationship) for row in rows}
+    finally:
+        # Release the cursor and its session when the caller stops early
+        await asyncio.to_thread(batches.close)
+
+
+async def get_workspace_records(
+    table: str,
+    workspace: str,
+    ids: list[str],
+    fields: list[str] | None = None,
+    relationship: bool = False,
+) -> list[dict[str, Any]]:
+    """Records of a workspace by IDs with only the requested fields, missing IDs are skipped."""
+    # Import here to avoid circular imports
+    from aperag.db.ops import db_ops
+
+    rows = await asyncio.to_thread(
+        db_ops.query_lightrag_rows_by_ids, table, workspace, ids, fields_to_columns(table, fields)
+    )
+    return [row_to_record(row, relationship) for row in rows]
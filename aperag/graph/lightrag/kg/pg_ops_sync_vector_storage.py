@@ -35,7 +35,7 @@ import asyncio
 import datetime
 from dataclasses import dataclass
 from datetime import timezone
-from typing import Any, final
+from typing import Any, AsyncIterator, final
 
 import numpy as np
 
@@ -120,6 +120,30 @@ class PGOpsSyncVectorStorage(BaseVectorStorage):
 
         return await asyncio.to_thread(_sync_get_all)
 
+    async def iter_all(
+        self, fields: list[str] | None = None, batch_size: int = 1000
+    ) -> AsyncIterator[dict[str, dict[str, Any]]]:
+        """Iterate over all data in batches of {id: record}, streaming instead of loading the workspace.
+
+        Args:
+            fields: Record fields to fetch, "id" is always included. None fetches every field
+                but content_vector, which must be asked for explicitly.
+            batch_size: Max number of records per batch
+        """
+        # Import here to avoid circular imports
+        from aperag.graph.lightrag.kg.pg_ops_sync_rows import iter_workspace_records
+        from aperag.graph.lightrag.kg.pg_vector_index import vector_table_for_namespace
+        from aperag.graph.lightrag.namespace import NameSpace, is_namespace
+
+        table = vector_table_for_namespace(self.namespace)
+        if table is None:
+            logger.error(f"Unknown namespace for iter_all: {self.namespace}")
+            return
+
+        relationship = is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS)
+        async for batch in iter_workspace_records(table, self.workspace, fields, batch_size, relationship):
+            yield batch
+
     def _prepare_vector_data(self, item: dict[str, Any], current_time: datetime.datetime) -> dict[str, Any]:
         """Prepare vector data based on namespace."""
         from aperag.graph.lightrag.namespace import NameSpace, is_namespace
@@ -214,7 +238,16 @@ class PGOpsSyncVectorStorage(BaseVectorStorage):
 
         await asyncio.to_thread(_sync_upsert_with_vectors)
 
-    async def query(self, query: str, top_k: int, ids: list[str] | None = None) -> list[dict[str, Any]]:
+        # Build the ANN index in the background once the workspace grows large enough
+        from aperag.graph.lightrag.kg.pg_vector_index import get_vector_index_manager, vector_table_for_namespace
+
+        get_vector_index_manager().schedule_ensure(
+            vector_table_for_namespace(self.namespace), self.workspace, len(list_data[0]["__vector__"])
+        )
+
+    async def query(
+        self, query: str, top_k: int, ids: list[str] | None = None, ef_search: int | None = None
+    ) -> list[dict[str, Any]]:
         """Query vectors by similarity"""
         # Compute embedding for query
         embeddings = await self.embedding_func([query])
@@ -222,9 +255,12 @@ class PGOpsSyncVectorStorage(BaseVectorStorage):
 
         def _sync_query():
             # Import here to avoid circular imports
+            from aperag.config import settings
             from aperag.db.ops import db_ops
             from aperag.graph.lightrag.namespace import NameSpace, is_namespace
 
+            hnsw_ef_search = ef_search if ef_search is not None else settings.graph_index_hnsw_ef_search
+
             # Convert embedding to list if it's numpy array
             if hasattr(embedding, "tolist"):
                 embedding_list = embedding.tolist()
@@ -234,7 +270,12 @@ class PGOpsSyncVectorStorage(BaseVectorStorage):
             # Use appropriate similarity search method based on namespace
             if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
                 results = db_ops.query_lightrag_doc_chunks_similarity(
-                    self.workspace, embedding_list, top_k, ids, self.cosine_better_than_threshold
+                    self.workspace,
+                    embedding_list,
+                    top_k,
+                    ids,
+                    self.cosine_better_than_threshold,
+                    ef_search=hnsw_ef_search,
                 )
                 # Convert results to expected format for chunks
                 formatted_results = []
@@ -260,7 +301,12 @@ class PGOpsSyncVectorStorage(BaseVectorStorage):
 
             elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
                 results = db_ops.query_lightrag_vdb_entity_similarity(
-                    self.workspace, embedding_list, top_k, ids, self.cosine_better_than_threshold
+                    self.workspace,
+                    embedding_list,
+                    top_k,
+                    ids,
+                    self.cosine_better_than_threshold,
+                    ef_search=hnsw_ef_search,
                 )
                 # Convert results to expected format for entities
                 formatted_results = []
@@ -281,7 +327,12 @@ class PGOpsSyncVectorStorage(BaseVectorStorage):
 
             elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
                 results = db_ops.query_lightrag_vdb_relation_similarity(
-                    self.workspace, embedding_list, top_k, ids, self.cosine_better_than_threshold
+                    self.workspace,
+                    embedding_list,
+                    top_k,
+                    ids,
+                    self.cosine_better_than_threshold,
+                    ef_search=hnsw_ef_search,
                 )
                 # Convert results to expected format for relationships
                 formatted_results = []
@@ -425,8 +476,20 @@ class PGOpsSyncVectorStorage(BaseVectorStorage):
 
         return await asyncio.to_thread(_sync_get_by_id)
 
-    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Get multiple vector data by their IDs"""
+    async def get_by_ids(self, ids: list[str], fields: list[str] | None = None) -> list[dict[str, Any]]:
+        """Get multiple vector data by their IDs, with only the given fields (and "id") when fields is set"""
+        if fields is not None:
+            # Import here to avoid circular imports
+            from aperag.graph.lightrag.kg.pg_ops_sync_rows import get_workspace_records
+            from aperag.graph.lightrag.kg.pg_vector_index import vector_table_for_namespace
+            from aperag.graph.lightrag.namespace import NameSpace, is_namespace
+
+            table = vector_table_for_namespace(self.namespace)
+            if table is None:
+                logger.error(f"Unknown namespace for get_by_ids: {self.namespace}")
+                return []
+            relationship = is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS)
+            return await get_workspace_records(table, self.workspace, ids, fields, relationship)
 
         def _sync_get_by_ids():
             if not ids:
@@ -0,0 +1,247 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+ANN index management for the PGOpsSyncVectorStorage tables.
+
+Similarity queries on lightrag_doc_chunks, lightrag_vdb_entity and lightrag_vdb_relation are
+always filtered by workspace, and content_vector has no fixed dimension, so every workspace gets
+its own partial HNSW index on content_vector::vector(dim) (halfvec above 2000 dimensions).
+Small workspaces are scanned exactly. Once a table holds GRAPH_INDEX_HNSW_MIN_ROWS rows for a
+workspace, the index is built in the background after an upsert, and it is rebuilt when the
+embedding dimension of the workspace changes or a concurrent build left it invalid.
+
+Command line:
+    python -m aperag.graph.lightrag.kg.pg_vector_index status [--workspace WS]
+    python -m aperag.graph.lightrag.kg.pg_vector_index ensure|rebuild|drop --workspace WS [--table TABLE]
+"""
+
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from aperag.db.repositories.lightrag import (
+    HNSW_MAX_HALFVEC_DIM,
+    LIGHTRAG_VECTOR_TABLES,
+    lightrag_vector_index_name,
+    pgvector_search_type,
+)
+from aperag.graph.lightrag.namespace import NameSpace, is_namespace
+
+logger = logging.getLogger(__name__)
+
+_NAMESPACE_TABLES = {
+    NameSpace.VECTOR_STORE_CHUNKS: "lightrag_doc_chunks",
+    NameSpace.VECTOR_STORE_ENTITIES: "lightrag_vdb_entity",
+    NameSpace.VECTOR_STORE_RELATIONSHIPS: "lightrag_vdb_relation",
+}
+
+
+def vector_table_for_namespace(namespace: str) -> Optional[str]:
+    """Table backing a vector storage namespace, None for non-vector namespaces."""
+    for vector_namespace, table in _NAMESPACE_TABLES.items():
+        if is_namespace(namespace, vector_namespace):
+            return table
+    return None
+
+
+def index_matches_dimension(definition: str, dim: int) -> bool:
+    """Whether an index definition was built on the cast used to search vectors of this dimension."""
+    return f"::{pgvector_search_type(dim)}" in definition
+
+
+class PGVectorIndexManager:
+    """Create, repair and rebuild the per-workspace HNSW indexes of the LightRAG vector tables."""
+
+    # Seconds between two row-count checks of a workspace that is not indexed yet
+    RECHECK_INTERVAL = 600
+
+    def __init__(self, ops=None, min_rows: int = 20000, m: int = 16, ef_construction: int = 64):
+        self._ops = ops
+        self.min_rows = min_rows
+        self.m = m
+        self.ef_construction = ef_construction
+        # (table, workspace) -> dimension of the valid index known to exist
+        self._indexed: Dict[Tuple[str, str], int] = {}
+        self._checked_at: Dict[Tuple[str, str], float] = {}
+        self._inflight: set = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def ops(self):
+        if self._ops is None:
+            # Import here to avoid circular imports
+            from aperag.db.ops import db_ops
+
+            self._ops = db_ops
+        return self._ops
+
+    def find_index(self, table: str, workspace: str) -> Optional[Dict[str, Any]]:
+        name = lightrag_vector_index_name(table, workspace)
+        for index in self.ops.query_lightrag_vector_indexes(workspace):
+            if index["name"] == name:
+                return index
+        return None
+
+    def ensure(self, table: str, workspace: str, dim: int = None, force: bool = False) -> Optional[str]:
+        """
+        Make sure the workspace has a valid index matching its vector dimension.
+
+        Unless forced, nothing is built while the table holds fewer than min_rows rows for the
+        workspace. Returns "created" or "recreated" when an index was built, None otherwise.
+        """
+        if dim is None:
+            dim = self.ops.query_lightrag_vector_dimension(table, workspace)
+            if dim is None:
+                return None
+        if dim > HNSW_MAX_HALFVEC_DIM:
+            logger.warning(f"Skip HNSW index for {table}/{workspace}: {dim} dimensions is not supported")
+            return None
+        if not force:
+            if not self.min_rows:
+                return None
+            if self.ops.count_lightrag_vectors(table, workspace, limit=self.min_rows) < self.min_rows:
+                return None
+
+        action = "created"
+        existing = self.find_index(table, workspace)
+        if existing:
+            if existing["valid"] and index_matches_dimension(existing["definition"], dim):
+                self._remember(table, workspace, dim)
+                return None
+            logger.info(f"Dropping stale HNSW index {existing['name']} (valid={existing['valid']})")
+            self.ops.drop_lightrag_vector_index(table, workspace)
+            action = "recreated"
+
+        start = time.perf_counter()
+        name = self.ops.create_lightrag_vector_index(
+            table, workspace, dim, m=self.m, ef_construction=self.ef_construction
+        )
+        logger.info(
+            f"Built HNSW index {name} on {table} for workspace {workspace} in {time.perf_counter() - start:.1f}s"
+        )
+        self._remember(table, workspace, dim)
+        return action
+
+    def rebuild(self, table: str, workspace: str) -> Optional[str]:
+        """Reindex a valid index in place, or build it from scratch regardless of the row threshold."""
+        dim = self.ops.query_lightrag_vector_dimension(table, workspace)
+        if dim is None:
+            return None
+        existing = self.find_index(table, workspace)
+        if existing and existing["valid"] and index_matches_dimension(existing["definition"], dim):
+            self.ops.reindex_lightrag_vector_index(table, workspace)
+            return "reindexed"
+        return self.ensure(table, workspace, dim=dim, force=True)
+
+    def drop(self, table: str, workspace: str) -> None:
+        with self._lock:
+            self._indexed.pop((table, workspace), None)
+            self._checked_at.pop((table, workspace), None)
+        self.ops.drop_lightrag_vector_index(table, workspace)
+
+    def schedule_ensure(self, table: str, workspace: str, dim: int) -> bool:
+        """
+        Check the workspace index in the background after an upsert.
+
+        Workspaces known to be indexed for this dimension are skipped, others are checked
+        at most once per RECHECK_INTERVAL. Returns whether a check was scheduled.
+        """
+        if not self.min_rows:
+            return False
+        key = (table, workspace)
+        now = time.monotonic()
+        with self._lock:
+            if self._indexed.get(key) == dim or key in self._inflight:
+                return False
+            if key in self._checked_at and now - self._checked_at[key] < self.RECHECK_INTERVAL:
+                return False
+            self._checked_at[key] = now
+            self._inflight.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pgvector-index")
+        self._executor.submit(self._ensure_in_background, table, workspace, dim)
+        return True
+
+    def _ensure_in_background(self, table: str, workspace: str, dim: int) -> None:
+        try:
+            self.ensure(table, workspace, dim=dim)
+        except Exception as e:
+            # Searching still works without the index, retry after RECHECK_INTERVAL
+            logger.warning(f"Failed to ensure HNSW index on {table} for workspace {workspace}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard((table, workspace))
+
+    def _remember(self, table: str, workspace: str, dim: int) -> None:
+        with self._lock:
+            self._indexed[(table, workspace)] = dim
+
+
+_default_manager: Optional[PGVectorIndexManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_vector_index_manager() -> PGVectorIndexManager:
+    """Get the process-wide index manager configured from settings."""
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                from aperag.config import settings
+
+                _default_manager = PGVectorIndexManager(
+                    min_rows=settings.graph_index_hnsw_min_rows,
+                    m=settings.graph_index_hnsw_m,
+                    ef_construction=settings.graph_index_hnsw_ef_construction,
+                )
+    return _default_manager
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage HNSW indexes of the LightRAG pgvector tables")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    status = subparsers.add_parser("status", help="List the per-workspace HNSW indexes")
+    status.add_argument("--workspace")
+    for command in ("ensure", "rebuild", "drop"):
+        sub = subparsers.add_parser(command, help=f"{command.capitalize()} the HNSW indexes of a workspace")
+        sub.add_argument("--workspace", required=True)
+        sub.add_argument("--table", choices=LIGHTRAG_VECTOR_TABLES, action="append")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    manager = get_vector_index_manager()
+
+    if args.command == "status":
+        for index in manager.ops.query_lightrag_vector_indexes(args.workspace):
+            print(f"{index['table']:<24} {index['name']:<48} valid={index['valid']} size={index['size_bytes']}")
+    else:
+        for table in args.table or LIGHTRAG_VECTOR_TABLES:
+            if args.command == "ensure":
+                result = manager.ensure(table, args.workspace, force=True)
+            elif args.command == "rebuild":
+                result = manager.rebuild(table, args.workspace)
+            else:
+                manager.drop(table, args.workspace)
+                result = "dropped"
+            print(f"{table}: {result or 'unchanged'}")
+
+
+if __name__ == "__main__":
+    main()
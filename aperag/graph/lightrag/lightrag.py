@@ -64,14 +64,18 @@ from .base import (
     QueryParam,
     StoragesStatus,
 )
+from .extraction_cache import ExtractionCache, ExtractionCacheStats
 from .namespace import NameSpace
 from .operate import (
     build_query_context,
     chunking_by_token_size,
     extract_entities,
+    find_connected_components,
     kg_query,
     merge_nodes_and_edges,
     naive_query,
+    pack_components,
+    split_chunk_results_by_group,
 )
 from .prompt import GRAPH_FIELD_SEP, PROMPTS
 from .types import KnowledgeGraph
@@ -217,6 +221,9 @@ class LightRAG:
     llm_model_kwargs: dict[str, Any] = field(default_factory=dict)
     """Additional keyword arguments passed to the LLM model function."""
 
+    extraction_cache: ExtractionCache | None = field(default=None)
+    """Cache of raw entity extraction outputs, keyed on llm_model_name, the prompts and the chunk content."""
+
     # Storage
     # ---
 
@@ -358,6 +365,9 @@ class LightRAG:
         text = await self.chunk_entity_relation_graph.get_all_labels()
         return text
 
+    async def search_graph_labels(self, query: str, limit: int = 50, offset: int = 0, match: str = "fuzzy"):
+        return await self.chunk_entity_relation_graph.search_labels(query, limit, offset, match)
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -410,48 +420,10 @@ class LightRAG:
         Returns:
             List of entity groups, where each group is a list of connected entity names
         """
-        # Build adjacency list
-        adjacency: Dict[str, set[str]] = {}
-
-        for nodes, edges in chunk_results:
-            # Add all nodes to adjacency list
-            for entity_name in nodes.keys():
-                if entity_name not in adjacency:
-                    adjacency[entity_name] = set()
-
-            # Add edges to create connections
-            for src, tgt in edges.keys():
-                if src not in adjacency:
-                    adjacency[src] = set()
-                if tgt not in adjacency:
-                    adjacency[tgt] = set()
-                adjacency[src].add(tgt)
-                adjacency[tgt].add(src)
-
-        # Find connected components using BFS
-        visited = set()
-        components = []
-
-        for node in adjacency:
-            if node not in visited:
-                # Start BFS from this node
-                component = []
-                queue = [node]
-                visited.add(node)
-
-                while queue:
-                    current = queue.pop(0)
-                    component.append(current)
-
-                    # Visit all neighbors
-                    for neighbor in adjacency.get(current, set()):
-                        if neighbor not in visited:
-                            visited.add(neighbor)
-                            queue.append(neighbor)
-
-                components.append(component)
-
-        self.lightrag_logger.debug(f"Found {len(components)} connected components from {len(adjacency)} entities")
+        components = find_connected_components(chunk_results)
+        self.lightrag_logger.debug(
+            f"Found {len(components)} connected components from {sum(len(c) for c in components)} entities"
+        )
         return components
 
     async def _grouping_process_chunk_results(
@@ -481,44 +453,26 @@ class LightRAG:
                 "collection_id": collection_id,
             }
 
-        # Prepare component data for parallel processing
-        component_tasks = []
-
-        for i, component in enumerate(components):
-            # Create a set for quick lookup
-            component_entities = set(component)
-
-            # Filter chunk results for this component
-            component_chunk_results = []
-
-            for nodes, edges in chunk_results:
-                # Filter nodes belonging to this component
-                filtered_nodes = {
-                    entity_name: entity_data
-                    for entity_name, entity_data in nodes.items()
-                    if entity_name in component_entities
-                }
+        # Pack small components into merge groups, so that one-entity components do not each cost a task
+        groups = pack_components(components)
+        self.lightrag_logger.debug(f"Packed {len(components)} components into {len(groups)} merge groups")
 
-                # Filter edges where both endpoints belong to this component
-                filtered_edges = {
-                    (src, tgt): edge_data
-                    for (src, tgt), edge_data in edges.items()
-                    if src in component_entities and tgt in component_entities
-                }
-
-                if filtered_nodes or filtered_edges:
-                    component_chunk_results.append((filtered_nodes, filtered_edges))
+        # Prepare group data for parallel processing
+        component_tasks = []
 
+        for i, (component, component_chunk_results) in enumerate(
+            zip(groups, split_chunk_results_by_group(chunk_results, groups))
+        ):
             if not component_chunk_results:
                 continue
 
-            # Add task data for this component
+            # Add task data for this group
             component_tasks.append(
                 {
                     "index": i,
                     "component": component,
                     "component_chunk_results": component_chunk_results,
-                    "total_components": len(components),
+                    "total_components": len(groups),
                 }
             )
 
@@ -547,6 +501,7 @@ class LightRAG:
                     addon_params=self.addon_params or PROMPTS["DEFAULT_LANGUAGE"],
                     force_llm_summary_on_merge=self.force_llm_summary_on_merge,
                     lightrag_logger=self.lightrag_logger,
+                    llm_model_max_async=self.llm_model_max_async,
                 )
 
                 self.lightrag_logger.debug(
@@ -755,6 +710,7 @@ class LightRAG:
             self.lightrag_logger.debug(f"Starting graph indexing for {len(chunks)} chunks")
 
             # 1. Extract entities and relations from chunks (completely parallel, no lock)
+            cache_stats = ExtractionCacheStats()
             chunk_results = await extract_entities(
                 chunks,
                 use_llm_func=self.llm_model_func,
@@ -762,6 +718,9 @@ class LightRAG:
                 addon_params=self.addon_params,
                 llm_model_max_async=self.llm_model_max_async,
                 lightrag_logger=self.lightrag_logger,
+                extraction_cache=self.extraction_cache,
+                llm_model_name=self.llm_model_name,
+                cache_stats=cache_stats,
             )
 
             # 2. Process each component group with its own lock scope
@@ -782,6 +741,7 @@ class LightRAG:
                 "entities_extracted": entity_count,
                 "relations_extracted": relation_count,
                 "groups_processed": result["groups_processed"],
+                "extraction_cache": cache_stats.snapshot(),
                 "collection_id": collection_id,
             }
 
@@ -925,6 +885,10 @@ class LightRAG:
             raise ValueError(f"Unknown mode {param.mode}")
         return response
 
+    async def _find_doc_chunk_ids(self, doc_id: str) -> set[str]:
+        """Find the ids of the text chunks of a document."""
+        return set(await self.text_chunks.get_ids_by_doc_id(doc_id))
+
     # Deleting documents can cause hallucinations in RAG.
     async def adelete_by_doc_id(self, doc_id: str) -> None:
         """Delete a document and all its related data
@@ -936,18 +900,12 @@ class LightRAG:
             self.lightrag_logger.info(f"Starting deletion for document {doc_id}")
 
             # ========== STEP 1: Get all chunks related to this document ==========
-            all_chunks = await self.text_chunks.get_all()
-            related_chunks = {
-                chunk_id: chunk_data
-                for chunk_id, chunk_data in all_chunks.items()
-                if isinstance(chunk_data, dict) and chunk_data.get("full_doc_id") == doc_id
-            }
+            chunk_ids = await self._find_doc_chunk_ids(doc_id)
 
-            if not related_chunks:
+            if not chunk_ids:
                 logger.warning(f"No chunks found for document {doc_id}")
                 return
 
-            chunk_ids = set(related_chunks.keys())
             self.lightrag_logger.info(f"Found {len(chunk_ids)} chunks to delete for document {doc_id}")
 
             # ========== STEP 2: Handle Vector Storage References (chunk_ids arrays) ==========
@@ -955,64 +913,67 @@ class LightRAG:
             entities_to_delete_from_vdb = []
             entities_to_update_in_vdb = {}
 
-            if hasattr(self.entities_vdb, "get_all"):
-                all_entities = await self.entities_vdb.get_all()
-                for entity_id, entity_data in all_entities.items():
-                    if not isinstance(entity_data, dict) or "chunk_ids" not in entity_data:
-                        continue
-
-                    # Remove deleted chunks from entity's chunk_ids array
-                    old_chunk_ids = set(entity_data.get("chunk_ids", []))
-                    new_chunk_ids = old_chunk_ids - chunk_ids
-
-                    if not new_chunk_ids:
-                        # Entity has no remaining chunks, mark for deletion
-                        entity_name = entity_data.get("entity_name")
-                        if entity_name:
-                            entities_to_delete_from_vdb.append(entity_name)
+            if hasattr(self.entities_vdb, "iter_all"):
+                # Stream without vectors, content is kept to re-embed the updated entities
+                entity_fields = ["entity_name", "content", "chunk_ids", "file_path"]
+                async for entity_batch in self.entities_vdb.iter_all(fields=entity_fields):
+                    for entity_id, entity_data in entity_batch.items():
+                        if not isinstance(entity_data, dict) or "chunk_ids" not in entity_data:
+                            continue
+
+                        # Remove deleted chunks from entity's chunk_ids array
+                        old_chunk_ids = set(entity_data.get("chunk_ids", []))
+                        new_chunk_ids = old_chunk_ids - chunk_ids
+
+                        if not new_chunk_ids:
+                            # Entity has no remaining chunks, mark for deletion
+                            entity_name = entity_data.get("entity_name")
+                            if entity_name:
+                                entities_to_delete_from_vdb.append(entity_name)
+                                self.lightrag_logger.debug(
+                                    f"Entity {entity_name} marked for deletion from VDB - no remaining chunks"
+                                )
+                        elif len(new_chunk_ids) != len(old_chunk_ids):
+                            # Entity has some remaining chunks, update chunk_ids array
+                            entity_data["chunk_ids"] = list(new_chunk_ids)
+                            entity_data["source_id"] = GRAPH_FIELD_SEP.join(new_chunk_ids)
+                            entities_to_update_in_vdb[entity_id] = entity_data
                             self.lightrag_logger.debug(
-                                f"Entity {entity_name} marked for deletion from VDB - no remaining chunks"
+                                f"Entity {entity_data.get('entity_name')} chunk_ids updated: {len(old_chunk_ids)} -> {len(new_chunk_ids)}"
                             )
-                    elif len(new_chunk_ids) != len(old_chunk_ids):
-                        # Entity has some remaining chunks, update chunk_ids array
-                        entity_data["chunk_ids"] = list(new_chunk_ids)
-                        entity_data["source_id"] = GRAPH_FIELD_SEP.join(new_chunk_ids)
-                        entities_to_update_in_vdb[entity_id] = entity_data
-                        self.lightrag_logger.debug(
-                            f"Entity {entity_data.get('entity_name')} chunk_ids updated: {len(old_chunk_ids)} -> {len(new_chunk_ids)}"
-                        )
 
             # Process relationships in vector storage
             relationships_to_delete_from_vdb = []
             relationships_to_update_in_vdb = {}
 
-            if hasattr(self.relationships_vdb, "get_all"):
-                all_relationships = await self.relationships_vdb.get_all()
-                for rel_id, rel_data in all_relationships.items():
-                    if not isinstance(rel_data, dict) or "chunk_ids" not in rel_data:
-                        continue
-
-                    # Remove deleted chunks from relationship's chunk_ids array
-                    old_chunk_ids = set(rel_data.get("chunk_ids", []))
-                    new_chunk_ids = old_chunk_ids - chunk_ids
-
-                    if not new_chunk_ids:
-                        # Relationship has no remaining chunks, mark for deletion by calculating IDs
-                        src_id = rel_data.get("src_id") or rel_data.get("source_id")
-                        tgt_id = rel_data.get("tgt_id") or rel_data.get("target_id")
-                        if src_id and tgt_id:
-                            relationships_to_delete_from_vdb.append((src_id, tgt_id))
+            if hasattr(self.relationships_vdb, "iter_all"):
+                relationship_fields = ["src_id", "tgt_id", "content", "chunk_ids", "file_path"]
+                async for relationship_batch in self.relationships_vdb.iter_all(fields=relationship_fields):
+                    for rel_id, rel_data in relationship_batch.items():
+                        if not isinstance(rel_data, dict) or "chunk_ids" not in rel_data:
+                            continue
+
+                        # Remove deleted chunks from relationship's chunk_ids array
+                        old_chunk_ids = set(rel_data.get("chunk_ids", []))
+                        new_chunk_ids = old_chunk_ids - chunk_ids
+
+                        if not new_chunk_ids:
+                            # Relationship has no remaining chunks, mark for deletion by calculating IDs
+                            src_id = rel_data.get("src_id") or rel_data.get("source_id")
+                            tgt_id = rel_data.get("tgt_id") or rel_data.get("target_id")
+                            if src_id and tgt_id:
+                                relationships_to_delete_from_vdb.append((src_id, tgt_id))
+                                self.lightrag_logger.debug(
+                                    f"Relationship {src_id}-{tgt_id} marked for deletion from VDB - no remaining chunks"
+                                )
+                        elif len(new_chunk_ids) != len(old_chunk_ids):
+                            # Relationship has some remaining chunks, update chunk_ids array
+                            rel_data["chunk_ids"] = list(new_chunk_ids)
+                            rel_data["source_id"] = GRAPH_FIELD_SEP.join(new_chunk_ids)
+                            relationships_to_update_in_vdb[rel_id] = rel_data
                             self.lightrag_logger.debug(
-                                f"Relationship {src_id}-{tgt_id} marked for deletion from VDB - no remaining chunks"
+                                f"Relationship {rel_data.get('src_id')}-{rel_data.get('tgt_id')} chunk_ids updated: {len(old_chunk_ids)} -> {len(new_chunk_ids)}"
                             )
-                    elif len(new_chunk_ids) != len(old_chunk_ids):
-                        # Relationship has some remaining chunks, update chunk_ids array
-                        rel_data["chunk_ids"] = list(new_chunk_ids)
-                        rel_data["source_id"] = GRAPH_FIELD_SEP.join(new_chunk_ids)
-                        relationships_to_update_in_vdb[rel_id] = rel_data
-                        self.lightrag_logger.debug(
-                            f"Relationship {rel_data.get('src_id')}-{rel_data.get('tgt_id')} chunk_ids updated: {len(old_chunk_ids)} -> {len(new_chunk_ids)}"
-                        )
 
             # ========== STEP 3: Handle Graph Storage References (source_id strings) ==========
             # Process entities in graph storage
@@ -1137,16 +1098,11 @@ class LightRAG:
 
             # ========== STEP 5: Simple verification ==========
             # Verify chunks were actually deleted
-            remaining_chunks = await self.text_chunks.get_all()
-            remaining_related_chunks = {
-                chunk_id: chunk_data
-                for chunk_id, chunk_data in remaining_chunks.items()
-                if isinstance(chunk_data, dict) and chunk_data.get("full_doc_id") == doc_id
-            }
+            remaining_chunk_ids = await self._find_doc_chunk_ids(doc_id)
 
-            if remaining_related_chunks:
+            if remaining_chunk_ids:
                 self.lightrag_logger.warning(
-                    f"Verification failed: {len(remaining_related_chunks)} chunks still exist for document {doc_id}"
+                    f"Verification failed: {len(remaining_chunk_ids)} chunks still exist for document {doc_id}"
                 )
             else:
                 self.lightrag_logger.info(
@@ -1176,6 +1132,9 @@ class LightRAG:
         """
         Generate node merge suggestions using LLM analysis.
 
+        Candidate duplicates are found by blocking on entity names and embeddings
+        (generate_merge_candidates), only the candidate groups are confirmed by the LLM.
+
         Args:
             max_suggestions: Maximum number of suggestions to return (default: 10)
             entity_types: Optional filter for specific entity types
@@ -1191,10 +1150,9 @@ class LightRAG:
         import time
 
         from .operate import (
-            analyze_entities_with_llm,
+            analyze_candidate_groups_with_llm,
             filter_and_deduplicate_suggestions,
-            filter_and_group_entities,
-            get_high_degree_nodes,
+            generate_merge_candidates,
         )
         from .types import MergeSuggestionsResult
 
@@ -1202,9 +1160,10 @@ class LightRAG:
 
         try:
             # Configuration constants
-            MAX_ANALYZE_NODES = 500
-            BATCH_SIZE = 100
+            MAX_CANDIDATE_NODES = 100000
+            MAX_GROUP_SIZE = 10
             LLM_BATCH_SIZE = 50
+            MAX_LLM_BATCHES = 20
             CONFIDENCE_THRESHOLD = 0.3 if debug_mode else 0.6  # Lower threshold in debug mode
 
             self.lightrag_logger.info(
@@ -1214,38 +1173,31 @@ class LightRAG:
                 f"max_concurrent_llm_calls={max_concurrent_llm_calls}"
             )
 
-            # Step 1: Get high-degree nodes from graph
-            selected_nodes_dict, total_analyzed = await get_high_degree_nodes(
+            # Step 1: Block entities on names and embeddings into candidate groups, no LLM involved
+            candidate_groups, total_analyzed_nodes = await generate_merge_candidates(
                 self.chunk_entity_relation_graph,
-                max_analyze_nodes=MAX_ANALYZE_NODES,
-                batch_size=BATCH_SIZE,
+                entities_vdb=self.entities_vdb,
+                entity_types=entity_types,
+                max_candidate_nodes=MAX_CANDIDATE_NODES,
+                max_group_size=MAX_GROUP_SIZE,
                 lightrag_logger=self.lightrag_logger,
             )
 
-            if not selected_nodes_dict.labels:
-                return MergeSuggestionsResult(
-                    suggestions=[],
-                    total_analyzed_nodes=0,
-                    processing_time_seconds=time.time() - start_time,
-                ).dict()
-
-            # Step 2: Filter and group entities by type
-            entities_by_type = await filter_and_group_entities(selected_nodes_dict, entity_types=entity_types)
-
-            if not entities_by_type:
+            if not candidate_groups:
                 return MergeSuggestionsResult(
                     suggestions=[],
-                    total_analyzed_nodes=len(selected_nodes_dict.labels),
+                    total_analyzed_nodes=total_analyzed_nodes,
                     processing_time_seconds=time.time() - start_time,
                 ).dict()
 
-            # Step 3: Analyze entities with LLM (with early exit optimization and concurrency)
-            suggestions = await analyze_entities_with_llm(
-                entities_by_type,
+            # Step 2: Confirm the best candidate groups with LLM (with concurrency)
+            suggestions = await analyze_candidate_groups_with_llm(
+                candidate_groups,
                 self.llm_model_func,
                 confidence_threshold=CONFIDENCE_THRESHOLD,
                 batch_size=LLM_BATCH_SIZE,
-                max_suggestions=max_suggestions,  # Pass max_suggestions for early exit
+                max_batches=MAX_LLM_BATCHES,
+                max_suggestions=max_suggestions,
                 max_concurrent_llm_calls=max_concurrent_llm_calls,  # Pass concurrent limit
                 tokenizer=self.tokenizer,
                 llm_model_max_token_size=self.llm_model_max_token_size,
@@ -1253,12 +1205,11 @@ class LightRAG:
                 lightrag_logger=self.lightrag_logger,
             )
 
-            # Step 4: Final filtering (now mostly redundant due to early exit optimization)
+            # Step 3: Final filtering (now mostly redundant due to early exit optimization)
             # Keep this for backward compatibility and final sorting by confidence
             final_suggestions = filter_and_deduplicate_suggestions(suggestions, max_suggestions)
 
             processing_time = time.time() - start_time
-            total_analyzed_nodes = sum(len(entities) for entities in entities_by_type.values())
 
             # Convert to dict format for API response
             result = MergeSuggestionsResult(
@@ -1268,8 +1219,8 @@ class LightRAG:
             )
 
             self.lightrag_logger.info(
-                f"Generated {len(final_suggestions)} merge suggestions using concurrent batch analysis "
-                f"(processed {total_analyzed_nodes} entities in {processing_time:.2f}s with {max_concurrent_llm_calls} concurrent LLM calls)"
+                f"Generated {len(final_suggestions)} merge suggestions from {len(candidate_groups)} candidate groups "
+                f"(blocked {total_analyzed_nodes} entities in {processing_time:.2f}s with {max_concurrent_llm_calls} concurrent LLM calls)"
             )
 
             return result.dict()
@@ -1796,7 +1747,8 @@ class LightRAG:
                 # Batch get chunk contents (single call)
                 source_texts = []
                 if linked_chunk_ids:
-                    chunk_contents = await self.chunks_vdb.get_by_ids(list(linked_chunk_ids))
+                    # Only the contents of the linked chunks, without their vectors
+                    chunk_contents = await self.chunks_vdb.get_by_ids(list(linked_chunk_ids), fields=["content"])
 
                     # Process source texts efficiently (single pass)
                     source_texts = [
@@ -0,0 +1,287 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Candidate generation for merge suggestions.
+
+Rather than sending a sample of entities to the LLM, merge suggestions block the entities of a
+workspace on two signals and only send the resulting candidate groups to the LLM for confirmation:
+- MinHash LSH over the character n-grams of the normalized entity names, which finds spelling,
+  casing and punctuation variants ("McDonald's" / "McDonalds")
+- random hyperplane LSH over the entity embeddings, which finds abbreviations, synonyms and
+  translations ("Microsoft" / "微软")
+
+Both are linear in the number of entities. Pairs sharing a bucket are verified with the exact
+Jaccard or cosine similarity, then grouped into size-bounded connected components.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+
+# Prime modulus of the MinHash permutations, larger than the 32-bit shingle hashes
+_MINHASH_PRIME = 4294967311
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+CandidatePairs = dict[tuple[str, str], float]
+
+
+def normalize_entity_name(name: str) -> str:
+    """Fold case, width and punctuation so that trivially different names compare equal."""
+    name = unicodedata.normalize("NFKC", name).casefold()
+    return " ".join(_NON_WORD.sub(" ", name).split())
+
+
+def name_shingles(name: str, n: int = 3) -> set[str]:
+    """Character n-grams of the normalized name, padded so that short names still get shingles."""
+    padded = f" {normalize_entity_name(name)} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i : i + n] for i in range(len(padded) - n + 1)}
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _add_pair(pairs: CandidatePairs, a: str, b: str, score: float) -> None:
+    key = (a, b) if a < b else (b, a)
+    if score > pairs.get(key, 0.0):
+        pairs[key] = score
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def _bucket_members(keys: np.ndarray, max_bucket_size: int) -> Iterator[np.ndarray]:
+    """Indices of the equal keys, one array per key shared by 2 to max_bucket_size entries."""
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    ends = np.append(starts[1:], len(keys))
+    sizes = ends - starts
+    selected = (sizes >= 2) & (sizes <= max_bucket_size)
+    for start, end in zip(starts[selected], ends[selected]):
+        yield order[start:end]
+
+
+class MinHasher:
+    """MinHash signatures of shingle sets, with universal hashing as permutations."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a * hash + b stays below 2**64 for 32-bit hashes
+        self._a = rng.integers(1, 2**31, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2**31, num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signatures(self, shingle_sets: Sequence[Iterable[str]], chunk_size: int = 4096) -> np.ndarray:
+        """Signatures of non-empty shingle sets as a (len(shingle_sets), num_perm) array."""
+        hash_cache: dict[str, int] = {}
+        result = np.empty((len(shingle_sets), self.num_perm), dtype=np.uint64)
+        for start in range(0, len(shingle_sets), chunk_size):
+            chunk = shingle_sets[start : start + chunk_size]
+            hashes, offsets = [], []
+            for shingles in chunk:
+                offsets.append(len(hashes))
+                for shingle in shingles:
+                    shingle_hash = hash_cache.get(shingle)
+                    if shingle_hash is None:
+                        shingle_hash = hash_cache[shingle] = _shingle_hash(shingle)
+                    hashes.append(shingle_hash)
+            permuted = (
+                self._a[:, None] * np.array(hashes, dtype=np.uint64)[None, :] + self._b[:, None]
+            ) % _MINHASH_PRIME
+            result[start : start + len(chunk)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        return result
+
+
+def name_candidate_pairs(
+    names: Sequence[str],
+    threshold: float = 0.5,
+    num_perm: int = 128,
+    bands: int = 32,
+    max_bucket_size: int = 100,
+) -> CandidatePairs:
+    """
+    Find the pairs of names whose n-gram Jaccard similarity reaches the threshold.
+
+    Names are bucketed per band of their MinHash signature, only names sharing a bucket are compared.
+    Buckets larger than max_bucket_size are skipped, they hold generic names rather than duplicates.
+
+    Returns:
+        {(name_a, name_b): jaccard} with name_a < name_b
+    """
+    pairs: CandidatePairs = {}
+    if len(names) < 2:
+        return pairs
+
+    rows = num_perm // bands
+    shingles = [name_shingles(name) for name in names]
+    signatures = MinHasher(num_perm=bands * rows).signatures(shingles)
+    # Fold the rows of a band into one key, colliding keys only cost an extra Jaccard check
+    row_mixers = np.random.default_rng(2).integers(1, 2**63, rows, dtype=np.uint64) | np.uint64(1)
+
+    checked: set[tuple[int, int]] = set()
+    for band in range(bands):
+        keys = signatures[:, band * rows : (band + 1) * rows] @ row_mixers
+        for members in _bucket_members(keys, max_bucket_size):
+            members = sorted(members.tolist())
+            for i, left in enumerate(members):
+                for right in members[i + 1 :]:
+                    if (left, right) in checked:
+                        continue
+                    checked.add((left, right))
+                    score = _jaccard(shingles[left], shingles[right])
+                    if score >= threshold:
+                        _add_pair(pairs, names[left], names[right], score)
+    return pairs
+
+
+class EmbeddingSketch:
+    """
+    Accumulates unit-length, randomly projected entity embeddings.
+
+    Embeddings wider than dim are projected down (Johnson-Lindenstrauss), which keeps cosine
+    similarities close while bounding the memory of a 10^5 entity workspace.
+    """
+
+    def __init__(self, dim: int = 256, seed: int = 1):
+        self.dim = dim
+        self.seed = seed
+        self._projection: np.ndarray | None = None
+        self.ids: list[str] = []
+        self._batches: list[np.ndarray] = []
+
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.shape[1] > self.dim:
+            if self._projection is None:
+                rng = np.random.default_rng(self.seed)
+                self._projection = rng.standard_normal((matrix.shape[1], self.dim)).astype(np.float32)
+            matrix = matrix @ self._projection
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.ids.extend(ids)
+        self._batches.append(matrix / norms)
+
+    def matrix(self) -> np.ndarray:
+        if not self._batches:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if len(self._batches) > 1:
+            self._batches = [np.concatenate(self._batches)]
+        return self._batches[0]
+
+
+def embedding_candidate_pairs(
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    threshold: float = 0.85,
+    num_planes: int = 14,
+    num_tables: int = 16,
+    max_bucket_size: int = 256,
+    seed: int = 1,
+) -> CandidatePairs:
+    """
+    Find the pairs of unit vectors whose cosine similarity reaches the threshold.
+
+    Every table buckets the vectors by the signs of num_planes random projections, only vectors
+    sharing a bucket in some table are compared.
+
+    Returns:
+        {(id_a, id_b): cosine} with id_a < id_b
+    """
+    pairs: CandidatePairs = {}
+    if len(ids) < 2:
+        return pairs
+
+    rng = np.random.default_rng(seed)
+    bit_values = np.left_shift(np.uint64(1), np.arange(num_planes, dtype=np.uint64))
+    for _ in range(num_tables):
+        planes = rng.standard_normal((vectors.shape[1], num_planes)).astype(np.float32)
+        keys = ((vectors @ planes) > 0).astype(np.uint64) @ bit_values
+        for members in _bucket_members(keys, max_bucket_size):
+            similarities = vectors[members] @ vectors[members].T
+            for i, j in zip(*np.nonzero(np.triu(similarities >= threshold, k=1))):
+                _add_pair(pairs, ids[members[i]], ids[members[j]], float(similarities[i, j]))
+    return pairs
+
+
+def group_candidate_pairs(pairs: CandidatePairs, max_group_size: int = 10) -> list[list[str]]:
+    """
+    Group candidate pairs into connected components of at most max_group_size entities.
+
+    Pairs are joined best score first, a pair that would grow a component past the limit is
+    dropped, so chains of weak similarities cannot build one giant group.
+
+    Returns:
+        Groups of two or more entity ids, the group holding the best pair first
+    """
+    parent: dict[str, str] = {}
+    size: dict[str, int] = {}
+
+    def find(node: str) -> str:
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    best_score: dict[str, float] = {}
+    for (a, b), score in sorted(pairs.items(), key=lambda item: (-item[1], item[0])):
+        for node in (a, b):
+            if node not in parent:
+                parent[node] = node
+                size[node] = 1
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b or size[root_a] + size[root_b] > max_group_size:
+            continue
+        if size[root_a] < size[root_b]:
+            root_a, root_b = root_b, root_a
+        parent[root_b] = root_a
+        size[root_a] += size[root_b]
+        best_score[root_a] = max(best_score.get(root_a, 0.0), best_score.pop(root_b, 0.0), score)
+
+    groups: dict[str, list[str]] = defaultdict(list)
+    for node in parent:
+        groups[find(node)].append(node)
+    ranked = sorted(
+        (root for root, members in groups.items() if len(members) > 1),
+        key=lambda root: (-best_score.get(root, 0.0), min(groups[root])),
+    )
+    return [sorted(groups[root]) for root in ranked]
+
+
+def pack_groups(groups: Sequence[Sequence[str]], batch_size: int) -> list[list[str]]:
+    """Pack whole groups into batches of at most batch_size entities, keeping the group order."""
+    batches: list[list[str]] = []
+    current: list[str] = []
+    for group in groups:
+        if current and len(current) + len(group) > batch_size:
+            batches.append(current)
+            current = []
+        current.extend(group)
+    if current:
+        batches.append(current)
+    return batches
@@ -34,12 +34,14 @@ Modifications by ApeRAG Team:
 from __future__ import annotations
 
 import asyncio
+import heapq
 import json
 import os
 import re
 import time
 from collections import Counter, defaultdict
-from typing import Any, AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 from aperag.concurrent_control import get_or_create_lock
 
@@ -50,8 +52,21 @@ from .base import (
     QueryParam,
     TextChunkSchema,
 )
+from .extraction_cache import (
+    ExtractionCache,
+    ExtractionCacheStats,
+    hash_prompt_templates,
+    make_extraction_cache_key,
+)
+from .merge_candidates import (
+    EmbeddingSketch,
+    embedding_candidate_pairs,
+    group_candidate_pairs,
+    name_candidate_pairs,
+    pack_groups,
+)
 from .prompt import GRAPH_FIELD_SEP, PROMPTS
-from .types import GraphNodeData, GraphNodeDataDict, MergeSuggestion
+from .types import GraphNodeData, MergeSuggestion
 from .utils import (
     LightRAGLogger,
     Tokenizer,
@@ -68,6 +83,9 @@ from .utils import (
     truncate_list_by_token_size,
 )
 
+# Number of entities or relationships merged together, see _merge_nodes_and_edges_impl
+MERGE_BATCH_SIZE = 128
+
 
 def chunking_by_token_size(
     tokenizer: Tokenizer,
@@ -231,10 +249,10 @@ async def _handle_single_relationship_extraction(
     )
 
 
-async def _merge_nodes_then_upsert(
+async def _merge_nodes(
     entity_name: str,
     nodes_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_node: dict | None,
     llm_model_func: callable,
     tokenizer: Tokenizer,
     llm_model_max_token_size: int,
@@ -245,19 +263,20 @@ async def _merge_nodes_then_upsert(
     workspace: str = "",
 ):
     """
-    Merge multiple entity nodes with the same name and upsert the result to knowledge graph.
+    Merge multiple entity nodes with the same name into the node to upsert to knowledge graph.
 
     This function handles entity deduplication by:
-    1. Retrieving existing entity data from knowledge graph
+    1. Taking the existing entity data prefetched from knowledge graph
     2. Merging existing data with new entity data
     3. Determining the final entity properties through aggregation
     4. Optionally using LLM to summarize lengthy descriptions
-    5. Upserting the merged entity back to knowledge graph
+
+    The caller upserts the merged entities back to knowledge graph in batch.
 
     Args:
         entity_name: The name of the entity to merge
         nodes_data: List of new entity data dictionaries to merge
-        knowledge_graph_inst: Knowledge graph storage instance
+        already_node: The entity currently stored in knowledge graph, None if it is new
         llm_model_func: LLM function for description summarization
         tokenizer: Tokenizer for text processing
         llm_model_max_token_size: Maximum token size for LLM input
@@ -268,7 +287,7 @@ async def _merge_nodes_then_upsert(
         workspace: Workspace identifier for lock creation
 
     Returns:
-        dict: The merged node data that was upserted
+        dict: The merged node data to upsert, with entity_name added
     """
 
     # 1. Initialize containers for collecting existing entity data
@@ -277,8 +296,7 @@ async def _merge_nodes_then_upsert(
     already_description = []
     already_file_paths = []
 
-    # 2. Retrieve existing entity from knowledge graph if it exists
-    already_node = await knowledge_graph_inst.get_node(entity_name)
+    # 2. Collect the existing entity if there is one
     if already_node:
         # 2.1. Collect existing entity type
         already_entity_types.append(already_node["entity_type"])
@@ -346,22 +364,16 @@ async def _merge_nodes_then_upsert(
         created_at=int(time.time()),
     )
 
-    # 7. Upsert the merged entity to knowledge graph
-    await knowledge_graph_inst.upsert_node(
-        entity_name,
-        node_data=node_data,
-    )
-
-    # 8. Add entity_name to returned data and return the final merged entity
+    # 7. Add entity_name to returned data and return the final merged entity
     node_data["entity_name"] = entity_name
     return node_data
 
 
-async def _merge_edges_then_upsert(
+async def _merge_edges(
     src_id: str,
     tgt_id: str,
     edges_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_edge: dict | None,
     llm_model_func: callable,
     tokenizer: Tokenizer,
     llm_model_max_token_size: int,
@@ -380,28 +392,26 @@ async def _merge_edges_then_upsert(
     already_keywords = []
     already_file_paths = []
 
-    if await knowledge_graph_inst.has_edge(src_id, tgt_id):
-        already_edge = await knowledge_graph_inst.get_edge(src_id, tgt_id)
-        # Handle the case where get_edge returns None or missing fields
-        if already_edge:
-            # Get weight with default 0.0 if missing
-            already_weights.append(already_edge.get("weight", 0.0))
+    # Handle the case where the prefetched edge is None or missing fields
+    if already_edge:
+        # Get weight with default 0.0 if missing
+        already_weights.append(already_edge.get("weight", 0.0))
 
-            # Get source_id with empty string default if missing or None
-            if already_edge.get("source_id") is not None:
-                already_source_ids.extend(split_string_by_multi_markers(already_edge["source_id"], [GRAPH_FIELD_SEP]))
+        # Get source_id with empty string default if missing or None
+        if already_edge.get("source_id") is not None:
+            already_source_ids.extend(split_string_by_multi_markers(already_edge["source_id"], [GRAPH_FIELD_SEP]))
 
-            # Get file_path with empty string default if missing or None
-            if already_edge.get("file_path") is not None:
-                already_file_paths.extend(split_string_by_multi_markers(already_edge["file_path"], [GRAPH_FIELD_SEP]))
+        # Get file_path with empty string default if missing or None
+        if already_edge.get("file_path") is not None:
+            already_file_paths.extend(split_string_by_multi_markers(already_edge["file_path"], [GRAPH_FIELD_SEP]))
 
-            # Get description with empty string default if missing or None
-            if already_edge.get("description") is not None:
-                already_description.append(already_edge["description"])
+        # Get description with empty string default if missing or None
+        if already_edge.get("description") is not None:
+            already_description.append(already_edge["description"])
 
-            # Get keywords with empty string default if missing or None
-            if already_edge.get("keywords") is not None:
-                already_keywords.extend(split_string_by_multi_markers(already_edge["keywords"], [GRAPH_FIELD_SEP]))
+        # Get keywords with empty string default if missing or None
+        if already_edge.get("keywords") is not None:
+            already_keywords.extend(split_string_by_multi_markers(already_edge["keywords"], [GRAPH_FIELD_SEP]))
 
     # Process edges_data with None checks
     weight = sum([dp["weight"] for dp in edges_data] + already_weights)
@@ -429,20 +439,6 @@ async def _merge_edges_then_upsert(
         set([dp["file_path"] for dp in edges_data if dp.get("file_path")] + already_file_paths)
     )
 
-    for need_insert_id in [src_id, tgt_id]:
-        if not (await knowledge_graph_inst.has_node(need_insert_id)):
-            await knowledge_graph_inst.upsert_node(
-                need_insert_id,
-                node_data={
-                    "entity_id": need_insert_id,
-                    "source_id": source_id,
-                    "description": description,
-                    "entity_type": "UNKNOWN",
-                    "file_path": file_path,
-                    "created_at": int(time.time()),
-                },
-            )
-
     num_fragment = description.count(GRAPH_FIELD_SEP) + 1
     num_new_fragment = len(set([dp["description"] for dp in edges_data if dp.get("description")]))
 
@@ -463,22 +459,11 @@ async def _merge_edges_then_upsert(
         else:
             lightrag_logger.log_relation_merge(src_id, tgt_id, num_fragment, num_new_fragment, is_llm_summary=False)
 
-    await knowledge_graph_inst.upsert_edge(
-        src_id,
-        tgt_id,
-        edge_data=dict(
-            weight=weight,
-            description=description,
-            keywords=keywords,
-            source_id=source_id,
-            file_path=file_path,
-            created_at=int(time.time()),
-        ),
-    )
-
+    # The caller upserts the merged relationships to knowledge graph in batch
     edge_data = dict(
         src_id=src_id,
         tgt_id=tgt_id,
+        weight=weight,
         description=description,
         keywords=keywords,
         source_id=source_id,
@@ -489,6 +474,115 @@ async def _merge_edges_then_upsert(
     return edge_data
 
 
+def find_connected_components(chunk_results: list[tuple[dict, dict]]) -> list[list[str]]:
+    """
+    Find the connected components of the extracted entities and relationships.
+
+    Entity names are interned to integer ids and joined with a union-find (union by size,
+    path halving), so grouping stays near-linear in the number of entities and relationships.
+
+    Args:
+        chunk_results: List of (nodes_dict, edges_dict) tuples from entity extraction
+
+    Returns:
+        List of entity groups, each listing its entity names in first-seen order
+
+    Example:
+        Input: [({"A": [...], "B": [...]}, {("A", "C"): [...]})]
+        Output: [["A", "C"], ["B"]]
+    """
+    ids: dict[str, int] = {}
+    parent: list[int] = []
+    size: list[int] = []
+
+    def _intern(name: str) -> int:
+        node = ids.get(name)
+        if node is None:
+            node = ids[name] = len(parent)
+            parent.append(node)
+            size.append(1)
+        return node
+
+    def _find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for nodes, edges in chunk_results:
+        for entity_name in nodes:
+            _intern(entity_name)
+        for src, tgt in edges:
+            root_src, root_tgt = _find(_intern(src)), _find(_intern(tgt))
+            if root_src == root_tgt:
+                continue
+            if size[root_src] < size[root_tgt]:
+                root_src, root_tgt = root_tgt, root_src
+            parent[root_tgt] = root_src
+            size[root_src] += size[root_tgt]
+
+    components: dict[int, list[str]] = {}
+    for name, node in ids.items():
+        components.setdefault(_find(node), []).append(name)
+    return list(components.values())
+
+
+def pack_components(components: list[list[str]], max_group_size: int = MERGE_BATCH_SIZE) -> list[list[str]]:
+    """
+    Pack small components into merge groups of balanced size.
+
+    A component of max_group_size entities or more is a group of its own. Smaller ones are
+    spread, largest first, over the least loaded of ceil(total / max_group_size) groups, so a
+    document with thousands of one-entity components yields a few well-filled merge tasks.
+    Components are never split, their entities stay in the same group.
+
+    Example:
+        Input: components=[["A", "B", "C", "D"], ["E"], ["F", "G"], ["H"]], max_group_size=4
+        Output: [["A", "B", "C", "D"], ["F", "G", "E", "H"]]
+    """
+    groups = [component for component in components if len(component) >= max_group_size]
+    small = sorted((component for component in components if len(component) < max_group_size), key=len, reverse=True)
+    total = sum(len(component) for component in small)
+    if not total:
+        return groups
+
+    bins: list[list[str]] = [[] for _ in range(-(-total // max_group_size))]
+    loads = [(0, index) for index in range(len(bins))]
+    for component in small:
+        load, index = heapq.heappop(loads)
+        bins[index].extend(component)
+        heapq.heappush(loads, (load + len(component), index))
+    return groups + [group for group in bins if group]
+
+
+def split_chunk_results_by_group(
+    chunk_results: list[tuple[dict, dict]], groups: list[list[str]]
+) -> list[list[tuple[dict, dict]]]:
+    """
+    Split chunk results into the results of each entity group, in one pass over the extraction.
+
+    Groups must be unions of connected components, so both endpoints of an edge fall in the
+    same group. Chunks contributing nothing to a group are left out of its results.
+    """
+    group_of = {entity_name: index for index, group in enumerate(groups) for entity_name in group}
+    group_results: list[list[tuple[dict, dict]]] = [[] for _ in groups]
+
+    for nodes, edges in chunk_results:
+        per_group: dict[int, tuple[dict, dict]] = {}
+        for entity_name, entity_data in nodes.items():
+            index = group_of.get(entity_name)
+            if index is not None:
+                per_group.setdefault(index, ({}, {}))[0][entity_name] = entity_data
+        for edge_key, edge_data in edges.items():
+            index = group_of.get(edge_key[0])
+            if index is not None and group_of.get(edge_key[1]) == index:
+                per_group.setdefault(index, ({}, {}))[1][edge_key] = edge_data
+        for index, result in per_group.items():
+            group_results[index].append(result)
+
+    return group_results
+
+
 @timing_wrapper("merge_nodes_and_edges")
 async def merge_nodes_and_edges(
     chunk_results: list,
@@ -504,6 +598,7 @@ async def merge_nodes_and_edges(
     addon_params,
     force_llm_summary_on_merge,
     lightrag_logger: LightRAGLogger,
+    llm_model_max_async: int = 8,
 ) -> dict[str, int]:
     # Now using fine-grained locking inside _merge_nodes_and_edges_impl
     return await _merge_nodes_and_edges_impl(
@@ -519,9 +614,107 @@ async def merge_nodes_and_edges(
         addon_params,
         force_llm_summary_on_merge,
         lightrag_logger,
+        llm_model_max_async,
     )
 
 
+async def _gather_bounded(coros: list, limit: int) -> list:
+    """Await the coroutines concurrently, at most limit at a time, and return their results in order."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*[_run(coro) for coro in coros])
+
+
+@asynccontextmanager
+async def _hold_locks(lock_names: list[str]):
+    """Hold several fine-grained locks, acquired in sorted order so that concurrent holders cannot deadlock."""
+    async with AsyncExitStack() as stack:
+        for lock_name in sorted(set(lock_names)):
+            await stack.enter_async_context(get_or_create_lock(lock_name))
+        yield
+
+
+async def _merge_group(
+    group: list,
+    lock_names: list[str],
+    read_stored: Callable[[list], Awaitable[dict]],
+    merge_item: Callable[[Any, dict | None], Awaitable[dict]],
+    write_merged: Callable[[list[dict]], Awaitable[None]],
+    llm_model_max_async: int,
+) -> list[dict]:
+    """
+    Merge a group of items with their stored versions, holding their locks only to write them.
+
+    The stored versions are read and the items merged, at most llm_model_max_async at a time,
+    without holding any lock, as merges may wait for LLM summaries. The locks of the group are then
+    held to read the stored versions again and write the merged items: the items another merge
+    stored meanwhile are merged again from their current version before the write.
+    """
+    stored = await read_stored(group)
+    merged = await _gather_bounded([merge_item(key, stored.get(key)) for key in group], llm_model_max_async)
+
+    async with _hold_locks(lock_names):
+        current = await read_stored(group)
+        stale = [i for i, key in enumerate(group) if current.get(key) != stored.get(key)]
+        if stale:
+            remerged = await _gather_bounded(
+                [merge_item(group[i], current.get(group[i])) for i in stale], llm_model_max_async
+            )
+            for i, item_data in zip(stale, remerged):
+                merged[i] = item_data
+        await write_merged(merged)
+    return merged
+
+
+def _graph_node_data(entity_data: dict) -> dict:
+    return {key: value for key, value in entity_data.items() if key != "entity_name"}
+
+
+def _graph_edge_data(edge_data: dict) -> dict:
+    return {key: value for key, value in edge_data.items() if key not in ("src_id", "tgt_id")}
+
+
+def _endpoint_node_data(node_id: str, edge_data: dict) -> dict:
+    """A placeholder node for a relationship endpoint that was never extracted as an entity."""
+    return {
+        "entity_id": node_id,
+        "source_id": edge_data["source_id"],
+        "description": edge_data["description"],
+        "entity_type": "UNKNOWN",
+        "file_path": edge_data["file_path"],
+        "created_at": int(time.time()),
+    }
+
+
+def _entity_vdb_record(entity_data: dict, workspace: str) -> dict[str, dict]:
+    return {
+        compute_mdhash_id(entity_data["entity_name"], prefix="ent-", workspace=workspace): {
+            "entity_name": entity_data["entity_name"],
+            "entity_type": entity_data["entity_type"],
+            "content": f"{entity_data['entity_name']}\n{entity_data['description']}",
+            "source_id": entity_data["source_id"],
+            "file_path": entity_data.get("file_path", "unknown_source"),
+        }
+    }
+
+
+def _relationship_vdb_record(edge_data: dict, workspace: str) -> dict[str, dict]:
+    return {
+        compute_mdhash_id(edge_data["src_id"] + edge_data["tgt_id"], prefix="rel-", workspace=workspace): {
+            "src_id": edge_data["src_id"],
+            "tgt_id": edge_data["tgt_id"],
+            "keywords": edge_data["keywords"],
+            "content": f"{edge_data['src_id']}\t{edge_data['tgt_id']}\n{edge_data['keywords']}\n{edge_data['description']}",
+            "source_id": edge_data["source_id"],
+            "file_path": edge_data.get("file_path", "unknown_source"),
+        }
+    }
+
+
 async def _merge_nodes_and_edges_impl(
     chunk_results: list,
     workspace: str,
@@ -535,8 +728,18 @@ async def _merge_nodes_and_edges_impl(
     addon_params,
     force_llm_summary_on_merge,
     lightrag_logger: LightRAGLogger,
+    llm_model_max_async: int = 8,
 ) -> dict[str, int]:
-    """Internal implementation of merge_nodes_and_edges with fine-grained locking"""
+    """
+    Internal implementation of merge_nodes_and_edges with fine-grained locking.
+
+    Entities, then relationships, are merged in groups of MERGE_BATCH_SIZE, see _merge_group. A
+    group prefetches the stored versions of its items with one batch read and merges them
+    concurrently (at most llm_model_max_async at a time, as merges may call the LLM) without
+    holding locks. Under the locks of its items it then checks their stored versions again, writes
+    them to the graph and to the vector storage with one upsert, embedded in max_batch_size calls.
+    Another merge touching one of the items only waits for these writes, never for a summary.
+    """
 
     # Extract language from addon_params
     language = addon_params.get("language", "English")
@@ -555,86 +758,101 @@ async def _merge_nodes_and_edges_impl(
             sorted_edge_key = tuple(sorted(edge_key))
             all_edges[sorted_edge_key].extend(edges)
 
+    merge_args = (
+        llm_model_func,
+        tokenizer,
+        llm_model_max_token_size,
+        summary_to_max_tokens,
+        language,  # Pass language instead of addon_params
+        force_llm_summary_on_merge,
+        lightrag_logger,
+        workspace,
+    )
+
     # Process entities with fine-grained locking
     entity_count = 0
+    entity_names = list(all_nodes)
 
-    for entity_name, entities in all_nodes.items():
-        # Create lock for this specific entity
-        entity_lock = get_or_create_lock(f"entity:{entity_name}:{workspace}")
+    async def merge_entity(entity_name: str, already_node: dict | None) -> dict:
+        return await _merge_nodes(entity_name, all_nodes[entity_name], already_node, *merge_args)
 
-        async with entity_lock:
-            # Process and update entity in graph db
-            entity_data = await _merge_nodes_then_upsert(
-                entity_name,
-                entities,
-                knowledge_graph_inst,
-                llm_model_func,
-                tokenizer,
-                llm_model_max_token_size,
-                summary_to_max_tokens,
-                language,  # Pass language instead of addon_params
-                force_llm_summary_on_merge,
-                lightrag_logger,
-                workspace,
-            )
-
-            # Update entity in vector db immediately under the same lock
-            if entity_vdb is not None and entity_data:
-                vdb_data = {
-                    compute_mdhash_id(entity_data["entity_name"], prefix="ent-", workspace=workspace): {
-                        "entity_name": entity_data["entity_name"],
-                        "entity_type": entity_data["entity_type"],
-                        "content": f"{entity_data['entity_name']}\n{entity_data['description']}",
-                        "source_id": entity_data["source_id"],
-                        "file_path": entity_data.get("file_path", "unknown_source"),
-                    }
-                }
+    async def write_entities(merged: list[dict]) -> None:
+        await knowledge_graph_inst.upsert_nodes_batch(
+            {entity_data["entity_name"]: _graph_node_data(entity_data) for entity_data in merged if entity_data}
+        )
+        # Update entities in vector db under the same locks
+        if entity_vdb is not None:
+            vdb_data = {}
+            for entity_data in merged:
+                if entity_data:
+                    vdb_data.update(_entity_vdb_record(entity_data, workspace))
+            if vdb_data:
                 await entity_vdb.upsert(vdb_data)
 
-            entity_count += 1
+    for start in range(0, len(entity_names), MERGE_BATCH_SIZE):
+        group = entity_names[start : start + MERGE_BATCH_SIZE]
+        await _merge_group(
+            group,
+            [f"entity:{entity_name}:{workspace}" for entity_name in group],
+            knowledge_graph_inst.get_nodes_batch,
+            merge_entity,
+            write_entities,
+            llm_model_max_async,
+        )
+        entity_count += len(group)
 
     # Process relationships with fine-grained locking
     relation_count = 0
+    edge_keys = [edge_key for edge_key in all_edges if edge_key[0] != edge_key[1]]
 
-    for edge_key, edges in all_edges.items():
-        # Create lock for this specific relationship
-        # Sort edge key to ensure consistent lock naming
-        sorted_edge_key = tuple(sorted(edge_key))
-        relationship_lock = get_or_create_lock(f"relationship:{sorted_edge_key[0]}:{sorted_edge_key[1]}:{workspace}")
-
-        async with relationship_lock:
-            # Process and update relationship in graph db
-            edge_data = await _merge_edges_then_upsert(
-                edge_key[0],
-                edge_key[1],
-                edges,
-                knowledge_graph_inst,
-                llm_model_func,
-                tokenizer,
-                llm_model_max_token_size,
-                summary_to_max_tokens,
-                language,  # Pass language instead of addon_params
-                force_llm_summary_on_merge,
-                lightrag_logger,
-                workspace,
-            )
+    async def read_edges(group: list[tuple[str, str]]) -> dict:
+        return await knowledge_graph_inst.get_edges_batch(
+            [{"src": edge_key[0], "tgt": edge_key[1]} for edge_key in group]
+        )
 
-            # Update relationship in vector db immediately under the same lock
-            if relationships_vdb is not None and edge_data is not None:
-                vdb_data = {
-                    compute_mdhash_id(edge_data["src_id"] + edge_data["tgt_id"], prefix="rel-", workspace=workspace): {
-                        "src_id": edge_data["src_id"],
-                        "tgt_id": edge_data["tgt_id"],
-                        "keywords": edge_data["keywords"],
-                        "content": f"{edge_data['src_id']}\t{edge_data['tgt_id']}\n{edge_data['keywords']}\n{edge_data['description']}",
-                        "source_id": edge_data["source_id"],
-                        "file_path": edge_data.get("file_path", "unknown_source"),
-                    }
-                }
+    async def merge_edge(edge_key: tuple[str, str], already_edge: dict | None) -> dict:
+        return await _merge_edges(edge_key[0], edge_key[1], all_edges[edge_key], already_edge, *merge_args)
+
+    async def write_edges(merged: list[dict]) -> None:
+        # Endpoints that are neither merged above nor stored, e.g. by another document meanwhile, are
+        # created first. They are looked up under their entity locks, right before the write.
+        endpoints = {node_id for edge_data in merged for node_id in (edge_data["src_id"], edge_data["tgt_id"])}
+        endpoints -= set(all_nodes)
+        if endpoints:
+            stored_endpoints = await knowledge_graph_inst.get_nodes_batch(sorted(endpoints))
+            endpoint_nodes = {}
+            for edge_data in merged:
+                for node_id in (edge_data["src_id"], edge_data["tgt_id"]):
+                    if node_id in endpoints and node_id not in stored_endpoints and node_id not in endpoint_nodes:
+                        endpoint_nodes[node_id] = _endpoint_node_data(node_id, edge_data)
+            if endpoint_nodes:
+                await knowledge_graph_inst.upsert_nodes_batch(endpoint_nodes)
+        await knowledge_graph_inst.upsert_edges_batch(
+            {(edge_data["src_id"], edge_data["tgt_id"]): _graph_edge_data(edge_data) for edge_data in merged}
+        )
+
+        # Update relationships in vector db under the same locks
+        if relationships_vdb is not None:
+            vdb_data = {}
+            for edge_data in merged:
+                vdb_data.update(_relationship_vdb_record(edge_data, workspace))
+            if vdb_data:
                 await relationships_vdb.upsert(vdb_data)
 
-            if edge_data is not None:
-                relation_count += 1
+    for start in range(0, len(edge_keys), MERGE_BATCH_SIZE):
+        group = edge_keys[start : start + MERGE_BATCH_SIZE]
+        endpoint_locks = {
+            f"entity:{node_id}:{workspace}" for edge_key in group for node_id in edge_key if node_id not in all_nodes
+        }
+        merged = await _merge_group(
+            group,
+            [f"relationship:{edge_key[0]}:{edge_key[1]}:{workspace}" for edge_key in group] + sorted(endpoint_locks),
+            read_edges,
+            merge_edge,
+            write_edges,
+            llm_model_max_async,
+        )
+        relation_count += len(merged)
 
     return {"entity_count": entity_count, "relation_count": relation_count}
 
@@ -647,6 +865,9 @@ async def extract_entities(
     addon_params: dict,
     llm_model_max_async: int,
     lightrag_logger: LightRAGLogger,
+    extraction_cache: ExtractionCache | None = None,
+    llm_model_name: str = "",
+    cache_stats: ExtractionCacheStats | None = None,
 ) -> list:
     ordered_chunks = list(chunks.items())
     # add language and example number params to prompt
@@ -680,6 +901,7 @@ async def extract_entities(
 
     continue_prompt = PROMPTS["entity_continue_extraction"].format(**context_base)
     if_loop_prompt = PROMPTS["entity_if_loop_extraction"]
+    prompt_hash = hash_prompt_templates(entity_extract_prompt, continue_prompt, if_loop_prompt, examples)
 
     processed_chunks = 0
     total_chunks = len(ordered_chunks)
@@ -719,6 +941,35 @@ async def extract_entities(
 
         return maybe_nodes, maybe_edges
 
+    async def _extract_raw_results(content: str) -> list[str]:
+        """Run the initial extraction and the gleaning rounds of a chunk
+        Args:
+            content (str): The chunk content
+        Returns:
+            list[str]: The raw LLM outputs, the initial extraction followed by each gleaning result
+        """
+        hint_prompt = entity_extract_prompt.format(**{**context_base, "input_text": content})
+
+        final_result = await use_llm_func(hint_prompt)
+        history = pack_user_ass_to_openai_messages(hint_prompt, final_result)
+        raw_results = [final_result]
+
+        for now_glean_index in range(entity_extract_max_gleaning):
+            glean_result = await use_llm_func(continue_prompt, history_messages=history)
+
+            history += pack_user_ass_to_openai_messages(continue_prompt, glean_result)
+            raw_results.append(glean_result)
+
+            if now_glean_index == entity_extract_max_gleaning - 1:
+                break
+
+            if_loop_result: str = await use_llm_func(if_loop_prompt, history_messages=history)
+            if_loop_result = if_loop_result.strip().strip('"').strip("'").lower()
+            if if_loop_result != "yes":
+                break
+
+        return raw_results
+
     async def _process_single_content(chunk_key_dp: tuple[str, TextChunkSchema]):
         """Process a single chunk
         Args:
@@ -734,21 +985,26 @@ async def extract_entities(
         # Get file path from chunk data or use default
         file_path = chunk_dp.get("file_path", "unknown_source")
 
-        # Get initial extraction
-        hint_prompt = entity_extract_prompt.format(**{**context_base, "input_text": content})
+        cache_key = None
+        raw_results = None
+        if extraction_cache is not None:
+            cache_key = make_extraction_cache_key(
+                llm_model_name, prompt_hash, language, entity_types, entity_extract_max_gleaning, content
+            )
+            raw_results = await extraction_cache.aget(cache_key)
+            if cache_stats is not None:
+                cache_stats.record(raw_results is not None)
 
-        final_result = await use_llm_func(hint_prompt)
-        history = pack_user_ass_to_openai_messages(hint_prompt, final_result)
+        if raw_results is None:
+            raw_results = await _extract_raw_results(content)
+            if cache_key is not None:
+                await extraction_cache.aset(cache_key, raw_results)
 
         # Process initial extraction with file path
-        maybe_nodes, maybe_edges = await _process_extraction_result(final_result, chunk_key, file_path)
+        maybe_nodes, maybe_edges = await _process_extraction_result(raw_results[0], chunk_key, file_path)
 
         # Process additional gleaning results
-        for now_glean_index in range(entity_extract_max_gleaning):
-            glean_result = await use_llm_func(continue_prompt, history_messages=history)
-
-            history += pack_user_ass_to_openai_messages(continue_prompt, glean_result)
-
+        for glean_result in raw_results[1:]:
             # Process gleaning result separately with file path
             glean_nodes, glean_edges = await _process_extraction_result(glean_result, chunk_key, file_path)
 
@@ -760,14 +1016,6 @@ async def extract_entities(
                 if edge_key not in maybe_edges:  # Only accetp edges with new name in gleaning stage
                     maybe_edges[edge_key].extend(edges)
 
-            if now_glean_index == entity_extract_max_gleaning - 1:
-                break
-
-            if_loop_result: str = await use_llm_func(if_loop_prompt, history_messages=history)
-            if_loop_result = if_loop_result.strip().strip('"').strip("'").lower()
-            if if_loop_result != "yes":
-                break
-
         processed_chunks += 1
         entities_count = len(maybe_nodes)
         relations_count = len(maybe_edges)
@@ -1081,7 +1329,9 @@ async def _get_vector_context(
         compatible with _get_edge_data and _get_node_data format
     """
     try:
-        results = await chunks_vdb.query(query, top_k=query_param.top_k, ids=query_param.ids)
+        results = await chunks_vdb.query(
+            query, top_k=query_param.top_k, ids=query_param.ids, ef_search=query_param.ef_search
+        )
         if not results:
             return [], [], []
 
@@ -1135,6 +1385,36 @@ async def _get_vector_context(
         return [], [], []
 
 
+# Chunk fields used by the query context
+TEXT_UNIT_FIELDS = ["content", "file_path"]
+
+
+class _TextChunkMemo:
+    """
+    Per-query memo in front of the text chunk KV storage.
+
+    Chunks are fetched with get_by_ids, projected to TEXT_UNIT_FIELDS, and each chunk ID is
+    fetched at most once per query, also when the entity and relationship passes run concurrently.
+    """
+
+    def __init__(self, text_chunks_db: BaseKVStorage):
+        self._text_chunks_db = text_chunks_db
+        self._fetches: dict[str, asyncio.Future] = {}
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict]:
+        to_fetch = [c_id for c_id in dict.fromkeys(ids) if c_id not in self._fetches]
+        if to_fetch:
+            fetch = asyncio.ensure_future(self._text_chunks_db.get_by_ids(to_fetch, fields=TEXT_UNIT_FIELDS))
+            for c_id in to_fetch:
+                self._fetches[c_id] = fetch
+
+        chunks = {}
+        for fetch in {self._fetches[c_id] for c_id in ids}:
+            for chunk in await fetch:
+                chunks[chunk["id"]] = chunk
+        return [chunks[c_id] for c_id in ids if c_id in chunks]
+
+
 async def _build_query_context_from_keywords(
     ll_keywords: str,
     hl_keywords: str,
@@ -1147,6 +1427,7 @@ async def _build_query_context_from_keywords(
     chunks_vdb: BaseVectorStorage = None,  # Add chunks_vdb parameter for mix mode
 ):
     logger.info(f"Process {os.getpid()} building query context...")
+    text_chunks_db = _TextChunkMemo(text_chunks_db)
 
     # Handle local and global modes as before
     if query_param.mode == "local":
@@ -1250,7 +1531,9 @@ async def _get_node_data(
         f"Query nodes: {query}, top_k: {query_param.top_k}, cosine: {entities_vdb.cosine_better_than_threshold}"
     )
 
-    results = await entities_vdb.query(query, top_k=query_param.top_k, ids=query_param.ids)
+    results = await entities_vdb.query(
+        query, top_k=query_param.top_k, ids=query_param.ids, ef_search=query_param.ef_search
+    )
 
     if not len(results):
         return "", "", ""
@@ -1415,14 +1698,10 @@ async def _find_most_related_text_unit_from_entities(
                 all_text_units_lookup[c_id] = index
                 tasks.append((c_id, index, this_edges))
 
-    # Process in batches tasks at a time to avoid overwhelming resources
-    batch_size = 5
-    results = []
-
-    for i in range(0, len(tasks), batch_size):
-        batch_tasks = tasks[i : i + batch_size]
-        batch_results = await asyncio.gather(*[text_chunks_db.get_by_id(c_id) for c_id, _, _ in batch_tasks])
-        results.extend(batch_results)
+    # Fetch all chunks at once
+    chunks = await text_chunks_db.get_by_ids([c_id for c_id, _, _ in tasks])
+    chunks_by_id = {chunk["id"]: chunk for chunk in chunks}
+    results = [chunks_by_id.get(c_id) for c_id, _, _ in tasks]
 
     for (c_id, index, this_edges), data in zip(tasks, results):
         all_text_units_lookup[c_id] = {
@@ -1538,7 +1817,9 @@ async def _get_edge_data(
         f"Query edges: {keywords}, top_k: {query_param.top_k}, cosine: {relationships_vdb.cosine_better_than_threshold}"
     )
 
-    results = await relationships_vdb.query(keywords, top_k=query_param.top_k, ids=query_param.ids)
+    results = await relationships_vdb.query(
+        keywords, top_k=query_param.top_k, ids=query_param.ids, ef_search=query_param.ef_search
+    )
 
     if not len(results):
         return "", "", ""
@@ -1718,24 +1999,20 @@ async def _find_related_text_unit_from_relationships(
         for dp in edge_datas
         if dp["source_id"] is not None
     ]
-    all_text_units_lookup = {}
-
-    async def fetch_chunk_data(c_id, index):
-        if c_id not in all_text_units_lookup:
-            chunk_data = await text_chunks_db.get_by_id(c_id)
-            # Only store valid data
-            if chunk_data is not None and "content" in chunk_data:
-                all_text_units_lookup[c_id] = {
-                    "data": chunk_data,
-                    "order": index,
-                }
-
-    tasks = []
+    # Order of each chunk is the first relationship it comes from
+    chunk_orders = {}
     for index, unit_list in enumerate(text_units):
         for c_id in unit_list:
-            tasks.append(fetch_chunk_data(c_id, index))
+            chunk_orders.setdefault(c_id, index)
 
-    await asyncio.gather(*tasks)
+    # Fetch all chunks at once, only keeping valid data
+    all_text_units_lookup = {}
+    for chunk_data in await text_chunks_db.get_by_ids(list(chunk_orders)):
+        if "content" in chunk_data:
+            all_text_units_lookup[chunk_data["id"]] = {
+                "data": chunk_data,
+                "order": chunk_orders[chunk_data["id"]],
+            }
 
     if not all_text_units_lookup:
         logger.warning("No valid text chunks found")
@@ -1840,152 +2117,137 @@ async def naive_query(
 # ============= Merge Suggestions Functions =============
 
 
-async def get_high_degree_nodes(
+async def generate_merge_candidates(
     graph_storage: BaseGraphStorage,
-    max_analyze_nodes: int = 500,
-    batch_size: int = 100,
+    entities_vdb: BaseVectorStorage | None = None,
+    entity_types: list[str] | None = None,
+    max_candidate_nodes: int = 100000,
+    max_group_size: int = 10,
+    name_similarity_threshold: float = 0.5,
+    embedding_similarity_threshold: float = 0.85,
     lightrag_logger=None,
-) -> tuple[GraphNodeDataDict, int]:
+) -> tuple[list[list[GraphNodeData]], int]:
     """
-    Get high-degree nodes from the graph prioritized by connectivity.
+    Find groups of entities that are likely duplicates, without any LLM call.
+
+    The connected entities (highest degree first, up to max_candidate_nodes) are blocked on
+    MinHash signatures of their names and, when the entity vector storage can stream its
+    vectors, on LSH buckets of their embeddings. Only pairs of the same entity type are kept.
 
     Args:
         graph_storage: Graph storage instance
-        max_analyze_nodes: Maximum number of nodes to analyze (default: 500)
-        batch_size: Batch size for processing (default: 100)
+        entities_vdb: Entity vector storage, its embeddings add semantic candidates
+        entity_types: Optional filter for specific entity types
+        max_candidate_nodes: Maximum number of entities to block (default: 100000)
+        max_group_size: Maximum number of entities per candidate group (default: 10)
+        name_similarity_threshold: Minimum n-gram Jaccard similarity of names (default: 0.5)
+        embedding_similarity_threshold: Minimum cosine similarity of embeddings (default: 0.85)
         lightrag_logger: Logger instance
 
     Returns:
-        Tuple of (selected_nodes_dict, total_nodes_analyzed)
+        Tuple of (candidate groups of GraphNodeData best first, number of entities blocked)
 
     Example:
-        Input: Graph with 1000 nodes, max_analyze_nodes=300
-        Output: (GraphNodeDataDict with 300 nodes, 1000)
+        Input: Graph with 'Apple Inc', 'Apple Inc.', 'Microsoft' and '微软', all ORGANIZATION
+        Output: ([[GraphNodeData('Apple Inc'), GraphNodeData('Apple Inc.')],
+                  [GraphNodeData('Microsoft'), GraphNodeData('微软')]], 4)
     """
-    # Get all node labels
-    all_labels = await graph_storage.get_all_labels()
-    if not all_labels:
-        return GraphNodeDataDict(nodes_by_id={}), 0
-
-    if lightrag_logger:
-        lightrag_logger.debug(f"Found {len(all_labels)} total nodes in graph")
-
-    # Process nodes in batches to get degrees
-    high_degree_nodes = []
-    all_degrees = {}
-
-    for i in range(0, len(all_labels), batch_size):
-        batch_labels = all_labels[i : i + batch_size]
-        batch_degrees = await graph_storage.node_degrees_batch(batch_labels)
-
-        # Collect all degrees for return
-        all_degrees.update(batch_degrees)
-
-        # Collect nodes with their degrees
-        for label in batch_labels:
-            degree = batch_degrees.get(label, 0)
-            if degree > 0:  # Only consider connected nodes
-                high_degree_nodes.append((label, degree))
-
-    # Sort by degree and take top nodes
-    high_degree_nodes.sort(key=lambda x: x[1], reverse=True)
-    selected_labels = [label for label, _ in high_degree_nodes[:max_analyze_nodes]]
-
-    # Get detailed node data for selected nodes (avoid redundant query in filter_and_group_entities)
-    nodes_data_raw = {}
-    if selected_labels:
-        nodes_data_raw = await graph_storage.get_nodes_batch(selected_labels)
-
-    # Convert raw dict data to GraphNodeData objects with degree information
-    nodes_by_id = {}
-    for label, raw_data in nodes_data_raw.items():
-        # Ensure entity_id is set
-        if "entity_id" not in raw_data:
-            raw_data["entity_id"] = label
-
-        # Add degree information to the node data
-        raw_data["degree"] = all_degrees.get(label, 0)
-
-        nodes_by_id[label] = GraphNodeData(**raw_data)
+    top_nodes = await graph_storage.get_top_degree_nodes(max_candidate_nodes)
+    if not top_nodes:
+        return [], 0
+
+    degrees = dict(top_nodes)
+    # Blocking is CPU bound, keep it off the event loop
+    pairs = await asyncio.to_thread(name_candidate_pairs, list(degrees), threshold=name_similarity_threshold)
+    name_pair_count = len(pairs)
+
+    if entities_vdb is not None and hasattr(entities_vdb, "iter_all"):
+        sketch = EmbeddingSketch()
+        async for entity_batch in entities_vdb.iter_all(fields=["entity_name", "content_vector"]):
+            ids, vectors = [], []
+            for record in entity_batch.values():
+                entity_name = record.get("entity_name")
+                if entity_name in degrees and record.get("content_vector") is not None:
+                    ids.append(entity_name)
+                    vectors.append(record["content_vector"])
+            sketch.add(ids, vectors)
+        embedding_pairs = await asyncio.to_thread(
+            embedding_candidate_pairs, sketch.ids, sketch.matrix(), threshold=embedding_similarity_threshold
+        )
+        for key, score in embedding_pairs.items():
+            pairs[key] = max(score, pairs.get(key, 0.0))
+
+    candidate_ids = sorted({entity_id for pair in pairs for entity_id in pair})
+    nodes_data = await graph_storage.get_nodes_batch(candidate_ids) if candidate_ids else {}
+
+    def _entity_type(entity_id: str) -> str:
+        return nodes_data[entity_id].get("entity_type") or "UNKNOWN"
+
+    typed_pairs = {
+        (a, b): score
+        for (a, b), score in pairs.items()
+        if a in nodes_data
+        and b in nodes_data
+        and _entity_type(a) == _entity_type(b)
+        and (not entity_types or _entity_type(a) in entity_types)
+    }
+    groups = group_candidate_pairs(typed_pairs, max_group_size=max_group_size)
 
     if lightrag_logger:
-        lightrag_logger.debug(f"Selected {len(selected_labels)} high-degree nodes and retrieved their data")
-
-    return GraphNodeDataDict(nodes_by_id=nodes_by_id), len(all_labels)
-
-
-async def filter_and_group_entities(
-    selected_nodes_dict: GraphNodeDataDict,
-    entity_types: list[str] | None = None,
-) -> dict[str, list[GraphNodeData]]:
-    """
-    Filter nodes by entity types and group them by type.
-
-    Args:
-        selected_nodes_dict: Dictionary of selected nodes with their data
-        entity_types: Optional filter for specific entity types
-
-    Returns:
-        Dictionary mapping entity types to lists of GraphNodeData objects
-
-    Example:
-        Input: selected_nodes_dict=GraphNodeDataDict(...), entity_types=['PERSON']
-        Output: {'PERSON': [GraphNodeData(entity_id='entity1', ...)]}
-    """
-    # Filter by entity types if specified
-    filtered_nodes = {}
-    for label, node_data in selected_nodes_dict.nodes_by_id.items():
-        if entity_types:
-            entity_type = node_data.entity_type or ""
-            if entity_type not in entity_types:
-                continue
-        filtered_nodes[label] = node_data
-
-    if not filtered_nodes:
-        return {}
-
-    # Group entities by type
-    from collections import defaultdict
-
-    entities_by_type = defaultdict(list)
-    for label, node_data in filtered_nodes.items():
-        entity_type = node_data.entity_type or "UNKNOWN"
-        filtered_node_data = GraphNodeData(
-            entity_id=label,
-            entity_name=node_data.entity_name or label,
-            entity_type=entity_type,
-            description=node_data.description or "",
-            degree=node_data.degree,
-            source_id=node_data.source_id,
-            file_path=node_data.file_path,
-            created_at=node_data.created_at,
+        lightrag_logger.info(
+            f"Blocked {len(degrees)} entities: {name_pair_count} name pairs, "
+            f"{len(pairs) - name_pair_count} more embedding pairs, "
+            f"{len(typed_pairs)} same-type pairs in {len(groups)} candidate groups"
         )
-        entities_by_type[entity_type].append(filtered_node_data)
 
-    return dict(entities_by_type)
+    candidate_groups = []
+    for group in groups:
+        entities = []
+        for entity_id in group:
+            node_data = nodes_data[entity_id]
+            entities.append(
+                GraphNodeData(
+                    entity_id=entity_id,
+                    entity_name=node_data.get("entity_name") or entity_id,
+                    entity_type=_entity_type(entity_id),
+                    description=node_data.get("description") or "",
+                    degree=degrees.get(entity_id, 0),
+                    source_id=node_data.get("source_id"),
+                    file_path=node_data.get("file_path"),
+                    created_at=node_data.get("created_at"),
+                )
+            )
+        candidate_groups.append(entities)
+
+    return candidate_groups, len(degrees)
 
 
-async def analyze_entities_with_llm(
-    entities_by_type: dict[str, list[GraphNodeData]],
+async def analyze_candidate_groups_with_llm(
+    candidate_groups: list[list[GraphNodeData]],
     llm_model_func: callable,
     confidence_threshold: float = 0.6,
     batch_size: int = 50,
-    max_suggestions: int = 10,  # Add max_suggestions parameter for early exit
-    max_concurrent_llm_calls: int = 4,  # Add concurrent LLM calls limit
+    max_batches: int | None = None,
+    max_suggestions: int = 10,
+    max_concurrent_llm_calls: int = 4,
     tokenizer=None,
     llm_model_max_token_size: int = 32768,
     summary_to_max_tokens: int = 200,
     lightrag_logger=None,
 ) -> list[MergeSuggestion]:
     """
-    Analyze entities using LLM to identify merge candidates with concurrent processing and early exit optimization.
+    Confirm candidate groups from generate_merge_candidates with the LLM.
+
+    Whole groups are packed into batches of at most batch_size entities, so the LLM only sees
+    likely duplicates side by side. The best candidates come first, max_batches bounds the LLM calls.
 
     Args:
-        entities_by_type: Dictionary mapping entity types to GraphNodeData lists
+        candidate_groups: Candidate groups of GraphNodeData, best first
         llm_model_func: LLM function for analysis
         confidence_threshold: Minimum confidence score to accept suggestions (default: 0.6)
-        batch_size: Batch size for LLM processing (default: 50)
-        max_suggestions: Maximum suggestions to return - enables early exit (default: 10)
+        batch_size: Max number of entities per LLM call (default: 50)
+        max_batches: Max number of LLM calls, None analyzes every group
+        max_suggestions: Maximum suggestions to return (default: 10)
         max_concurrent_llm_calls: Maximum concurrent LLM calls (default: 4)
         tokenizer: Tokenizer for description handling
         llm_model_max_token_size: Max token size for LLM
@@ -1994,52 +2256,55 @@ async def analyze_entities_with_llm(
 
     Returns:
         List of MergeSuggestion objects (up to max_suggestions)
-
-    Example:
-        Input: entities_by_type={'PERSON': [GraphNodeData('Alice Smith'), GraphNodeData('A. Smith')]}
-        Output: [MergeSuggestion(entities=[...], confidence_score=0.85, ...)]
     """
-    suggestions = []
-
     if not llm_model_func:
         if lightrag_logger:
             lightrag_logger.warning("No LLM function provided, skipping LLM analysis")
-        return suggestions
-
-    # Track processed entities for debugging
-    total_entities_processed = 0
-    total_batches_prepared = 0
-
-    # For early exit tracking
-    seen_entities = set()
-
-    # Prepare all batches for concurrent processing
-    batch_tasks_data = []
+        return []
 
-    # Process each entity type and create batch task data
-    for entity_type, entities_list in entities_by_type.items():
-        if len(entities_list) < 2:
-            if lightrag_logger:
-                lightrag_logger.debug(f"Skipping {entity_type}: only {len(entities_list)} entities")
-            continue  # Skip types with only one entity
+    entities_by_id = {entity.entity_id: entity for group in candidate_groups for entity in group}
+    batches = pack_groups([[entity.entity_id for entity in group] for group in candidate_groups], batch_size)
+    if max_batches is not None:
+        batches = batches[:max_batches]
 
-        if lightrag_logger:
-            lightrag_logger.debug(f"Preparing {entity_type}: {len(entities_list)} entities in batches of {batch_size}")
+    batch_tasks_data = [
+        {
+            "batch_id": batch_id,
+            "entity_type": "candidates",
+            "entities": [entities_by_id[entity_id] for entity_id in batch],
+            "batch_size": len(batch),
+        }
+        for batch_id, batch in enumerate(batches, start=1)
+    ]
+    return await _analyze_batches_with_llm(
+        batch_tasks_data,
+        llm_model_func,
+        confidence_threshold=confidence_threshold,
+        max_suggestions=max_suggestions,
+        max_concurrent_llm_calls=max_concurrent_llm_calls,
+        tokenizer=tokenizer,
+        llm_model_max_token_size=llm_model_max_token_size,
+        summary_to_max_tokens=summary_to_max_tokens,
+        lightrag_logger=lightrag_logger,
+    )
 
-        # Create batch tasks for this entity type
-        for i in range(0, len(entities_list), batch_size):
-            batch_entities = entities_list[i : i + batch_size]
-            total_batches_prepared += 1
-            total_entities_processed += len(batch_entities)
 
-            batch_tasks_data.append(
-                {
-                    "batch_id": total_batches_prepared,
-                    "entity_type": entity_type,
-                    "entities": batch_entities,
-                    "batch_size": len(batch_entities),
-                }
-            )
+async def _analyze_batches_with_llm(
+    batch_tasks_data: list[dict[str, Any]],
+    llm_model_func: callable,
+    confidence_threshold: float,
+    max_suggestions: int,
+    max_concurrent_llm_calls: int,
+    tokenizer,
+    llm_model_max_token_size: int,
+    summary_to_max_tokens: int,
+    lightrag_logger,
+) -> list[MergeSuggestion]:
+    """Run the LLM merge analysis of prepared batches concurrently, deduplicating suggestions across batches."""
+    suggestions = []
+    seen_entities = set()
+    total_batches_prepared = len(batch_tasks_data)
+    total_entities_processed = sum(batch_data["batch_size"] for batch_data in batch_tasks_data)
 
     if not batch_tasks_data:
         if lightrag_logger:
@@ -22,6 +22,8 @@ import numpy
 from aperag.db.models import Collection
 from aperag.db.ops import db_ops
 from aperag.graph.lightrag import LightRAG
+from aperag.graph.lightrag.extraction_cache import ExtractionCacheStats, get_default_extraction_cache
+from aperag.graph.lightrag.kg.graph_cache import wrap_graph_storage
 from aperag.graph.lightrag.utils import EmbeddingFunc
 from aperag.llm.embed.base_embedding import get_collection_embedding_service_sync
 from aperag.llm.llm_error_types import (
@@ -67,6 +69,7 @@ async def create_lightrag_instance(collection: Collection) -> LightRAG:
         # Generate embedding and LLM functions
         embed_func, embed_dim = await _gen_embed_func(collection)
         llm_func = await _gen_llm_func(collection)
+        completion = parseCollectionConfig(collection.config).completion
 
         # Get storage configuration from environment
         kv_storage = os.environ.get("GRAPH_INDEX_KV_STORAGE")
@@ -82,6 +85,8 @@ async def create_lightrag_instance(collection: Collection) -> LightRAG:
             chunk_token_size=LightRAGConfig.CHUNK_TOKEN_SIZE,
             chunk_overlap_token_size=LightRAGConfig.CHUNK_OVERLAP_TOKEN_SIZE,
             llm_model_func=llm_func,
+            llm_model_name=f"{completion.custom_llm_provider}/{completion.model}",
+            extraction_cache=get_default_extraction_cache(),
             embedding_func=EmbeddingFunc(
                 embedding_dim=embed_dim,
                 max_token_size=LightRAGConfig.EMBEDDING_MAX_TOKEN_SIZE,
@@ -99,6 +104,9 @@ async def create_lightrag_instance(collection: Collection) -> LightRAG:
             graph_storage=graph_storage,
         )
 
+        # Cache the graph reads of queries when GRAPH_QUERY_CACHE_ENABLED is set
+        rag.chunk_entity_relation_graph = wrap_graph_storage(rag.chunk_entity_relation_graph)
+
         await rag.initialize_storages()
         return rag
 
@@ -167,6 +175,7 @@ async def _process_document_async(
 
         # Process results
         total_stats = {"chunks_created": 0, "entities_extracted": 0, "relations_extracted": 0, "documents": []}
+        cache_stats = ExtractionCacheStats()
 
         for doc_result in results:
             doc_result_id = doc_result.get("doc_id")
@@ -180,6 +189,9 @@ async def _process_document_async(
                 total_stats["chunks_created"] += chunk_count
                 total_stats["entities_extracted"] += graph_result.get("entities_extracted", 0)
                 total_stats["relations_extracted"] += graph_result.get("relations_extracted", 0)
+                doc_cache_stats = graph_result.get("extraction_cache", {})
+                cache_stats.hits += doc_cache_stats.get("hits", 0)
+                cache_stats.misses += doc_cache_stats.get("misses", 0)
 
                 total_stats["documents"].append(
                     {
@@ -187,10 +199,11 @@ async def _process_document_async(
                         "chunks_created": chunk_count,
                         "entities_extracted": graph_result.get("entities_extracted", 0),
                         "relations_extracted": graph_result.get("relations_extracted", 0),
+                        "extraction_cache": doc_cache_stats,
                     }
                 )
 
-        return {"status": "success", "doc_id": doc_id, **total_stats}
+        return {"status": "success", "doc_id": doc_id, **total_stats, "extraction_cache": cache_stats.snapshot()}
 
     finally:
         await rag.finalize_storages()
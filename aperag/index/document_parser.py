@@ -15,14 +15,17 @@
 import io
 import logging
 import mimetypes
+import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import pikepdf
-import pypdfium2 as pdfium
 
 from aperag.docparser.base import AssetBinPart, MarkdownPart, PdfPart
 from aperag.docparser.doc_parser import DocParser
+from aperag.index import pdf_pages
+from aperag.index.parse_cache import ParseCache
+from aperag.index.pdf_pages import PageRenderOptions
 from aperag.objectstore.base import get_object_store
 
 logger = logging.getLogger(__name__)
@@ -48,7 +51,12 @@ class DocumentParser:
     MAX_EXTRACTED_SIZE = 5000 * 1024 * 1024  # 5 GB
 
     def parse_document(
-        self, filepath: str, file_metadata: Dict[str, Any], parser_config: Optional[Dict[str, Any]] = None
+        self,
+        filepath: str,
+        file_metadata: Dict[str, Any],
+        parser_config: Optional[Dict[str, Any]] = None,
+        parse_cache: Optional[ParseCache] = None,
+        object_store_base_path: Optional[str] = None,
     ) -> List[Any]:
         """
         Parse document into parts using DocParser.
@@ -57,6 +65,8 @@ class DocumentParser:
             filepath: Path to the document file
             file_metadata: Metadata associated with the document
             parser_config: Configuration for the parser
+            parse_cache: Cache of parse artifacts, reused when the file and parser config are unchanged
+            object_store_base_path: Base path of the document, where its parse cache entry is stored
 
         Returns:
             List of document parts (MarkdownPart, AssetBinPart, etc.)
@@ -71,13 +81,21 @@ class DocumentParser:
         if not parser.accept(filepath_obj.suffix):
             raise ValueError(f"unsupported file type: {filepath_obj.suffix}")
 
-        parts = parser.parse_file(filepath_obj, file_metadata)
+        cache_key = None
+        if parse_cache is not None and object_store_base_path is not None:
+            cache_key = parse_cache.key_for(parser, filepath_obj)
+            parts = parse_cache.get(object_store_base_path, cache_key, file_metadata)
+            if parts is not None:
+                logger.info(f"Reused cached parse of document {filepath} ({len(parts)} parts, key {cache_key})")
+                return parts
+
+        parts = self._parse_document(parser, filepath_obj, file_metadata)
+        if cache_key is not None:
+            parse_cache.set(object_store_base_path, cache_key, parts, file_metadata)
+        return parts
 
-        # If there are no PdfPart in parts and the doc is a pdf, then add the doc itself as a PdfPart
-        if filepath_obj.suffix.lower() == ".pdf":
-            if not any(isinstance(p, PdfPart) for p in parts):
-                with open(filepath_obj, "rb") as f:
-                    parts.append(PdfPart(data=f.read()))
+    def _parse_document(self, parser: DocParser, filepath_obj: Path, file_metadata: Dict[str, Any]) -> List[Any]:
+        parts = parser.parse_file(filepath_obj, file_metadata)
 
         if is_image_file(filepath_obj.suffix):
             # Convert the image file to an asset
@@ -99,58 +117,39 @@ class DocumentParser:
                     mime_type=mime_type,
                 )
                 parts.append(asset_part)
-        else:
-            # Convert PdfPart to image assets
-            pdf_parts = [p for p in parts if isinstance(p, PdfPart)]
-            for pdf_part in pdf_parts:
-                try:
-                    pdf_doc = pdfium.PdfDocument(pdf_part.data)
-                    for i, page in enumerate(pdf_doc):
-                        # Render page to a PIL image
-                        image = page.render(scale=1).to_pil()
-                        # Save image to a bytes buffer
-                        with io.BytesIO() as buffer:
-                            image.save(buffer, format="PNG")
-                            image_data = buffer.getvalue()
-
-                        # Create a new AssetBinPart for each page
-                        metadata = file_metadata.copy()
-                        metadata.update(
-                            {
-                                "page_idx": i,
-                                "converted_from": "pdf",
-                                "vision_index": True,
-                            }
-                        )
-                        asset_id = f"page_{i}.png"
-                        asset_part = AssetBinPart(
-                            asset_id=asset_id,
-                            data=image_data,
-                            metadata=metadata,
-                            mime_type="image/png",
-                        )
-                        parts.append(asset_part)
 
-                    logger.info(f"Converted {len(pdf_doc)} pages from a PDF part to image assets.")
-                except Exception as e:
-                    logger.warning(f"Failed to convert PDF part to images: {e}", exc_info=True)
-
-        logger.info(f"Parsed document {filepath} into {len(parts)} parts")
+        logger.info(f"Parsed document {filepath_obj} into {len(parts)} parts")
         return parts
 
-    def linearize_pdf(self, data: bytes) -> bytes:
-        with pikepdf.open(io.BytesIO(data)) as pdf:
-            with io.BytesIO() as buffer:
-                pdf.save(buffer, linearize=True)
-                return buffer.getvalue()
-
-    def save_processed_content_and_assets(self, doc_parts: List[Any], object_store_base_path: Optional[str]) -> str:
+    def upload_linearized_pdf(self, obj_store, upload_path: str, pdf: str | bytes) -> int:
+        """Linearize a PDF given by path or data through a temporary file and upload it, returns its size."""
+        with tempfile.TemporaryFile() as buffer:
+            with pikepdf.open(pdf if isinstance(pdf, str) else io.BytesIO(pdf)) as pdf_doc:
+                pdf_doc.save(buffer, linearize=True)
+            size = buffer.tell()
+            buffer.seek(0)
+            obj_store.put(upload_path, buffer)
+        return size
+
+    def get_pdf_source(self, doc_parts: List[Any], filepath: str) -> Optional[str | bytes]:
+        """The PDF of the document: the one produced by the parser, else the file itself if it is a PDF."""
+        pdf_part = next((part for part in doc_parts if isinstance(part, PdfPart)), None)
+        if pdf_part is not None:
+            return pdf_part.data
+        if Path(filepath).suffix.lower() == ".pdf":
+            return str(filepath)
+        return None
+
+    def save_processed_content_and_assets(
+        self, doc_parts: List[Any], object_store_base_path: Optional[str], pdf_source: Optional[str | bytes] = None
+    ) -> str:
         """
         Save processed content and assets to object storage.
 
         Args:
             doc_parts: List of document parts from DocParser
             object_store_base_path: Base path for object storage, if None, skip saving
+            pdf_source: The PDF of the document, by path or data, see get_pdf_source
 
         Returns:
             Full markdown content of the document
@@ -170,6 +169,8 @@ class DocumentParser:
         pdf_part = next((part for part in doc_parts if isinstance(part, PdfPart)), None)
         if pdf_part is not None:
             doc_parts.remove(pdf_part)
+            if pdf_source is None:
+                pdf_source = pdf_part.data
 
         # Save to object storage if base path is provided
         if object_store_base_path is not None:
@@ -182,11 +183,10 @@ class DocumentParser:
             obj_store.put(md_upload_path, md_data)
             logger.info(f"uploaded markdown content to {md_upload_path}, size: {len(md_data)}")
 
-            if pdf_part is not None:
+            if pdf_source is not None:
                 converted_pdf_upload_path = f"{base_path}/converted.pdf"
-                linearized_pdf_data = self.linearize_pdf(pdf_part.data)
-                obj_store.put(converted_pdf_upload_path, linearized_pdf_data)
-                logger.info(f"uploaded converted pdf to {converted_pdf_upload_path}, size: {len(linearized_pdf_data)}")
+                linearized_size = self.upload_linearized_pdf(obj_store, converted_pdf_upload_path, pdf_source)
+                logger.info(f"uploaded converted pdf to {converted_pdf_upload_path}, size: {linearized_size}")
 
             # Save assets
             to_be_deleted = []
@@ -241,6 +241,9 @@ class DocumentParser:
         file_metadata: Dict[str, Any],
         object_store_base_path: Optional[str] = None,
         parser_config: Optional[Dict[str, Any]] = None,
+        parse_cache: Optional[ParseCache] = None,
+        render_pdf_pages: bool = True,
+        page_render_options: Optional[PageRenderOptions] = None,
     ) -> DocumentParsingResult:
         """
         Complete document parsing workflow
@@ -250,16 +253,31 @@ class DocumentParser:
             file_metadata: Metadata associated with the document
             object_store_base_path: Base path for object storage
             parser_config: Configuration for the parser
+            parse_cache: Cache of parse artifacts, see aperag.index.parse_cache
+            render_pdf_pages: Render the PDF pages to images for the vision index
+            page_render_options: DPI, image format and window of the page rendering, defaults to the settings
 
         Returns:
             DocumentParsingResult containing parsed parts and content
         """
         try:
             # Parse document into parts
-            doc_parts = self.parse_document(filepath, file_metadata, parser_config)
+            doc_parts = self.parse_document(filepath, file_metadata, parser_config, parse_cache, object_store_base_path)
+            pdf_source = self.get_pdf_source(doc_parts, filepath)
 
             # Save processed content and assets to object storage
-            content = self.save_processed_content_and_assets(doc_parts, object_store_base_path)
+            content = self.save_processed_content_and_assets(doc_parts, object_store_base_path, pdf_source)
+
+            # Render the PDF pages for the vision index, streamed to the object storage
+            if render_pdf_pages and pdf_source is not None and not is_image_file(Path(filepath).suffix):
+                try:
+                    doc_parts.extend(
+                        pdf_pages.render_pdf_pages(
+                            pdf_source, file_metadata or {}, object_store_base_path, page_render_options
+                        )
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to convert PDF part to images: {e}", exc_info=True)
 
             return DocumentParsingResult(doc_parts=doc_parts, content=content, metadata={"parts_count": len(doc_parts)})
 
@@ -237,6 +237,7 @@ class GraphIndexer(AsyncIndexer):
                         "chunks_created": result.get("chunks_created", 0),
                         "entities_extracted": result.get("entities_extracted", 0),
                         "relations_extracted": result.get("relations_extracted", 0),
+                        "extraction_cache": result.get("extraction_cache"),
                     },
                     metadata={"status": "complete", "processing_time": result.get("processing_time")},
                 )
@@ -0,0 +1,180 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Parse artifact cache.
+
+Parsing (MinerU / DocRay calls, MarkItDown conversion) is the most expensive step of an index
+workflow, and is repeated whenever a workflow runs again for an unchanged file: an update of a
+single index type, or a retry after a transient failure. The parts produced by
+DocumentParser.parse_document are stored next to the other objects of the document, at
+
+    {document object store base path}/parse_cache.bin
+
+together with their key
+
+    v{PARSER_VERSION}/{parser names}/{parser config hash}/{file sha256}
+
+so a parse output is only reused for the same file bytes, parsed by the same parsers with the
+same settings and the same parser version. A document holds a single entry, overwritten by the
+next parse with another key, and removed with the objects of the document when it is deleted.
+The file metadata merged into every part is stripped before storing and merged back on load. The
+PDF page images of the vision index are not part of the parse output, see aperag.index.pdf_pages.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from aperag.config import settings
+from aperag.docparser.base import Part
+from aperag.docparser.doc_parser import PARSER_VERSION, DocParser
+from aperag.tasks.parsed_store import decode_sections, encode_parts_json, encode_sections, restore_blobs
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_OBJECT = "parse_cache.bin"
+# Parser settings that authenticate rather than configure, rotating them keeps the cache valid
+_CREDENTIAL_MARKERS = ("token", "key", "secret", "password")
+
+
+def file_sha256(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parser_config_hash(parser: DocParser, extension: str) -> str:
+    """Hash of the configs of the parsers that would handle the extension, credentials excluded."""
+    configs = []
+    for cfg in parser.accepting_parsers(extension):
+        parser_settings = {
+            key: value
+            for key, value in (cfg.settings or {}).items()
+            if not any(marker in key.lower() for marker in _CREDENTIAL_MARKERS)
+        }
+        configs.append([cfg.name, parser_settings, cfg.supported_extensions_override])
+    payload = json.dumps([extension.lower(), configs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def make_parse_cache_key(file_hash: str, parser_names: List[str], config_hash: str) -> str:
+    return f"v{PARSER_VERSION}/{'+'.join(parser_names) or 'none'}/{config_hash}/{file_hash}"
+
+
+def _part_classes() -> Dict[str, type]:
+    classes, pending = {}, [Part]
+    while pending:
+        cls = pending.pop()
+        classes[cls.__name__] = cls
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+def encode_parts(parts: List[Part], file_metadata: Dict[str, Any], key: str = "") -> bytes:
+    """Encode typed parts, without the file metadata that the parsers copied into each of them."""
+    serialized = []
+    for part in parts:
+        fields = part.model_dump()
+        fields["metadata"] = {
+            key: value
+            for key, value in (fields.get("metadata") or {}).items()
+            if key not in file_metadata or file_metadata[key] != value
+        }
+        serialized.append({"type": part.__class__.__name__, "fields": fields})
+    parts_section, blobs = encode_parts_json(serialized)
+    return encode_sections(
+        [("key", key.encode("utf-8"), False), ("parts", parts_section, True), ("blobs", blobs, False)]
+    )
+
+
+def decode_parts(data: bytes, file_metadata: Dict[str, Any], key: Optional[str] = None) -> Optional[List[Part]]:
+    """Parts of an encoded entry, None if key is given and the entry was stored under another one."""
+    sections = decode_sections(data)
+    if key is not None and sections.get("key", b"").decode("utf-8") != key:
+        return None
+    serialized = restore_blobs(json.loads(sections["parts"]), sections["blobs"])
+    classes = _part_classes()
+    parts = []
+    for item in serialized:
+        fields = item["fields"]
+        fields["metadata"] = {**file_metadata, **fields.get("metadata", {})}
+        parts.append(classes[item["type"]].model_validate(fields))
+    return parts
+
+
+class ParseCache:
+    """Parse artifacts in the object store, one per document; lookups and writes are best effort."""
+
+    def __init__(self, object_store=None):
+        self._object_store = object_store
+
+    def _store(self):
+        if self._object_store is None:
+            from aperag.objectstore.base import get_object_store
+
+            self._object_store = get_object_store()
+        return self._object_store
+
+    @staticmethod
+    def path_for(object_store_base_path: str) -> str:
+        return f"{object_store_base_path}/{PARSE_CACHE_OBJECT}"
+
+    def key_for(self, parser: DocParser, filepath: str | Path) -> str:
+        extension = Path(filepath).suffix
+        parser_names = [cfg.name for cfg in parser.accepting_parsers(extension)]
+        return make_parse_cache_key(file_sha256(filepath), parser_names, parser_config_hash(parser, extension))
+
+    def get(self, object_store_base_path: str, key: str, file_metadata: Dict[str, Any]) -> Optional[List[Part]]:
+        path = self.path_for(object_store_base_path)
+        try:
+            obj = self._store().get(path)
+            if obj is None:
+                return None
+            try:
+                data = obj.read()
+            finally:
+                obj.close()
+            return decode_parts(data, file_metadata, key)
+        except Exception as e:
+            logger.warning(f"Failed to read parse cache entry {path}: {e}")
+            return None
+
+    def set(self, object_store_base_path: str, key: str, parts: List[Part], file_metadata: Dict[str, Any]) -> None:
+        path = self.path_for(object_store_base_path)
+        try:
+            self._store().put(path, encode_parts(parts, file_metadata, key))
+        except Exception as e:
+            logger.warning(f"Failed to write parse cache entry {path}: {e}")
+
+
+_default_parse_cache: Optional[ParseCache] = None
+_default_parse_cache_lock = threading.Lock()
+
+
+def get_default_parse_cache() -> Optional[ParseCache]:
+    """Process-wide parse cache, None when disabled by PARSE_CACHE_ENABLED."""
+    global _default_parse_cache
+    if not settings.parse_cache_enabled:
+        return None
+    if _default_parse_cache is None:
+        with _default_parse_cache_lock:
+            if _default_parse_cache is None:
+                _default_parse_cache = ParseCache()
+    return _default_parse_cache
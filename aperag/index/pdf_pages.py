@@ -0,0 +1,195 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming rendering of PDF pages for the vision index.
+
+Pages are rendered, encoded and uploaded to the object store one at a time, so the parse worker
+never holds more than one page image, whatever the page count. The parts handed to the vision
+indexer only reference the uploaded images (empty data, the object path in the "asset_path"
+metadata), and the indexer loads them back a window of PDF_PAGE_WINDOW pages at a time, see
+iter_image_windows.
+"""
+
+import io
+import itertools
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+import pypdfium2 as pdfium
+
+from aperag.config import settings
+from aperag.docparser.base import AssetBinPart
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# format name -> (PIL format, file extension, mime type)
+PAGE_IMAGE_FORMATS = {
+    "png": ("PNG", "png", "image/png"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "webp": ("WEBP", "webp", "image/webp"),
+}
+ASSET_PATH_KEY = "asset_path"
+# PDF user space units per inch
+_PDF_DPI = 72
+
+
+@dataclass
+class PageRenderOptions:
+    dpi: int = 72
+    image_format: str = "png"
+    quality: int = 85
+
+    def __post_init__(self):
+        self.image_format = self.image_format.lower()
+        if self.image_format == "jpg":
+            self.image_format = "jpeg"
+        if self.image_format not in PAGE_IMAGE_FORMATS:
+            raise ValueError(f"unsupported page image format: {self.image_format}")
+
+    @classmethod
+    def from_settings(cls) -> "PageRenderOptions":
+        return cls(
+            dpi=settings.pdf_page_render_dpi,
+            image_format=settings.pdf_page_image_format,
+            quality=settings.pdf_page_image_quality,
+        )
+
+
+def windows(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Consume items lazily, size at a time."""
+    iterator = iter(items)
+    while window := list(itertools.islice(iterator, size)):
+        yield window
+
+
+def encode_page_image(image, options: PageRenderOptions) -> bytes:
+    pil_format, _, _ = PAGE_IMAGE_FORMATS[options.image_format]
+    save_kwargs: Dict[str, Any] = {}
+    if options.image_format == "jpeg":
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        save_kwargs = {"quality": options.quality, "optimize": True}
+    elif options.image_format == "webp":
+        save_kwargs = {"quality": options.quality, "method": 4}
+    with io.BytesIO() as buffer:
+        image.save(buffer, format=pil_format, **save_kwargs)
+        return buffer.getvalue()
+
+
+def iter_pdf_pages(
+    pdf: str | Path | bytes, file_metadata: Dict[str, Any], options: Optional[PageRenderOptions] = None
+) -> Iterator[AssetBinPart]:
+    """
+    Render the pages of a PDF lazily, one AssetBinPart per page.
+
+    A PDF given by path is read by pdfium on demand instead of being loaded in memory. Each page
+    and its bitmap are released before the next one is rendered.
+    """
+    options = options or PageRenderOptions.from_settings()
+    _, extension, mime_type = PAGE_IMAGE_FORMATS[options.image_format]
+    pdf_doc = pdfium.PdfDocument(str(pdf) if isinstance(pdf, Path) else pdf)
+    try:
+        for i in range(len(pdf_doc)):
+            page = pdf_doc[i]
+            try:
+                bitmap = page.render(scale=options.dpi / _PDF_DPI)
+                try:
+                    image_data = encode_page_image(bitmap.to_pil(), options)
+                finally:
+                    bitmap.close()
+            finally:
+                page.close()
+
+            metadata = file_metadata.copy()
+            metadata.update(
+                {
+                    "page_idx": i,
+                    "converted_from": "pdf",
+                    "vision_index": True,
+                }
+            )
+            yield AssetBinPart(
+                asset_id=f"page_{i}.{extension}", data=image_data, metadata=metadata, mime_type=mime_type
+            )
+    finally:
+        pdf_doc.close()
+
+
+def render_pdf_pages(
+    pdf: str | Path | bytes,
+    file_metadata: Dict[str, Any],
+    object_store_base_path: Optional[str] = None,
+    options: Optional[PageRenderOptions] = None,
+    object_store=None,
+) -> List[AssetBinPart]:
+    """
+    Render the pages of a PDF and upload each of them under {object_store_base_path}/assets.
+
+    Returns:
+        One part per page for the vision index. Uploaded pages carry no data, only the object path
+        of their image; without a base path the pages are kept in memory.
+    """
+    options = options or PageRenderOptions.from_settings()
+    if object_store_base_path is None:
+        return list(iter_pdf_pages(pdf, file_metadata, options))
+    if object_store is None:
+        from aperag.objectstore.base import get_object_store
+
+        object_store = get_object_store()
+
+    page_refs = []
+    uploaded_bytes = 0
+    for part in iter_pdf_pages(pdf, file_metadata, options):
+        asset_path = f"{object_store_base_path}/assets/{part.asset_id}"
+        object_store.put(asset_path, part.data)
+        uploaded_bytes += len(part.data)
+        page_refs.append(
+            part.model_copy(update={"data": b"", "metadata": {**part.metadata, ASSET_PATH_KEY: asset_path}})
+        )
+    logger.info(
+        f"Rendered {len(page_refs)} PDF pages to {options.image_format} at {options.dpi} dpi, "
+        f"uploaded {uploaded_bytes} bytes"
+    )
+    return page_refs
+
+
+def load_image_data(part: Any, object_store=None) -> bytes:
+    """Image bytes of an asset part, read from the object store when the part only references them."""
+    if part.data:
+        return part.data
+    asset_path = (part.metadata or {}).get(ASSET_PATH_KEY)
+    if not asset_path:
+        return part.data
+    if object_store is None:
+        from aperag.objectstore.base import get_object_store
+
+        object_store = get_object_store()
+    obj = object_store.get(asset_path)
+    if obj is None:
+        raise FileNotFoundError(f"Asset {asset_path} not found in object store")
+    try:
+        return obj.read()
+    finally:
+        obj.close()
+
+
+def iter_image_windows(parts: List[Any], window: int, object_store=None) -> Iterator[List[tuple[Any, bytes]]]:
+    """(part, image bytes) of the image parts, window at a time, loading referenced images on demand."""
+    for parts_window in windows(parts, max(1, window)):
+        yield [(part, load_image_data(part, object_store)) for part in parts_window]
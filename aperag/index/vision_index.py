@@ -21,9 +21,10 @@ from typing import Any, List
 from llama_index.core.schema import TextNode
 from sqlalchemy import and_, select
 
-from aperag.config import get_vector_db_connector
+from aperag.config import get_vector_db_connector, settings
 from aperag.db.models import Collection
 from aperag.index.base import BaseIndexer, IndexResult, IndexType
+from aperag.index.pdf_pages import iter_image_windows, load_image_data
 from aperag.llm.completion.base_completion import get_collection_completion_service_sync
 from aperag.llm.embed.base_embedding import get_collection_embedding_service_sync
 from aperag.llm.llm_error_types import (
@@ -97,34 +98,39 @@ class VisionIndexer(BaseIndexer):
         all_ctx_ids = []
 
         # Path A: Pure Vision Embedding
+        # Images are loaded, embedded and stored a window at a time, page images being read from the object store
         if embedding_svc.is_multimodal():
+            direct_ctx_ids = []
             try:
-                nodes: List[TextNode] = []
-                image_uris = []
-                for part in image_parts:
-                    b64_image = base64.b64encode(part.data).decode("utf-8")
-                    mime_type = part.mime_type or "image/png"
-                    data_uri = f"data:{mime_type};base64,{b64_image}"
-                    image_uris.append(data_uri)
-                    metadata = part.metadata.copy()
-                    metadata["collection_id"] = collection.id
-                    metadata["document_id"] = document_id
-                    metadata["source"] = metadata.get("name", "")
-                    metadata["asset_id"] = part.asset_id
-                    metadata["mimetype"] = mime_type
-                    metadata["indexer"] = "vision"
-                    metadata["index_method"] = "multimodal_embedding"
-                    nodes.append(TextNode(text="", metadata=metadata))
-
-                vectors = embedding_svc.embed_documents(image_uris)
-                for i, node in enumerate(nodes):
-                    node.embedding = vectors[i]
+                for window in iter_image_windows(image_parts, settings.pdf_page_window):
+                    nodes: List[TextNode] = []
+                    image_uris = []
+                    for part, image_data in window:
+                        b64_image = base64.b64encode(image_data).decode("utf-8")
+                        mime_type = part.mime_type or "image/png"
+                        data_uri = f"data:{mime_type};base64,{b64_image}"
+                        image_uris.append(data_uri)
+                        metadata = part.metadata.copy()
+                        metadata["collection_id"] = collection.id
+                        metadata["document_id"] = document_id
+                        metadata["source"] = metadata.get("name", "")
+                        metadata["asset_id"] = part.asset_id
+                        metadata["mimetype"] = mime_type
+                        metadata["indexer"] = "vision"
+                        metadata["index_method"] = "multimodal_embedding"
+                        nodes.append(TextNode(text="", metadata=metadata))
 
-                ctx_ids = vector_store_adaptor.connector.store.add(nodes)
-                all_ctx_ids.extend(ctx_ids)
-                logger.info(f"Created {len(ctx_ids)} direct vision vectors for document {document_id}")
+                    vectors = embedding_svc.embed_documents(image_uris)
+                    for i, node in enumerate(nodes):
+                        node.embedding = vectors[i]
+
+                    direct_ctx_ids.extend(vector_store_adaptor.connector.store.add(nodes))
+                all_ctx_ids.extend(direct_ctx_ids)
+                logger.info(f"Created {len(direct_ctx_ids)} direct vision vectors for document {document_id}")
             except Exception as e:
                 logger.error(f"Failed to create pure vision embedding for document {document_id}: {e}", exc_info=True)
+                # The windows stored so far are not recorded anywhere, they would never be deleted
+                self._delete_vectors(vector_store_adaptor, direct_ctx_ids, document_id)
                 return IndexResult(
                     success=False,
                     index_type=self.index_type,
@@ -139,7 +145,7 @@ class VisionIndexer(BaseIndexer):
             try:
                 text_nodes: List[TextNode] = []
                 for part in image_parts:
-                    b64_image = base64.b64encode(part.data).decode("utf-8")
+                    b64_image = base64.b64encode(load_image_data(part)).decode("utf-8")
                     mime_type = part.mime_type or "image/png"
                     data_uri = f"data:{mime_type};base64,{b64_image}"
 
@@ -184,6 +190,7 @@ class VisionIndexer(BaseIndexer):
                                     f"Non-retryable error or max retries exceeded for asset {part.asset_id}: {e}",
                                     exc_info=True,
                                 )
+                                self._delete_vectors(vector_store_adaptor, all_ctx_ids, document_id)
                                 return IndexResult(
                                     success=False,
                                     index_type=self.index_type,
@@ -197,6 +204,7 @@ class VisionIndexer(BaseIndexer):
                                 f"Unexpected error generating vision-to-text for asset {part.asset_id}: {e}",
                                 exc_info=True,
                             )
+                            self._delete_vectors(vector_store_adaptor, all_ctx_ids, document_id)
                             return IndexResult(
                                 success=False,
                                 index_type=self.index_type,
@@ -228,6 +236,7 @@ class VisionIndexer(BaseIndexer):
                 logger.error(
                     f"Failed to create vision-to-text embedding for document {document_id}: {e}", exc_info=True
                 )
+                self._delete_vectors(vector_store_adaptor, all_ctx_ids, document_id)
                 return IndexResult(
                     success=False,
                     index_type=self.index_type,
@@ -244,6 +253,16 @@ class VisionIndexer(BaseIndexer):
             metadata={"vector_count": len(all_ctx_ids), "vector_size": vector_size},
         )
 
+    def _delete_vectors(self, vector_store_adaptor, ctx_ids: List[str], document_id: str) -> None:
+        """Delete the vectors already stored for a document whose indexing failed."""
+        if not ctx_ids:
+            return
+        try:
+            vector_store_adaptor.connector.delete(ids=ctx_ids)
+            logger.info(f"Deleted {len(ctx_ids)} vision vectors stored before document {document_id} failed")
+        except Exception as e:
+            logger.warning(f"Failed to delete {len(ctx_ids)} vision vectors of document {document_id}: {e}")
+
     def update_index(
         self, document_id: str, content: str, doc_parts: List[Any], collection: Collection, **kwargs
     ) -> IndexResult:
@@ -13,7 +13,15 @@
 # limitations under the License.
 
 from aperag.llm.embed.base_embedding import get_collection_embedding_service_sync
+from aperag.llm.embed.embedding_cache import get_embedding_cache_stats
+from aperag.llm.embed.embedding_coalescer import get_coalescer_stats
 from aperag.llm.embed.embedding_service import EmbeddingService
 from aperag.llm.embed.embedding_utils import create_embeddings_and_store
 
-__all__ = ["EmbeddingService", "get_collection_embedding_service_sync", "create_embeddings_and_store"]
+__all__ = [
+    "EmbeddingService",
+    "get_collection_embedding_service_sync",
+    "get_embedding_cache_stats",
+    "get_coalescer_stats",
+    "create_embeddings_and_store",
+]
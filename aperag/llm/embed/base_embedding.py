@@ -119,6 +119,7 @@ def _get_embedding_model(
             multimodal=multimodal,
         )
         embedding_dim = _get_embedding_dimension(embedding_svc, embedding_provider, embedding_model)
+        embedding_svc.dimension = embedding_dim
         return embedding_svc, embedding_dim
     except EmbeddingError:
         # Re-raise embedding errors
@@ -0,0 +1,119 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Token-aware batch planning for embedding requests.
+
+Batches are packed by both chunk count and token budget. When a provider rejects a
+batch as too large, the caller splits it in half and retries, and the size that failed
+is remembered per (provider, model) so later batches are planned below it.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aperag.llm.llm_error_types import (
+    AuthenticationError,
+    LLMError,
+    QuotaExceededError,
+    RateLimitError,
+    TextTooLongError,
+)
+
+logger = logging.getLogger(__name__)
+
+_SIZE_ERROR_KEYWORDS = [
+    "too many",
+    "too long",
+    "too large",
+    "token limit",
+    "maximum context",
+    "max_tokens",
+    "batch size",
+    "exceeds",
+    "413",
+]
+
+
+def is_batch_size_error(error: Exception) -> bool:
+    """Whether the error looks like the provider rejected the request for its size."""
+    if isinstance(error, TextTooLongError):
+        return True
+    if isinstance(error, (RateLimitError, QuotaExceededError, AuthenticationError)):
+        return False
+    message = str(error).lower()
+    if isinstance(error, LLMError):
+        message += " " + str(error.details.get("original_error", "")).lower()
+    return any(keyword in message for keyword in _SIZE_ERROR_KEYWORDS)
+
+
+def plan_batches(token_counts: Sequence[int], max_chunks: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """
+    Greedily pack consecutive items into batches.
+
+    Args:
+        token_counts: Token count of every item, in order
+        max_chunks: Max items per batch, 0 means unlimited
+        max_tokens: Max total tokens per batch, 0 means unlimited. An item larger
+            than the budget is sent alone.
+
+    Returns:
+        List of (start, end) index ranges covering every item in order
+    """
+    batches = []
+    start, tokens = 0, 0
+    for i, count in enumerate(token_counts):
+        size = i - start
+        if size and ((max_chunks and size >= max_chunks) or (max_tokens and tokens + count > max_tokens)):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += count
+    if start < len(token_counts):
+        batches.append((start, len(token_counts)))
+    return batches
+
+
+class LearnedBatchLimits:
+    """Batch size limits learned from provider rejections, per (provider, model), process-wide."""
+
+    def __init__(self):
+        self._limits: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._limits.get((provider, model), {}))
+
+    def record_rejection(self, provider: str, model: str, chunks: int, tokens: Optional[int]) -> None:
+        """Remember that a batch of this size was rejected, limiting later batches to half of it."""
+        with self._lock:
+            limits = self._limits.setdefault((provider, model), {})
+            chunk_limit = max(1, chunks // 2)
+            if chunk_limit < limits.get("max_chunks", chunk_limit + 1):
+                limits["max_chunks"] = chunk_limit
+            if tokens:
+                token_limit = max(1, tokens // 2)
+                if token_limit < limits.get("max_tokens", token_limit + 1):
+                    limits["max_tokens"] = token_limit
+            logger.info(f"Learned embedding batch limits for {provider}/{model}: {limits}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._limits.clear()
+
+
+learned_batch_limits = LearnedBatchLimits()
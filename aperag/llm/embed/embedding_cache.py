@@ -0,0 +1,256 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Content-addressed embedding cache.
+
+Embeddings are cached per text, keyed on (provider, model, dimension, sha256(text)),
+so a re-index of unchanged chunks never goes back to the embedding provider.
+
+Two tiers are available:
+- MemoryEmbeddingCache: in-process LRU, always the first tier
+- RedisEmbeddingCache: optional shared tier, survives worker restarts and is
+  visible to every API/Celery process
+
+Statistics are process-local, in the same spirit as litellm_cache.get_cache_stats().
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_REDIS_KEY_PREFIX = "aperag:embedding_cache:"
+
+
+def make_embedding_cache_key(provider: str, model: str, dimension: Optional[int], text: str) -> str:
+    """Build the content-addressed cache key for a single text."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{provider}:{model}:{dimension or 0}:{digest}"
+
+
+class EmbeddingCacheStats:
+    """Thread-safe hit/miss/byte counters for an embedding cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.hit_bytes = 0
+        self.miss_bytes = 0
+        self.stored = 0
+
+    def record(self, hits: int, misses: int, hit_bytes: int, miss_bytes: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.hit_bytes += hit_bytes
+            self.miss_bytes += miss_bytes
+
+    def record_stored(self, count: int) -> None:
+        with self._lock:
+            self.stored += count
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_bytes": self.hit_bytes,
+                "miss_bytes": self.miss_bytes,
+                "stored": self.stored,
+                "total_requests": total,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class EmbeddingCache(ABC):
+    """Interface of an embedding cache tier."""
+
+    @abstractmethod
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for the given keys; missing keys are omitted."""
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        """Store vectors by key."""
+
+    def clear(self) -> None:
+        """Drop every cached entry, if the backend supports it."""
+
+
+class MemoryEmbeddingCache(EmbeddingCache):
+    """In-process LRU cache bounded by entry count."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._data.get(key)
+                if vector is not None:
+                    self._data.move_to_end(key)
+                    found[key] = vector
+        return found
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._data[key] = vector
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisEmbeddingCache(EmbeddingCache):
+    """Shared cache tier stored in Redis, using the application's shared connection pool."""
+
+    def __init__(self, ttl: int = 86400, client=None):
+        self.ttl = ttl
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from aperag.db.redis_manager import RedisConnectionManager
+
+            self._client = RedisConnectionManager.get_sync_client()
+        return self._client
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        try:
+            values = self.client.mget([_REDIS_KEY_PREFIX + key for key in keys])
+        except Exception as e:
+            # The shared tier is best effort, a Redis outage must not break embedding
+            logger.warning(f"Embedding cache redis lookup failed: {e}")
+            return {}
+        found = {}
+        for key, value in zip(keys, values):
+            if value is not None:
+                found[key] = json.loads(value)
+        return found
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, vector in items.items():
+                pipe.set(_REDIS_KEY_PREFIX + key, json.dumps(vector), ex=self.ttl or None)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Embedding cache redis write failed: {e}")
+
+
+class TieredEmbeddingCache(EmbeddingCache):
+    """
+    Chain of cache tiers, fastest first.
+
+    Lookups fall through the tiers in order and hits from a slower tier are
+    promoted into the faster ones. Writes go to every tier.
+    """
+
+    def __init__(self, tiers: Sequence[EmbeddingCache]):
+        self.tiers = list(tiers)
+        self.stats = EmbeddingCacheStats()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        pending = list(dict.fromkeys(keys))
+        for level, tier in enumerate(self.tiers):
+            if not pending:
+                break
+            tier_hits = tier.get_many(pending)
+            if not tier_hits:
+                continue
+            found.update(tier_hits)
+            for faster in self.tiers[:level]:
+                faster.set_many(tier_hits)
+            pending = [key for key in pending if key not in tier_hits]
+        return found
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        for tier in self.tiers:
+            tier.set_many(items)
+        self.stats.record_stored(len(items))
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+
+_default_cache: Optional[TieredEmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_embedding_cache() -> Optional[TieredEmbeddingCache]:
+    """
+    Get the process-wide embedding cache configured from settings.
+
+    Returns None when EMBEDDING_CACHE_ENABLED is false.
+    """
+    global _default_cache
+    from aperag.config import settings
+
+    if not settings.embedding_cache_enabled:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                tiers: List[EmbeddingCache] = [MemoryEmbeddingCache(settings.embedding_cache_max_entries)]
+                if settings.embedding_cache_backend == "redis":
+                    tiers.append(RedisEmbeddingCache(ttl=settings.embedding_cache_ttl))
+                elif settings.embedding_cache_backend != "memory":
+                    raise ValueError(
+                        f"Unsupported EMBEDDING_CACHE_BACKEND: {settings.embedding_cache_backend}. "
+                        "Supported backends are: memory, redis."
+                    )
+                _default_cache = TieredEmbeddingCache(tiers)
+    return _default_cache
+
+
+def get_embedding_cache_stats() -> Dict[str, float]:
+    """Get hit/miss/byte statistics of the process-wide embedding cache."""
+    cache = _default_cache
+    if cache is None:
+        return EmbeddingCacheStats().snapshot()
+    return cache.stats.snapshot()
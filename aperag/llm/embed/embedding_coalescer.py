@@ -0,0 +1,168 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Micro-batching coalescer for query embeddings.
+
+Concurrent chat requests each embed a single query string. With coalescing enabled
+(EMBEDDING_QUERY_COALESCE_WINDOW_MS > 0), aembed_query calls arriving within the window
+are sent to the provider as one batch and the vectors are fanned back out to the callers.
+A batch is flushed early once it reaches the max batch size.
+
+Coalescers are shared by every EmbeddingService with the same provider configuration,
+one per event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from aperag.llm.embed.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Fixed-bucket histogram, thread-safe so it can be shared by coalescers on different loops."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+            return {
+                "count": self.count,
+                "mean": round(self.total / self.count, 4) if self.count else 0.0,
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+# Time a caller waits from enqueue to receiving its vector, in milliseconds
+_latency_ms = Histogram([1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500])
+# Number of queries sent to the provider per flushed batch
+_batch_size = Histogram([1, 2, 4, 8, 16, 32, 64])
+
+
+class EmbeddingQueryCoalescer:
+    """Collect single-query embedding calls and send them as one batch."""
+
+    def __init__(self, service: "EmbeddingService", window_ms: float, max_batch_size: int):
+        self.service = service
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def embed_query(self, content: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((content, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        # Keep a strong reference until the batch completes
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        _batch_size.observe(len(batch))
+        try:
+            vectors = await self.service.aembed_documents([content for content, _, _ in batch])
+            now = time.perf_counter()
+            for (_, future, enqueued_at), vector in zip(batch, vectors):
+                _latency_ms.observe((now - enqueued_at) * 1000)
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Callers of a cancelled batch would otherwise wait forever
+            for _, future, _ in batch:
+                if not future.done():
+                    future.cancel()
+
+
+_coalescers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, EmbeddingQueryCoalescer]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_query_coalescer(service: "EmbeddingService", window_ms: float, max_batch_size: int) -> EmbeddingQueryCoalescer:
+    """Get the coalescer shared by services with the same provider configuration on the running loop."""
+    key = (
+        service.embedding_provider,
+        service.model,
+        service.api_base,
+        service.api_key,
+        service.dimension,
+        service.caching,
+    )
+    coalescers = _coalescers.setdefault(asyncio.get_running_loop(), {})
+    coalescer = coalescers.get(key)
+    if coalescer is None:
+        coalescer = EmbeddingQueryCoalescer(service, window_ms, max_batch_size)
+        coalescers[key] = coalescer
+    return coalescer
+
+
+def get_coalescer_stats() -> Dict[str, object]:
+    """Get latency and batch-size histograms of coalesced query embeddings for the current process."""
+    return {
+        "latency_ms": _latency_ms.snapshot(),
+        "batch_size": _batch_size.snapshot(),
+    }
+
+
+def clear_coalescer_stats() -> None:
+    _latency_ms.reset()
+    _batch_size.reset()
@@ -16,20 +16,43 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import weakref
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import litellm
 
+from aperag.config import settings
+from aperag.llm.embed.embedding_batching import is_batch_size_error, learned_batch_limits, plan_batches
+from aperag.llm.embed.embedding_cache import EmbeddingCache, get_default_embedding_cache, make_embedding_cache_key
+from aperag.llm.embed.embedding_coalescer import get_query_coalescer
 from aperag.llm.llm_error_types import (
     BatchProcessingError,
     EmbeddingError,
     EmptyTextError,
     wrap_litellm_error,
 )
+from aperag.utils.tokenizer import get_default_tokenizer
 
 logger = logging.getLogger(__name__)
 
+# asyncio primitives are bound to an event loop, and Celery tasks run each job in a fresh loop,
+# so the per-provider limiters are kept per loop and dropped together with it.
+_provider_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_provider_limiter(provider: str) -> asyncio.Semaphore:
+    """Get the semaphore bounding concurrent embedding requests to a provider on the running loop."""
+    loop = asyncio.get_running_loop()
+    limiters = _provider_limiters.setdefault(loop, {})
+    limiter = limiters.get(provider)
+    if limiter is None:
+        limiter = asyncio.Semaphore(settings.embedding_max_concurrency)
+        limiters[provider] = limiter
+    return limiter
+
 
 class EmbeddingService:
     def __init__(
@@ -41,15 +64,34 @@ class EmbeddingService:
         embedding_max_chunks_in_batch: int,
         multimodal: bool = False,
         caching: bool = True,
+        embedding_dimension: Optional[int] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_max_tokens_in_batch: Optional[int] = None,
     ):
         self.embedding_provider = embedding_provider
         self.model = embedding_model
         self.api_base = embedding_service_url
         self.api_key = embedding_service_api_key
         self.max_chunks = embedding_max_chunks_in_batch
+        self.max_tokens = (
+            settings.embedding_max_tokens_in_batch
+            if embedding_max_tokens_in_batch is None
+            else embedding_max_tokens_in_batch
+        )
         self.max_workers = 8
         self.multimodal = multimodal
         self.caching = caching
+        self.dimension = embedding_dimension
+        self._embedding_cache = embedding_cache
+
+    @property
+    def embedding_cache(self) -> Optional[EmbeddingCache]:
+        """The content-addressed cache used by this service, None when caching is disabled."""
+        if not self.caching:
+            return None
+        if self._embedding_cache is None:
+            self._embedding_cache = get_default_embedding_cache()
+        return self._embedding_cache
 
     def embed_documents(self, contents: List[str]) -> List[List[float]]:
         """
@@ -61,6 +103,55 @@ class EmbeddingService:
         Returns:
             List of embedding vectors in the same order as input contents
         """
+        clean_contents = self._clean_contents(contents)
+
+        try:
+            cache = self.embedding_cache
+            if cache is None:
+                return self._embed_contents(clean_contents)
+
+            keys, cached, missing = self._lookup_cache(cache, clean_contents)
+            miss_vectors = self._embed_contents([clean_contents[i] for i in missing.values()]) if missing else []
+            return self._fill_cache(cache, keys, cached, missing, miss_vectors)
+        except (EmptyTextError, BatchProcessingError, EmbeddingError):
+            # Re-raise our custom embedding errors
+            raise
+        except Exception as e:
+            logger.error(f"Document embedding failed: {str(e)}")
+            raise wrap_litellm_error(e, "embedding", self.embedding_provider, self.model) from e
+
+    async def aembed_documents(self, contents: List[str]) -> List[List[float]]:
+        """
+        Embed multiple documents natively on the event loop.
+
+        Batches are sent concurrently through litellm.aembedding, bounded by a
+        per-provider limiter shared by every EmbeddingService in the process.
+
+        Args:
+            contents: List of documents (texts or base64-encoded images) to embed
+
+        Returns:
+            List of embedding vectors in the same order as input contents
+        """
+        clean_contents = self._clean_contents(contents)
+
+        try:
+            cache = self.embedding_cache
+            if cache is None:
+                return await self._aembed_contents(clean_contents)
+
+            # The cache backend may be a blocking Redis client, keep its round trips off the event loop
+            keys, cached, missing = await asyncio.to_thread(self._lookup_cache, cache, clean_contents)
+            miss_vectors = await self._aembed_contents([clean_contents[i] for i in missing.values()]) if missing else []
+            return await asyncio.to_thread(self._fill_cache, cache, keys, cached, missing, miss_vectors)
+        except (EmptyTextError, BatchProcessingError, EmbeddingError):
+            raise
+        except Exception as e:
+            logger.error(f"Async document embedding failed: {str(e)}")
+            raise wrap_litellm_error(e, "embedding", self.embedding_provider, self.model) from e
+
+    def _clean_contents(self, contents: List[str]) -> List[str]:
+        """Validate the inputs and replace newlines with spaces."""
         # Validate inputs
         if not contents:
             raise EmptyTextError(0)
@@ -72,56 +163,181 @@ class EmbeddingService:
             if len(empty_indices) == len(contents):
                 raise EmptyTextError(len(empty_indices))
 
+        return [t.replace("\n", " ") if t and t.strip() else " " for t in contents]
+
+    def _lookup_cache(
+        self, cache: EmbeddingCache, clean_contents: List[str]
+    ) -> Tuple[List[str], Dict[str, List[float]], Dict[str, int]]:
+        """
+        Split the contents into cache hits and misses.
+
+        Returns:
+            (cache keys of every content, cached vectors by key, unique missing keys mapped to
+            the first index where they appear). Identical texts within one call are embedded once.
+        """
+        keys = [
+            make_embedding_cache_key(self.embedding_provider, self.model, self.dimension, text)
+            for text in clean_contents
+        ]
+        cached = cache.get_many(keys)
+        if self.dimension:
+            # Never serve a vector of the wrong size, e.g. after a model changed its output dimension
+            cached = {key: vector for key, vector in cached.items() if len(vector) == self.dimension}
+
+        missing: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if key not in cached and key not in missing:
+                missing[key] = i
+
+        hit_indices = [i for i, key in enumerate(keys) if key in cached]
+        miss_indices = [i for i, key in enumerate(keys) if key not in cached]
+        stats = getattr(cache, "stats", None)
+        if stats is not None:
+            stats.record(
+                hits=len(hit_indices),
+                misses=len(miss_indices),
+                hit_bytes=sum(len(clean_contents[i].encode("utf-8")) for i in hit_indices),
+                miss_bytes=sum(len(clean_contents[i].encode("utf-8")) for i in miss_indices),
+            )
+        logger.debug(f"Embedding cache: {len(hit_indices)} hits, {len(miss_indices)} misses")
+        return keys, cached, missing
+
+    @staticmethod
+    def _fill_cache(
+        cache: EmbeddingCache,
+        keys: List[str],
+        cached: Dict[str, List[float]],
+        missing: Dict[str, int],
+        miss_vectors: List[List[float]],
+    ) -> List[List[float]]:
+        """Store freshly embedded vectors and assemble the results in input order."""
+        if missing:
+            new_entries = dict(zip(missing.keys(), miss_vectors))
+            cache.set_many(new_entries)
+            cached = {**cached, **new_entries}
+        return [cached[key] for key in keys]
+
+    def _plan_batches(self, clean_contents: List[str]) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """
+        Plan batches by chunk count and token budget, below any limits learned from provider rejections.
+
+        Returns:
+            (list of (start, end) index ranges, token count of every content)
+        """
+        learned = learned_batch_limits.get(self.embedding_provider, self.model)
+        max_chunks = min(filter(None, [self.max_chunks, learned.get("max_chunks")]), default=0)
+        max_tokens = min(filter(None, [self.max_tokens, learned.get("max_tokens")]), default=0)
+
+        # Token counts of base64 images are meaningless, multimodal inputs are batched by count only
+        if max_tokens and not self.multimodal:
+            tokenizer = get_default_tokenizer()
+            token_counts = [len(tokenizer(text)) for text in clean_contents]
+        else:
+            token_counts = [0] * len(clean_contents)
+            max_tokens = 0
+        return plan_batches(token_counts, max_chunks, max_tokens), token_counts
+
+    def _embed_contents(self, clean_contents: List[str]) -> List[List[float]]:
+        """Embed cleaned contents in parallel batches, preserving the input order."""
+        batches, token_counts = self._plan_batches(clean_contents)
+
+        # Store results with original indices to ensure correct ordering
+        results_dict: Dict[int, List[float]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = []
+
+            # Submit batches for processing with their starting indices
+            for start, end in batches:
+                # Pass both the batch and starting index to track position
+                future = pool.submit(
+                    self._embed_batch_with_indices, clean_contents[start:end], start, token_counts[start:end]
+                )
+                futures.append(future)
+
+            # Process completed futures and store results by index
+            failed_batches = []
+            for future in as_completed(futures):
+                try:
+                    # Get results with their original indices
+                    batch_results = future.result()
+                    for idx, embedding in batch_results:
+                        results_dict[idx] = embedding
+                except Exception as e:
+                    failed_batches.append(str(e))
+                    logger.error(f"Batch processing failed: {e}")
+
+            if failed_batches:
+                raise BatchProcessingError(
+                    batch_size=max(end - start for start, end in batches),
+                    reason=f"Failed to process {len(failed_batches)} batches: {failed_batches[:3]} "
+                    f"contents: {clean_contents}",
+                )
+
+        # Reconstruct the result list in the original order
+        results = [results_dict[i] for i in range(len(clean_contents))]
+        return results
+
+    async def _aembed_contents(self, clean_contents: List[str]) -> List[List[float]]:
+        """Embed cleaned contents with concurrent async batches, preserving the input order."""
+        batches, token_counts = self._plan_batches(clean_contents)
+        batch_results = await asyncio.gather(
+            *(
+                self._aembed_batch_adaptive(clean_contents[start:end], token_counts[start:end])
+                for start, end in batches
+            ),
+            return_exceptions=True,
+        )
+
+        failed_batches = [str(result) for result in batch_results if isinstance(result, BaseException)]
+        if failed_batches:
+            for reason in failed_batches:
+                logger.error(f"Batch processing failed: {reason}")
+            raise BatchProcessingError(
+                batch_size=max(end - start for start, end in batches),
+                reason=f"Failed to process {len(failed_batches)} batches: {failed_batches[:3]} "
+                f"contents: {clean_contents}",
+            )
+
+        return [embedding for embeddings in batch_results for embedding in embeddings]
+
+    def _embed_batch_adaptive(self, batch: Sequence[str], token_counts: Sequence[int]) -> List[List[float]]:
+        """Embed a batch, splitting it in half and retrying when the provider rejects it as too large."""
         try:
-            # Clean contents by replacing newlines with spaces
-            clean_contents = [t.replace("\n", " ") if t and t.strip() else " " for t in contents]
-            # Determine batch size (use max_chunks or process all at once if not set)
-            batch_size = self.max_chunks or len(clean_contents)
-
-            # Store results with original indices to ensure correct ordering
-            results_dict: Dict[int, List[float]] = {}
-
-            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
-                futures = []
-
-                # Submit batches for processing with their starting indices
-                for start in range(0, len(clean_contents), batch_size):
-                    batch = clean_contents[start : start + batch_size]
-                    # Pass both the batch and starting index to track position
-                    future = pool.submit(self._embed_batch_with_indices, batch, start)
-                    futures.append(future)
-
-                # Process completed futures and store results by index
-                failed_batches = []
-                for future in as_completed(futures):
-                    try:
-                        # Get results with their original indices
-                        batch_results = future.result()
-                        for idx, embedding in batch_results:
-                            results_dict[idx] = embedding
-                    except Exception as e:
-                        failed_batches.append(str(e))
-                        logger.error(f"Batch processing failed: {e}")
-
-                if failed_batches:
-                    raise BatchProcessingError(
-                        batch_size=batch_size,
-                        reason=f"Failed to process {len(failed_batches)} batches: {failed_batches[:3]} "
-                        f"contents: {contents}",
-                    )
-
-            # Reconstruct the result list in the original order
-            results = [results_dict[i] for i in range(len(clean_contents))]
-            return results
-        except (EmptyTextError, BatchProcessingError, EmbeddingError):
-            # Re-raise our custom embedding errors
-            raise
+            return self._embed_batch(batch)
         except Exception as e:
-            logger.error(f"Document embedding failed: {str(e)}")
-            raise wrap_litellm_error(e, "embedding", self.embedding_provider, self.model) from e
+            if len(batch) <= 1 or not is_batch_size_error(e):
+                raise
+            self._on_batch_rejected(batch, token_counts, e)
+            mid = len(batch) // 2
+            return self._embed_batch_adaptive(batch[:mid], token_counts[:mid]) + self._embed_batch_adaptive(
+                batch[mid:], token_counts[mid:]
+            )
 
-    async def aembed_documents(self, contents: List[str]) -> List[List[float]]:
-        return await asyncio.to_thread(self.embed_documents, contents)
+    async def _aembed_batch_adaptive(self, batch: Sequence[str], token_counts: Sequence[int]) -> List[List[float]]:
+        """Async variant of _embed_batch_adaptive, bounded by the per-provider limiter."""
+        try:
+            # Only hold the limiter for the request itself, not while retrying the halves
+            async with _get_provider_limiter(self.embedding_provider):
+                return await self._aembed_batch(batch)
+        except Exception as e:
+            if len(batch) <= 1 or not is_batch_size_error(e):
+                raise
+            self._on_batch_rejected(batch, token_counts, e)
+        mid = len(batch) // 2
+        first, second = await asyncio.gather(
+            self._aembed_batch_adaptive(batch[:mid], token_counts[:mid]),
+            self._aembed_batch_adaptive(batch[mid:], token_counts[mid:]),
+        )
+        return first + second
+
+    def _on_batch_rejected(self, batch: Sequence[str], token_counts: Sequence[int], error: Exception) -> None:
+        tokens = sum(token_counts)
+        logger.warning(
+            f"Embedding batch of {len(batch)} chunks ({tokens} tokens) rejected as too large by "
+            f"{self.embedding_provider}/{self.model}, splitting in half: {error}"
+        )
+        learned_batch_limits.record_rejection(self.embedding_provider, self.model, len(batch), tokens)
 
     def embed_query(self, content: str) -> List[float]:
         """
@@ -146,15 +362,42 @@ class EmbeddingService:
             raise wrap_litellm_error(e, "embedding", self.embedding_provider, self.model) from e
 
     async def aembed_query(self, content: str) -> List[float]:
-        return await asyncio.to_thread(self.embed_query, content)
+        """
+        Embed a single query content asynchronously.
+
+        Args:
+            content: content to embed
+
+        Returns:
+            List of floats representing the embedding vector
+        """
+        if not content or not content.strip():
+            raise EmptyTextError(1)
+
+        try:
+            if settings.embedding_query_coalesce_window_ms > 0:
+                coalescer = get_query_coalescer(
+                    self,
+                    settings.embedding_query_coalesce_window_ms,
+                    settings.embedding_query_coalesce_max_batch or self.max_chunks or 1,
+                )
+                return await coalescer.embed_query(content)
+            return (await self.aembed_documents([content]))[0]
+        except (EmptyTextError, EmbeddingError):
+            raise
+        except Exception as e:
+            logger.error(f"Async query embedding failed: {str(e)}")
+            raise wrap_litellm_error(e, "embedding", self.embedding_provider, self.model) from e
 
     def is_multimodal(self) -> bool:
         return self.multimodal
 
-    def _embed_batch_with_indices(self, batch: Sequence[str], start_idx: int) -> List[Tuple[int, List[float]]]:
+    def _embed_batch_with_indices(
+        self, batch: Sequence[str], start_idx: int, token_counts: Sequence[int]
+    ) -> List[Tuple[int, List[float]]]:
         """Process a batch of texts and return embeddings with their original indices."""
         try:
-            embeddings = self._embed_batch(batch)
+            embeddings = self._embed_batch_adaptive(batch, token_counts)
             # Return each embedding with its corresponding index in the original list
             return [(start_idx + i, embedding) for i, embedding in enumerate(embeddings)]
         except Exception as e:
@@ -185,22 +428,54 @@ class EmbeddingService:
                 input=list(batch),
                 caching=self.caching,
             )
+            return self._parse_embedding_response(response, len(batch))
+        except Exception as e:
+            logger.error(f"Batch embedding API call failed: {str(e)}")
+            # Convert litellm errors to our custom types
+            raise wrap_litellm_error(e, "embedding", self.embedding_provider, self.model) from e
 
-            if not response or "data" not in response:
-                raise EmbeddingError(
-                    "Invalid response format from embedding API",
-                    {"provider": self.embedding_provider, "model": self.model, "batch_size": len(batch)},
-                )
+    async def _aembed_batch(self, batch: Sequence[str]) -> List[List[float]]:
+        """
+        Embed a batch of contents using litellm.aembedding.
 
-            embeddings = [item["embedding"] for item in response["data"]]
+        litellm keeps its async HTTP clients cached per provider configuration, so
+        consecutive calls on the same event loop reuse pooled connections.
 
-            # Validate embedding dimensions
-            if embeddings and len(set(len(emb) for emb in embeddings)) > 1:
-                dimensions = [len(emb) for emb in embeddings]
-                logger.warning(f"Inconsistent embedding dimensions: {set(dimensions)}")
+        Args:
+            batch: Sequence of contents to embed
+
+        Returns:
+            List of embedding vectors
 
-            return embeddings
+        Raises:
+            EmbeddingError: If embedding fails
+        """
+        try:
+            response = await litellm.aembedding(
+                custom_llm_provider=self.embedding_provider,
+                model=self.model,
+                api_base=self.api_base,
+                api_key=self.api_key,
+                input=list(batch),
+                caching=self.caching,
+            )
+            return self._parse_embedding_response(response, len(batch))
         except Exception as e:
-            logger.error(f"Batch embedding API call failed: {str(e)}")
-            # Convert litellm errors to our custom types
+            logger.error(f"Async batch embedding API call failed: {str(e)}")
             raise wrap_litellm_error(e, "embedding", self.embedding_provider, self.model) from e
+
+    def _parse_embedding_response(self, response, batch_size: int) -> List[List[float]]:
+        if not response or "data" not in response:
+            raise EmbeddingError(
+                "Invalid response format from embedding API",
+                {"provider": self.embedding_provider, "model": self.model, "batch_size": batch_size},
+            )
+
+        embeddings = [item["embedding"] for item in response["data"]]
+
+        # Validate embedding dimensions
+        if embeddings and len(set(len(emb) for emb in embeddings)) > 1:
+            dimensions = [len(emb) for emb in embeddings]
+            logger.warning(f"Inconsistent embedding dimensions: {set(dimensions)}")
+
+        return embeddings
@@ -16,7 +16,9 @@
 # -*- coding: utf-8 -*-
 # import faulthandler
 import logging
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, List
 
 from langchain_core.embeddings import Embeddings
 from llama_index.core.schema import BaseNode, TextNode
@@ -39,11 +41,17 @@ def create_embeddings_and_store(
     chunk_size: int = None,
     chunk_overlap: int = None,
     tokenizer=None,
+    batch_size: int = None,
+    max_inflight_writes: int = None,
 ) -> List[str]:
     """
     Processes document parts, rechunks content, generates embeddings,
     and stores nodes in the vector database.
 
+    Chunks flow through embed -> upsert in bounded batches: while a batch is being
+    written to the vector store, the next one is embedded. At most max_inflight_writes
+    batches are being written at once, which bounds memory for very large documents.
+
     Args:
         parts: List of document parts to process
         vector_store_adaptor: Vector store connector adaptor
@@ -51,6 +59,8 @@ def create_embeddings_and_store(
         chunk_size: Size for chunking text (defaults to settings.chunk_size)
         chunk_overlap: Overlap size for chunking (defaults to settings.chunk_overlap_size)
         tokenizer: Tokenizer to use (defaults to default tokenizer)
+        batch_size: Chunks per embed/upsert batch (defaults to settings.vector_upsert_batch_size)
+        max_inflight_writes: Max concurrent upserts (defaults to settings.vector_upsert_max_inflight)
 
     Returns:
         List[str]: A list of vector store IDs
@@ -62,57 +72,111 @@ def create_embeddings_and_store(
     chunk_size = chunk_size or settings.chunk_size
     chunk_overlap = chunk_overlap or settings.chunk_overlap_size
     tokenizer = tokenizer or get_default_tokenizer()
-
-    nodes: List[BaseNode] = []
+    batch_size = batch_size or settings.vector_upsert_batch_size
+    max_inflight_writes = max_inflight_writes or settings.vector_upsert_max_inflight
 
     # 1. Rechunk the document parts (resulting in text parts)
     # After rechunk(), parts only contains TextPart
-    chunked_parts = rechunk(parts, chunk_size, chunk_overlap, tokenizer)
-
-    # 2. Process each text chunk
-    for part in chunked_parts:
-        if not part.content:
-            continue
-
-        # 2.1 Prepare metadata paddings (titles, labels)
-        paddings = []
-        # padding titles of the hierarchy
-        if "titles" in part.metadata:
-            paddings.append("> Hierarchy: " + " > ".join(part.metadata["titles"]))
-
-        # padding user custom labels
-        if "labels" in part.metadata:
-            labels = []
-            for item in part.metadata.get("labels", [{}]):
-                if not item.get("key", None) or not item.get("value", None):
-                    continue
-                labels.append("%s=%s" % (item["key"], item["value"]))
-            if labels:
-                paddings.append("> Labels: " + " ".join(labels))
-
-        prefix = ""
-        if len(paddings) > 0:
-            prefix = "\n".join(paddings)
-            logger.debug("add extra prefix for document before embedding: %s", prefix)
-
-        # 2.2 Construct text for embedding with paddings
-        if prefix:
-            text = f"{prefix}\n\n{part.content}"
-        else:
-            text = part.content
-        # 2.3 Prepare metadata for the node
-        metadata = part.metadata.copy()
-        metadata["source"] = metadata.get("name", "")
-        # 2.4 Create TextNode
-        nodes.append(TextNode(text=text, metadata=metadata))
-
-    # 3. Generate embeddings for text chunks
-    texts = [node.get_content() for node in nodes]
-    vectors = embedding_model.embed_documents(texts)
-    # 4. Assign embeddings to nodes
-    for i in range(len(vectors)):
-        nodes[i].embedding = vectors[i]
-
-    logger.info(f"processed document with {len(parts)} parts and {len(vectors)} chunks")
-    # 5. Add nodes to vector store and return results
-    return vector_store_adaptor.connector.store.add(nodes)
+    chunked_parts = [part for part in rechunk(parts, chunk_size, chunk_overlap, tokenizer) if part.content]
+
+    connector = vector_store_adaptor.connector
+    upsert_nodes = getattr(connector, "upsert_nodes", None)
+    if upsert_nodes is None:
+        # Connectors without a pipelined write path store everything in one shot
+        nodes = [_build_text_node(part) for part in chunked_parts]
+        _embed_nodes(nodes, embedding_model)
+        logger.info(f"processed document with {len(parts)} parts and {len(nodes)} chunks")
+        return connector.store.add(nodes)
+
+    ids: List[str] = []
+    # Ids of every batch handed to the vector store, removed again if the document fails midway
+    submitted_ids: List[str] = []
+    inflight: Deque[Future] = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=max_inflight_writes) as pool:
+            try:
+                for start in range(0, len(chunked_parts), batch_size):
+                    # 2. Build and embed the next batch while earlier batches are being written
+                    nodes = [_build_text_node(part) for part in chunked_parts[start : start + batch_size]]
+                    _embed_nodes(nodes, embedding_model)
+                    submitted_ids.extend(node.node_id for node in nodes)
+
+                    if start + batch_size >= len(chunked_parts):
+                        # 3a. Once every earlier batch is acknowledged, write the last one and wait for it
+                        # to be applied. Updates are applied in order, so the whole document is searchable
+                        # when this function returns.
+                        while inflight:
+                            ids.extend(inflight.popleft().result())
+                        ids.extend(upsert_nodes(nodes, wait=True))
+                        break
+
+                    # Backpressure: wait for the oldest write before queueing more
+                    while len(inflight) >= max_inflight_writes:
+                        ids.extend(inflight.popleft().result())
+
+                    # 3b. Upsert without waiting for the vector store to apply the points
+                    inflight.append(pool.submit(upsert_nodes, nodes, wait=False))
+            except BaseException:
+                for future in inflight:
+                    future.cancel()
+                raise
+    except BaseException:
+        # Leaving the pool waited for the writes already running: none of the document is kept,
+        # as its ids are never recorded for a later delete
+        _delete_written_nodes(connector, submitted_ids)
+        raise
+
+    logger.info(f"processed document with {len(parts)} parts and {len(ids)} chunks")
+    return ids
+
+
+def _delete_written_nodes(connector, node_ids: List[str]) -> None:
+    if not node_ids:
+        return
+    try:
+        connector.delete(ids=node_ids)
+        logger.info(f"Deleted {len(node_ids)} chunks written before the document failed")
+    except Exception as e:
+        logger.warning(f"Failed to delete {len(node_ids)} chunks written before the document failed: {e}")
+
+
+def _build_text_node(part: Part) -> TextNode:
+    """Build a TextNode from a chunk, padding its hierarchy titles and labels into the embedded text."""
+    # Prepare metadata paddings (titles, labels)
+    paddings = []
+    # padding titles of the hierarchy
+    if "titles" in part.metadata:
+        paddings.append("> Hierarchy: " + " > ".join(part.metadata["titles"]))
+
+    # padding user custom labels
+    if "labels" in part.metadata:
+        labels = []
+        for item in part.metadata.get("labels", [{}]):
+            if not item.get("key", None) or not item.get("value", None):
+                continue
+            labels.append("%s=%s" % (item["key"], item["value"]))
+        if labels:
+            paddings.append("> Labels: " + " ".join(labels))
+
+    prefix = ""
+    if len(paddings) > 0:
+        prefix = "\n".join(paddings)
+        logger.debug("add extra prefix for document before embedding: %s", prefix)
+
+    # Construct text for embedding with paddings
+    if prefix:
+        text = f"{prefix}\n\n{part.content}"
+    else:
+        text = part.content
+    # Prepare metadata for the node
+    metadata = part.metadata.copy()
+    metadata["source"] = metadata.get("name", "")
+    return TextNode(text=text, metadata=metadata)
+
+
+def _embed_nodes(nodes: List[BaseNode], embedding_model: Embeddings) -> None:
+    if not nodes:
+        return
+    vectors = embedding_model.embed_documents([node.get_content() for node in nodes])
+    for node, vector in zip(nodes, vectors):
+        node.embedding = vector
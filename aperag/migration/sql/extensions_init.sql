@@ -6,10 +6,13 @@
 -- Used by LightRAG tables: lightrag_doc_chunks, lightrag_vdb_entity, lightrag_vdb_relation
 CREATE EXTENSION IF NOT EXISTS vector;
 
+-- Create pg_trgm extension for trigram indexes
+-- Used by lightrag_graph_nodes for substring matches on entity_id
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Optional: Create other useful extensions
 -- Uncomment as needed based on project requirements
 
 -- CREATE EXTENSION IF NOT EXISTS "uuid-ossp";  -- For UUID generation
--- CREATE EXTENSION IF NOT EXISTS pg_trgm;      -- For trigram text search
 -- CREATE EXTENSION IF NOT EXISTS btree_gin;    -- For GIN indexes on btree data
 -- CREATE EXTENSION IF NOT EXISTS btree_gist;   -- For GIST indexes on btree data 
\ No newline at end of file
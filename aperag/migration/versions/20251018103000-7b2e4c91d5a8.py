@@ -0,0 +1,93 @@
+"""add per-workspace hnsw indexes for lightrag vector tables
+
+Revision ID: 7b2e4c91d5a8
+Revises: ef8cf2222205
+Create Date: 2025-10-18 10:30:00.000000
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from aperag.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c91d5a8'
+down_revision: Union[str, None] = 'ef8cf2222205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['lightrag_doc_chunks', 'lightrag_vdb_entity', 'lightrag_vdb_relation']
+
+# pgvector HNSW indexes support up to 2000 dimensions for vector and 4000 for halfvec.
+# The index expression must match pgvector_search_type() in aperag/db/repositories/lightrag.py.
+HNSW_MAX_VECTOR_DIM = 2000
+HNSW_MAX_HALFVEC_DIM = 4000
+
+
+def _index_name(table: str, workspace: str) -> str:
+    return f"idx_{table}_hnsw_{hashlib.md5(workspace.encode()).hexdigest()[:12]}"
+
+
+def _vector_type(dim: int) -> str:
+    return f"halfvec({dim})" if dim > HNSW_MAX_VECTOR_DIM else f"vector({dim})"
+
+
+def upgrade() -> None:
+    """
+    Create a partial HNSW index on the cosine distance of content_vector for every workspace
+    holding at least GRAPH_INDEX_HNSW_MIN_ROWS rows, as PGVectorIndexManager.ensure() does.
+
+    Smaller workspaces are left to the index manager, which builds their index once they grow
+    past the threshold.
+    """
+    min_rows = settings.graph_index_hnsw_min_rows
+    if not min_rows:
+        return
+    bind = op.get_bind()
+    targets = []
+    for table in TABLES:
+        rows = bind.execute(
+            sa.text(
+                f"SELECT workspace, vector_dims(content_vector) AS dim FROM {table} "
+                "WHERE content_vector IS NOT NULL GROUP BY workspace, vector_dims(content_vector) "
+                "HAVING count(*) >= :min_rows"
+            ),
+            {"min_rows": min_rows},
+        ).fetchall()
+        for workspace, dim in rows:
+            if dim > HNSW_MAX_HALFVEC_DIM:
+                continue
+            targets.append((table, workspace, dim))
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for table, workspace, dim in targets:
+            vector_type = _vector_type(dim)
+            ops = "halfvec_cosine_ops" if vector_type.startswith("halfvec") else "vector_cosine_ops"
+            quoted_workspace = workspace.replace("'", "''")
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {_index_name(table, workspace)} ON {table} "
+                f"USING hnsw ((content_vector::{vector_type}) {ops}) "
+                f"WITH (m = {int(settings.graph_index_hnsw_m)}, "
+                f"ef_construction = {int(settings.graph_index_hnsw_ef_construction)}) "
+                f"WHERE workspace = '{quoted_workspace}'"
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    names = []
+    for table in TABLES:
+        rows = bind.execute(
+            sa.text("SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname LIKE :pattern"),
+            {"table": table, "pattern": f"idx_{table}_hnsw_%"},
+        ).fetchall()
+        names.extend(row[0] for row in rows)
+
+    with op.get_context().autocommit_block():
+        for name in names:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
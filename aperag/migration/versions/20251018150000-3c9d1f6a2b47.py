@@ -0,0 +1,45 @@
+"""add maintained degree to lightrag graph nodes
+
+Revision ID: 3c9d1f6a2b47
+Revises: 7b2e4c91d5a8
+Create Date: 2025-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9d1f6a2b47'
+down_revision: Union[str, None] = '7b2e4c91d5a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('lightrag_graph_nodes', sa.Column('degree', sa.Integer(), server_default='0', nullable=False))
+    # Backfill from the edges, the same count as get_graph_node_degrees_batch used to compute
+    op.execute(
+        """
+        UPDATE lightrag_graph_nodes AS n
+        SET degree = c.degree
+        FROM (
+            SELECT workspace, entity_id, COUNT(*) AS degree
+            FROM (
+                SELECT workspace, source_entity_id AS entity_id FROM lightrag_graph_edges
+                UNION ALL
+                SELECT workspace, target_entity_id AS entity_id FROM lightrag_graph_edges
+            ) AS endpoints
+            GROUP BY workspace, entity_id
+        ) AS c
+        WHERE n.workspace = c.workspace AND n.entity_id = c.entity_id
+        """
+    )
+    op.create_index('idx_lightrag_nodes_workspace_degree', 'lightrag_graph_nodes', ['workspace', 'degree'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_lightrag_nodes_workspace_degree', table_name='lightrag_graph_nodes')
+    op.drop_column('lightrag_graph_nodes', 'degree')
@@ -0,0 +1,33 @@
+"""add trigram index on lightrag graph node entity_id
+
+Revision ID: 5e8a7d2c4f13
+Revises: 3c9d1f6a2b47
+Create Date: 2025-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a7d2c4f13'
+down_revision: Union[str, None] = '3c9d1f6a2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'idx_lightrag_nodes_entity_id_trgm',
+        'lightrag_graph_nodes',
+        ['entity_id'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'entity_id': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_lightrag_nodes_entity_id_trgm', table_name='lightrag_graph_nodes')
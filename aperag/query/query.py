@@ -14,13 +14,15 @@
 
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class DocumentWithScore(BaseModel):
     text: Optional[str] = None
     score: Optional[float] = None
     metadata: Optional[dict] = None
+    # Only set when the search asked for vectors, and never serialized
+    embedding: Optional[List[float]] = Field(None, exclude=True)
 
 
 class Query(BaseModel):
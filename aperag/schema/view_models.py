@@ -932,6 +932,9 @@ class GraphLabelsResponse(BaseModel):
         description='List of available node labels in the knowledge graph',
         examples=[['墨香居', '李明华', '林晓雯', '深夜读书会']],
     )
+    has_more: Optional[bool] = Field(
+        None, description='Whether more labels match the query, only set for searches'
+    )
 
 
 class Properties(BaseModel):
@@ -36,14 +36,27 @@ class GraphService:
         self.collection_service = collection_service
         self.db_ops = async_db_ops
 
-    async def get_graph_labels(self, user_id: str, collection_id: str) -> view_models.GraphLabelsResponse:
-        """Get available node labels in the knowledge graph"""
+    async def get_graph_labels(
+        self,
+        user_id: str,
+        collection_id: str,
+        query: str = None,
+        match: str = "fuzzy",
+        limit: int = 50,
+        offset: int = 0,
+    ) -> view_models.GraphLabelsResponse:
+        """Get available node labels in the knowledge graph, all of them or a page of the ones matching query"""
         db_collection = await self._get_and_validate_collection(user_id, collection_id)
 
         rag = await lightrag_manager.create_lightrag_instance(db_collection)
         try:
-            labels = await rag.get_graph_labels()
-            return view_models.GraphLabelsResponse(labels=labels)
+            if not query:
+                labels = await rag.get_graph_labels()
+                return view_models.GraphLabelsResponse(labels=labels)
+
+            # Fetch one more label than the page to tell whether there are more
+            labels = await rag.search_graph_labels(query, limit=limit + 1, offset=offset, match=match)
+            return view_models.GraphLabelsResponse(labels=labels[:limit], has_more=len(labels) > limit)
         finally:
             await rag.finalize_storages()
 
@@ -54,6 +54,22 @@ class DocumentIndexTask:
             local_doc_info=local_doc_info,
         )
 
+    def save_parsed_document(self, parsed_data: ParsedDocumentData) -> dict:
+        """
+        Store parsed data in the object store, under the document's path
+
+        Args:
+            parsed_data: Parsed document data
+
+        Returns:
+            Reference to pass to the index tasks, see aperag.tasks.parsed_store
+        """
+        from aperag.tasks.parsed_store import save_parsed_document
+        from aperag.tasks.utils import get_document_and_collection
+
+        document, _ = get_document_and_collection(parsed_data.document_id)
+        return save_parsed_document(parsed_data, document.object_store_base_path())
+
     def create_index(self, document_id: str, index_type: str, parsed_data: ParsedDocumentData) -> IndexTaskResult:
         """
         Create a single index for a document using parsed data
@@ -0,0 +1,287 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Parsed document storage for the indexing workflow.
+
+parse_document_task writes the parsed output once to the object store and only passes a small
+reference through the broker to the index tasks of the chord. Each document has a single object,
+{object_store_base_path}/parsed.bin, which a re-parse overwrites. The object is a compact binary
+container of independently readable sections:
+
+    magic | header length (uint32) | JSON header | content | parts | blobs
+
+- content: the zlib-compressed markdown content
+- parts: the zlib-compressed JSON doc parts, bytes values replaced by references into blobs
+- blobs: the raw binary assets (images, pdf data) of the doc parts
+
+Index tasks read the sections lazily with ranged reads: the graph index only reads the content,
+while the doc parts and their assets are only read by the indexes that chunk them. The header
+holds the digest of the sections, which the reference carries as well: an index task of an older
+workflow whose object has been overwritten by a newer parse fails instead of reading the new
+output, and is then skipped on retry by the index version check.
+"""
+
+import hashlib
+import json
+import logging
+import struct
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from aperag.tasks.models import LocalDocumentInfo, ParsedDocumentData
+
+logger = logging.getLogger(__name__)
+
+PARSED_DOCUMENT_MAGIC = b"APRGPD01"
+PARSED_DOCUMENT_REF_KEY = "parsed_ref"
+PARSED_DOCUMENT_OBJECT = "parsed.bin"
+
+_HEADER_LENGTH = struct.Struct(">I")
+_PREFIX_SIZE = len(PARSED_DOCUMENT_MAGIC) + _HEADER_LENGTH.size
+_BLOB_KEY = "__blob__"
+# Most headers fit in the first read
+_HEADER_READ_SIZE = 4096
+
+
+def _extract_blobs(value: Any, blobs: List[bytes], offset: List[int]) -> Any:
+    """Replace the bytes values of a serialized part by [offset, length] references into blobs."""
+    if isinstance(value, (bytes, bytearray)):
+        ref = {_BLOB_KEY: [offset[0], len(value)]}
+        blobs.append(bytes(value))
+        offset[0] += len(value)
+        return ref
+    if isinstance(value, dict):
+        return {key: _extract_blobs(item, blobs, offset) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_extract_blobs(item, blobs, offset) for item in value]
+    return value
+
+
+def extract_blobs(value: Any) -> Tuple[Any, bytes]:
+    """Replace the bytes values nested in value by [offset, length] references into the returned blobs."""
+    blobs: List[bytes] = []
+    return _extract_blobs(value, blobs, [0]), b"".join(blobs)
+
+
+def restore_blobs(value: Any, blobs: bytes) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and _BLOB_KEY in value:
+            start, length = value[_BLOB_KEY]
+            return blobs[start : start + length]
+        return {key: restore_blobs(item, blobs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [restore_blobs(item, blobs) for item in value]
+    return value
+
+
+def encode_parts_json(parts: Any) -> Tuple[bytes, bytes]:
+    """Encode serialized parts into the (parts, blobs) sections, parts being compressed JSON."""
+    parts, blobs = extract_blobs(parts)
+    return zlib.compress(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")), blobs
+
+
+def encode_sections(sections: List[Tuple[str, bytes, bool]], header_fields: Optional[Dict[str, Any]] = None) -> bytes:
+    """Lay out (name, data, compressed) sections behind the magic and the JSON header."""
+    header: Dict[str, Any] = {**(header_fields or {}), "sections": {}}
+    offset = 0
+    for name, data, compressed in sections:
+        header["sections"][name] = [offset, len(data), compressed]
+        offset += len(data)
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    return b"".join(
+        [PARSED_DOCUMENT_MAGIC, _HEADER_LENGTH.pack(len(header_bytes)), header_bytes]
+        + [data for _, data, _ in sections]
+    )
+
+
+def decode_sections(data: bytes) -> Dict[str, bytes]:
+    """Split a fully read container into its decompressed sections."""
+    if data[: len(PARSED_DOCUMENT_MAGIC)] != PARSED_DOCUMENT_MAGIC:
+        raise ValueError("not a sectioned parsed document")
+    (header_length,) = _HEADER_LENGTH.unpack_from(data, len(PARSED_DOCUMENT_MAGIC))
+    data_start = _PREFIX_SIZE + header_length
+    header = json.loads(data[_PREFIX_SIZE:data_start])
+    sections = {}
+    for name, (offset, length, compressed) in header["sections"].items():
+        section = data[data_start + offset : data_start + offset + length]
+        sections[name] = zlib.decompress(section) if compressed else section
+    return sections
+
+
+def encode_parsed_document(parsed_data: ParsedDocumentData) -> Tuple[bytes, str]:
+    """
+    Encode the content and doc parts of parsed data into the sectioned binary container.
+
+    Returns:
+        The encoding and the sha256 digest of its sections, which is also stored in its header
+    """
+    parts, blobs = encode_parts_json(parsed_data._serialize_doc_parts(parsed_data.doc_parts))
+    sections = [
+        ("content", zlib.compress((parsed_data.content or "").encode("utf-8")), True),
+        ("parts", parts, True),
+        ("blobs", blobs, False),
+    ]
+    sha256 = hashlib.sha256()
+    for _, data, _ in sections:
+        sha256.update(data)
+    digest = sha256.hexdigest()
+    return encode_sections(sections, {"sha256": digest}), digest
+
+
+def save_parsed_document(parsed_data: ParsedDocumentData, base_path: str, object_store=None) -> Dict[str, Any]:
+    """
+    Store the parsed data at {base_path}/parsed.bin, replacing the output of a previous parse.
+
+    Storing the same parse output again, e.g. on a retry, keeps the existing object.
+
+    Returns:
+        The reference to pass to the index tasks instead of ParsedDocumentData.to_dict()
+    """
+    if object_store is None:
+        from aperag.objectstore.base import get_object_store
+
+        object_store = get_object_store()
+
+    encoded, digest = encode_parsed_document(parsed_data)
+    path = f"{base_path}/{PARSED_DOCUMENT_OBJECT}"
+    if ParsedDocumentReader(path, object_store).stored_digest() != digest:
+        object_store.put(path, encoded)
+    logger.info(f"Stored parsed document {parsed_data.document_id} at {path} ({len(encoded)} bytes)")
+
+    return {
+        PARSED_DOCUMENT_REF_KEY: path,
+        "sha256": digest,
+        "size": len(encoded),
+        "document_id": parsed_data.document_id,
+        "collection_id": parsed_data.collection_id,
+        "file_path": parsed_data.file_path,
+        "local_doc_info": parsed_data.local_doc_info.to_dict(),
+    }
+
+
+class ParsedDocumentReader:
+    """Reads the sections of a stored parsed document on demand, each at most once."""
+
+    def __init__(self, path: str, object_store=None, sha256: Optional[str] = None):
+        self.path = path
+        self.sha256 = sha256
+        self._object_store = object_store
+        self._digest: Optional[str] = None
+        self._sections: Optional[Dict[str, Tuple[int, int, bool]]] = None
+        self._lock = threading.Lock()
+
+    def _store(self):
+        if self._object_store is None:
+            from aperag.objectstore.base import get_object_store
+
+            self._object_store = get_object_store()
+        return self._object_store
+
+    def _read_range(self, start: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        range_info = self._store().stream_range(self.path, start, start + length - 1)
+        if range_info is None:
+            raise FileNotFoundError(f"Parsed document {self.path} not found in object store")
+        stream, _ = range_info
+        try:
+            return stream.read()
+        finally:
+            stream.close()
+
+    def _load_sections(self) -> Dict[str, Tuple[int, int, bool]]:
+        with self._lock:
+            if self._sections is None:
+                head = self._read_range(0, _HEADER_READ_SIZE)
+                if head[: len(PARSED_DOCUMENT_MAGIC)] != PARSED_DOCUMENT_MAGIC:
+                    raise ValueError(f"{self.path} is not a stored parsed document")
+                (header_length,) = _HEADER_LENGTH.unpack_from(head, len(PARSED_DOCUMENT_MAGIC))
+                data_start = _PREFIX_SIZE + header_length
+                if len(head) < data_start:
+                    head += self._read_range(len(head), data_start - len(head))
+                header = json.loads(head[_PREFIX_SIZE:data_start])
+                if self.sha256 is not None and header.get("sha256") != self.sha256:
+                    raise ValueError(f"Parsed document {self.path} has been replaced by another parse")
+                self._digest = header.get("sha256")
+                self._sections = {
+                    name: (data_start + offset, length, compressed)
+                    for name, (offset, length, compressed) in header["sections"].items()
+                }
+            return self._sections
+
+    def stored_digest(self) -> Optional[str]:
+        """Digest of the stored sections, None if there is no stored parsed document."""
+        try:
+            self._load_sections()
+        except (FileNotFoundError, ValueError):
+            return None
+        return self._digest
+
+    def read_section(self, name: str) -> bytes:
+        start, length, compressed = self._load_sections()[name]
+        data = self._read_range(start, length)
+        return zlib.decompress(data) if compressed else data
+
+    def content(self) -> str:
+        return self.read_section("content").decode("utf-8")
+
+    def doc_parts(self) -> List[Dict[str, Any]]:
+        parts = json.loads(self.read_section("parts"))
+        if self._load_sections()["blobs"][1] == 0:
+            return parts
+        return restore_blobs(parts, self.read_section("blobs"))
+
+
+class LazyParsedDocumentData(ParsedDocumentData):
+    """ParsedDocumentData whose content and doc_parts are read from the object store on first access."""
+
+    def __init__(self, ref: Dict[str, Any], object_store=None):
+        self.document_id = ref["document_id"]
+        self.collection_id = ref["collection_id"]
+        self.file_path = ref["file_path"]
+        self.local_doc_info = LocalDocumentInfo(**ref["local_doc_info"])
+        self._reader = ParsedDocumentReader(ref[PARSED_DOCUMENT_REF_KEY], object_store, ref.get("sha256"))
+        self._content: Optional[str] = None
+        self._doc_parts: Optional[List[Any]] = None
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = self._reader.content()
+        return self._content
+
+    @property
+    def doc_parts(self) -> List[Any]:
+        if self._doc_parts is None:
+            self._doc_parts = self._deserialize_doc_parts(self._reader.doc_parts())
+        return self._doc_parts
+
+
+def is_parsed_document_ref(data: Dict[str, Any]) -> bool:
+    return PARSED_DOCUMENT_REF_KEY in data
+
+
+def load_parsed_document(data: Dict[str, Any], object_store=None) -> ParsedDocumentData:
+    """
+    Restore parsed data from the task payload.
+
+    Accepts both a stored reference and an inline ParsedDocumentData.to_dict() payload, so tasks
+    queued before the switch to references still run.
+    """
+    if is_parsed_document_ref(data):
+        return LazyParsedDocumentData(data, object_store)
+    return ParsedDocumentData.from_dict(data)
@@ -27,6 +27,8 @@ class TaskConfig:
 def parse_document_content(document, collection) -> Tuple[str, List[Any], Any]:
     """Parse document content for indexing (shared across all index types)"""
     from aperag.index.document_parser import document_parser
+    from aperag.index.parse_cache import get_default_parse_cache
+    from aperag.index.vision_index import vision_indexer
     from aperag.schema.utils import parseCollectionConfig
     from aperag.service.setting_service import setting_service
     from aperag.source.base import get_source
@@ -46,6 +48,9 @@ def parse_document_content(document, collection) -> Tuple[str, List[Any], Any]:
             local_doc.metadata,
             document.object_store_base_path(),
             global_settings,
+            parse_cache=get_default_parse_cache(),
+            # Page images are only used by the vision index
+            render_pdf_pages=vision_indexer.is_enabled(collection),
         )
 
         # Add chat metadata to all document parts if this is a chat upload
@@ -1,18 +1,158 @@
+import asyncio
 import json
 import logging
 import os
-from typing import Any, Dict
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
 
 import qdrant_client
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 from qdrant_client.http.models import ScoredPoint
-from qdrant_client.models import VectorParams
+from qdrant_client.models import PayloadSchemaType, PointStruct, QueryRequest, SearchParams, VectorParams
 
+from aperag.config import settings
 from aperag.query.query import DocumentWithScore, QueryResult, QueryWithEmbedding
 from aperag.vectorstore.base import VectorStoreConnector
 
 logger = logging.getLogger(__name__)
 
+# Payload keys needed to rebuild a DocumentWithScore. The rest of the payload is the node
+# metadata flattened for filtering, which _node_content already carries.
+_DOCUMENT_PAYLOAD_FIELDS = ["_node_content", "text", "metadata"]
+# Collection layout of the llama-index store: the dense vector is unnamed ("") unless the
+# collection has named vectors, and doc_id has a payload index
+_UNNAMED_VECTOR = ""
+_NAMED_DENSE_VECTOR = "text-dense"
+_DOCUMENT_ID_KEY = "doc_id"
+# Serializes the creation of collections by the writer threads of the process
+_collection_create_lock = threading.Lock()
+
+# Clients are shared by every connector with the same connection settings. Sync clients are
+# process-wide, async clients are bound to the event loop they were created on.
+_sync_clients: Dict[tuple, qdrant_client.QdrantClient] = {}
+_sync_clients_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, qdrant_client.AsyncQdrantClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client_options(ctx: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+    return {
+        "url": ctx.get("url", "http://localhost"),
+        "port": ctx.get("port", 6333),
+        "grpc_port": ctx.get("grpc_port", 6334),
+        "prefer_grpc": ctx.get("prefer_grpc", False),
+        "https": ctx.get("https", False),
+        "timeout": ctx.get("timeout", 300),
+        **kwargs,
+    }
+
+
+def _client_key(options: Dict[str, Any]) -> tuple:
+    return tuple(sorted((key, repr(value)) for key, value in options.items()))
+
+
+def get_qdrant_client(ctx: Dict[str, Any], **kwargs: Any) -> qdrant_client.QdrantClient:
+    """Get the process-wide sync client for a connection context. In-memory clients are never shared."""
+    if ctx.get("url") == ":memory:":
+        return qdrant_client.QdrantClient(":memory:")
+    options = _client_options(ctx, **kwargs)
+    key = _client_key(options)
+    client = _sync_clients.get(key)
+    if client is None:
+        with _sync_clients_lock:
+            client = _sync_clients.get(key)
+            if client is None:
+                client = qdrant_client.QdrantClient(**options)
+                _sync_clients[key] = client
+    return client
+
+
+def get_async_qdrant_client(ctx: Dict[str, Any], **kwargs: Any) -> qdrant_client.AsyncQdrantClient:
+    """
+    Get the async client for a connection context on the running event loop.
+
+    Set "prefer_grpc": true in VECTOR_DB_CONTEXT to talk gRPC on grpc_port, which has less
+    per-request overhead than REST.
+    """
+    options = _client_options(ctx, **kwargs)
+    key = _client_key(options)
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(key)
+    if client is None:
+        client = qdrant_client.AsyncQdrantClient(**options)
+        clients[key] = client
+    return client
+
+
+class _SearchBatcher:
+    """Collect concurrent searches on one collection within a time window and run them as one batch."""
+
+    MAX_BATCH_SIZE = 32
+
+    def __init__(self, connector: "QdrantVectorStoreConnector", window_ms: float):
+        self.connector = connector
+        self.window = window_ms / 1000.0
+        self._pending: List[Tuple[QueryWithEmbedding, Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def search(self, query: QueryWithEmbedding, kwargs: Dict[str, Any]) -> QueryResult:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, kwargs, future))
+
+        if len(self._pending) >= self.MAX_BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        # Keep a strong reference until the batch completes
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[QueryWithEmbedding, Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            results = await self.connector.asearch_batch([(query, kwargs) for query, kwargs, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+_search_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, _SearchBatcher]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_search_batcher(connector: "QdrantVectorStoreConnector") -> _SearchBatcher:
+    key = (_client_key(_client_options(connector.ctx, **connector._client_kwargs)), connector.collection_name)
+    batchers = _search_batchers.setdefault(asyncio.get_running_loop(), {})
+    batcher = batchers.get(key)
+    if batcher is None:
+        batcher = _SearchBatcher(connector, settings.vector_search_batch_window_ms)
+        batchers[key] = batcher
+    return batcher
+
 
 class QdrantVectorStoreConnector(VectorStoreConnector):
     def __init__(self, ctx: Dict[str, Any], **kwargs: Any) -> None:
@@ -29,43 +169,192 @@ class QdrantVectorStoreConnector(VectorStoreConnector):
         self.vector_size = ctx.get("vector_size", 1536)
         self.distance = ctx.get("distance", "Cosine")
 
-        if self.url == ":memory:":
-            self.client = qdrant_client.QdrantClient(":memory:")
-        else:
-            self.client = qdrant_client.QdrantClient(
-                url=self.url,
-                port=self.port,
-                grpc_port=self.grpc_port,
-                prefer_grpc=self.prefer_grpc,
-                https=self.https,
-                timeout=self.timeout,
-                **kwargs,
+        self._client_kwargs = kwargs
+        self.client = get_qdrant_client(ctx, **kwargs)
+        self._dense_vector_name: Optional[str] = None
+
+    @property
+    def store(self) -> QdrantVectorStore:
+        """
+        llama-index store used for writes.
+
+        Created on first use, since it checks the collection on the server and searches
+        do not need it.
+        """
+        if self._store is None:
+            self._store = QdrantVectorStore(
+                client=self.client,
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(size=self.vector_size, distance=self.distance),
+            )
+        return self._store
+
+    @store.setter
+    def store(self, value: Optional[QdrantVectorStore]) -> None:
+        self._store = value
+
+    @property
+    def aclient(self) -> qdrant_client.AsyncQdrantClient:
+        """Async client shared on the running event loop"""
+        return get_async_qdrant_client(self.ctx, **self._client_kwargs)
+
+    def upsert_nodes(self, nodes: List[BaseNode], wait: bool = True) -> List[str]:
+        """
+        Upsert nodes with embeddings in a single request.
+
+        Unlike store.add(), which always waits for the points to be applied, this lets callers
+        pipeline writes with wait=False. The points have the payload of store.add(), built by
+        node_to_metadata_dict.
+
+        Returns:
+            The ids of the upserted nodes
+        """
+        if not nodes:
+            return []
+        vector_name = self._ensure_collection(len(nodes[0].get_embedding()))
+
+        points = [
+            PointStruct(
+                id=node.node_id,
+                vector={vector_name: node.get_embedding()},
+                payload=node_to_metadata_dict(node, remove_text=False, flat_metadata=False),
             )
+            for node in nodes
+        ]
+        self.client.upsert(collection_name=self.collection_name, points=points, wait=wait)
+        return [node.node_id for node in nodes]
 
-        self.store = QdrantVectorStore(
-            client=self.client,
+    def _ensure_collection(self, vector_size: int) -> str:
+        """
+        Create the collection on the first write if it does not exist, as store.add() does.
+
+        Concurrent writes of the process create it once, a collection created meanwhile by another
+        process is reused.
+
+        Returns:
+            The name of the dense vector of the collection
+        """
+        if self._dense_vector_name is not None:
+            return self._dense_vector_name
+        with _collection_create_lock:
+            if self._dense_vector_name is None:
+                if not self.client.collection_exists(self.collection_name):
+                    try:
+                        self.client.create_collection(
+                            collection_name=self.collection_name,
+                            vectors_config=VectorParams(size=vector_size, distance=self.distance),
+                        )
+                        self.client.create_payload_index(
+                            collection_name=self.collection_name,
+                            field_name=_DOCUMENT_ID_KEY,
+                            field_schema=PayloadSchemaType.KEYWORD,
+                        )
+                    except Exception as e:
+                        if "already exists" not in str(e):
+                            raise
+                        logger.info(f"Collection {self.collection_name} already exists, skipping its creation")
+                vectors = self.client.get_collection(self.collection_name).config.params.vectors
+                if isinstance(vectors, dict) and _UNNAMED_VECTOR not in vectors:
+                    self._dense_vector_name = _NAMED_DENSE_VECTOR
+                else:
+                    self._dense_vector_name = _UNNAMED_VECTOR
+        return self._dense_vector_name
+
+    def search(self, query: QueryWithEmbedding, **kwargs):
+        request = self._build_query_request(query, **kwargs)
+        hits = self.client.query_points(
             collection_name=self.collection_name,
-            vectors_config=VectorParams(size=self.vector_size, distance=self.distance),
+            query=request.query,
+            with_vectors=request.with_vector,
+            with_payload=request.with_payload,
+            limit=request.limit,
+            consistency=kwargs.get("consistency", "majority"),
+            search_params=request.params,
+            score_threshold=request.score_threshold,
+            query_filter=request.filter,
         )
+        return self._to_query_result(query, hits.points, kwargs.get("payload_fields"))
 
-    def search(self, query: QueryWithEmbedding, **kwargs):
-        consistency = kwargs.get("consistency", "majority")
-        search_params = kwargs.get("search_params")
-        score_threshold = kwargs.get("score_threshold", 0.1)
-        filter_conditions = kwargs.get("filter")
+    async def asearch(self, query: QueryWithEmbedding, **kwargs) -> QueryResult:
+        """
+        Async variant of search(), on the client shared by the running event loop.
 
-        hits = self.client.query_points(
+        With VECTOR_SEARCH_BATCH_WINDOW_MS > 0, concurrent searches on the same collection,
+        e.g. the vector, vision and summary search nodes of one flow, are sent as one batch.
+        """
+        if self.url == ":memory:":
+            # An in-memory async client would not see the data of the sync one
+            return await asyncio.to_thread(self.search, query, **kwargs)
+        if settings.vector_search_batch_window_ms > 0:
+            return await _get_search_batcher(self).search(query, kwargs)
+
+        request = self._build_query_request(query, **kwargs)
+        hits = await self.aclient.query_points(
+            collection_name=self.collection_name,
+            query=request.query,
+            with_vectors=request.with_vector,
+            with_payload=request.with_payload,
+            limit=request.limit,
+            consistency=kwargs.get("consistency", "majority"),
+            search_params=request.params,
+            score_threshold=request.score_threshold,
+            query_filter=request.filter,
+        )
+        return self._to_query_result(query, hits.points, kwargs.get("payload_fields"))
+
+    async def asearch_batch(self, searches: List[Tuple[QueryWithEmbedding, Dict[str, Any]]]) -> List[QueryResult]:
+        """
+        Run several searches on the collection in a single request.
+
+        Args:
+            searches: (query, search kwargs) pairs, the kwargs are the same as for search().
+                The read consistency of the first search applies to the whole batch.
+
+        Returns:
+            One QueryResult per search, in order
+        """
+        if not searches:
+            return []
+        if self.url == ":memory:":
+            return [await asyncio.to_thread(self.search, query, **kwargs) for query, kwargs in searches]
+
+        requests = [self._build_query_request(query, **kwargs) for query, kwargs in searches]
+        responses = await self.aclient.query_batch_points(
             collection_name=self.collection_name,
+            requests=requests,
+            consistency=searches[0][1].get("consistency", "majority"),
+        )
+        return [
+            self._to_query_result(query, response.points, kwargs.get("payload_fields"))
+            for (query, kwargs), response in zip(searches, responses)
+        ]
+
+    def _build_query_request(self, query: QueryWithEmbedding, **kwargs) -> QueryRequest:
+        """
+        Build the query of a search.
+
+        Results are projected: vectors are only returned with with_vectors=True (e.g. for MMR
+        diversification), and the payload is limited to the fields needed to rebuild the
+        document plus the optional payload_fields, which are copied into its metadata.
+        """
+        search_params = kwargs.get("search_params")
+        if isinstance(search_params, dict):
+            # The gRPC transport only converts model objects
+            search_params = SearchParams(**search_params)
+        return QueryRequest(
             query=query.embedding,
-            with_vectors=True,
+            filter=kwargs.get("filter"),
+            params=search_params,
             limit=query.top_k,
-            consistency=consistency,
-            search_params=search_params,
-            score_threshold=score_threshold,
-            query_filter=filter_conditions,
+            with_vector=kwargs.get("with_vectors", False),
+            with_payload=_DOCUMENT_PAYLOAD_FIELDS + list(kwargs.get("payload_fields") or []),
+            score_threshold=kwargs.get("score_threshold", 0.1),
         )
 
-        results = [self._convert_scored_point_to_document_with_score(point) for point in hits.points]
+    def _to_query_result(
+        self, query: QueryWithEmbedding, points: List[ScoredPoint], payload_fields: Optional[List[str]] = None
+    ) -> QueryResult:
+        results = [self._convert_scored_point_to_document_with_score(point, payload_fields) for point in points]
         results = [result for result in results if result is not None]
 
         return QueryResult(
@@ -73,18 +362,23 @@ class QdrantVectorStoreConnector(VectorStoreConnector):
             results=results,
         )
 
-    def _convert_scored_point_to_document_with_score(self, scored_point: ScoredPoint) -> DocumentWithScore | None:
+    def _convert_scored_point_to_document_with_score(
+        self, scored_point: ScoredPoint, payload_fields: Optional[List[str]] = None
+    ) -> DocumentWithScore | None:
         try:
             payload = scored_point.payload or {}
-            text = scored_point.payload.get("text") or json.loads(payload["_node_content"]).get("text")
-            metadata = payload.get("metadata") or json.loads(payload["_node_content"]).get("metadata")
+            node_content = json.loads(payload["_node_content"]) if "_node_content" in payload else {}
+            text = payload.get("text") or node_content.get("text")
+            metadata = payload.get("metadata") or node_content.get("metadata") or {}
             # todo source phrase
-            relationships = json.loads(payload["_node_content"]).get("relationships")
+            relationships = node_content.get("relationships")
             if relationships is not None and metadata.get("source") is None:
                 source = relationships.get("1").get("metadata").get("source")
                 metadata["source"] = os.path.basename(source)
+            for field in payload_fields or []:
+                if field in payload:
+                    metadata.setdefault(field, payload[field])
             return DocumentWithScore(
-                id=scored_point.id,
                 text=text,  # type: ignore
                 metadata=metadata,  # type: ignore
                 embedding=scored_point.vector,  # type: ignore
@@ -351,13 +351,25 @@ async def rebuild_failed_indexes_view(
 async def get_graph_labels_view(
     request: Request,
     collection_id: str,
+    query: str = None,
+    match: str = "fuzzy",
+    limit: int = 50,
+    offset: int = 0,
     user: User = Depends(required_user),
 ) -> view_models.GraphLabelsResponse:
-    """Get all available node labels in the collection's knowledge graph"""
+    """Get all available node labels in the collection's knowledge graph, or search them with query"""
     from aperag.service.graph_service import graph_service
 
+    # Validate parameters
+    if match not in ("prefix", "fuzzy"):
+        raise HTTPException(status_code=400, detail="match must be 'prefix' or 'fuzzy'")
+    if not (1 <= limit <= 1000):
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+
     try:
-        result = await graph_service.get_graph_labels(str(user.id), collection_id)
+        result = await graph_service.get_graph_labels(str(user.id), collection_id, query, match, limit, offset)
         return result
     except CollectionNotFoundException:
         raise HTTPException(status_code=404, detail="Collection not found")
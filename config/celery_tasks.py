@@ -29,6 +29,11 @@ parse_document_task -> trigger_indexing_workflow
 The `trigger_indexing_workflow` task receives parsed document data and dynamically creates
 the parallel index tasks, solving the static parameter passing limitation.
 
+### Parsed Data by Reference
+`parse_document_task` stores the parsed document once in the object store and returns a small
+content-addressed reference, which is what fans out to the index tasks. Each index task reads
+only the sections it needs (see `aperag.tasks.parsed_store`).
+
 ## Task Hierarchy
 
 ### Core Tasks:
@@ -108,10 +113,10 @@ from aperag.tasks.collection import collection_task
 from aperag.tasks.document import document_index_task
 from aperag.tasks.models import (
     IndexTaskResult,
-    ParsedDocumentData,
     TaskStatus,
     WorkflowResult,
 )
+from aperag.tasks.parsed_store import load_parsed_document
 from aperag.tasks.utils import TaskConfig
 from aperag.utils.constant import IndexAction
 from config.celery import app
@@ -212,13 +217,14 @@ def parse_document_task(self, document_id: str, index_types: List[str]) -> dict:
         document_id: Document ID to parse
 
     Returns:
-        Serialized ParsedDocumentData
+        Reference to the ParsedDocumentData stored in the object store
     """
     try:
         logger.info(f"Starting to parse document {document_id}")
         parsed_data = document_index_task.parse_document(document_id)
         logger.info(f"Successfully parsed document {document_id}")
-        return parsed_data.to_dict()
+        # Only the reference goes through the broker, once per index task of the chord
+        return document_index_task.save_parsed_document(parsed_data)
     except Exception as e:
         error_msg = f"Failed to parse document {document_id}: {str(e)}"
         logger.error(error_msg, exc_info=True)
@@ -238,7 +244,7 @@ def create_index_task(self, document_id: str, index_type: str, parsed_data_dict:
     Args:
         document_id: Document ID to process
         index_type: Type of index to create ('vector', 'fulltext', 'graph')
-        parsed_data_dict: Serialized ParsedDocumentData from parse_document_task
+        parsed_data_dict: Parsed document reference from parse_document_task
         context: Task context including index version
 
     Returns:
@@ -260,8 +266,8 @@ def create_index_task(self, document_id: str, index_type: str, parsed_data_dict:
         if skip_reason:
             return skip_reason
 
-        # Convert dict back to structured data
-        parsed_data = ParsedDocumentData.from_dict(parsed_data_dict)
+        # Content and doc parts are read from the object store on first access
+        parsed_data = load_parsed_document(parsed_data_dict)
 
         # Execute index creation
         result = document_index_task.create_index(document_id, index_type, parsed_data)
@@ -364,7 +370,7 @@ def update_index_task(self, document_id: str, index_type: str, parsed_data_dict:
     Args:
         document_id: Document ID to process
         index_type: Type of index to update ('vector', 'fulltext', 'graph')
-        parsed_data_dict: Serialized ParsedDocumentData from parse_document_task
+        parsed_data_dict: Parsed document reference from parse_document_task
         context: Task context including index version
 
     Returns:
@@ -386,8 +392,8 @@ def update_index_task(self, document_id: str, index_type: str, parsed_data_dict:
         if skip_reason:
             return skip_reason
 
-        # Convert dict back to structured data
-        parsed_data = ParsedDocumentData.from_dict(parsed_data_dict)
+        # Content and doc parts are read from the object store on first access
+        parsed_data = load_parsed_document(parsed_data_dict)
 
         # Execute index update
         result = document_index_task.update_index(document_id, index_type, parsed_data)
@@ -426,7 +432,7 @@ def trigger_create_indexes_workflow(self, parsed_data_dict: dict, document_id: s
     creating parallel index creation tasks based on the actual parsed content.
 
     Args:
-        parsed_data_dict: Serialized ParsedDocumentData from parse_document_task
+        parsed_data_dict: Parsed document reference from parse_document_task
         document_id: Document ID to process
         index_types: List of index types to create
 
@@ -503,7 +509,7 @@ def trigger_update_indexes_workflow(self, parsed_data_dict: dict, document_id: s
     Dynamic orchestration task for index update workflow.
 
     Args:
-        parsed_data_dict: Serialized ParsedDocumentData from parse_document_task
+        parsed_data_dict: Parsed document reference from parse_document_task
         document_id: Document ID to process
         index_types: List of index types to update
 
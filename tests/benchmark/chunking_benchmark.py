@@ -0,0 +1,182 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Micro-benchmark of the rechunking of parsed markdown.
+
+Parses markdown documents with parse_md, like the MarkItDown parser does, and rechunks the parts
+with the former implementation, which re-tokenizes a merged part after every merge, and with the
+incremental token counting. Both must produce the same chunks, as both tokenizers offered here
+pre-split text with a regex, see aperag.docparser.chunking.TokenTally. By default the corpus is the
+markdown documentation of the repository, also concatenated into one long document, and two
+synthetic documents made of many short sections and of a long log excerpt.
+
+Command line:
+    python -m tests.benchmark.chunking_benchmark [--chunk-size N] [--repeat R] [--tokenizer tiktoken|words] [PATH ...]
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from aperag.docparser.base import MarkdownPart, Part
+from aperag.docparser.chunking import Group, Rechunker, SimpleSemanticSplitter
+from aperag.docparser.parse_md import parse_md
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+_WORDS = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+class LegacySplitter(SimpleSemanticSplitter):
+    """The former splitter: every fit check tokenizes the whole candidate chunk."""
+
+    def split(self, s: str, chunk_size: int, chunk_overlap: int) -> list[str]:
+        return self._recursive_split(s, chunk_size, chunk_overlap, 0)
+
+    def _fit(self, s: str, chunk_size: int) -> bool:
+        return len(self.tokenizer(s)) <= chunk_size
+
+    def _merge_small_chunks(self, chunks: list[str], chunk_size: int) -> list[str]:
+        merged_chunks = []
+        current_chunk = ""
+        for chunk in chunks:
+            if len(current_chunk) == 0:
+                current_chunk = chunk
+                continue
+            if self._fit(current_chunk + chunk, chunk_size):
+                current_chunk += chunk
+            else:
+                merged_chunks.append(current_chunk)
+                current_chunk = chunk
+        if len(current_chunk) > 0:
+            merged_chunks.append(current_chunk)
+        return merged_chunks
+
+
+class LegacyRechunker(Rechunker):
+    """The former rechunker: a merged part is re-tokenized whenever its size is checked."""
+
+    def _make_splitter(self) -> SimpleSemanticSplitter:
+        return LegacySplitter(self.tokenizer)
+
+    def _count_tokens(self, elem: Group | Part) -> int:
+        if isinstance(elem, Group):
+            if elem.tokens is None:
+                elem.tokens = sum(self._count_tokens(child) for child in elem.items)
+            return elem.tokens
+        tokens = elem.metadata.get("tokens", None)
+        if tokens is None:
+            tokens = elem.metadata["tokens"] = len(self.tokenizer(elem.content))
+        return tokens
+
+
+def word_tokenizer(text: str) -> List[int]:
+    """Dependency-free stand-in for a BPE tokenizer: one token per word or punctuation mark."""
+    return [len(token) for token in _WORDS.findall(text)]
+
+
+def get_tokenizer(name: str) -> Callable[[str], List[int]]:
+    if name == "words":
+        return word_tokenizer
+    from aperag.utils.tokenizer import get_default_tokenizer
+
+    return get_default_tokenizer()
+
+
+def default_corpus() -> List[Path]:
+    return sorted(REPO_ROOT.glob("docs/**/*.md")) + sorted(REPO_ROOT.glob("README*.md"))
+
+
+def synthetic_documents(sections: int = 3000) -> List[Tuple[str, str]]:
+    """Shapes where every merge used to re-tokenize the whole chunk: many short sections, a long log excerpt."""
+    short_sections = "\n\n".join(
+        f"## Step {i}\n\nRun the command number {i} and check its output." for i in range(sections)
+    )
+    log_lines = "\n".join(
+        f"2025-01-01T00:00:{i % 60:02d}Z INFO worker-{i % 8} processed batch {i} in {i % 97} ms"
+        for i in range(sections * 2)
+    )
+    return [("<short-sections>", short_sections), ("<long-log>", f"```\n{log_lines}\n```")]
+
+
+def load_documents(paths: Sequence[Path], repeat: int = 1) -> List[Tuple[str, str]]:
+    """(name, markdown) of every file, plus all of them concatenated `repeat` times as one long document."""
+    documents = [(path.name, path.read_text(encoding="utf-8")) for path in paths]
+    if documents and repeat > 0:
+        documents.append(("<all>", "\n\n".join(text for _, text in documents) * repeat))
+    return documents
+
+
+def _parts(markdown: str) -> List[Part]:
+    return [part for part in parse_md(markdown, {}) if not isinstance(part, MarkdownPart)]
+
+
+def _chunk_signature(parts: List[Part]) -> List[Tuple[str, Any]]:
+    return [(part.content, part.metadata) for part in parts]
+
+
+def run_benchmark(
+    paths: Optional[Sequence[Path]] = None,
+    chunk_size: int = 400,
+    chunk_overlap: int = 20,
+    repeat: int = 3,
+    tokenizer: Callable[[str], List[int]] = word_tokenizer,
+) -> List[Dict[str, Any]]:
+    """Rechunk every document with both implementations, checking that the chunks are identical."""
+    if paths is None:
+        documents = load_documents(default_corpus(), repeat) + synthetic_documents()
+    else:
+        documents = load_documents(paths, repeat)
+    report = []
+    for name, markdown in documents:
+        row: Dict[str, Any] = {"document": name, "chars": len(markdown)}
+        outputs = []
+        for mode, rechunker_class in (("legacy", LegacyRechunker), ("incremental", Rechunker)):
+            # Token counts are cached in the part metadata, every run starts from a fresh parse
+            parts = _parts(markdown)
+            start = time.perf_counter()
+            chunks = rechunker_class(chunk_size, chunk_overlap, tokenizer)(parts)
+            row[f"{mode}_seconds"] = round(time.perf_counter() - start, 4)
+            outputs.append(_chunk_signature(chunks))
+        row["chunks"] = len(outputs[1])
+        row["identical"] = outputs[0] == outputs[1]
+        row["speedup"] = round(row["legacy_seconds"] / max(row["incremental_seconds"], 1e-9), 1)
+        report.append(row)
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare the legacy and incremental rechunking")
+    parser.add_argument("paths", nargs="*", type=Path, help="markdown files, defaults to the docs of the repository")
+    parser.add_argument("--chunk-size", type=int, default=400)
+    parser.add_argument("--chunk-overlap", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3, help="copies of the corpus in the long document")
+    parser.add_argument("--tokenizer", choices=["tiktoken", "words"], default="tiktoken")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.paths or None, args.chunk_size, args.chunk_overlap, args.repeat, get_tokenizer(args.tokenizer)
+    )
+    print(f"{'document':<48}{'chars':>10}{'chunks':>8}{'legacy s':>10}{'incr. s':>10}{'speedup':>9}{'identical':>11}")
+    for row in report:
+        print(
+            f"{row['document'][:47]:<48}{row['chars']:>10}{row['chunks']:>8}{row['legacy_seconds']:>10}"
+            f"{row['incremental_seconds']:>10}{row['speedup']:>9}{str(row['identical']):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Micro-benchmark of the component grouping of extracted entities.
+
+Builds synthetic extraction output (chunk results of entities and relationships, with many
+isolated entities and a few large clusters, like a long document) and times the grouping done
+by _grouping_process_chunk_results before any merge: the former dict-of-sets BFS with a filter
+pass over every chunk per component, against the union-find, packing and one-pass split.
+
+Command line:
+    python -m tests.benchmark.component_grouping_benchmark [--entities N] [--relations M] [--chunks C]
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aperag.graph.lightrag.operate import find_connected_components, pack_components, split_chunk_results_by_group
+
+ChunkResults = List[Tuple[Dict[str, list], Dict[Tuple[str, str], list]]]
+
+
+def synthetic_chunk_results(entities: int, relations: int, chunks: int, seed: int = 0) -> ChunkResults:
+    """Extraction output where relationships only link entities of a tenth of the entity space."""
+    rng = random.Random(seed)
+    names = [f"entity-{i}" for i in range(entities)]
+    connected = names[: max(2, entities // 10)]
+    results: ChunkResults = [({}, {}) for _ in range(chunks)]
+    for name in names:
+        nodes, _ = results[rng.randrange(chunks)]
+        nodes[name] = [{"entity_name": name, "entity_type": "PERSON", "description": name}]
+    for _ in range(relations):
+        src, tgt = rng.sample(connected, 2)
+        _, edges = results[rng.randrange(chunks)]
+        edges[(src, tgt)] = [{"src_id": src, "tgt_id": tgt, "description": f"{src} - {tgt}"}]
+    return results
+
+
+def legacy_grouping(chunk_results: ChunkResults) -> List[ChunkResults]:
+    """The former grouping: BFS over a dict-of-sets adjacency, then one filter pass per component."""
+    adjacency: Dict[str, set] = {}
+    for nodes, edges in chunk_results:
+        for entity_name in nodes:
+            adjacency.setdefault(entity_name, set())
+        for src, tgt in edges:
+            adjacency.setdefault(src, set()).add(tgt)
+            adjacency.setdefault(tgt, set()).add(src)
+
+    visited, components = set(), []
+    for node in adjacency:
+        if node in visited:
+            continue
+        component, queue = [], [node]
+        visited.add(node)
+        while queue:
+            current = queue.pop(0)
+            component.append(current)
+            for neighbor in adjacency[current]:
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+        components.append(component)
+
+    grouped = []
+    for component in components:
+        members = set(component)
+        component_results = []
+        for nodes, edges in chunk_results:
+            filtered_nodes = {name: data for name, data in nodes.items() if name in members}
+            filtered_edges = {key: data for key, data in edges.items() if key[0] in members and key[1] in members}
+            if filtered_nodes or filtered_edges:
+                component_results.append((filtered_nodes, filtered_edges))
+        grouped.append(component_results)
+    return grouped
+
+
+def union_find_grouping(chunk_results: ChunkResults) -> List[ChunkResults]:
+    groups = pack_components(find_connected_components(chunk_results))
+    return split_chunk_results_by_group(chunk_results, groups)
+
+
+def run_benchmark(
+    entities: int = 20000, relations: int = 10000, chunks: int = 500, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Group the same synthetic extraction output with both implementations."""
+    chunk_results = synthetic_chunk_results(entities, relations, chunks, seed)
+    report = []
+    for mode, grouping in (("legacy", legacy_grouping), ("union-find", union_find_grouping)):
+        start = time.perf_counter()
+        groups = grouping(chunk_results)
+        elapsed = time.perf_counter() - start
+        report.append(
+            {
+                "mode": mode,
+                "entities": entities,
+                "relations": relations,
+                "merge_tasks": len(groups),
+                "seconds": round(elapsed, 3),
+            }
+        )
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare the legacy and union-find component grouping")
+    parser.add_argument("--entities", type=int, default=20000)
+    parser.add_argument("--relations", type=int, default=10000)
+    parser.add_argument("--chunks", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.entities, args.relations, args.chunks)
+    print(f"{'mode':<12}{'entities':>10}{'relations':>11}{'merge tasks':>13}{'seconds':>10}")
+    for row in report:
+        print(
+            f"{row['mode']:<12}{row['entities']:>10}{row['relations']:>11}{row['merge_tasks']:>13}{row['seconds']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
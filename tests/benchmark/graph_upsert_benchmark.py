@@ -0,0 +1,136 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of per-item vs batch graph upserts.
+
+Writes the same synthetic graph to a throwaway workspace with upsert_node/upsert_edge and with
+upsert_nodes_batch/upsert_edges_batch, and reports the storage calls (one database round trip
+each for upsert_node/upsert_edge) and the wall-clock time of both. The workspace is dropped afterwards.
+
+Command line:
+    python -m tests.benchmark.graph_upsert_benchmark [--storage PGOpsSyncGraphStorage] [--nodes N] [--edges M]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aperag.graph.lightrag.kg import STORAGES
+from aperag.graph.lightrag.namespace import NameSpace
+
+logger = logging.getLogger(__name__)
+
+GRAPH_STORAGES = ("PGOpsSyncGraphStorage", "Neo4JSyncStorage", "NebulaSyncStorage")
+
+
+def synthetic_graph(
+    nodes: int, edges: int, seed: int = 0
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[Tuple[str, str], Dict[str, Any]]]:
+    """Random graph shaped like the output of the entity/relation merge."""
+    rng = random.Random(seed)
+    now = int(time.time())
+    node_ids = [f"entity-{i}" for i in range(nodes)]
+    node_data = {
+        node_id: {
+            "entity_id": node_id,
+            "entity_type": rng.choice(["PERSON", "ORGANIZATION", "LOCATION", "EVENT"]),
+            "description": f"description of {node_id}",
+            "source_id": f"chunk-{rng.randrange(100)}",
+            "file_path": "benchmark.md",
+            "created_at": now,
+        }
+        for node_id in node_ids
+    }
+    edge_data = {}
+    while nodes > 1 and len(edge_data) < min(edges, nodes * (nodes - 1) // 2):
+        pair = tuple(sorted(rng.sample(node_ids, 2)))
+        edge_data[pair] = {
+            "weight": 1.0,
+            "description": f"relation between {pair[0]} and {pair[1]}",
+            "keywords": "benchmark",
+            "source_id": f"chunk-{rng.randrange(100)}",
+            "file_path": "benchmark.md",
+            "created_at": now,
+        }
+    return node_data, edge_data
+
+
+async def _upsert(storage, mode: str, node_data: dict, edge_data: dict) -> int:
+    if mode == "batch":
+        await storage.upsert_nodes_batch(node_data)
+        await storage.upsert_edges_batch(edge_data)
+        return 2
+    for node_id, data in node_data.items():
+        await storage.upsert_node(node_id, data)
+    for (source, target), data in edge_data.items():
+        await storage.upsert_edge(source, target, data)
+    return len(node_data) + len(edge_data)
+
+
+async def run_benchmark(
+    storage_name: str = "PGOpsSyncGraphStorage", nodes: int = 1000, edges: int = 2000, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Upsert the same synthetic graph per item and in batch, each into a fresh workspace."""
+    node_data, edge_data = synthetic_graph(nodes, edges, seed)
+    report = []
+    for mode in ("single", "batch"):
+        workspace = f"graph-upsert-benchmark-{uuid.uuid4().hex[:8]}"
+        storage = STORAGES[storage_name](
+            namespace=NameSpace.GRAPH_STORE_CHUNK_ENTITY_RELATION, workspace=workspace, embedding_func=None
+        )
+        await storage.initialize()
+        try:
+            start = time.perf_counter()
+            calls = await _upsert(storage, mode, node_data, edge_data)
+            elapsed = time.perf_counter() - start
+        finally:
+            await storage.drop()
+            await storage.finalize()
+        report.append(
+            {
+                "mode": mode,
+                "nodes": len(node_data),
+                "edges": len(edge_data),
+                "calls": calls,
+                "seconds": round(elapsed, 3),
+                "items_per_second": round((len(node_data) + len(edge_data)) / elapsed, 1),
+            }
+        )
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare per-item and batch graph upserts")
+    parser.add_argument("--storage", choices=GRAPH_STORAGES, default="PGOpsSyncGraphStorage")
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--edges", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    report = asyncio.run(run_benchmark(args.storage, args.nodes, args.edges))
+    print(f"{'mode':<8}{'nodes':>8}{'edges':>8}{'calls':>8}{'seconds':>10}{'items/s':>12}")
+    for row in report:
+        print(
+            f"{row['mode']:<8}{row['nodes']:>8}{row['edges']:>8}{row['calls']:>8}"
+            f"{row['seconds']:>10}{row['items_per_second']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
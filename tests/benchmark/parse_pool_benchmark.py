@@ -0,0 +1,164 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput benchmark of the parse pool.
+
+Converts a generated text PDF to markdown and parses a long markdown document (the markdown
+documentation of the repository, concatenated) to parts, in-process and on the parse pool, and
+checks that both produce the same output. The pool is warmed up before timing, so the worker
+start-up cost is reported separately.
+
+Command line:
+    python -m tests.benchmark.parse_pool_benchmark [--workers N] [--pdf-pages P] [--repeat R]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from aperag.docparser.parse_md import parse_md
+from aperag.docparser.parse_pool import ParsePool, _convert_md_shard
+from tests.benchmark.chunking_benchmark import default_corpus
+
+_WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore".split()
+
+
+def make_text_pdf(path: str | Path, pages: int, lines_per_page: int = 50) -> None:
+    """Write a PDF of text pages, enough to exercise the text extraction without a PDF library."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        lines = [
+            f"Page {page + 1} line {line + 1}: "
+            + " ".join(_WORDS[(page * 7 + line * 3 + i) % len(_WORDS)] for i in range(12))
+            for line in range(lines_per_page)
+        ]
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode("latin-1")))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(out))
+
+
+def markdown_corpus(repeat: int) -> str:
+    return "\n\n".join(path.read_text(encoding="utf-8") for path in default_corpus()) * repeat
+
+
+def _signature(parts: List[Any]) -> List[Any]:
+    return [(type(part).__name__, part.model_dump()) for part in parts]
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(
+    workers: int = 4,
+    pdf_pages: int = 128,
+    pdf_pages_per_shard: int = 16,
+    repeat: int = 5,
+    markdown_chars_per_shard: int = 200000,
+) -> List[Dict[str, Any]]:
+    from markitdown import MarkItDown
+
+    pool = ParsePool(
+        workers, pdf_pages_per_shard=pdf_pages_per_shard, markdown_chars_per_shard=markdown_chars_per_shard
+    )
+    report = []
+    try:
+        _, warmup = _timed(pool._map, _convert_md_shard, [("# warm up", {})] * workers)
+        report.append({"document": "<pool start-up>", "size": workers, "serial_seconds": 0, "pool_seconds": warmup})
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = os.path.join(temp_dir, "benchmark.pdf")
+            make_text_pdf(pdf_path, pdf_pages)
+            serial, serial_seconds = _timed(lambda: MarkItDown().convert_local(pdf_path).markdown)
+            pooled, pool_seconds = _timed(pool.pdf_to_markdown, pdf_path)
+            report.append(
+                {
+                    "document": f"pdf, {pdf_pages} pages",
+                    "size": pdf_pages,
+                    "serial_seconds": serial_seconds,
+                    "pool_seconds": pool_seconds,
+                    "identical": serial == pooled,
+                }
+            )
+
+        markdown = markdown_corpus(repeat)
+        serial, serial_seconds = _timed(parse_md, markdown, {})
+        pooled, pool_seconds = _timed(pool.parse_md, markdown, {})
+        report.append(
+            {
+                "document": f"markdown, {len(markdown)} chars",
+                "size": len(markdown),
+                "serial_seconds": serial_seconds,
+                "pool_seconds": pool_seconds,
+                "identical": _signature(serial) == _signature(pooled),
+            }
+        )
+    finally:
+        pool.shutdown()
+
+    for row in report:
+        row["serial_seconds"] = round(row["serial_seconds"], 4)
+        row["pool_seconds"] = round(row["pool_seconds"], 4)
+        row["speedup"] = round(row["serial_seconds"] / max(row["pool_seconds"], 1e-9), 2)
+    report[0]["identical"] = None
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare in-process parsing with the parse pool")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pdf-pages", type=int, default=128)
+    parser.add_argument("--pdf-pages-per-shard", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5, help="copies of the docs in the markdown document")
+    parser.add_argument("--markdown-chars-per-shard", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.workers, args.pdf_pages, args.pdf_pages_per_shard, args.repeat, args.markdown_chars_per_shard
+    )
+    print(f"workers: {args.workers}")
+    print(f"{'document':<32}{'serial s':>10}{'pool s':>10}{'speedup':>9}{'identical':>11}")
+    for row in report:
+        print(
+            f"{row['document']:<32}{row['serial_seconds']:>10}{row['pool_seconds']:>10}{row['speedup']:>9}"
+            f"{str(row['identical']):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
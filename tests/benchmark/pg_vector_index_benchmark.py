@@ -0,0 +1,155 @@
+# Copyright 2025 ApeCloud, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of exact vs HNSW similarity search on the LightRAG pgvector tables.
+
+Loads synthetic vectors into a throwaway workspace of lightrag_doc_chunks, measures the recall and
+latency of exact search, then builds the workspace HNSW index with PGVectorIndexManager and measures
+them again for each hnsw.ef_search value. The workspace rows and its index are deleted afterwards.
+
+Command line:
+    python -m tests.benchmark.pg_vector_index_benchmark [--rows N] [--dim D] [--ef-search 40 100 200]
+"""
+
+import argparse
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from aperag.graph.lightrag.kg.pg_vector_index import PGVectorIndexManager
+
+logger = logging.getLogger(__name__)
+
+
+def synthetic_vectors(rows: int, dim: int, clusters: int = 32, seed: int = 0) -> np.ndarray:
+    """Unit vectors drawn around random cluster centers, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size=rows)] + rng.normal(scale=0.5, size=(rows, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def recall_at_k(exact_ids: Sequence[str], approx_ids: Sequence[str]) -> float:
+    if not exact_ids:
+        return 1.0
+    return len(set(exact_ids) & set(approx_ids)) / len(exact_ids)
+
+
+def _summarize(label: str, ef_search: Optional[int], latencies: List[float], recalls: List[float]) -> Dict[str, Any]:
+    return {
+        "mode": label,
+        "ef_search": ef_search,
+        "recall": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+
+def run_benchmark(
+    rows: int = 20000,
+    dim: int = 256,
+    queries: int = 50,
+    top_k: int = 10,
+    ef_search_values: Sequence[int] = (40, 100, 200),
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Compare exact and HNSW search recall/latency on synthetic vectors in a throwaway workspace.
+
+    The workspace rows and its index are deleted afterwards.
+    """
+    from pgvector.sqlalchemy import Vector
+    from sqlalchemy import bindparam, text
+
+    from aperag.config import sync_engine
+    from aperag.db.ops import db_ops
+
+    table = "lightrag_doc_chunks"
+    workspace = f"ann-benchmark-{uuid.uuid4().hex[:8]}"
+    vectors = synthetic_vectors(rows + queries, dim, seed=seed)
+    base, probes = vectors[:rows], vectors[rows:].tolist()
+    manager = PGVectorIndexManager(ops=db_ops)
+
+    insert = text(
+        f"INSERT INTO {table} (workspace, id, content, content_vector, create_time, update_time) "
+        "VALUES (:workspace, :id, '', :content_vector, now(), now())"
+    ).bindparams(bindparam("content_vector", type_=Vector(dim)))
+
+    def _search(ef_search: int = 0) -> Tuple[List[List[str]], List[float]]:
+        results, latencies = [], []
+        for probe in probes:
+            start = time.perf_counter()
+            hits = db_ops.query_lightrag_doc_chunks_similarity(
+                workspace, probe, top_k, threshold=-1.0, ef_search=ef_search
+            )
+            latencies.append(time.perf_counter() - start)
+            results.append([hit["id"] for hit in hits])
+        return results, latencies
+
+    report = []
+    try:
+        logger.info(f"Loading {rows} synthetic {dim}-d vectors into workspace {workspace}")
+        with sync_engine.begin() as conn:
+            for offset in range(0, rows, 1000):
+                conn.execute(
+                    insert,
+                    [
+                        {"workspace": workspace, "id": f"chunk-{offset + i}", "content_vector": vector.tolist()}
+                        for i, vector in enumerate(base[offset : offset + 1000])
+                    ],
+                )
+            conn.execute(text(f"ANALYZE {table}"))
+
+        exact, latencies = _search()
+        report.append(_summarize("exact", None, latencies, [1.0] * len(exact)))
+
+        start = time.perf_counter()
+        manager.ensure(table, workspace, dim=dim, force=True)
+        logger.info(f"HNSW index built in {time.perf_counter() - start:.1f}s")
+
+        for ef_search in ef_search_values:
+            approx, latencies = _search(ef_search)
+            recalls = [recall_at_k(e, a) for e, a in zip(exact, approx)]
+            report.append(_summarize("hnsw", ef_search, latencies, recalls))
+    finally:
+        manager.drop(table, workspace)
+        with sync_engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {table} WHERE workspace = :workspace"), {"workspace": workspace})
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare exact and HNSW search on synthetic vectors")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 100, 200])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    report = run_benchmark(args.rows, args.dim, args.queries, args.top_k, args.ef_search)
+    print(f"{'mode':<8}{'ef_search':>10}{'recall@' + str(args.top_k):>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for row in report:
+        ef_search = row["ef_search"] if row["ef_search"] is not None else "-"
+        print(f"{row['mode']:<8}{ef_search:>10}{row['recall']:>12}{row['p50_ms']:>10}{row['p95_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
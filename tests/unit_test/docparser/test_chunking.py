@@ -1,7 +1,9 @@
+import re
 from typing import List
 
-from aperag.docparser.base import Part, TitlePart
-from aperag.docparser.chunking import Group, Rechunker, SimpleSemanticSplitter
+from aperag.docparser.base import MarkdownPart, Part, TitlePart
+from aperag.docparser.chunking import Group, Rechunker, SimpleSemanticSplitter, TokenTally
+from aperag.docparser.parse_md import parse_md
 
 
 def mock_tokenizer(text: str) -> List[int]:
@@ -14,6 +16,24 @@ def mock_char_tokenizer(text: str) -> List[int]:
     return [ord(char) for char in text]
 
 
+_WORDS = re.compile(r"\w+|[^\w\s]")
+
+
+def word_tokenizer(text: str) -> List[int]:
+    # Like a BPE tokenizer, token boundaries depend on the surrounding text
+    return [len(word) for word in _WORDS.findall(text)]
+
+
+def markdown_document(sections: int) -> str:
+    short_sections = "\n\n".join(
+        f"## Step {i}\n\nRun the command number {i} and check its output." for i in range(sections)
+    )
+    log_lines = "\n".join(
+        f"2025-01-01T00:00:{i % 60:02d}Z INFO worker-{i % 8} processed batch {i}" for i in range(sections)
+    )
+    return f"{short_sections}\n\n```\n{log_lines}\n```"
+
+
 def test_group_creation():
     parts = [
         Part(content="Text 1", metadata={"nesting": 0}),
@@ -396,3 +416,28 @@ def test_merge_consecutive_title_groups():
     assert len(merged7) == 2
     assert len(merged7[0].items) == 1
     assert len(merged7[1].items) == 2
+
+
+def test_token_tally_matches_full_tokenization():
+    pieces = [("", "# Title"), ("\n\n", "First line\n"), ("", "second line"), (" ", "more"), ("\n\n", "  Indented")]
+    for tokenizer in (mock_char_tokenizer, word_tokenizer):
+        tally = TokenTally(tokenizer)
+        text = ""
+        for separator, piece in pieces:
+            text = text + separator + piece if text else piece
+            assert tally.append(separator if tally.tail else "", piece) == len(tokenizer(text))
+
+
+def test_incremental_rechunking_matches_full_retokenization():
+    markdown = markdown_document(sections=200)
+    for chunk_size in (50, 400):
+        parts = [part for part in parse_md(markdown, {}) if not isinstance(part, MarkdownPart)]
+        words = _WORDS.findall(" ".join(part.content for part in parts))
+        chunks = Rechunker(chunk_size=chunk_size, chunk_overlap=0, tokenizer=word_tokenizer)(parts)
+
+        assert len(chunks) > 1
+        assert _WORDS.findall(" ".join(chunk.content for chunk in chunks)) == words
+        for chunk in chunks:
+            tokens = len(word_tokenizer(chunk.content))
+            assert tokens <= chunk_size
+            assert chunk.metadata.get("tokens", tokens) == tokens
@@ -0,0 +1,96 @@
+"""
+Unit tests for the parse artifact cache.
+"""
+
+import pytest
+
+from aperag.docparser.base import AssetBinPart, MarkdownPart, TextPart
+from aperag.docparser.doc_parser import DocParser
+from aperag.index.document_parser import DocumentParser
+from aperag.index.parse_cache import ParseCache, decode_parts, encode_parts, parser_config_hash
+from aperag.objectstore.local import Local, LocalConfig
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(Local(LocalConfig(root_dir=str(tmp_path / "objects"))))
+
+
+@pytest.fixture
+def markdown_file(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_text("# Title\n\nSome paragraph.\n")
+    return path
+
+
+class CountingDocumentParser(DocumentParser):
+    def __init__(self):
+        self.parses = 0
+
+    def _parse_document(self, parser, filepath_obj, file_metadata):
+        self.parses += 1
+        return super()._parse_document(parser, filepath_obj, file_metadata)
+
+
+def test_parts_round_trip_with_file_metadata_restamped():
+    file_metadata = {"doc_id": "doc1", "name": "a.pdf"}
+    parts = [
+        MarkdownPart(markdown="# A", metadata={**file_metadata, "md_source_map": [0, 1]}),
+        AssetBinPart(asset_id="page_0.png", data=b"\x89PNG" * 10, metadata={**file_metadata, "page_idx": 0}),
+    ]
+    data = encode_parts(parts, file_metadata)
+    assert b"doc1" not in data
+
+    restored = decode_parts(data, {"doc_id": "doc2", "name": "b.pdf"})
+    assert [type(part) for part in restored] == [MarkdownPart, AssetBinPart]
+    assert restored[0].metadata == {"doc_id": "doc2", "name": "b.pdf", "md_source_map": [0, 1]}
+    assert restored[1].data == b"\x89PNG" * 10
+
+
+def test_parse_is_reused_for_same_file_and_config(cache, markdown_file):
+    parser = CountingDocumentParser()
+    first = parser.parse_document(str(markdown_file), {"doc_id": "doc1"}, {}, cache, "user/col/doc1")
+    second = parser.parse_document(str(markdown_file), {"doc_id": "doc1", "name": "a.md"}, {}, cache, "user/col/doc1")
+
+    assert parser.parses == 1
+    assert [type(part) for part in second] == [type(part) for part in first]
+    assert any(isinstance(part, TextPart) for part in second)
+    assert all(part.metadata["name"] == "a.md" for part in second)
+
+    markdown_file.write_text("# Title\n\nAnother paragraph.\n")
+    parser.parse_document(str(markdown_file), {"doc_id": "doc1"}, {}, cache, "user/col/doc1")
+    assert parser.parses == 2
+    # Without a document base path there is no cache entry
+    parser.parse_document(str(markdown_file), {"doc_id": "doc1"}, {}, cache)
+    assert parser.parses == 3
+
+
+def test_parser_settings_change_the_key(cache, markdown_file):
+    default_key = cache.key_for(DocParser(), markdown_file)
+    assert cache.key_for(DocParser({"use_markitdown": False, "use_doc_ray": True}), markdown_file) != default_key
+    # Credentials are not part of the key
+    with_token = DocParser({"use_doc_ray": True})
+    with_token.config[1].settings = {"api_token": "secret", "timeout": 10}
+    without_token = DocParser({"use_doc_ray": True})
+    without_token.config[1].settings = {"timeout": 10}
+    assert parser_config_hash(with_token, ".pdf") == parser_config_hash(without_token, ".pdf")
+
+
+def test_entries_are_per_document_and_overwritten(cache, markdown_file, tmp_path):
+    parser = CountingDocumentParser()
+    parser.parse_document(str(markdown_file), {}, {}, cache, "user/col/doc1")
+    store = cache._store()
+    assert store.obj_exists("user/col/doc1/parse_cache.bin")
+
+    # A new version of the file does not match the stored key, and replaces the entry
+    markdown_file.write_text("# Title\n\nAnother paragraph.\n")
+    parser.parse_document(str(markdown_file), {}, {}, cache, "user/col/doc1")
+    assert parser.parses == 2
+    assert list((tmp_path / "objects" / "user" / "col" / "doc1").iterdir()) == [
+        tmp_path / "objects" / "user" / "col" / "doc1" / "parse_cache.bin"
+    ]
+
+    # The entry goes away with the objects of the document
+    store.delete_objects_by_prefix("user/col/doc1/")
+    parser.parse_document(str(markdown_file), {}, {}, cache, "user/col/doc1")
+    assert parser.parses == 3
@@ -0,0 +1,104 @@
+"""
+Unit tests for the sharded parsing on the parse pool.
+"""
+
+import ctypes
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+import pytest
+from markitdown import MarkItDown
+
+from aperag.docparser.markitdown_parser import MarkItDownParser
+from aperag.docparser.parse_md import parse_md
+from aperag.docparser.parse_pool import ParsePool, split_markdown
+
+SECTION = "# Section {i}\n\nSome text of section {i}.\n\n- item one\n- item two\n\n"
+FENCED = "```md\n\n# Not a heading\n```\n\n"
+
+
+def make_text_pdf(path, pages, lines_per_page):
+    pdf = pdfium.PdfDocument.new()
+    for page_index in range(pages):
+        page = pdf.new_page(595, 842)
+        for line in range(lines_per_page):
+            text = f"Page {page_index + 1} line {line + 1}: some text to extract\x00".encode("utf-16-le")
+            text_obj = pdfium_c.FPDFPageObj_NewTextObj(pdf.raw, b"Helvetica", 10.0)
+            buffer = ctypes.create_string_buffer(text)
+            pdfium_c.FPDFText_SetText(text_obj, ctypes.cast(buffer, ctypes.POINTER(pdfium_c.FPDF_WCHAR)))
+            pdfium_c.FPDFPageObj_Transform(text_obj, 1, 0, 0, 1, 40, 800 - 14 * line)
+            pdfium_c.FPDFPage_InsertObject(page.raw, text_obj)
+        pdfium_c.FPDFPage_GenerateContent(page.raw)
+        page.close()
+    pdf.save(str(path))
+    pdf.close()
+
+
+def _signature(parts):
+    return [(type(part).__name__, part.model_dump()) for part in parts]
+
+
+@pytest.fixture
+def pool():
+    pool = ParsePool(2, pdf_pages_per_shard=2, markdown_chars_per_shard=50)
+    yield pool
+    pool.shutdown()
+
+
+def test_markdown_is_split_at_top_level_headings_only():
+    markdown = "Intro\r\n\r\n" + SECTION.format(i=1) + FENCED + SECTION.format(i=2) + "<!--\n\n# Commented\n-->\n"
+    shards = split_markdown(markdown, 1)
+
+    assert "".join(text for _, text in shards) == markdown.replace("\r\n", "\n")
+    assert [text.split("\n")[0] for _, text in shards] == ["Intro", "# Section 1", "# Section 2"]
+    assert shards[2][0] == markdown.replace("\r\n", "\n").split("\n").index("# Section 2")
+    # References are resolved across the whole document
+    assert len(split_markdown(markdown + "[ref]: https://example.com\n", 1)) == 1
+
+
+def test_sharded_markdown_parse_matches_in_process_parse(pool):
+    markdown = "".join(SECTION.format(i=i) + (FENCED if i % 3 == 0 else "") for i in range(20))
+    markdown += "![img](data:image/png;base64,iVBORw0KGgo=)\n"
+
+    assert _signature(pool.parse_md(markdown, {"doc_id": "doc1"})) == _signature(parse_md(markdown, {"doc_id": "doc1"}))
+    assert pool.fallbacks == 0
+
+
+def test_pdf_text_is_extracted_by_page_ranges(pool, tmp_path):
+    pdf_path = tmp_path / "doc.pdf"
+    make_text_pdf(pdf_path, pages=5, lines_per_page=10)
+
+    assert pool.pdf_to_markdown(pdf_path) == MarkItDown().convert_local(str(pdf_path)).markdown
+    assert pool.fallbacks == 0
+
+    make_text_pdf(pdf_path, pages=3, lines_per_page=10)
+    assert pool.pdf_to_markdown(pdf_path) is None
+
+
+def test_pdf_is_not_sharded_with_an_unverified_markitdown_version(pool, tmp_path, monkeypatch):
+    pdf_path = tmp_path / "doc.pdf"
+    make_text_pdf(pdf_path, pages=5, lines_per_page=10)
+
+    monkeypatch.setattr("aperag.docparser.parse_pool.MARKITDOWN_PDF_VERSIONS", ("0.0.0",))
+    assert pool.pdf_to_markdown(pdf_path) is None
+    assert pool.fallbacks == 0
+
+
+def test_markitdown_parser_uses_the_pool(pool, tmp_path, monkeypatch):
+    pdf_path = tmp_path / "doc.pdf"
+    make_text_pdf(pdf_path, pages=6, lines_per_page=10)
+    in_process = MarkItDownParser().parse_file(pdf_path, {"doc_id": "doc1"})
+
+    monkeypatch.setattr("aperag.docparser.markitdown_parser.get_default_parse_pool", lambda: pool)
+    assert _signature(MarkItDownParser().parse_file(pdf_path, {"doc_id": "doc1"})) == _signature(in_process)
+    assert pool.fallbacks == 0
+
+
+def test_worker_over_memory_limit_falls_back_to_in_process_parse():
+    pool = ParsePool(1, memory_limit_mb=16, markdown_chars_per_shard=1000)
+    markdown = "# One\n\n" + "word " * 400000 + "\n\n# Two\n\nText\n"
+    try:
+        assert _signature(pool.parse_md(markdown, {})) == _signature(parse_md(markdown, {}))
+        assert pool.fallbacks == 1
+    finally:
+        pool.shutdown()
@@ -0,0 +1,124 @@
+"""
+Unit tests for the streaming rendering of PDF pages for the vision index.
+"""
+
+import io
+import types
+
+import pypdfium2 as pdfium
+import pytest
+from PIL import Image
+
+from aperag.config import settings
+from aperag.docparser.base import AssetBinPart, PdfPart
+from aperag.index.document_parser import DocumentParser
+from aperag.index.pdf_pages import (
+    PageRenderOptions,
+    iter_image_windows,
+    iter_pdf_pages,
+    load_image_data,
+    render_pdf_pages,
+)
+from aperag.index.vision_index import VisionIndexer
+from aperag.llm.llm_error_types import InvalidConfigurationError
+from aperag.objectstore.local import Local, LocalConfig
+from aperag.vectorstore.connector import VectorStoreConnectorAdaptor
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Local(LocalConfig(root_dir=str(tmp_path / "objects")))
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "doc.pdf"
+    pdf = pdfium.PdfDocument.new()
+    for _ in range(3):
+        pdf.new_page(144, 288)
+    pdf.save(str(path))
+    pdf.close()
+    return path
+
+
+def test_pages_are_rendered_lazily_at_the_configured_dpi_and_format(pdf_file):
+    pages = iter_pdf_pages(pdf_file, {"doc_id": "doc1"}, PageRenderOptions(dpi=144, image_format="webp"))
+    assert isinstance(pages, types.GeneratorType)
+
+    first = next(pages)
+    assert (first.asset_id, first.mime_type) == ("page_0.webp", "image/webp")
+    assert first.metadata == {"doc_id": "doc1", "page_idx": 0, "converted_from": "pdf", "vision_index": True}
+    with Image.open(io.BytesIO(first.data)) as image:
+        assert (image.format, image.size) == ("WEBP", (288, 576))
+    assert [page.asset_id for page in pages] == ["page_1.webp", "page_2.webp"]
+
+    jpeg = next(iter_pdf_pages(pdf_file.read_bytes(), {}, PageRenderOptions(image_format="JPG")))
+    assert (jpeg.asset_id, jpeg.mime_type) == ("page_0.jpg", "image/jpeg")
+
+    with pytest.raises(ValueError):
+        PageRenderOptions(image_format="gif")
+
+
+def test_uploaded_pages_are_loaded_back_by_window(pdf_file, store):
+    refs = render_pdf_pages(pdf_file, {}, "user/col/doc", PageRenderOptions(image_format="jpeg"), store)
+
+    assert [ref.data for ref in refs] == [b"", b"", b""]
+    assert refs[2].metadata["asset_path"] == "user/col/doc/assets/page_2.jpg"
+    assert store.obj_exists("user/col/doc/assets/page_2.jpg")
+
+    windows = list(iter_image_windows(refs, 2, store))
+    assert [len(window) for window in windows] == [2, 1]
+    assert windows[1][0][1] == load_image_data(refs[2], store)
+    assert windows[1][0][1].startswith(b"\xff\xd8")
+
+
+def test_pages_are_rendered_only_for_the_vision_index(pdf_file, store, monkeypatch):
+    monkeypatch.setattr("aperag.index.document_parser.get_object_store", lambda: store)
+    monkeypatch.setattr("aperag.objectstore.base.get_object_store", lambda: store)
+    parser = DocumentParser()
+
+    result = parser.process_document_parsing(str(pdf_file), {}, "user/col/doc", {}, render_pdf_pages=False)
+    assert not any(isinstance(part, (AssetBinPart, PdfPart)) for part in result.doc_parts)
+    assert store.obj_exists("user/col/doc/converted.pdf")
+    assert not store.obj_exists("user/col/doc/assets/page_0.png")
+
+    result = parser.process_document_parsing(str(pdf_file), {}, "user/col/doc", {}, render_pdf_pages=True)
+    pages = [part for part in result.doc_parts if isinstance(part, AssetBinPart)]
+    assert [page.asset_id for page in pages] == ["page_0.png", "page_1.png", "page_2.png"]
+    assert store.obj_exists("user/col/doc/assets/page_0.png")
+
+
+def test_vision_vectors_of_a_failed_document_are_deleted(pdf_file, store, monkeypatch):
+    class MultimodalEmbedding:
+        calls = 0
+
+        def is_multimodal(self):
+            return True
+
+        def embed_documents(self, uris):
+            MultimodalEmbedding.calls += 1
+            if MultimodalEmbedding.calls == 2:
+                raise RuntimeError("embedding service unavailable")
+            return [[1.0, float(i), 0.0, 0.0] for i in range(len(uris))]
+
+    def no_completion_service(collection):
+        raise InvalidConfigurationError("completion")
+
+    adaptor = VectorStoreConnectorAdaptor("qdrant", {"url": ":memory:", "collection": "test", "vector_size": 4})
+    monkeypatch.setattr(VisionIndexer, "is_enabled", lambda self, collection: True)
+    monkeypatch.setattr(
+        "aperag.index.vision_index.get_collection_embedding_service_sync",
+        lambda collection: (MultimodalEmbedding(), 4),
+    )
+    monkeypatch.setattr("aperag.index.vision_index.get_collection_completion_service_sync", no_completion_service)
+    monkeypatch.setattr("aperag.index.vision_index.get_vector_db_connector", lambda collection: adaptor)
+    monkeypatch.setattr(settings, "pdf_page_window", 2)
+    pages = render_pdf_pages(pdf_file, {}, "user/col/doc", PageRenderOptions(), store)
+    monkeypatch.setattr("aperag.objectstore.base.get_object_store", lambda: store)
+
+    result = VisionIndexer().create_index("doc1", "", pages, types.SimpleNamespace(id="col1"))
+
+    # The first window was stored before the second one failed
+    assert MultimodalEmbedding.calls == 2
+    assert not result.success
+    assert adaptor.connector.client.count(collection_name="test").count == 0
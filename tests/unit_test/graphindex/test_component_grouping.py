@@ -0,0 +1,75 @@
+"""
+Unit tests for the component grouping of extracted entities before the merge.
+"""
+
+import random
+
+from aperag.graph.lightrag.operate import find_connected_components, pack_components, split_chunk_results_by_group
+
+
+def _as_sets(components):
+    return {frozenset(component) for component in components}
+
+
+def test_find_connected_components():
+    chunk_results = [
+        ({"A": [1], "B": [2]}, {("A", "C"): [3]}),
+        ({"D": [4]}, {("C", "E"): [5], ("F", "G"): [6]}),
+        ({"B": [7]}, {}),
+    ]
+    components = find_connected_components(chunk_results)
+    assert components == [["A", "C", "E"], ["B"], ["D"], ["F", "G"]]
+
+
+def test_find_connected_components_of_a_random_graph():
+    rng = random.Random(3)
+    names = [f"entity-{i}" for i in range(2000)]
+    chunk_results = [
+        (
+            {name: [chunk] for name in rng.sample(names, 40)},
+            {tuple(rng.sample(names, 2)): [chunk] for _ in range(30)},
+        )
+        for chunk in range(50)
+    ]
+    edges = [edge for _, chunk_edges in chunk_results for edge in chunk_edges]
+    all_names = {name for nodes, _ in chunk_results for name in nodes} | {name for edge in edges for name in edge}
+
+    components = find_connected_components(chunk_results)
+    assert sorted(name for component in components for name in component) == sorted(all_names)
+
+    component_of = {name: i for i, component in enumerate(components) for name in component}
+    assert all(component_of[src] == component_of[tgt] for src, tgt in edges)
+    # Every component is connected by the edges it contains
+    neighbors = {name: set() for name in all_names}
+    for src, tgt in edges:
+        neighbors[src].add(tgt)
+        neighbors[tgt].add(src)
+    for component in components:
+        reached, stack = {component[0]}, [component[0]]
+        while stack:
+            for neighbor in neighbors[stack.pop()] - reached:
+                reached.add(neighbor)
+                stack.append(neighbor)
+        assert reached == set(component)
+
+
+def test_pack_components_balances_small_components():
+    components = [["A", "B", "C", "D"], ["E"], ["F", "G"], ["H"]]
+    assert pack_components(components, max_group_size=4) == [["A", "B", "C", "D"], ["F", "G", "E", "H"]]
+
+    singletons = [[f"n{i}"] for i in range(10)]
+    groups = pack_components(singletons, max_group_size=4)
+    assert sorted(len(group) for group in groups) == [3, 3, 4]
+    assert sorted(name for group in groups for name in group) == sorted(name for [name] in singletons)
+
+
+def test_split_chunk_results_by_group():
+    chunk_results = [
+        ({"A": [1], "B": [2]}, {("A", "C"): [3]}),
+        ({"D": [4]}, {("D", "E"): [5]}),
+    ]
+    groups = [["A", "C"], ["B", "D", "E"]]
+    assert split_chunk_results_by_group(chunk_results, groups) == [
+        [({"A": [1]}, {("A", "C"): [3]})],
+        [({"B": [2]}, {}), ({"D": [4]}, {("D", "E"): [5]})],
+    ]
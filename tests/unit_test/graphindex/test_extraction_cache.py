@@ -0,0 +1,103 @@
+"""
+Unit tests for the LLM entity extraction cache.
+"""
+
+import threading
+
+from aperag.graph.lightrag.extraction_cache import ExtractionCache, ExtractionCacheStats, make_extraction_cache_key
+from aperag.graph.lightrag.operate import extract_entities
+from aperag.graph.lightrag.utils import LightRAGLogger
+
+INITIAL = '("entity"<|>"Alice"<|>"person"<|>"Alice is an engineer.")##<|COMPLETE|>'
+GLEANED = '("entity"<|>"Bob"<|>"person"<|>"Bob is a manager.")##<|COMPLETE|>'
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def __call__(self, prompt, history_messages=None, **kwargs):
+        self.prompts.append(prompt)
+        return GLEANED if history_messages else INITIAL
+
+
+async def _extract(chunks, llm, cache, stats, model="openai/gpt-4o", language="English"):
+    return await extract_entities(
+        chunks,
+        use_llm_func=llm,
+        entity_extract_max_gleaning=1,
+        addon_params={"language": language},
+        llm_model_max_async=4,
+        lightrag_logger=LightRAGLogger(workspace="test"),
+        extraction_cache=cache,
+        llm_model_name=model,
+        cache_stats=stats,
+    )
+
+
+async def test_cached_extraction_skips_llm():
+    cache = ExtractionCache()
+    chunks = {"chunk-1": {"content": "Alice works with Bob.", "file_path": "a.md"}}
+
+    llm, stats = FakeLLM(), ExtractionCacheStats()
+    first = await _extract(chunks, llm, cache, stats)
+    assert len(llm.prompts) == 2
+    assert stats.snapshot() == {"hits": 0, "misses": 1, "hit_rate": 0.0}
+
+    # Same content under another chunk id and file is served from the cache
+    llm, stats = FakeLLM(), ExtractionCacheStats()
+    second = await _extract({"chunk-2": {"content": "Alice works with Bob.", "file_path": "b.md"}}, llm, cache, stats)
+    assert llm.prompts == []
+    assert stats.snapshot() == {"hits": 1, "misses": 0, "hit_rate": 1.0}
+
+    [(first_nodes, _)] = first
+    [(second_nodes, _)] = second
+    assert sorted(first_nodes) == sorted(second_nodes) == ["Alice", "Bob"]
+    assert second_nodes["Bob"][0]["source_id"] == "chunk-2"
+    assert second_nodes["Bob"][0]["file_path"] == "b.md"
+
+
+async def test_extraction_parameters_are_part_of_the_key():
+    cache = ExtractionCache()
+    chunks = {"chunk-1": {"content": "Alice works with Bob."}}
+    await _extract(chunks, FakeLLM(), cache, ExtractionCacheStats())
+
+    for kwargs in ({"model": "openai/gpt-4o-mini"}, {"language": "Chinese"}):
+        llm = FakeLLM()
+        await _extract(chunks, llm, cache, ExtractionCacheStats(), **kwargs)
+        assert len(llm.prompts) == 2
+
+    key = make_extraction_cache_key("m", "p", "English", ["person"], 1, "text")
+    assert key != make_extraction_cache_key("m", "p", "English", ["person", "event"], 1, "text")
+    assert key != make_extraction_cache_key("m", "p", "English", ["person"], 0, "text")
+
+
+def test_memory_tier_is_bounded():
+    cache = ExtractionCache(max_entries=2)
+    for key in "abc":
+        cache.set(key, [key])
+    assert cache.get("a") is None
+    assert cache.get("c") == ["c"]
+
+
+class ThreadRecordingRedis:
+    def __init__(self):
+        self.data = {}
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.threads.add(threading.get_ident())
+        self.data[key] = value
+
+
+async def test_async_redis_tier_runs_off_the_event_loop():
+    redis = ThreadRecordingRedis()
+    await ExtractionCache(redis_ttl=60, redis_client=redis).aset("k", ["out"])
+
+    # A fresh process only finds the entry in redis
+    assert await ExtractionCache(redis_ttl=60, redis_client=redis).aget("k") == ["out"]
+    assert redis.threads and threading.get_ident() not in redis.threads
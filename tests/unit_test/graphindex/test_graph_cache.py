@@ -0,0 +1,94 @@
+import threading
+
+from aperag.graph.lightrag.kg.graph_cache import CachedGraphStorage, GraphReadCache, WorkspaceVersions
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.threads.add(threading.get_ident())
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("redis is down")
+
+    def incr(self, key):
+        raise ConnectionError("redis is down")
+
+
+class FakeGraph:
+    workspace = "ws"
+
+    def __init__(self):
+        self.nodes = {"A": {"entity_id": "A", "description": "a"}}
+        self.reads = []
+
+    async def get_nodes_batch(self, node_ids):
+        self.reads.append(("nodes", list(node_ids)))
+        return {node_id: self.nodes[node_id] for node_id in node_ids if node_id in self.nodes}
+
+    async def edge_degrees_batch(self, edge_pairs):
+        self.reads.append(("edge_degrees", list(edge_pairs)))
+        return {pair: 2 for pair in edge_pairs}
+
+    async def upsert_node(self, node_id, node_data):
+        self.nodes[node_id] = node_data
+
+    async def get_all_labels(self):
+        return sorted(self.nodes)
+
+
+async def test_reads_are_cached_until_a_write_bumps_the_version():
+    graph, redis = FakeGraph(), FakeRedis()
+    cached = CachedGraphStorage(graph, GraphReadCache(), WorkspaceVersions(client=redis))
+
+    assert await cached.get_nodes_batch(["A", "B"]) == {"A": graph.nodes["A"]}
+    # Hits, including the cached miss of B
+    assert await cached.get_nodes_batch(["B", "A"]) == {"A": graph.nodes["A"]}
+    assert graph.reads == [("nodes", ["A", "B"])]
+
+    await cached.upsert_node("B", {"entity_id": "B"})
+    assert redis.values == {"aperag:graph_cache:version:ws": 1}
+    assert await cached.get_nodes_batch(["A", "B"]) == {"A": graph.nodes["A"], "B": {"entity_id": "B"}}
+    assert len(graph.reads) == 2
+
+    # A write from another process invalidates this one too
+    redis.values["aperag:graph_cache:version:ws"] = 2
+    await cached.get_nodes_batch(["A"])
+    assert len(graph.reads) == 3
+
+    assert await cached.edge_degrees_batch([("A", "B")]) == {("A", "B"): 2}
+    assert await cached.edge_degrees_batch([("A", "B")]) == {("A", "B"): 2}
+    assert len(graph.reads) == 4
+    # Other methods are delegated
+    assert await cached.get_all_labels() == ["A", "B"]
+    # Redis is only called from worker threads, not on the event loop
+    assert redis.threads and threading.get_ident() not in redis.threads
+
+
+async def test_cache_is_bypassed_without_redis():
+    graph = FakeGraph()
+    cached = CachedGraphStorage(graph, GraphReadCache(), WorkspaceVersions(client=BrokenRedis()))
+    await cached.get_nodes_batch(["A"])
+    await cached.get_nodes_batch(["A"])
+    assert len(graph.reads) == 2
+    await cached.upsert_node("B", {"entity_id": "B"})
+
+
+def test_read_cache_is_bounded():
+    cache = GraphReadCache(max_entries=2)
+    cache.set_many("ws", 0, "node", {"A": 1, "B": 2, "C": 3})
+    assert len(cache) == 2
+    assert cache.get_many("ws", 0, "node", ["A", "B", "C"]) == {"B": 2, "C": 3}
+    assert cache.get_many("ws", 1, "node", ["B"]) == {}
+    assert len(cache) == 1
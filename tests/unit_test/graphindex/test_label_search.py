@@ -0,0 +1,144 @@
+"""
+Unit tests for the graph label search.
+"""
+
+import re
+from contextlib import contextmanager
+
+from aperag.graph.lightrag.base import BaseGraphStorage
+from aperag.graph.lightrag.kg.neo4j_sync_impl import _label_fulltext_query
+
+
+class LabelGraph:
+    def __init__(self, labels):
+        self.labels = labels
+
+    async def get_all_labels(self):
+        return self.labels
+
+
+LABELS = ["Apple Inc", "apple", "Pineapple", "Applied Science", "Banana"]
+
+
+class FakeNebulaValue:
+    def __init__(self, value):
+        self.value = value
+
+    def as_string(self):
+        return self.value
+
+    def as_int(self):
+        return self.value
+
+
+class FakeNebulaLabelIndex:
+    """Answers the label searches of NebulaSyncStorage like a case-sensitive range scan of the index."""
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.scanned_ranges = []
+
+    def execute_parameter(self, query, params):
+        limit = int(re.search(r"LIMIT (\d+)", query).group(1))
+        self.scanned_ranges.append(params["low"])
+        needle = params["needle"]
+        rows = sorted(
+            (int(label.lower() != needle), label)
+            for label in self.labels
+            if params["low"] <= label < params["high"] and label.lower().startswith(needle)
+        )[:limit]
+        return FakeNebulaResult([FakeNebulaValue(label), FakeNebulaValue(rank)] for rank, label in rows)
+
+
+class FakeNebulaResult:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def is_succeeded(self):
+        return True
+
+    def __iter__(self):
+        return iter(type("Row", (), {"values": lambda _, row=row: row})() for row in self.rows)
+
+
+async def test_default_search_ranks_exact_then_prefix_matches():
+    graph = LabelGraph(LABELS)
+    assert await BaseGraphStorage.search_labels(graph, "APPLE") == ["apple", "Apple Inc", "Pineapple"]
+    assert await BaseGraphStorage.search_labels(graph, "app", match="prefix") == [
+        "Apple Inc",
+        "Applied Science",
+        "apple",
+    ]
+
+
+async def test_default_search_paginates():
+    graph = LabelGraph(LABELS)
+    assert await BaseGraphStorage.search_labels(graph, "a", limit=2) == ["Apple Inc", "Applied Science"]
+    assert await BaseGraphStorage.search_labels(graph, "a", limit=2, offset=4) == ["Pineapple"]
+    assert await BaseGraphStorage.search_labels(graph, "missing") == []
+
+
+def test_label_fulltext_query_is_tokenized_like_the_index():
+    assert _label_fulltext_query("New York", "prefix") == "new* AND york*"
+    assert _label_fulltext_query("AT&T", "fuzzy") == "(at* OR at~) AND (t* OR t~)"
+    assert _label_fulltext_query("  ", "fuzzy") == ""
+    # Words are kept whole across periods and colons, which are escaped for Lucene
+    assert _label_fulltext_query("U.S.A", "prefix") == "u.s.a*"
+    assert _label_fulltext_query("std::vector", "prefix") == "std* AND vector*"
+    assert _label_fulltext_query("a:b", "prefix") == "a\\:b*"
+
+
+def test_label_fulltext_query_splits_hyphenated_words():
+    assert _label_fulltext_query("GPT-4", "prefix") == "gpt* AND 4*"
+    assert _label_fulltext_query("gpt-4o", "fuzzy") == "(gpt* OR gpt~) AND (4o* OR 4o~)"
+
+
+def test_label_fulltext_query_splits_cjk_per_character():
+    assert _label_fulltext_query("墨香", "prefix") == "墨* AND 香*"
+    assert _label_fulltext_query("墨香", "fuzzy") == "墨* AND 香*"
+    assert _label_fulltext_query("日本語テキスト", "prefix") == "日* AND 本* AND 語* AND テキスト*"
+
+
+async def test_nebula_prefix_search_is_case_insensitive(monkeypatch):
+    from aperag.graph.lightrag.kg import nebula_sync_impl
+
+    index = FakeNebulaLabelIndex(LABELS + ["APPLE PIE"])
+
+    @contextmanager
+    def get_session(space=None, **kwargs):
+        yield index
+
+    monkeypatch.setattr(nebula_sync_impl.NebulaSyncConnectionManager, "get_session", get_session)
+    monkeypatch.setattr(nebula_sync_impl, "_prepare_nebula_params", lambda params: params)
+    storage = nebula_sync_impl.NebulaSyncStorage("graph", "ws")
+    storage._space_name = "ws"
+
+    assert await storage.search_labels("APPLE", match="prefix") == ["apple", "APPLE PIE", "Apple Inc"]
+    assert sorted(index.scanned_ranges) == ["A", "a"]
+    assert await storage.search_labels("app", limit=2, offset=1, match="prefix") == ["Apple Inc", "Applied Science"]
+    assert await storage.search_labels("pine", match="prefix") == ["Pineapple"]
+
+
+async def test_neo4j_prefix_search_matches_the_start_of_the_labels(monkeypatch):
+    from aperag.graph.lightrag.kg import neo4j_sync_impl
+
+    runs = []
+
+    class Session:
+        def run(self, cypher, **params):
+            runs.append((cypher, params))
+            return []
+
+    @contextmanager
+    def get_session(database=None):
+        yield Session()
+
+    monkeypatch.setattr(neo4j_sync_impl.Neo4jSyncConnectionManager, "get_session", get_session)
+    storage = neo4j_sync_impl.Neo4JSyncStorage("graph", "ws")
+
+    await storage.search_labels("York", match="prefix")
+    await storage.search_labels("York", match="fuzzy")
+    await storage.search_labels("墨香", match="prefix")
+    assert "STARTS WITH $exact" in runs[0][0] and runs[0][1]["exact"] == "york"
+    assert "STARTS WITH" not in runs[1][0]
+    assert (runs[2][1]["query"], runs[2][1]["exact"]) == ("墨* AND 香*", "墨香")
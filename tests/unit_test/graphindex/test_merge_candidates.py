@@ -0,0 +1,129 @@
+"""
+Unit tests for the blocking-based merge suggestion candidates.
+"""
+
+import numpy as np
+
+from aperag.graph.lightrag.merge_candidates import (
+    EmbeddingSketch,
+    embedding_candidate_pairs,
+    group_candidate_pairs,
+    name_candidate_pairs,
+    normalize_entity_name,
+    pack_groups,
+)
+from aperag.graph.lightrag.operate import analyze_candidate_groups_with_llm, generate_merge_candidates
+from aperag.graph.lightrag.types import GraphNodeData
+
+
+def test_normalize_entity_name():
+    assert normalize_entity_name("  McDonald's   Corp. ") == "mcdonald s corp"
+    assert normalize_entity_name("ＡＰＰＬＥ") == "apple"
+
+
+def test_name_candidate_pairs_finds_variants_only():
+    names = ["Apple Inc", "apple inc.", "APPLE-INC", "Microsoft", "Microsoft Corp", "Banana", "Zebra"]
+    pairs = name_candidate_pairs(names)
+    assert ("APPLE-INC", "Apple Inc") in pairs
+    assert pairs[("Apple Inc", "apple inc.")] == 1.0
+    assert ("Microsoft", "Microsoft Corp") in pairs
+    assert not any("Banana" in pair or "Zebra" in pair for pair in pairs)
+
+
+def test_name_candidate_pairs_scales_linearly_on_distinct_names():
+    names = [f"entity {i:06d} {i * 7919 % 1000003}" for i in range(3000)]
+    names += ["Acme Corporation", "Acme Corporation Ltd"]
+    pairs = name_candidate_pairs(names, threshold=0.7)
+    assert ("Acme Corporation", "Acme Corporation Ltd") in pairs
+
+
+def test_embedding_candidate_pairs():
+    rng = np.random.default_rng(0)
+    base = rng.standard_normal((50, 1536))
+    vectors = np.concatenate([base, base[:5] + rng.standard_normal((5, 1536)) * 0.05])
+    ids = [f"e{i}" for i in range(50)] + [f"dup{i}" for i in range(5)]
+
+    sketch = EmbeddingSketch(dim=256)
+    sketch.add(ids[:30], vectors[:30])
+    sketch.add(ids[30:], vectors[30:])
+    assert sketch.matrix().shape == (55, 256)
+
+    pairs = embedding_candidate_pairs(sketch.ids, sketch.matrix(), threshold=0.9)
+    assert set(pairs) == {(f"dup{i}", f"e{i}") for i in range(5)}
+
+
+def test_group_candidate_pairs_bounds_group_size():
+    pairs = {("a", "b"): 0.9, ("b", "c"): 0.8, ("c", "d"): 0.7, ("x", "y"): 0.95}
+    assert group_candidate_pairs(pairs) == [["x", "y"], ["a", "b", "c", "d"]]
+    assert group_candidate_pairs(pairs, max_group_size=2) == [["x", "y"], ["a", "b"], ["c", "d"]]
+
+
+def test_pack_groups_keeps_groups_whole():
+    groups = [["a", "b", "c"], ["d", "e"], ["f", "g"], ["h", "i", "j"]]
+    assert pack_groups(groups, batch_size=5) == [["a", "b", "c", "d", "e"], ["f", "g", "h", "i", "j"]]
+    assert pack_groups(groups, batch_size=4) == [["a", "b", "c"], ["d", "e", "f", "g"], ["h", "i", "j"]]
+
+
+class CandidateGraph:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    async def get_top_degree_nodes(self, limit):
+        return [(node_id, 1) for node_id in self.nodes][:limit]
+
+    async def get_nodes_batch(self, node_ids):
+        return {node_id: self.nodes[node_id] for node_id in node_ids if node_id in self.nodes}
+
+
+class EntityVectors:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    async def iter_all(self, fields=None, batch_size=1000):
+        yield {f"ent-{name}": {"entity_name": name, "content_vector": vector} for name, vector in self.vectors.items()}
+
+
+async def test_generate_merge_candidates_blocks_on_names_and_embeddings():
+    graph = CandidateGraph(
+        {
+            "Apple Inc": {"entity_type": "ORGANIZATION"},
+            "Apple Inc.": {"entity_type": "ORGANIZATION"},
+            "Microsoft": {"entity_type": "ORGANIZATION"},
+            "微软": {"entity_type": "ORGANIZATION"},
+            "Apple Incorporated": {"entity_type": "PRODUCT"},
+            "Banana": {"entity_type": "FOOD"},
+        }
+    )
+    vectors = {"Microsoft": [1.0, 0.0, 0.1], "微软": [1.0, 0.0, 0.12], "Banana": [0.0, 1.0, 0.0]}
+
+    groups, blocked = await generate_merge_candidates(graph, EntityVectors(vectors))
+    assert blocked == 6
+    assert [[entity.entity_id for entity in group] for group in groups] == [
+        ["Apple Inc", "Apple Inc."],
+        ["Microsoft", "微软"],
+    ]
+    assert groups[0][0].entity_type == "ORGANIZATION"
+
+    groups, _ = await generate_merge_candidates(graph, None, entity_types=["FOOD"])
+    assert groups == []
+
+
+async def test_analyze_candidate_groups_sends_only_candidates():
+    prompts = []
+
+    async def llm(prompt, **kwargs):
+        prompts.append(prompt)
+        return (
+            '("merge_group"<|>Apple Inc<SEP>Apple Inc.<|>0.95<|>Same company<|>Apple Inc<|>ORGANIZATION)##<|COMPLETE|>'
+        )
+
+    groups = [
+        [GraphNodeData(entity_id="Apple Inc"), GraphNodeData(entity_id="Apple Inc.")],
+        [GraphNodeData(entity_id="Microsoft"), GraphNodeData(entity_id="MSFT")],
+    ]
+    suggestions = await analyze_candidate_groups_with_llm(groups, llm, batch_size=2, max_batches=1)
+
+    assert len(prompts) == 1
+    assert "- Name: Apple Inc." in prompts[0]
+    assert "MSFT" not in prompts[0]
+    assert [entity.entity_id for entity in suggestions[0].entities] == ["Apple Inc", "Apple Inc."]
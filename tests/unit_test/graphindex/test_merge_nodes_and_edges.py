@@ -0,0 +1,185 @@
+"""
+Unit tests for the batched entity/relationship merge of LightRAG.
+"""
+
+import asyncio
+
+from aperag.graph.lightrag import operate
+from aperag.graph.lightrag.operate import _merge_nodes_and_edges_impl
+from aperag.graph.lightrag.prompt import GRAPH_FIELD_SEP
+from aperag.graph.lightrag.utils import LightRAGLogger
+
+
+class FakeGraph:
+    def __init__(self, nodes=None, edges=None):
+        self.nodes = dict(nodes or {})
+        self.edges = dict(edges or {})
+        self.batch_reads = 0
+        self.batch_writes = 0
+
+    async def get_nodes_batch(self, node_ids):
+        self.batch_reads += 1
+        return {node_id: self.nodes[node_id] for node_id in node_ids if node_id in self.nodes}
+
+    async def get_edges_batch(self, pairs):
+        self.batch_reads += 1
+        return {
+            (pair["src"], pair["tgt"]): self.edges[(pair["src"], pair["tgt"])]
+            for pair in pairs
+            if (pair["src"], pair["tgt"]) in self.edges
+        }
+
+    async def upsert_nodes_batch(self, nodes):
+        self.batch_writes += 1
+        self.nodes.update(nodes)
+
+    async def upsert_edges_batch(self, edges):
+        self.batch_writes += 1
+        self.edges.update(edges)
+
+
+class FakeVectorStorage:
+    def __init__(self):
+        self.upserts = []
+
+    async def upsert(self, data):
+        self.upserts.append(data)
+
+
+def _entity(name, description, chunk="chunk-1"):
+    return {
+        "entity_name": name,
+        "entity_type": "PERSON",
+        "description": description,
+        "source_id": chunk,
+        "file_path": "a.md",
+    }
+
+
+def _relation(src, tgt, description, chunk="chunk-1"):
+    return {
+        "src_id": src,
+        "tgt_id": tgt,
+        "weight": 1.0,
+        "description": description,
+        "keywords": "knows",
+        "source_id": chunk,
+        "file_path": "a.md",
+    }
+
+
+async def _merge(chunk_results, graph, entity_vdb, relationships_vdb):
+    return await _merge_nodes_and_edges_impl(
+        chunk_results,
+        "ws",
+        graph,
+        entity_vdb,
+        relationships_vdb,
+        llm_model_func=None,
+        tokenizer=None,
+        llm_model_max_token_size=1000,
+        summary_to_max_tokens=100,
+        addon_params={},
+        force_llm_summary_on_merge=100,
+        lightrag_logger=LightRAGLogger(workspace="ws"),
+    )
+
+
+async def test_merge_batches_reads_and_vector_writes(monkeypatch):
+    monkeypatch.setattr(operate, "MERGE_BATCH_SIZE", 2)
+    graph = FakeGraph(
+        nodes={"A": {"entity_type": "PERSON", "description": "old A", "source_id": "chunk-0", "file_path": "a.md"}},
+        edges={("A", "B"): {"weight": 2.0, "description": "old AB", "keywords": "met", "source_id": "chunk-0"}},
+    )
+    entity_vdb, relationships_vdb = FakeVectorStorage(), FakeVectorStorage()
+    chunk_results = [
+        (
+            {"A": [_entity("A", "new A")], "B": [_entity("B", "B")], "C": [_entity("C", "C")]},
+            {("B", "A"): [_relation("B", "A", "AB")], ("C", "D"): [_relation("C", "D", "CD")]},
+        ),
+        ({"B": [_entity("B", "B again", "chunk-2")]}, {("A", "A"): [_relation("A", "A", "self")]}),
+    ]
+
+    result = await _merge(chunk_results, graph, entity_vdb, relationships_vdb)
+
+    assert result == {"entity_count": 3, "relation_count": 2}
+    # Two entity groups, then the relationship group, each read before merging and again under the locks,
+    # plus the lookup of the endpoints of the group
+    assert graph.batch_reads == 7
+    # Two entity groups, then the missing endpoint D and the relationship group
+    assert graph.batch_writes == 4
+    assert [len(data) for data in entity_vdb.upserts] == [2, 1]
+    assert [len(data) for data in relationships_vdb.upserts] == [2]
+
+    assert graph.nodes["A"]["description"] == GRAPH_FIELD_SEP.join(["new A", "old A"])
+    assert graph.edges[("A", "B")]["weight"] == 3.0
+    assert graph.edges[("A", "B")]["keywords"] == "knows,met"
+    # D was only seen in a relationship
+    assert graph.nodes["D"]["entity_type"] == "UNKNOWN"
+    assert ("A", "A") not in graph.edges
+
+
+async def test_placeholder_endpoint_does_not_overwrite_an_entity_stored_meanwhile(monkeypatch):
+    graph = FakeGraph()
+    merge_edges = operate._merge_edges
+
+    async def merge_edges_while_another_document_stores_d(*args, **kwargs):
+        # Another document merges the real entity while this relationship is being summarized
+        graph.nodes["D"] = {"entity_type": "PERSON", "description": "D", "source_id": "chunk-9", "file_path": "b.md"}
+        return await merge_edges(*args, **kwargs)
+
+    monkeypatch.setattr(operate, "_merge_edges", merge_edges_while_another_document_stores_d)
+    await _merge([({"C": [_entity("C", "C")]}, {("C", "D"): [_relation("C", "D", "CD")]})], graph, None, None)
+
+    assert graph.nodes["D"]["entity_type"] == "PERSON"
+    assert ("C", "D") in graph.edges
+
+
+async def test_merges_touching_an_item_do_not_wait_for_the_summaries_of_its_group(monkeypatch):
+    graph = FakeGraph()
+    merge_nodes = operate._merge_nodes
+    summary_started, release_summary = asyncio.Event(), asyncio.Event()
+
+    async def merge_nodes_with_a_slow_summary_of_a(entity_name, *args, **kwargs):
+        if entity_name == "A" and not release_summary.is_set():
+            summary_started.set()
+            await release_summary.wait()
+        return await merge_nodes(entity_name, *args, **kwargs)
+
+    monkeypatch.setattr(operate, "_merge_nodes", merge_nodes_with_a_slow_summary_of_a)
+    first = asyncio.create_task(
+        _merge([({"A": [_entity("A", "A")], "B": [_entity("B", "B first")]}, {})], graph, None, None)
+    )
+    await summary_started.wait()
+
+    # B is in the group of A, but its lock is free while A is being summarized
+    await asyncio.wait_for(_merge([({"B": [_entity("B", "B second", "chunk-2")]}, {})], graph, None, None), 1)
+    assert graph.nodes["B"]["description"] == "B second"
+
+    release_summary.set()
+    await first
+    # B changed after the first merge read it, so it was merged again from its current version
+    assert graph.nodes["B"]["description"] == GRAPH_FIELD_SEP.join(["B first", "B second"])
+    assert graph.nodes["A"]["description"] == "A"
+
+
+def test_nebula_batched_upserts_only_set_given_properties(monkeypatch):
+    from aperag.graph.lightrag.kg import nebula_sync_impl
+
+    monkeypatch.setattr(nebula_sync_impl, "UPSERT_BATCH_SIZE", 2)
+    requests = nebula_sync_impl._build_batched_upserts(
+        [
+            ('UPSERT VERTEX "a"', "base.", {"entity_id": "a", "created_at": 1}),
+            ('UPSERT VERTEX "b"', "base.", {"entity_id": "b"}),
+            ('UPSERT VERTEX "c"', "base.", {}),
+            ('UPSERT EDGE "a" -> "b" OF DIRECTED', "", {"weight": 1.0}),
+        ]
+    )
+    assert requests == [
+        (
+            'UPSERT VERTEX "a" SET base.entity_id = $p0_entity_id, base.created_at = $p0_created_at; '
+            'UPSERT VERTEX "b" SET base.entity_id = $p1_entity_id',
+            {"p0_entity_id": "a", "p0_created_at": 1, "p1_entity_id": "b"},
+        ),
+        ('UPSERT EDGE "a" -> "b" OF DIRECTED SET weight = $p0_weight', {"p0_weight": 1.0}),
+    ]
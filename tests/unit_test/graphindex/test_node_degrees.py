@@ -0,0 +1,172 @@
+"""
+Unit tests for the maintained node degrees and the top-K by degree selection.
+"""
+
+import re
+from contextlib import contextmanager
+
+from aperag.db.repositories.graph import _apply_degree_deltas
+from aperag.graph.lightrag.base import BaseGraphStorage
+
+
+class FakeSession:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, statement, params=None):
+        self.executed.append((str(statement), params))
+
+
+class ScanGraph:
+    def __init__(self, degrees):
+        self.degrees = degrees
+
+    async def get_all_labels(self):
+        return list(self.degrees)
+
+    async def node_degrees_batch(self, node_ids):
+        return {node_id: self.degrees[node_id] for node_id in node_ids}
+
+
+def test_apply_degree_deltas_counts_both_endpoints():
+    session = FakeSession()
+    _apply_degree_deltas(session, "ws", [("B", "A"), ("A", "C"), ("C", "C")], -1)
+
+    [(statement, params)] = session.executed
+    assert "UPDATE lightrag_graph_nodes" in statement
+    assert params == {"workspace": "ws", "node_ids": ["A", "B", "C"], "deltas": [-2, -1, -3]}
+
+    session = FakeSession()
+    _apply_degree_deltas(session, "ws", [], 1)
+    assert session.executed == []
+
+
+async def test_default_top_degree_nodes_scans_connected_nodes():
+    degrees = {f"n{i}": i % 7 for i in range(250)}
+    top = await BaseGraphStorage.get_top_degree_nodes(ScanGraph(degrees), 3)
+    assert [degree for _, degree in top] == [6, 6, 6]
+    assert await BaseGraphStorage.get_top_degree_nodes(ScanGraph({"a": 0}), 3) == []
+
+
+class FakeNebulaValue:
+    def __init__(self, value):
+        self.value = value
+
+    def as_string(self):
+        return self.value
+
+    def as_int(self):
+        return self.value
+
+
+class FakeNebulaResult:
+    def __init__(self, rows=()):
+        self.rows = [[FakeNebulaValue(value) for value in row] for row in rows]
+
+    def is_succeeded(self):
+        return True
+
+    def __iter__(self):
+        return iter(type("Row", (), {"values": lambda _, row=row: row})() for row in self.rows)
+
+
+class FakeNebulaSpace:
+    """In-memory space answering the statements of the degree maintenance of NebulaSyncStorage."""
+
+    def __init__(self, vertices, edges):
+        self.vertices = set(vertices)
+        self.edges = set(edges)
+        self.degrees = None
+        self.indexes = []
+
+    def recount(self):
+        return {vid: sum(vid in edge for edge in self.edges) for vid in self.vertices}
+
+    def execute_parameter(self, query, params):
+        node_ids = params.get("node_ids", [])
+        if "UNWIND" in query:
+            counts = {vid: sum(vid in edge for edge in self.edges) for vid in node_ids}
+            return FakeNebulaResult((vid, count) for vid, count in counts.items() if count)
+        if "RETURN id(v) AS vid, id(other)" in query:
+            rows = {}
+            for source, target in self.edges:
+                for vid, other in ((source, target), (target, source)):
+                    if vid in node_ids:
+                        rows[(vid, other)] = rows.get((vid, other), 0) + 1
+            return FakeNebulaResult((vid, other, count) for (vid, other), count in rows.items())
+        if "RETURN id(v) AS vid" in query:
+            return FakeNebulaResult((vid,) for vid in node_ids if vid in self.vertices)
+        return self.execute(query)
+
+    def execute(self, query):
+        if query == "SHOW TAG INDEXES":
+            return FakeNebulaResult((name,) for name in self.indexes)
+        if query == "DESCRIBE TAG base":
+            return FakeNebulaResult([("entity_id",)] + ([("degree",)] if self.degrees is not None else []))
+        if query.startswith("ALTER TAG base ADD (degree"):
+            self.degrees = {vid: 0 for vid in self.vertices}
+        elif query.startswith("LOOKUP ON base"):
+            return FakeNebulaResult((vid,) for vid in self.vertices)
+        elif query.startswith("CREATE TAG INDEX"):
+            self.indexes.append(query.split()[6])
+        elif query.startswith("FETCH PROP ON DIRECTED"):
+            pairs = re.findall(r'"(\w+)" -> "(\w+)"', query)
+            return FakeNebulaResult(pair for pair in pairs if pair in self.edges)
+        for statement in query.split("; "):
+            if match := re.match(r'UPDATE VERTEX ON base "(\w+)" SET degree = (degree \+ )?(-?\d+)$', statement):
+                vid, increment, value = match.groups()
+                assert vid in self.vertices
+                self.degrees[vid] = (self.degrees[vid] if increment else 0) + int(value)
+            elif match := re.match(r'UPSERT EDGE "(\w+)" -> "(\w+)"', statement):
+                self.edges.add(match.groups())
+            elif match := re.match(r'UPSERT VERTEX "(\w+)"', statement):
+                if match.group(1) not in self.vertices:
+                    self.vertices.add(match.group(1))
+                    self.degrees[match.group(1)] = 0
+            elif match := re.match(r'DELETE VERTEX "(\w+)" WITH EDGE', statement):
+                self.vertices.discard(match.group(1))
+                self.degrees.pop(match.group(1), None)
+                self.edges = {edge for edge in self.edges if match.group(1) not in edge}
+            elif match := re.match(r'DELETE EDGE DIRECTED "(\w+)" -> "(\w+)"', statement):
+                self.edges.discard(match.groups())
+        return FakeNebulaResult()
+
+
+async def test_nebula_degrees_are_backfilled_then_maintained_incrementally(monkeypatch):
+    from aperag.graph.lightrag.kg import nebula_sync_impl
+
+    space = FakeNebulaSpace({"A", "B", "C"}, {("A", "B")})
+
+    @contextmanager
+    def get_session(space_name=None, **kwargs):
+        yield space
+
+    monkeypatch.setattr(nebula_sync_impl.NebulaSyncConnectionManager, "get_session", get_session)
+    monkeypatch.setattr(nebula_sync_impl, "_prepare_nebula_params", lambda params: params)
+    monkeypatch.setattr(nebula_sync_impl, "_degree_ready_spaces", set())
+    storage = nebula_sync_impl.NebulaSyncStorage("graph", "ws")
+    storage._space_name = "ws"
+
+    # A space created before the degree property is backfilled, then indexed
+    assert storage._sync_ensure_stored_degree()
+    storage._stored_degree = True
+    assert space.degrees == {"A": 1, "B": 1, "C": 0}
+    assert space.indexes == ["base_degree_index"]
+
+    await storage.upsert_edges_batch({("A", "C"): {"weight": 1.0}, ("A", "B"): {"weight": 2.0}})
+    assert space.degrees == space.recount() == {"A": 2, "B": 1, "C": 1}
+
+    # An edge written before its source vertex is counted when the vertex is inserted
+    await storage.upsert_edge("D", "A", {"weight": 1.0})
+    await storage.upsert_nodes_batch({"D": {"entity_id": "D"}, "A": {"entity_id": "A"}})
+    assert space.degrees == space.recount() == {"A": 3, "B": 1, "C": 1, "D": 1}
+
+    # Missing and repeated edges are not subtracted
+    await storage.remove_edges([("A", "B"), ("A", "B"), ("B", "C")])
+    assert space.degrees == space.recount()
+
+    await storage.upsert_edge("C", "D", {"weight": 1.0})
+    await storage.delete_node("A")
+    assert space.degrees == space.recount() == {"B": 0, "C": 1, "D": 1}
+    await storage.remove_nodes(["C"])
+    assert space.degrees == space.recount() == {"B": 0, "D": 0}
@@ -0,0 +1,91 @@
+"""
+Unit tests for the depth-bounded subgraph retrieval of PGOpsSyncGraphStorage.
+"""
+
+from unittest.mock import patch
+
+from aperag.db.ops import db_ops
+from aperag.db.repositories.graph import _bfs_node_ids, _escape_like
+from aperag.graph.lightrag.kg.pg_ops_sync_graph_storage import PGOpsSyncGraphStorage
+
+# A - B - C - D, and A - E, E being the hub
+EDGES = [("A", "B"), ("B", "C"), ("C", "D"), ("A", "E"), ("E", "F"), ("E", "G"), ("E", "H")]
+
+
+def _degree(node_id):
+    return sum(node_id in edge for edge in EDGES)
+
+
+def _fetch_neighbors(calls):
+    def fetch(frontier, visited, limit):
+        calls.append(limit)
+        neighbors = {t for s, t in EDGES if s in frontier} | {s for s, t in EDGES if t in frontier}
+        ranked = sorted(neighbors - set(visited), key=lambda node_id: (-_degree(node_id), node_id))
+        return ranked[:limit]
+
+    return fetch
+
+
+def test_bfs_stops_at_max_depth():
+    calls = []
+    node_ids, truncated = _bfs_node_ids(lambda limit: ["B"], _fetch_neighbors(calls), 1, 100)
+    assert node_ids == ["B", "A", "C"]
+    assert truncated is False
+
+    node_ids, truncated = _bfs_node_ids(lambda limit: ["B"], _fetch_neighbors(calls), 3, 100)
+    assert set(node_ids) == set("ABCDEFGH")
+    assert truncated is False
+
+
+def test_bfs_truncates_by_degree_at_max_nodes():
+    calls = []
+    node_ids, truncated = _bfs_node_ids(lambda limit: ["D"], _fetch_neighbors(calls), 5, 4)
+    # D, C, B, A fill the budget before E is reached
+    assert node_ids == ["D", "C", "B", "A"]
+    assert truncated is True
+    # Every level asks for one more node than it can take
+    assert calls == [4, 3, 2, 1]
+
+    node_ids, truncated = _bfs_node_ids(lambda limit: ["A"], _fetch_neighbors([]), 2, 3)
+    # E has the highest degree among the neighbors of A
+    assert node_ids == ["A", "E", "B"]
+    assert truncated is True
+
+
+def test_bfs_truncates_seeds():
+    node_ids, truncated = _bfs_node_ids(lambda limit: ["A", "B", "C"][:limit], _fetch_neighbors([]), 2, 2)
+    assert node_ids == ["A", "B"]
+    assert truncated is True
+
+
+def test_escape_like():
+    assert _escape_like("50%_a\\b") == "50\\%\\_a\\\\b"
+
+
+async def test_get_knowledge_graph_assembles_bfs_result():
+    storage = PGOpsSyncGraphStorage(namespace="graph", workspace="ws")
+    nodes = {
+        "A": {"entity_id": "A", "entity_type": "PERSON", "description": "a"},
+        "B": {"entity_id": "B", "entity_type": "PERSON", "description": "b", "file_path": "x.md"},
+    }
+    edges = {("A", "B"): {"weight": 2.0, "keywords": None, "description": "ab", "source_id": "chunk-1"}}
+
+    with (
+        patch.object(db_ops, "get_graph_subgraph_node_ids", return_value=(["B", "A", "missing"], True)) as search,
+        patch.object(db_ops, "get_graph_nodes_batch", return_value=nodes),
+        patch.object(db_ops, "get_graph_edges_among", return_value=edges) as among,
+    ):
+        kg = await storage.get_knowledge_graph("b", max_depth=2, max_nodes=3)
+
+    search.assert_called_once_with("ws", "b", 2, 3)
+    among.assert_called_once_with("ws", ["B", "A", "missing"])
+    assert kg.is_truncated is True
+    assert [node.id for node in kg.nodes] == ["B", "A"]
+    assert kg.nodes[0].properties == {
+        "entity_id": "B",
+        "entity_type": "PERSON",
+        "description": "b",
+        "file_path": "x.md",
+    }
+    assert [(edge.source, edge.target) for edge in kg.edges] == [("A", "B")]
+    assert kg.edges[0].properties == {"weight": 2.0, "description": "ab", "source_id": "chunk-1"}
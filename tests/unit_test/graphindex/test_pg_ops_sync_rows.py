@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from aperag.db.ops import db_ops
+from aperag.graph.lightrag.kg.pg_ops_sync_kv_storage import PGOpsSyncKVStorage
+from aperag.graph.lightrag.kg.pg_ops_sync_rows import fields_to_columns, iter_workspace_records, row_to_record
+from aperag.graph.lightrag.lightrag import LightRAG
+
+
+def test_fields_to_columns_skips_vectors_by_default():
+    columns = fields_to_columns("lightrag_vdb_entity", None)
+    assert "content_vector" not in columns
+    assert "workspace" not in columns
+    assert {"id", "entity_name", "content", "chunk_ids", "create_time"} <= set(columns)
+
+    assert fields_to_columns("lightrag_vdb_relation", ["src_id", "tgt_id", "created_at", "content_vector"]) == [
+        "source_id",
+        "target_id",
+        "create_time",
+        "content_vector",
+    ]
+
+
+def test_row_to_record_matches_get_all_shape():
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    record = row_to_record(
+        {"id": "rel-1", "source_id": "A", "target_id": "B", "content": None, "chunk_ids": None, "create_time": created},
+        relationship=True,
+    )
+    assert record == {
+        "id": "rel-1",
+        "source_id": "A",
+        "target_id": "B",
+        "src_id": "A",
+        "tgt_id": "B",
+        "content": "",
+        "chunk_ids": [],
+        "created_at": int(created.timestamp()),
+    }
+
+
+async def test_iter_workspace_records_streams_batches_and_closes_cursor():
+    closed = []
+
+    def fake_rows(table, workspace, columns, batch_size):
+        assert columns == ["full_doc_id"]
+        try:
+            for start in range(0, 5, batch_size):
+                yield [{"id": f"chunk-{i}", "full_doc_id": "doc"} for i in range(start, min(start + batch_size, 5))]
+        finally:
+            closed.append(True)
+
+    with patch.object(db_ops, "iter_lightrag_rows", side_effect=fake_rows):
+        batches = [
+            batch async for batch in iter_workspace_records("lightrag_doc_chunks", "ws", ["full_doc_id"], batch_size=2)
+        ]
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batches[2] == {"chunk-4": {"id": "chunk-4", "full_doc_id": "doc"}}
+        assert closed == [True]
+
+        # Stopping early releases the cursor too
+        closed.clear()
+        iterator = iter_workspace_records("lightrag_doc_chunks", "ws", ["full_doc_id"], batch_size=2)
+        await iterator.__anext__()
+        await iterator.aclose()
+        assert closed == [True]
+
+
+def test_iter_lightrag_rows_rejects_unknown_columns():
+    with pytest.raises(ValueError):
+        db_ops.iter_lightrag_rows("lightrag_doc_chunks", "ws", ["no_such_column"])
+    with pytest.raises(ValueError):
+        db_ops.iter_lightrag_rows("no_such_table", "ws")
+
+
+async def test_doc_chunk_ids_are_queried_by_doc_id():
+    statements = []
+
+    class FakeSession:
+        def execute(self, stmt):
+            statements.append(str(stmt.compile(compile_kwargs={"literal_binds": True})))
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: ["chunk-1", "chunk-2"]))
+
+    storage = PGOpsSyncKVStorage(namespace="text_chunks", workspace="ws", embedding_func=None)
+    rag = SimpleNamespace(text_chunks=storage)
+    with (
+        patch.object(db_ops, "_execute_query", side_effect=lambda query: query(FakeSession())),
+        patch.object(db_ops, "iter_lightrag_rows", side_effect=AssertionError("workspace scanned")),
+    ):
+        assert await LightRAG._find_doc_chunk_ids(rag, "doc-1") == {"chunk-1", "chunk-2"}
+
+    assert len(statements) == 1
+    assert "lightrag_doc_chunks.workspace = 'ws'" in statements[0]
+    assert "lightrag_doc_chunks.full_doc_id = 'doc-1'" in statements[0]
@@ -0,0 +1,104 @@
+import hashlib
+
+from aperag.db.repositories.lightrag import lightrag_vector_index_name
+from aperag.graph.lightrag.kg.pg_vector_index import (
+    PGVectorIndexManager,
+    index_matches_dimension,
+    vector_table_for_namespace,
+)
+
+
+class FakeIndexOps:
+    def __init__(self, rows=0, dim=4, indexes=None):
+        self.rows = rows
+        self.dim = dim
+        self.indexes = indexes or []
+        self.calls = []
+
+    def count_lightrag_vectors(self, table, workspace, limit=None):
+        return min(self.rows, limit) if limit else self.rows
+
+    def query_lightrag_vector_dimension(self, table, workspace):
+        return self.dim if self.rows else None
+
+    def query_lightrag_vector_indexes(self, workspace=None):
+        return self.indexes
+
+    def create_lightrag_vector_index(self, table, workspace, dim, m=16, ef_construction=64):
+        self.calls.append(("create", table, dim))
+        return lightrag_vector_index_name(table, workspace)
+
+    def drop_lightrag_vector_index(self, table, workspace):
+        self.calls.append(("drop", table))
+
+    def reindex_lightrag_vector_index(self, table, workspace):
+        self.calls.append(("reindex", table))
+
+
+def _index(table, workspace, dim, valid=True):
+    return {
+        "name": lightrag_vector_index_name(table, workspace),
+        "table": table,
+        "valid": valid,
+        "definition": f"CREATE INDEX ... USING hnsw (((content_vector)::vector({dim})) vector_cosine_ops)",
+    }
+
+
+def test_index_name_matches_migration():
+    digest = hashlib.md5(b"ws").hexdigest()[:12]
+    assert lightrag_vector_index_name("lightrag_doc_chunks", "ws") == f"idx_lightrag_doc_chunks_hnsw_{digest}"
+    assert vector_table_for_namespace("chunks") == "lightrag_doc_chunks"
+    assert vector_table_for_namespace("relationships") == "lightrag_vdb_relation"
+    assert vector_table_for_namespace("full_docs") is None
+
+
+def test_index_matches_dimension():
+    assert index_matches_dimension("((content_vector)::vector(1536))", 1536)
+    assert not index_matches_dimension("((content_vector)::vector(153))", 1536)
+    assert index_matches_dimension("((content_vector)::halfvec(3072))", 3072)
+
+
+def test_ensure_waits_for_min_rows():
+    ops = FakeIndexOps(rows=10)
+    manager = PGVectorIndexManager(ops=ops, min_rows=100)
+    assert manager.ensure("lightrag_doc_chunks", "ws") is None
+    assert ops.calls == []
+
+    assert manager.ensure("lightrag_doc_chunks", "ws", force=True) == "created"
+    assert ops.calls == [("create", "lightrag_doc_chunks", 4)]
+
+
+def test_ensure_repairs_stale_index():
+    table = "lightrag_vdb_entity"
+    ops = FakeIndexOps(rows=100, dim=8, indexes=[_index(table, "ws", 8)])
+    manager = PGVectorIndexManager(ops=ops, min_rows=100)
+    assert manager.ensure(table, "ws") is None
+
+    # Embedding dimension changed
+    ops.indexes = [_index(table, "ws", 4)]
+    assert manager.ensure(table, "ws") == "recreated"
+    # Failed concurrent build
+    ops.indexes = [_index(table, "ws", 8, valid=False)]
+    assert manager.ensure(table, "ws") == "recreated"
+    assert ops.calls == [("drop", table), ("create", table, 8)] * 2
+
+
+def test_rebuild_reindexes_valid_index():
+    table = "lightrag_doc_chunks"
+    ops = FakeIndexOps(rows=1, dim=4, indexes=[_index(table, "ws", 4)])
+    manager = PGVectorIndexManager(ops=ops, min_rows=100)
+    assert manager.rebuild(table, "ws") == "reindexed"
+
+    ops.indexes = []
+    assert manager.rebuild(table, "ws") == "created"
+
+
+def test_schedule_ensure_skips_indexed_and_recent_workspaces():
+    ops = FakeIndexOps(rows=100)
+    manager = PGVectorIndexManager(ops=ops, min_rows=100)
+    manager._ensure_in_background("lightrag_doc_chunks", "ws", 4)
+    assert manager.schedule_ensure("lightrag_doc_chunks", "ws", 4) is False
+
+    manager._checked_at[("lightrag_vdb_entity", "ws")] = float("inf")
+    assert manager.schedule_ensure("lightrag_vdb_entity", "ws", 4) is False
+    assert PGVectorIndexManager(ops=ops, min_rows=0).schedule_ensure("lightrag_doc_chunks", "ws", 4) is False
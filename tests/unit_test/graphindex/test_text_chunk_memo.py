@@ -0,0 +1,51 @@
+import asyncio
+from unittest.mock import patch
+
+from aperag.db.ops import db_ops
+from aperag.graph.lightrag.kg.pg_ops_sync_rows import get_workspace_records
+from aperag.graph.lightrag.kg.pg_ops_sync_vector_storage import PGOpsSyncVectorStorage
+from aperag.graph.lightrag.operate import TEXT_UNIT_FIELDS, _TextChunkMemo
+
+
+class FakeKVStorage:
+    def __init__(self, chunk_ids):
+        self.chunk_ids = chunk_ids
+        self.calls = []
+
+    async def get_by_ids(self, ids, fields=None):
+        self.calls.append((list(ids), fields))
+        await asyncio.sleep(0)
+        return [{"id": c_id, "content": f"content of {c_id}"} for c_id in ids if c_id in self.chunk_ids]
+
+
+async def test_memo_fetches_each_chunk_once():
+    storage = FakeKVStorage({"c1", "c2", "c3"})
+    memo = _TextChunkMemo(storage)
+
+    first, second = await asyncio.gather(memo.get_by_ids(["c1", "c2", "c1"]), memo.get_by_ids(["c2", "c3", "missing"]))
+    assert [chunk["id"] for chunk in first] == ["c1", "c2", "c1"]
+    assert [chunk["id"] for chunk in second] == ["c2", "c3"]
+
+    assert [chunk["id"] for chunk in await memo.get_by_ids(["c3", "c1", "missing"])] == ["c3", "c1"]
+    assert storage.calls == [(["c1", "c2"], TEXT_UNIT_FIELDS), (["c3", "missing"], TEXT_UNIT_FIELDS)]
+
+
+async def test_get_workspace_records_projects_columns():
+    def fake_query(table, workspace, ids, columns):
+        assert columns == ["content", "file_path"]
+        return [{"id": "c1", "content": None, "file_path": "a.md"}]
+
+    with patch.object(db_ops, "query_lightrag_rows_by_ids", side_effect=fake_query):
+        records = await get_workspace_records("lightrag_doc_chunks", "ws", ["c1", "c2"], ["content", "file_path"])
+    assert records == [{"id": "c1", "content": "", "file_path": "a.md"}]
+
+
+async def test_vector_get_by_ids_projects_fields():
+    def fake_query(table, workspace, ids, columns):
+        assert (table, ids, columns) == ("lightrag_vdb_relation", ["r1"], ["content", "source_id"])
+        return [{"id": "r1", "content": "a to b", "source_id": "a"}]
+
+    storage = PGOpsSyncVectorStorage(namespace="relationships", workspace="ws", embedding_func=None)
+    with patch.object(db_ops, "query_lightrag_rows_by_ids", side_effect=fake_query):
+        records = await storage.get_by_ids(["r1"], fields=["content", "src_id"])
+    assert records == [{"id": "r1", "content": "a to b", "source_id": "a", "src_id": "a"}]
@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+import pytest
+
+from aperag.llm.embed.embedding_batching import is_batch_size_error, learned_batch_limits, plan_batches
+from aperag.llm.embed.embedding_service import EmbeddingService
+from aperag.llm.llm_error_types import BatchProcessingError, LLMAPIError, RateLimitError, TextTooLongError
+
+
+@pytest.fixture(autouse=True)
+def _clear_learned_limits():
+    learned_batch_limits.clear()
+    yield
+    learned_batch_limits.clear()
+
+
+def _make_service(max_chunks=8, max_tokens=0):
+    return EmbeddingService(
+        embedding_provider="openai",
+        embedding_model="text-embedding-3-small",
+        embedding_service_url="http://localhost",
+        embedding_service_api_key="key",
+        embedding_max_chunks_in_batch=max_chunks,
+        caching=False,
+        embedding_max_tokens_in_batch=max_tokens,
+    )
+
+
+def test_plan_batches_by_count_and_tokens():
+    assert plan_batches([1] * 5, max_chunks=2, max_tokens=0) == [(0, 2), (2, 4), (4, 5)]
+    assert plan_batches([3, 3, 3, 1], max_chunks=0, max_tokens=6) == [(0, 2), (2, 4)]
+    # An item larger than the budget is sent alone
+    assert plan_batches([1, 10, 1], max_chunks=0, max_tokens=5) == [(0, 1), (1, 2), (2, 3)]
+    assert plan_batches([], max_chunks=2, max_tokens=5) == []
+
+
+def test_is_batch_size_error():
+    assert is_batch_size_error(TextTooLongError())
+    assert is_batch_size_error(LLMAPIError("Embedding API error", details={"original_error": "413 Payload"}))
+    assert not is_batch_size_error(RateLimitError("openai", details={"original_error": "too many requests"}))
+    assert not is_batch_size_error(LLMAPIError("connection refused"))
+
+
+def test_token_budget_splits_long_chunks():
+    service = _make_service(max_tokens=6)
+    sizes = []
+
+    def _fake_embed_batch(batch):
+        sizes.append(len(batch))
+        return [[0.0] for _ in batch]
+
+    with patch.object(service, "_embed_batch", side_effect=_fake_embed_batch):
+        service.embed_documents(["one two three four five"] * 3)
+
+    assert sorted(sizes) == [1, 1, 1]
+
+
+def test_rejected_batch_is_split_and_limit_is_learned():
+    service = _make_service(max_chunks=8)
+    sizes = []
+
+    def _fake_embed_batch(batch):
+        sizes.append(len(batch))
+        if len(batch) > 2:
+            raise TextTooLongError()
+        return [[float(len(text))] for text in batch]
+
+    texts = ["a" * n for n in range(1, 9)]
+    with patch.object(service, "_embed_batch", side_effect=_fake_embed_batch):
+        assert service.embed_documents(texts) == [[float(n)] for n in range(1, 9)]
+    assert sizes == [8, 4, 2, 2, 4, 2, 2]
+    assert learned_batch_limits.get("openai", "text-embedding-3-small")["max_chunks"] == 2
+
+    sizes.clear()
+    with patch.object(service, "_embed_batch", side_effect=_fake_embed_batch):
+        service.embed_documents(texts)
+    assert sizes == [2, 2, 2, 2]
+
+
+async def test_async_rejected_batch_is_split():
+    service = _make_service(max_chunks=4)
+
+    async def _fake_aembed_batch(batch):
+        if len(batch) > 1:
+            raise TextTooLongError()
+        return [[float(len(batch[0]))]]
+
+    with patch.object(service, "_aembed_batch", side_effect=_fake_aembed_batch):
+        assert await service.aembed_documents(["a", "bb", "ccc"]) == [[1.0], [2.0], [3.0]]
+
+
+def test_single_chunk_rejection_is_not_retried():
+    service = _make_service()
+
+    with patch.object(service, "_embed_batch", side_effect=TextTooLongError()) as mock_batch:
+        with pytest.raises(BatchProcessingError):
+            service.embed_documents(["too long"])
+    assert mock_batch.call_count == 1
@@ -0,0 +1,126 @@
+import threading
+from unittest.mock import patch
+
+from aperag.llm.embed.embedding_cache import (
+    MemoryEmbeddingCache,
+    TieredEmbeddingCache,
+    make_embedding_cache_key,
+)
+from aperag.llm.embed.embedding_service import EmbeddingService
+
+
+def _fake_embed_batch(batch):
+    return [[float(len(text)), 1.0] for text in batch]
+
+
+def _make_service(cache):
+    return EmbeddingService(
+        embedding_provider="openai",
+        embedding_model="text-embedding-3-small",
+        embedding_service_url="http://localhost",
+        embedding_service_api_key="key",
+        embedding_max_chunks_in_batch=2,
+        embedding_cache=cache,
+    )
+
+
+def test_cache_key_is_content_addressed():
+    key = make_embedding_cache_key("openai", "m", 1536, "hello")
+    assert key == make_embedding_cache_key("openai", "m", 1536, "hello")
+    assert key != make_embedding_cache_key("openai", "m", 1536, "hello!")
+    assert key != make_embedding_cache_key("openai", "m", 768, "hello")
+    assert key != make_embedding_cache_key("jina_ai", "m", 1536, "hello")
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryEmbeddingCache(max_entries=2)
+    cache.set_many({"a": [1.0], "b": [2.0]})
+    cache.get_many(["a"])
+    cache.set_many({"c": [3.0]})
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_tiered_cache_promotes_hits():
+    l1, l2 = MemoryEmbeddingCache(), MemoryEmbeddingCache()
+    l2.set_many({"k": [0.5]})
+    cache = TieredEmbeddingCache([l1, l2])
+    assert cache.get_many(["k"]) == {"k": [0.5]}
+    assert l1.get_many(["k"]) == {"k": [0.5]}
+
+
+def test_embed_documents_only_sends_misses():
+    cache = TieredEmbeddingCache([MemoryEmbeddingCache()])
+    service = _make_service(cache)
+
+    with patch.object(service, "_embed_batch", side_effect=_fake_embed_batch) as mock_batch:
+        first = service.embed_documents(["aa", "bbb", "aa"])
+        assert first == [[2.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+        # Duplicates within a call are embedded once
+        assert sum(len(call.args[0]) for call in mock_batch.call_args_list) == 2
+
+        mock_batch.reset_mock()
+        second = service.embed_documents(["bbb", "cccc", "aa"])
+        assert second == [[3.0, 1.0], [4.0, 1.0], [2.0, 1.0]]
+        sent = [text for call in mock_batch.call_args_list for text in call.args[0]]
+        assert sent == ["cccc"]
+
+    stats = cache.stats.snapshot()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+    assert stats["hit_bytes"] == len("bbb") + len("aa")
+
+
+def test_caching_disabled_bypasses_cache():
+    cache = TieredEmbeddingCache([MemoryEmbeddingCache()])
+    service = _make_service(cache)
+    service.caching = False
+
+    with patch.object(service, "_embed_batch", side_effect=_fake_embed_batch) as mock_batch:
+        service.embed_documents(["aa"])
+        service.embed_documents(["aa"])
+        assert mock_batch.call_count == 2
+    assert cache.stats.snapshot()["total_requests"] == 0
+
+
+async def test_aembed_documents_only_sends_misses():
+    cache = TieredEmbeddingCache([MemoryEmbeddingCache()])
+    service = _make_service(cache)
+
+    async def _fake_aembed_batch(batch):
+        return _fake_embed_batch(batch)
+
+    with patch.object(service, "_aembed_batch", side_effect=_fake_aembed_batch) as mock_batch:
+        assert await service.aembed_documents(["aa", "bbb", "cccc"]) == [[2.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+        # max_chunks=2 splits the three misses into two concurrent batches
+        assert mock_batch.call_count == 2
+
+        mock_batch.reset_mock()
+        assert await service.aembed_query("bbb") == [3.0, 1.0]
+        mock_batch.assert_not_called()
+
+
+class ThreadRecordingCache(MemoryEmbeddingCache):
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def get_many(self, keys):
+        self.threads.add(threading.get_ident())
+        return super().get_many(keys)
+
+    def set_many(self, items):
+        self.threads.add(threading.get_ident())
+        super().set_many(items)
+
+
+async def test_aembed_documents_cache_calls_run_off_the_event_loop():
+    cache = ThreadRecordingCache()
+    service = _make_service(cache)
+
+    async def _fake_aembed_batch(batch):
+        return _fake_embed_batch(batch)
+
+    with patch.object(service, "_aembed_batch", side_effect=_fake_aembed_batch):
+        assert await service.aembed_documents(["aa", "bbb"]) == [[2.0, 1.0], [3.0, 1.0]]
+    assert len(cache) == 2
+    assert cache.threads and threading.get_ident() not in cache.threads
@@ -0,0 +1,92 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from aperag.config import settings
+from aperag.llm.embed.embedding_coalescer import clear_coalescer_stats, get_coalescer_stats, get_query_coalescer
+from aperag.llm.embed.embedding_service import EmbeddingService
+
+
+def _make_service():
+    return EmbeddingService(
+        embedding_provider="openai",
+        embedding_model="text-embedding-3-small",
+        embedding_service_url="http://localhost",
+        embedding_service_api_key="key",
+        embedding_max_chunks_in_batch=4,
+        caching=False,
+    )
+
+
+@pytest.fixture
+def coalescing():
+    with (
+        patch.object(settings, "embedding_query_coalesce_window_ms", 20),
+        patch.object(settings, "embedding_query_coalesce_max_batch", 0),
+    ):
+        clear_coalescer_stats()
+        yield
+
+
+async def test_concurrent_queries_are_sent_as_one_batch(coalescing):
+    service = _make_service()
+    batches = []
+
+    async def _fake_aembed_batch(batch):
+        batches.append(list(batch))
+        return [[float(len(text))] for text in batch]
+
+    with patch.object(EmbeddingService, "_aembed_batch", side_effect=_fake_aembed_batch):
+        results = await asyncio.gather(*(service.aembed_query("q" * n) for n in range(1, 4)))
+
+    assert results == [[1.0], [2.0], [3.0]]
+    assert batches == [["q", "qq", "qqq"]]
+    stats = get_coalescer_stats()
+    assert stats["batch_size"]["count"] == 1
+    assert stats["latency_ms"]["count"] == 3
+
+
+async def test_batch_is_flushed_at_max_size(coalescing):
+    service = _make_service()
+    batches = []
+
+    async def _fake_aembed_batch(batch):
+        batches.append(list(batch))
+        return [[0.0] for _ in batch]
+
+    with patch.object(EmbeddingService, "_aembed_batch", side_effect=_fake_aembed_batch):
+        await asyncio.gather(*(service.aembed_query(f"query {i}") for i in range(6)))
+
+    # max batch defaults to embedding_max_chunks_in_batch
+    assert [len(batch) for batch in batches] == [4, 2]
+
+
+async def test_batch_failure_is_propagated_to_every_caller(coalescing):
+    service = _make_service()
+
+    async def _failing_aembed_batch(batch):
+        raise RuntimeError("provider down")
+
+    with patch.object(EmbeddingService, "_aembed_batch", side_effect=_failing_aembed_batch):
+        results = await asyncio.gather(service.aembed_query("a"), service.aembed_query("b"), return_exceptions=True)
+
+    assert all(isinstance(result, Exception) for result in results)
+
+
+async def test_cancelled_batch_cancels_every_caller(coalescing):
+    service = _make_service()
+    started = asyncio.Event()
+
+    async def _hanging_aembed_batch(batch):
+        started.set()
+        await asyncio.Event().wait()
+
+    with patch.object(EmbeddingService, "_aembed_batch", side_effect=_hanging_aembed_batch):
+        queries = asyncio.gather(service.aembed_query("a"), service.aembed_query("b"), return_exceptions=True)
+        await started.wait()
+        for task in list(get_query_coalescer(service, 20, 4)._tasks):
+            task.cancel()
+        results = await asyncio.wait_for(queries, timeout=1)
+
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+import pytest
+
+from aperag.docparser.base import TextPart
+from aperag.llm.embed.embedding_utils import create_embeddings_and_store
+from aperag.vectorstore.connector import VectorStoreConnectorAdaptor
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return [[float(len(text)), 1.0, 0.0, 0.0] for text in texts]
+
+
+def _make_adaptor():
+    return VectorStoreConnectorAdaptor("qdrant", {"url": ":memory:", "collection": "test", "vector_size": 4})
+
+
+def _make_parts(count):
+    return [
+        TextPart(content=f"chunk number {i}", metadata={"name": "doc.md", "titles": ["Title"]}) for i in range(count)
+    ]
+
+
+def test_streams_chunks_in_bounded_batches():
+    adaptor = _make_adaptor()
+    embeddings = FakeEmbeddings()
+    connector = adaptor.connector
+
+    with patch.object(connector, "upsert_nodes", wraps=connector.upsert_nodes) as mock_upsert:
+        ids = create_embeddings_and_store(
+            parts=_make_parts(7),
+            vector_store_adaptor=adaptor,
+            embedding_model=embeddings,
+            chunk_size=10,
+            chunk_overlap=0,
+            batch_size=3,
+            max_inflight_writes=2,
+        )
+
+    assert len(ids) == len(set(ids)) == sum(embeddings.batches)
+    assert all(size <= 3 for size in embeddings.batches)
+    assert [call.kwargs["wait"] for call in mock_upsert.call_args_list][-1] is True
+    assert connector.client.count(collection_name="test").count == len(ids)
+
+
+def test_ids_keep_chunk_order():
+    adaptor = _make_adaptor()
+    ids = create_embeddings_and_store(
+        parts=_make_parts(5),
+        vector_store_adaptor=adaptor,
+        embedding_model=FakeEmbeddings(),
+        chunk_size=10,
+        chunk_overlap=0,
+        batch_size=2,
+    )
+
+    points = adaptor.connector.client.retrieve(collection_name="test", ids=ids, with_payload=True)
+    texts = {str(point.id): point.payload["_node_content"] for point in points}
+    first_chunks = [next(i for i in range(5) if f"chunk number {i}" in texts[point_id]) for point_id in ids]
+    assert len(ids) > 1
+    assert first_chunks == sorted(first_chunks)
+
+
+def test_failed_document_leaves_nothing_in_the_store():
+    class FailingEmbeddings(FakeEmbeddings):
+        def embed_documents(self, texts):
+            if len(self.batches) == 1:
+                raise RuntimeError("embedding service unavailable")
+            return super().embed_documents(texts)
+
+    adaptor = _make_adaptor()
+    connector = adaptor.connector
+    with (
+        patch.object(connector, "upsert_nodes", wraps=connector.upsert_nodes) as mock_upsert,
+        pytest.raises(RuntimeError),
+    ):
+        create_embeddings_and_store(
+            parts=_make_parts(7),
+            vector_store_adaptor=adaptor,
+            embedding_model=FailingEmbeddings(),
+            chunk_size=10,
+            chunk_overlap=0,
+            batch_size=2,
+            max_inflight_writes=2,
+        )
+
+    # The first batch was written before the second one failed to embed
+    assert mock_upsert.call_count == 1
+    assert connector.client.count(collection_name="test").count == 0
@@ -0,0 +1,106 @@
+"""
+Unit tests for passing parsed documents to the index tasks by reference.
+"""
+
+import pytest
+
+from aperag.docparser.base import AssetBinPart, MarkdownPart, TitlePart
+from aperag.objectstore.local import Local, LocalConfig
+from aperag.tasks.models import LocalDocumentInfo, ParsedDocumentData
+from aperag.tasks.parsed_store import (
+    LazyParsedDocumentData,
+    encode_parsed_document,
+    load_parsed_document,
+    save_parsed_document,
+)
+
+
+class CountingStore(Local):
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.puts = 0
+        self.range_reads = []
+
+    def put(self, path, data):
+        self.puts += 1
+        return super().put(path, data)
+
+    def stream_range(self, path, start, end=None):
+        self.range_reads.append((start, end))
+        return super().stream_range(path, start, end)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CountingStore(LocalConfig(root_dir=str(tmp_path)))
+
+
+def _parsed_data(content="# Title\n\nBody"):
+    return ParsedDocumentData(
+        document_id="doc1",
+        collection_id="col1",
+        content=content,
+        doc_parts=[
+            TitlePart(content="# Title", level=1, metadata={"md_source_map": [0, 1]}),
+            MarkdownPart(content="Body", markdown="Body"),
+            AssetBinPart(asset_id="img1", data=b"\x89PNG\x00" * 100, mime_type="image/png"),
+        ],
+        file_path="/tmp/doc1.pdf",
+        local_doc_info=LocalDocumentInfo(path="/tmp/doc1.pdf", is_temp=True),
+    )
+
+
+def test_reference_is_small_and_the_object_is_per_document(store):
+    parsed_data = _parsed_data(content="x" * 100000)
+    ref = save_parsed_document(parsed_data, "user-a/col1/doc1", store)
+
+    assert ref["parsed_ref"] == "user-a/col1/doc1/parsed.bin"
+    assert len(str(ref)) < 500
+    assert ref["size"] < 100000
+    # Saving the same output again, e.g. from a retried parse, keeps the object
+    assert save_parsed_document(parsed_data, "user-a/col1/doc1", store) == ref
+    assert store.puts == 1
+
+    # A re-parse replaces the object, readers of the former reference fail instead of reading it
+    new_ref = save_parsed_document(_parsed_data(content="new"), "user-a/col1/doc1", store)
+    assert new_ref["parsed_ref"] == ref["parsed_ref"]
+    assert store.puts == 2
+    assert load_parsed_document(new_ref, store).content == "new"
+    with pytest.raises(ValueError):
+        load_parsed_document(ref, store).content
+
+
+def test_sections_are_loaded_lazily(store):
+    ref = save_parsed_document(_parsed_data(), "user-a/col1/doc1", store)
+    store.range_reads.clear()
+
+    parsed_data = load_parsed_document(ref, store)
+    assert isinstance(parsed_data, LazyParsedDocumentData)
+    assert parsed_data.local_doc_info == LocalDocumentInfo(path="/tmp/doc1.pdf", is_temp=True)
+    assert store.range_reads == []
+
+    # header then content, the parts and blobs are not read for content-only indexes
+    assert parsed_data.content == "# Title\n\nBody"
+    assert parsed_data.content == "# Title\n\nBody"
+    assert len(store.range_reads) == 2
+
+    title, markdown, asset = parsed_data.doc_parts
+    assert (title.content, title.level, title.metadata) == ("# Title", 1, {"md_source_map": [0, 1]})
+    assert markdown.markdown == "Body"
+    assert asset.data == b"\x89PNG\x00" * 100
+    assert asset.mime_type == "image/png"
+    assert len(store.range_reads) == 4
+
+
+def test_inline_payloads_are_still_accepted():
+    inline = _parsed_data().to_dict()
+    parsed_data = load_parsed_document(inline)
+    assert type(parsed_data) is ParsedDocumentData
+    assert parsed_data.content == "# Title\n\nBody"
+    assert parsed_data.doc_parts[1].markdown == "Body"
+
+
+def test_encoding_is_deterministic():
+    encoded, digest = encode_parsed_document(_parsed_data())
+    assert encode_parsed_document(_parsed_data()) == (encoded, digest)
+    assert encode_parsed_document(_parsed_data(content="other"))[1] != digest
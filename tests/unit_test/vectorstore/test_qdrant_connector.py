@@ -0,0 +1,107 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from llama_index.core.schema import TextNode
+from qdrant_client.models import SearchParams
+
+from aperag.config import settings
+from aperag.query.query import QueryResult, QueryWithEmbedding
+from aperag.vectorstore.qdrant_connector import QdrantVectorStoreConnector, get_qdrant_client
+
+
+def _make_memory_connector():
+    connector = QdrantVectorStoreConnector({"url": ":memory:", "collection": "test", "vector_size": 4})
+    nodes = [
+        TextNode(
+            id_=f"00000000-0000-0000-0000-00000000000{i}",
+            text=f"text {i}",
+            metadata={"source": "doc.md"},
+            embedding=[1.0, float(i), 0.0, 0.0],
+        )
+        for i in range(1, 4)
+    ]
+    connector.upsert_nodes(nodes)
+    return connector
+
+
+def test_sync_clients_are_shared_by_connection_context():
+    ctx = {"url": "http://qdrant.invalid", "port": 6333}
+    assert get_qdrant_client(ctx) is get_qdrant_client(dict(ctx, collection="other"))
+    assert get_qdrant_client(ctx) is not get_qdrant_client(dict(ctx, prefer_grpc=True))
+    assert get_qdrant_client({"url": ":memory:"}) is not get_qdrant_client({"url": ":memory:"})
+
+
+def test_store_is_created_lazily():
+    connector = QdrantVectorStoreConnector({"url": "http://qdrant.invalid", "collection": "test"})
+    assert connector._store is None
+    request = connector._build_query_request(
+        QueryWithEmbedding(query="q", top_k=3, embedding=[0.1] * 4), search_params={"hnsw_ef": 128}
+    )
+    assert request.params == SearchParams(hnsw_ef=128)
+
+
+async def test_search_and_batch_search():
+    connector = _make_memory_connector()
+    query = QueryWithEmbedding(query="q", top_k=2, embedding=[1.0, 3.0, 0.0, 0.0])
+
+    result = await connector.asearch(query, score_threshold=0.0)
+    assert [doc.text for doc in result.results] == ["text 3", "text 2"]
+
+    results = await connector.asearch_batch([(query, {"score_threshold": 0.0}), (query, {"score_threshold": 0.999})])
+    assert [len(r.results) for r in results] == [2, 1]
+
+
+async def test_concurrent_searches_are_batched():
+    connector = QdrantVectorStoreConnector({"url": "http://qdrant.invalid", "collection": "batched"})
+    queries = [QueryWithEmbedding(query=f"q{i}", top_k=1, embedding=[0.1] * 4) for i in range(3)]
+
+    async def fake_batch(searches):
+        return [QueryResult(query=query.query, results=[]) for query, _ in searches]
+
+    with (
+        patch.object(settings, "vector_search_batch_window_ms", 5),
+        patch.object(QdrantVectorStoreConnector, "asearch_batch", side_effect=fake_batch) as mock_batch,
+    ):
+        results = await asyncio.gather(*[connector.asearch(query) for query in queries])
+
+    assert [result.query for result in results] == ["q0", "q1", "q2"]
+    mock_batch.assert_called_once()
+
+
+def test_search_projects_vectors_and_payload():
+    connector = _make_memory_connector()
+    query = QueryWithEmbedding(query="q", top_k=1, embedding=[1.0, 3.0, 0.0, 0.0])
+
+    doc = connector.search(query, score_threshold=0.0).results[0]
+    assert doc.text == "text 3"
+    assert doc.embedding is None
+    assert "embedding" not in doc.model_dump()
+
+    doc = connector.search(query, score_threshold=0.0, with_vectors=True).results[0]
+    assert doc.embedding is not None and len(doc.embedding) == 4
+
+    request = connector._build_query_request(query, payload_fields=["indexer"])
+    assert request.with_vector is False
+    assert request.with_payload == ["_node_content", "text", "metadata", "indexer"]
+
+
+def test_upserted_points_match_store_add_and_the_collection_is_created_once():
+    connector = QdrantVectorStoreConnector({"url": ":memory:", "collection": "test", "vector_size": 4})
+    nodes = [
+        TextNode(id_=f"00000000-0000-0000-0000-00000000000{i}", text=f"text {i}", embedding=[1.0, float(i), 0.0, 0.0])
+        for i in range(1, 9)
+    ]
+    create_collection = connector.client.create_collection
+    with patch.object(connector.client, "create_collection", side_effect=create_collection) as mock_create:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            ids = list(pool.map(lambda node: connector.upsert_nodes([node], wait=True), nodes[:4]))
+    assert mock_create.call_count == 1
+    assert ids == [[node.node_id] for node in nodes[:4]]
+
+    # The llama-index store writes the same points into the collection created here
+    connector.store.add(nodes[4:])
+    points, _ = connector.client.scroll("test", limit=10, with_payload=True, with_vectors=True)
+    assert len(points) == 8
+    assert {tuple(point.payload) for point in points} == {tuple(points[0].payload)}
+    assert all(len(point.vector) == 4 for point in points)